@@ -0,0 +1,252 @@
+"""
+Benchmark of the CAN stack which does not require any hardware. CAN interface reads a python-can virtual bus or a
+vcan SocketCAN interface, the benchmark sends the frames by another CAN interface on the same bus.
+
+Each case sends --payload-size byte frames with a standard or an extended ID for --duration seconds. By default, the
+frames are paced by CanLoadGenerator to the rate which loads a real bus of the case bitrate by --load, as neither
+virtual bus nor vcan emulates the bitrate. With --fd the frames are sent as CAN FD frames with bit rate switch to
+--data-bitrate, so the paced rate and the payload bytes per bus second show the gain of CAN FD over classic frames.
+With --unpaced the frames are sent as fast as possible. The receiving side has a callback registered on the ID of the
+frames and --subscribers callbacks on other IDs, the main thread takes the frames by get_messages(). Reported:
+- receive throughput in frames and payload bytes per second;
+- payload bytes per bus second: the payload a real bus of the case bitrates carries at 100% load;
+- callback latency: time from the frame timestamp set by the bus until the callback is called;
+- queue growth: maximum depth of the incoming data queue sampled by the consumer;
+- CPU time per 10k received frames. It is measured for the whole process, so it includes the sender.
+
+Run from the project root:
+    python -m benchmarks.can_benchmark --output can_benchmark.json
+    python -m benchmarks.can_benchmark --baseline can_benchmark.json
+    python -m benchmarks.can_benchmark --interface socketcan --channel vcan0
+    python -m benchmarks.can_benchmark --fd --payload-size 64 --interface socketcan --channel vcan0
+The vcan interface for CAN FD should have MTU 72: "ip link set vcan0 mtu 72".
+The second command exits with code 1 if any case is slower than the baseline by more than --tolerance.
+"""
+import argparse
+import itertools
+import platform
+import sys
+import threading
+import time
+
+from benchmarks.common.benchmark_helper import BenchmarkHelper
+from comm_support_lib.comm_interfaces.can_load_generator import CanLoadGenerator
+from comm_support_lib.comm_interfaces.can_socket import CAN
+from comm_support_lib.common.can_frame import CanFrame
+from comm_support_lib.common.can_interface_type_consts import CanInterfaceTypeConsts
+from comm_support_lib.common.overflow_policy_consts import OverflowPolicyConsts
+
+# the same bitrates as TestCan.__TEST_CASE_10_PARAM_LIST
+BITRATES = [20000, 50000, 100000, 125000, 250000, 500000, 1000000]
+ID_TYPES = ["standard", "extended"]
+# the same IDs as CommonConst.CAN_TEST_ID and CommonConst.CAN_TEST_ID_EXTENDED
+_FRAME_IDS = {"standard": 0x123, "extended": 0x1234567}
+# timeout of recv() in the polling thread of the driver
+_POLLING_TIMEOUT = 0.05
+# frames taken by one get_messages() call
+_BATCH_SIZE = 1000
+# metric -> True if the higher value is better
+_COMPARED_METRICS = {'frames_per_s': True, 'callback_latency_p99_ms': False, 'cpu_s_per_10k_frames': False}
+
+
+class CallbackProbe:
+    """
+    Callback registered on an ID of the benchmark frames, records the latency of each call
+    """
+
+    def __init__(self):
+        self.latencies = []
+
+    def __call__(self, frame):
+        self.latencies.append(time.time() - frame.timestamp)
+
+
+def send_frames(sender: CAN, frame: tuple, rate: float or None, duration: float, result: dict):
+    """
+    Send the frames at the rate or as fast as possible if the rate is None
+    """
+    if rate is not None:
+        result.update(CanLoadGenerator(sender).run(frame[0], frame[1], rate, duration=duration,
+                                                   is_extended_id=frame[2]))
+        return
+    start_time = time.monotonic()
+    sent = 0
+    errors = 0
+    while time.monotonic() - start_time < duration:
+        burst = sender.send_burst(itertools.repeat(frame, _BATCH_SIZE))
+        sent += burst
+        errors += _BATCH_SIZE - burst
+    result.update({'sent': sent, 'send_errors': errors})
+
+
+def receive_frames(receiver: CAN, sender_thread: threading.Thread, sender_result: dict, receive_timeout: float):
+    """
+    Take the frames from the incoming data queue until all the sent frames are received or the timeout expires
+        Returns:
+            result (dict): {'received', 'elapsed', 'queue_depth_max'}
+    """
+    received = 0
+    queue_depth_max = 0
+    start_time = time.monotonic()
+    last_receive_time = None
+    while True:
+        queue_depth_max = max(queue_depth_max, receiver.get_queue_statistics()['depth'])
+        batch = receiver.get_messages(_BATCH_SIZE, _POLLING_TIMEOUT)
+        now = time.monotonic()
+        if len(batch):
+            received += len(batch)
+            last_receive_time = now
+        if sender_thread.is_alive():
+            continue
+        if received >= sender_result['sent']:
+            break
+        if not len(batch) and now - (last_receive_time or start_time) > receive_timeout:
+            break
+    return {'received': received,
+            'elapsed': (last_receive_time or time.monotonic()) - start_time,
+            'queue_depth_max': queue_depth_max}
+
+
+def run_case(receiver: CAN, sender: CAN, probes: dict, id_type: str, bitrate: int, args) -> dict:
+    is_extended_id = id_type == "extended"
+    payload = bytes(index % 256 for index in range(args.payload_size))
+    frame = (_FRAME_IDS[id_type], payload, is_extended_id)
+    rate = None if args.unpaced else \
+        CanLoadGenerator.get_max_frame_rate(bitrate, len(payload), is_extended_id, args.fd, args.data_bitrate) * \
+        args.load
+
+    def run():
+        sender_result = {}
+        sender_thread = threading.Thread(target=send_frames, args=(sender, frame, rate, args.duration, sender_result),
+                                         daemon=True)
+        sender_thread.start()
+        result = receive_frames(receiver, sender_thread, sender_result, args.receive_timeout)
+        sender_thread.join()
+        result.update(sent=sender_result['sent'], send_errors=sender_result['send_errors'])
+        return result
+
+    probe = probes[id_type]
+    receiver.flush_incoming_data()
+    probe.latencies = []
+    statistics_before = receiver.get_statistics()
+    measurement = BenchmarkHelper.measure(run)
+    statistics_after = receiver.get_statistics()
+    # let the callback threads finish the pending frames
+    time.sleep(args.receive_timeout / 10)
+    result = measurement['result']
+    latencies = [latency * 1000 for latency in probe.latencies]
+    percentiles = BenchmarkHelper.get_percentiles(latencies)
+
+    frames_per_s = result['received'] / result['elapsed'] if result['elapsed'] > 0 else None
+    # the names of the classic 8-byte cases are kept to compare them with the earlier reports
+    case = {'name': "{}/{}/{}{}{}{}".format(args.interface, id_type, bitrate,
+                                           "/fd{}".format(args.data_bitrate) if args.fd else "",
+                                           "/{}B".format(len(payload)) if args.fd or len(payload) != 8 else "",
+                                           "/unpaced" if args.unpaced else ""),
+            'interface': args.interface,
+            'id_type': id_type,
+            'bitrate': bitrate,
+            'fd': args.fd,
+            'data_bitrate': args.data_bitrate if args.fd else None,
+            'payload_size': len(payload),
+            'target_rate': rate,
+            'frames_sent': result['sent'],
+            'frames_received': result['received'],
+            'send_errors': result['send_errors'],
+            'elapsed_s': result['elapsed'],
+            'frames_per_s': frames_per_s,
+            'payload_bytes_per_s': frames_per_s * len(payload) if frames_per_s is not None else None,
+            'payload_bytes_per_bus_s': CanLoadGenerator.get_payload_rate(bitrate, len(payload), is_extended_id,
+                                                                         args.fd, args.data_bitrate),
+            'callbacks_called': len(latencies),
+            'callback_latency_p50_ms': percentiles['p50'],
+            'callback_latency_p90_ms': percentiles['p90'],
+            'callback_latency_p99_ms': percentiles['p99'],
+            'callback_latency_max_ms': max(latencies) if latencies else None,
+            'queue_depth_max': result['queue_depth_max'],
+            'lost_messages': statistics_after['lost_messages'] - statistics_before['lost_messages'],
+            'cpu_s': measurement['cpu_time'],
+            'cpu_s_per_10k_frames': measurement['cpu_time'] / result['received'] * 10000
+            if result['received'] else None}
+    print("{name}: {frames_per_s} frames/s, callback p99 {callback_latency_p99_ms} ms, "
+          "queue max {queue_depth_max}".format(**case), file=sys.stderr)
+    return case
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="CAN stack benchmark on a virtual bus")
+    parser.add_argument("--interface", default=CanInterfaceTypeConsts.VIRTUAL,
+                        choices=[CanInterfaceTypeConsts.VIRTUAL, CanInterfaceTypeConsts.SOCKETCAN])
+    parser.add_argument("--channel", default="can_benchmark",
+                        help="name of the virtual bus or of the SocketCAN interface, e.g. vcan0")
+    parser.add_argument("--bitrates", nargs="+", type=int, default=BITRATES)
+    parser.add_argument("--id-types", nargs="+", choices=ID_TYPES, default=ID_TYPES)
+    parser.add_argument("--payload-size", type=int, default=8,
+                        help="payload size of the frames in bytes, up to 64 with --fd")
+    parser.add_argument("--fd", action="store_true", help="send CAN FD frames with bit rate switch")
+    parser.add_argument("--data-bitrate", type=int, default=2000000, help="data phase bitrate of CAN FD frames")
+    parser.add_argument("--duration", type=float, default=1.0, help="sending time of each case in seconds")
+    parser.add_argument("--load", type=float, default=1.0, help="bus load the paced frame rate corresponds to")
+    parser.add_argument("--unpaced", action="store_true", help="send the frames as fast as possible")
+    parser.add_argument("--subscribers", type=int, default=10,
+                        help="number of callbacks registered on other IDs, to check the cost of dispatch")
+    parser.add_argument("--receive-timeout", type=float, default=2.0,
+                        help="time to wait for the frames which have not been received yet")
+    parser.add_argument("--output", help="JSON report file, stdout by default")
+    parser.add_argument("--baseline", help="JSON report to compare the results with")
+    parser.add_argument("--tolerance", type=float, default=0.3, help="allowed relative degradation")
+    args = parser.parse_args(argv)
+    max_payload = CanFrame.MAX_FD_PAYLOAD if args.fd else CanFrame.MAX_PAYLOAD
+    if not 0 <= args.payload_size <= max_payload:
+        parser.error("--payload-size should be from 0 to {}".format(max_payload))
+    if args.fd:
+        # the sent payload is padded to the length which could be encoded by DLC
+        args.payload_size = CanFrame.get_fd_payload_length(args.payload_size)
+    return args
+
+
+def main(argv) -> int:
+    args = parse_args(argv)
+    receiver = CAN(args.bitrates[0], args.channel, _POLLING_TIMEOUT, queue_policy=OverflowPolicyConsts.DROP_OLDEST,
+                   interface_type=args.interface, fd=args.fd, data_bitrate=args.data_bitrate)
+    sender = CAN(args.bitrates[0], args.channel, _POLLING_TIMEOUT, interface_type=args.interface, fd=args.fd,
+                 data_bitrate=args.data_bitrate)
+    probes = {id_type: CallbackProbe() for id_type in ID_TYPES}
+    for id_type, probe in probes.items():
+        receiver.register_message_callback(probe, policy=OverflowPolicyConsts.BLOCK, can_id=_FRAME_IDS[id_type])
+    for index in range(args.subscribers):
+        def callback(frame):
+            pass
+        callback.__name__ = "subscriber_{}".format(index)
+        receiver.register_message_callback(callback, can_id=0x700 + index)
+
+    def run_config(config):
+        return [run_case(receiver, sender, probes, id_type, config['baud_rate'], args) for id_type in args.id_types]
+
+    cases = []
+    results = receiver.sweep([{'baud_rate': bitrate} for bitrate in args.bitrates], run_config)
+    for bitrate, result in zip(args.bitrates, results):
+        if result is None:
+            print("Failed to apply bitrate {}".format(bitrate), file=sys.stderr)
+            continue
+        cases += result
+    receiver.clear_callback_list()
+    report = {'benchmark': "can",
+              'python': platform.python_version(),
+              'platform': platform.platform(),
+              'parameters': vars(args),
+              'cases': cases}
+    BenchmarkHelper.write_report(report, args.output)
+
+    if args.baseline is not None:
+        regressions = BenchmarkHelper.compare_with_baseline(report, args.baseline, _COMPARED_METRICS,
+                                                            args.tolerance)
+        for regression in regressions:
+            print("Regression: " + regression, file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
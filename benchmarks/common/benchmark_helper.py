@@ -0,0 +1,112 @@
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+
+class BenchmarkHelper:
+    """
+    Measurement and reporting helpers shared by the benchmark scripts
+    """
+
+    @staticmethod
+    def get_percentiles(samples: list, percentiles=(50, 90, 99)) -> dict:
+        """
+        Calculate percentiles of the samples using the nearest rank method
+            Parameters:
+                samples (list): measured values
+                percentiles (Iterable): percentiles to calculate
+            Returns:
+                result (dict): {'p50': value, ...}, values are None if there are no samples
+        """
+        ordered = sorted(samples)
+        result = {}
+        for percentile in percentiles:
+            if not ordered:
+                result["p{}".format(percentile)] = None
+                continue
+            rank = max(0, min(len(ordered) - 1, int(round(percentile / 100 * len(ordered))) - 1))
+            result["p{}".format(percentile)] = ordered[rank]
+        return result
+
+    @staticmethod
+    def measure(fn, trace_allocations: bool = False) -> dict:
+        """
+        Execute the function and measure wall clock time, CPU time of the process and optionally memory allocated
+        by Python code.
+            Parameters:
+                fn (Callable): function to execute, its result is returned in the 'result' key
+                trace_allocations (bool): trace allocations with tracemalloc. Tracing slows the execution down, so the
+                                          timings of such a run should not be used
+            Returns:
+                measurement (dict): {'result', 'wall_time', 'cpu_time', 'alloc_peak_bytes', 'alloc_retained_bytes'}.
+                                    Allocation values are None if tracing is disabled
+        """
+        if trace_allocations:
+            tracemalloc.start()
+            start_traced, _ = tracemalloc.get_traced_memory()
+        start_wall = time.perf_counter()
+        start_cpu = time.process_time()
+        try:
+            result = fn()
+        finally:
+            cpu_time = time.process_time() - start_cpu
+            wall_time = time.perf_counter() - start_wall
+            if trace_allocations:
+                traced, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+        return {'result': result,
+                'wall_time': wall_time,
+                'cpu_time': cpu_time,
+                'alloc_peak_bytes': peak - start_traced if trace_allocations else None,
+                'alloc_retained_bytes': traced - start_traced if trace_allocations else None}
+
+    @staticmethod
+    def write_report(report: dict, path: str = None) -> None:
+        """
+        Write the report as JSON
+            Parameters:
+                report (dict): benchmark report
+                path (str): output file, None means stdout
+        """
+        if path is None:
+            json.dump(report, sys.stdout, indent=2)
+            print()
+            return
+        with open(path, "w") as file:
+            json.dump(report, file, indent=2)
+
+    @staticmethod
+    def compare_with_baseline(report: dict, baseline_path: str, metrics: dict, tolerance: float) -> list:
+        """
+        Compare the cases of the report with the same cases of the baseline report
+            Parameters:
+                report (dict): benchmark report with the 'cases' list, each case has the unique 'name' key
+                baseline_path (str): path to the report saved before
+                metrics (dict): metric name -> True if the higher value is better, False otherwise
+                tolerance (float): allowed relative degradation, e.g. 0.25 means 25 %
+            Returns:
+                regressions (list): descriptions of the metrics degraded more than the tolerance allows
+        """
+        if not os.path.isfile(baseline_path):
+            print("Baseline file is not found: {}".format(baseline_path), file=sys.stderr)
+            return []
+        with open(baseline_path) as file:
+            baseline_cases = {case['name']: case for case in json.load(file).get('cases', [])}
+
+        regressions = []
+        for case in report['cases']:
+            baseline_case = baseline_cases.get(case['name'])
+            if baseline_case is None:
+                continue
+            for metric, higher_is_better in metrics.items():
+                value = case.get(metric)
+                baseline_value = baseline_case.get(metric)
+                if value is None or not baseline_value:
+                    continue
+                change = (value - baseline_value) / baseline_value
+                if (-change if higher_is_better else change) > tolerance:
+                    regressions.append("{}: {} {:.6g} -> {:.6g} ({:+.1%})".format(case['name'], metric,
+                                                                               baseline_value, value, change))
+        return regressions
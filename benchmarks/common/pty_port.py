@@ -0,0 +1,54 @@
+import os
+import select
+import time
+
+
+class PtyPort:
+    """
+    Pseudo terminal pair. The driver opens the slave side by its name, the benchmark works with the master side.
+    """
+
+    def __init__(self):
+        self.master_fd, self.__slave_fd = os.openpty()
+        self.port = os.ttyname(self.__slave_fd)
+        os.set_blocking(self.master_fd, False)
+
+    def close(self):
+        os.close(self.master_fd)
+        os.close(self.__slave_fd)
+
+    def write(self, data: bytes, deadline: float) -> bool:
+        """
+        Write all the data into the master side
+            Returns:
+                result (bool): False if the deadline expired before the data was written
+        """
+        view = memoryview(data)
+        while view:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                return False
+            if not select.select([], [self.master_fd], [], timeout)[1]:
+                continue
+            try:
+                view = view[os.write(self.master_fd, view):]
+            except BlockingIOError:
+                continue
+        return True
+
+    def read(self, timeout: float) -> bytes:
+        """
+        Read the data available on the master side
+            Returns:
+                data (bytes): read data, empty if timeout expired
+        """
+        if not select.select([self.master_fd], [], [], timeout)[0]:
+            return b""
+        try:
+            return os.read(self.master_fd, 65536)
+        except (BlockingIOError, InterruptedError):
+            return b""
+
+    def drain(self):
+        while self.read(0.01):
+            pass
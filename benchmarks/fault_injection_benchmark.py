@@ -0,0 +1,160 @@
+"""
+Benchmark of DebugCLI parsing on a slow or noisy link. The console is emulated by a pseudo terminal, the incoming data
+passes through FaultInjectingDriver, which applies the faults of each scenario in turn.
+
+Each iteration the benchmark writes several lines of command output followed by the shell prompt without the end of
+line, as the board does, and measures:
+- line latency: time until the first line is returned by DebugCLI.get_message();
+- prompt latency: time until the prompt is matched by CliRegexConsts.REGEX_LOGGED_IN, as CliCommonUtil waits for it.
+Lines which are lost or damaged and prompts which are not detected within --iteration-timeout are counted.
+
+The faults are seeded, so the same chunks read from the port are damaged in the same way on each run. The chunking of
+the port itself depends on the timing of the host.
+
+Run from the project root:
+    python -m benchmarks.fault_injection_benchmark --output fault_injection_benchmark.json
+    python -m benchmarks.fault_injection_benchmark --baseline fault_injection_benchmark.json
+"""
+import argparse
+import platform
+import sys
+import time
+
+from benchmarks.common.benchmark_helper import BenchmarkHelper
+from benchmarks.common.pty_port import PtyPort
+from comm_support_lib.comm_interfaces.debug_cli import DebugCLI
+from comm_support_lib.common.fault_scenario import FaultScenario
+from comm_support_lib.common.serial_read_mode_consts import SerialReadModeConsts
+from comm_support_lib.hw_drivers.fault_injecting_driver import FaultInjectingDriver
+from comm_support_lib.hw_drivers.serial_driver import SerialDriver
+from utils.common.cli_regex_consts import CliRegexConsts
+
+SCENARIOS = [FaultScenario("no_faults"),
+             FaultScenario("latency_20ms", seed=1, latency=0.02),
+             FaultScenario("jitter_50ms", seed=2, jitter=0.05),
+             FaultScenario("split_chunks", seed=3, split_probability=1.0, max_split_parts=8),
+             FaultScenario("dropped_bytes", seed=4, drop_probability=0.0005),
+             FaultScenario("bursts", seed=5, burst_probability=0.2, burst_duration=0.2),
+             FaultScenario("noisy_slow_link", seed=6, latency=0.01, jitter=0.02, split_probability=0.5,
+                           drop_probability=0.0002, burst_probability=0.05, burst_duration=0.1)]
+PROMPT = "root@welbilt-common-ui43:~# "
+# metric -> True if the higher value is better
+_COMPARED_METRICS = {'line_latency_p99_ms': False, 'prompt_latency_p99_ms': False}
+
+
+def run_iteration(debug_cli: DebugCLI, pty: PtyPort, iteration: int, args) -> dict:
+    lines = ["line {} {}".format(index, "x" * args.line_length) for index in range(args.lines)]
+    expected_lines = set(lines)
+    debug_cli.flush_incoming_data()
+
+    start_time = time.monotonic()
+    deadline = start_time + args.iteration_timeout
+    pty.write(("\r\n".join(lines) + "\r\n" + PROMPT).encode(), deadline)
+    line_latency = None
+    prompt_latency = None
+    received_lines = 0
+    while prompt_latency is None:
+        timeout = deadline - time.monotonic()
+        if timeout <= 0:
+            break
+        message = debug_cli.get_message(timeout)
+        if message is None:
+            continue
+        now = time.monotonic()
+        if line_latency is None:
+            line_latency = now - start_time
+        if message in expected_lines:
+            received_lines += 1
+        if CliRegexConsts.REGEX_LOGGED_IN.search(message) and message.endswith(PROMPT):
+            prompt_latency = now - start_time
+    # let the delayed data and the idle notification reach the parser before the next iteration
+    time.sleep(args.iteration_gap)
+    return {'line_latency': line_latency, 'prompt_latency': prompt_latency, 'received_lines': received_lines}
+
+
+def run_scenario(debug_cli: DebugCLI, bus: FaultInjectingDriver, pty: PtyPort, scenario: FaultScenario, args) -> dict:
+    bus.set_scenario(FaultScenario(**{**scenario.to_dict(), 'seed': scenario.seed + args.seed}))
+    statistics_before = bus.get_fault_statistics()
+    results = [run_iteration(debug_cli, pty, iteration, args) for iteration in range(args.iterations)]
+    statistics_after = bus.get_fault_statistics()
+
+    line_latencies = [result['line_latency'] * 1000 for result in results if result['line_latency'] is not None]
+    prompt_latencies = [result['prompt_latency'] * 1000 for result in results if result['prompt_latency'] is not None]
+    line_percentiles = BenchmarkHelper.get_percentiles(line_latencies)
+    prompt_percentiles = BenchmarkHelper.get_percentiles(prompt_latencies)
+    lines_expected = args.iterations * args.lines
+    lines_received = sum(result['received_lines'] for result in results)
+    case = {'name': scenario.name,
+            'scenario': bus.get_scenario().to_dict(),
+            'iterations': args.iterations,
+            'line_latency_p50_ms': line_percentiles['p50'],
+            'line_latency_p90_ms': line_percentiles['p90'],
+            'line_latency_p99_ms': line_percentiles['p99'],
+            'prompt_latency_p50_ms': prompt_percentiles['p50'],
+            'prompt_latency_p90_ms': prompt_percentiles['p90'],
+            'prompt_latency_p99_ms': prompt_percentiles['p99'],
+            'prompt_latency_max_ms': max(prompt_latencies) if prompt_latencies else None,
+            'prompts_missed': args.iterations - len(prompt_latencies),
+            'lines_expected': lines_expected,
+            'lines_lost_or_damaged': lines_expected - lines_received}
+    for key in ('bytes_dropped', 'splits', 'bursts'):
+        case[key] = statistics_after[key] - statistics_before[key]
+    print("{name}: prompt p99 {prompt_latency_p99_ms} ms, missed {prompts_missed}, lines lost or damaged "
+          "{lines_lost_or_damaged}".format(**case), file=sys.stderr)
+    return case
+
+
+def parse_args(argv):
+    names = [scenario.name for scenario in SCENARIOS]
+    parser = argparse.ArgumentParser(description="DebugCLI parsing benchmark on a link with injected faults")
+    parser.add_argument("--scenarios", nargs="+", choices=names, default=names)
+    parser.add_argument("--seed", type=int, default=0, help="value added to the seeds of the scenarios")
+    parser.add_argument("--iterations", type=int, default=50, help="number of prompts written in each scenario")
+    parser.add_argument("--lines", type=int, default=20, help="number of lines written before each prompt")
+    parser.add_argument("--line-length", type=int, default=60)
+    parser.add_argument("--baud-rate", type=int, default=115200,
+                        help="baud rate the console timeouts are derived from")
+    parser.add_argument("--read-mode", default=SerialReadModeConsts.LOW_LATENCY,
+                        choices=[SerialReadModeConsts.BULK, SerialReadModeConsts.LOW_LATENCY])
+    parser.add_argument("--iteration-timeout", type=float, default=2.0,
+                        help="time to wait for the prompt in seconds")
+    parser.add_argument("--iteration-gap", type=float, default=0.3,
+                        help="pause between the iterations in seconds, should exceed the message timeout")
+    parser.add_argument("--output", help="JSON report file, stdout by default")
+    parser.add_argument("--baseline", help="JSON report to compare the results with")
+    parser.add_argument("--tolerance", type=float, default=0.3, help="allowed relative degradation")
+    return parser.parse_args(argv)
+
+
+def main(argv) -> int:
+    args = parse_args(argv)
+    pty = PtyPort()
+    driver = SerialDriver(pty.port, args.baud_rate, SerialReadModeConsts.TIMEOUT_AUTO,
+                          SerialReadModeConsts.TIMEOUT_AUTO, enqueue_incoming_data=False, read_mode=args.read_mode)
+    bus = FaultInjectingDriver(driver, enqueue_incoming_data=False)
+    # console logging of each received string would dominate the measured latency
+    DebugCLI._DebugCLI__DEBUG = False
+    debug_cli = DebugCLI(bus=bus)
+
+    cases = [run_scenario(debug_cli, bus, pty, scenario, args)
+             for scenario in SCENARIOS if scenario.name in args.scenarios]
+    report = {'benchmark': "fault_injection",
+              'python': platform.python_version(),
+              'platform': platform.platform(),
+              'parameters': vars(args),
+              'cases': cases}
+    BenchmarkHelper.write_report(report, args.output)
+    bus.stop()
+
+    if args.baseline is not None:
+        regressions = BenchmarkHelper.compare_with_baseline(report, args.baseline, _COMPARED_METRICS,
+                                                            args.tolerance)
+        for regression in regressions:
+            print("Regression: " + regression, file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
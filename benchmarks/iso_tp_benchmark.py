@@ -0,0 +1,148 @@
+"""
+Benchmark of ISO-TP transfers which does not require any hardware. Two IsoTp endpoints talk over two CAN interfaces
+on the same python-can virtual bus or vcan SocketCAN interface, the sender sends --messages messages of each size and
+the receiver takes them by get_message().
+
+The receiving endpoint requests the block size and STmin of the case, so the cases show how they limit the transfer
+rate. Note that neither virtual bus nor vcan emulates the bitrate, so the results are the cost of the stack on the
+host rather than the rate of a real bus. Reported:
+- throughput in payload bytes per second, measured by the sender from the first frame until the last one;
+- message latency: time from send_message() call until the message is returned by get_message();
+- flow control wait time of the sender and CPU time of the process per message.
+
+Run from the project root:
+    python -m benchmarks.iso_tp_benchmark --output iso_tp_benchmark.json
+    python -m benchmarks.iso_tp_benchmark --baseline iso_tp_benchmark.json
+"""
+import argparse
+import os
+import platform
+import sys
+import threading
+import time
+
+from benchmarks.common.benchmark_helper import BenchmarkHelper
+from comm_support_lib.comm_interfaces.can_socket import CAN
+from comm_support_lib.comm_interfaces.iso_tp import IsoTp
+from comm_support_lib.common.can_interface_type_consts import CanInterfaceTypeConsts
+
+BLOCK_SIZES = [0, 8, 32]
+ST_MINS = [0.0, 0.0005, 0.001]
+MESSAGE_SIZES = [64, 512, 4095]
+# the usual pair of UDS diagnostic IDs
+_TX_ID = 0x7E0
+_RX_ID = 0x7E8
+# timeout of recv() in the polling thread of the driver
+_POLLING_TIMEOUT = 0.05
+# metric -> True if the higher value is better
+_COMPARED_METRICS = {'throughput_bytes_per_s': True, 'latency_p99_ms': False, 'cpu_ms_per_message': False}
+
+
+def run_case(sender: IsoTp, receiver: IsoTp, block_size: int, st_min: float, size: int, args) -> dict:
+    payload = os.urandom(size)
+    latencies = []
+    send_times = []
+
+    def receive():
+        for _ in range(args.messages):
+            message = receiver.get_message(args.timeout)
+            if message is None:
+                return
+            latencies.append(time.perf_counter() - send_times[len(latencies)])
+
+    def run():
+        receiver_thread = threading.Thread(target=receive, daemon=True)
+        receiver_thread.start()
+        failed = 0
+        for _ in range(args.messages):
+            send_times.append(time.perf_counter())
+            if not sender.send_message(payload):
+                failed += 1
+            # the next message is sent once the previous one is received, so the latency does not include queuing
+            while receiver_thread.is_alive() and len(latencies) < len(send_times):
+                time.sleep(0.0001)
+        receiver_thread.join()
+        return failed
+
+    sender.reset_statistics()
+    receiver.reset_statistics()
+    measurement = BenchmarkHelper.measure(run)
+    statistics = sender.get_statistics()
+    latencies = [latency * 1000 for latency in latencies]
+    percentiles = BenchmarkHelper.get_percentiles(latencies)
+    case = {'name': "{}/bs{}/st{}/{}".format(args.interface, block_size, st_min, size),
+            'interface': args.interface,
+            'block_size': block_size,
+            'st_min': st_min,
+            'message_size': size,
+            'messages_sent': statistics['messages_sent'],
+            'messages_received': len(latencies),
+            'failed': measurement['result'],
+            'frames_sent': statistics['frames_sent'],
+            'flow_control_received': statistics['flow_control_received'],
+            'flow_control_wait_s': statistics['flow_control_wait_time'],
+            'throughput_bytes_per_s': statistics['tx_throughput'],
+            'latency_p50_ms': percentiles['p50'],
+            'latency_p90_ms': percentiles['p90'],
+            'latency_p99_ms': percentiles['p99'],
+            'latency_max_ms': max(latencies) if latencies else None,
+            'cpu_ms_per_message': measurement['cpu_time'] * 1000 / len(latencies) if latencies else None}
+    print("{name}: {throughput_bytes_per_s:.0f} B/s, latency p99 {latency_p99_ms} ms".format(**case), file=sys.stderr)
+    return case
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="ISO-TP benchmark on a virtual bus")
+    parser.add_argument("--interface", default=CanInterfaceTypeConsts.VIRTUAL,
+                        choices=[CanInterfaceTypeConsts.VIRTUAL, CanInterfaceTypeConsts.SOCKETCAN])
+    parser.add_argument("--channel", default="iso_tp_benchmark",
+                        help="name of the virtual bus or of the SocketCAN interface, e.g. vcan0")
+    parser.add_argument("--block-sizes", nargs="+", type=int, default=BLOCK_SIZES)
+    parser.add_argument("--st-mins", nargs="+", type=float, default=ST_MINS, help="STmin values in seconds")
+    parser.add_argument("--sizes", nargs="+", type=int, default=MESSAGE_SIZES, help="message sizes in bytes")
+    parser.add_argument("--messages", type=int, default=20, help="number of messages of each case")
+    parser.add_argument("--timeout", type=float, default=2.0, help="time to wait for a message in seconds")
+    parser.add_argument("--output", help="JSON report file, stdout by default")
+    parser.add_argument("--baseline", help="JSON report to compare the results with")
+    parser.add_argument("--tolerance", type=float, default=0.3, help="allowed relative degradation")
+    return parser.parse_args(argv)
+
+
+def main(argv) -> int:
+    args = parse_args(argv)
+    sender_can = CAN(500000, args.channel, _POLLING_TIMEOUT, interface_type=args.interface)
+    receiver_can = CAN(500000, args.channel, _POLLING_TIMEOUT, interface_type=args.interface)
+    # the frames are taken by the endpoints, the incoming data queues are not used
+    sender_can.set_filters([{'can_id': _RX_ID, 'can_mask': 0x7FF, 'extended': False}])
+    receiver_can.set_filters([{'can_id': _TX_ID, 'can_mask': 0x7FF, 'extended': False}])
+    sender = IsoTp(sender_can, _TX_ID, _RX_ID)
+
+    cases = []
+    for block_size in args.block_sizes:
+        for st_min in args.st_mins:
+            receiver = IsoTp(receiver_can, _RX_ID, _TX_ID, block_size=block_size, st_min=st_min)
+            for size in args.sizes:
+                cases.append(run_case(sender, receiver, block_size, st_min, size, args))
+                sender_can.flush_incoming_data()
+                receiver_can.flush_incoming_data()
+            receiver.close()
+    sender.close()
+    report = {'benchmark': "iso_tp",
+              'python': platform.python_version(),
+              'platform': platform.platform(),
+              'parameters': vars(args),
+              'cases': cases}
+    BenchmarkHelper.write_report(report, args.output)
+
+    if args.baseline is not None:
+        regressions = BenchmarkHelper.compare_with_baseline(report, args.baseline, _COMPARED_METRICS,
+                                                            args.tolerance)
+        for regression in regressions:
+            print("Regression: " + regression, file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,276 @@
+"""
+Loopback benchmark of SerialDriver and RS485 which does not require any hardware. Each driver opens the slave side of
+a pseudo terminal, the benchmark plays the device on the master side.
+
+Cases:
+- rx: the benchmark writes length prefixed messages into the master side, the driver splits them by
+  LengthPrefixFramer, the messages are taken by get_frame();
+- tx: the driver sends the messages by send_message(block=False), the benchmark reads them from the master side.
+
+Every message carries its send time, so the latency is measured from the moment the message is written until it is
+received by the other side. Note: a pseudo terminal does not emulate the baud rate, the data is transferred as fast as
+possible unless --paced is set. The baud rate still affects the timeouts derived from it. CPU time is measured for the
+whole process, so it includes the work done by the benchmark to play the device.
+
+Run from the project root:
+    python -m benchmarks.serial_benchmark --output serial_benchmark.json
+    python -m benchmarks.serial_benchmark --baseline serial_benchmark.json
+The second command exits with code 1 if any case is slower than the baseline by more than --tolerance.
+"""
+import argparse
+import platform
+import struct
+import sys
+import threading
+import time
+
+from benchmarks.common.benchmark_helper import BenchmarkHelper
+from benchmarks.common.pty_port import PtyPort
+from comm_support_lib.common.framers import LengthPrefixFramer
+from comm_support_lib.common.overflow_policy_consts import OverflowPolicyConsts
+from comm_support_lib.common.serial_iface_parity_consts import SerialIfaceParityConsts
+from comm_support_lib.common.serial_read_mode_consts import SerialReadModeConsts
+from comm_support_lib.hw_drivers.serial_driver import SerialDriver
+
+# the same baud rates as TestSerial.__TEST_CASE_70_PARAM_LIST
+BAUD_RATES = [300, 1200, 2400, 4800, 9600, 19200, 38400, 57600, 115200, 500000, 1000000]
+# message sizes in bytes including the length prefix
+MESSAGE_SIZES = [16, 256, 4096]
+DRIVERS = ["serial", "rs485"]
+DIRECTIONS = ["rx", "tx"]
+# length prefix (excluding itself), sequence number, time.monotonic() value when the message was sent
+_MESSAGE_HEADER = struct.Struct(">HId")
+# maximum payload which could be described by the length prefix
+_MAX_PAYLOAD_BYTES = 0xFFFF
+# start bit, 8 data bits, stop bit
+_BITS_PER_CHAR = 10
+# metric -> True if the higher value is better
+_COMPARED_METRICS = {'bytes_per_s': True, 'latency_p99_ms': False, 'cpu_s_per_mb': False}
+
+
+def make_message(sequence: int, size: int) -> bytes:
+    header = _MESSAGE_HEADER.pack(size - 2, sequence, time.monotonic())
+    return header + bytes(size - len(header))
+
+
+def parse_message(data) -> tuple:
+    """
+    Returns:
+        message (tuple): sequence number and send time of the message passed without the length prefix
+    """
+    _, sequence, send_time = _MESSAGE_HEADER.unpack_from(b"\0\0" + bytes(data[:_MESSAGE_HEADER.size - 2]))
+    return sequence, send_time
+
+
+def create_bus(driver: str, port: str, baud_rate: int, read_mode: str):
+    if driver == "rs485":
+        # imported here to keep the benchmark of the plain driver working without the interface dependencies
+        from comm_support_lib.comm_interfaces.rs_485 import RS485
+        return RS485(port, baud_rate, SerialIfaceParityConsts.PARITY_NONE, 1,
+                     ic_timeout=SerialReadModeConsts.TIMEOUT_AUTO, msg_timeout=SerialReadModeConsts.TIMEOUT_AUTO,
+                     queue_policy=OverflowPolicyConsts.BLOCK, framer=LengthPrefixFramer(2, max_size=_MAX_PAYLOAD_BYTES),
+                     read_mode=read_mode)
+    bus = SerialDriver(port, baud_rate, SerialReadModeConsts.TIMEOUT_AUTO, SerialReadModeConsts.TIMEOUT_AUTO,
+                       queue_policy=OverflowPolicyConsts.BLOCK, read_mode=read_mode)
+    bus.set_framer(LengthPrefixFramer(2, max_size=_MAX_PAYLOAD_BYTES))
+    return bus
+
+
+def run_sender(send, size: int, duration: float, max_messages: int, line_rate: float or None, result: dict):
+    """
+    Send the messages until the duration expires. If the line rate is set, the messages are paced to it.
+    """
+    start = time.monotonic()
+    sent = 0
+    while sent < max_messages:
+        now = time.monotonic()
+        if line_rate is not None:
+            send_time = start + sent * size / line_rate
+            if sent and send_time - start >= duration:
+                break
+            if send_time > now:
+                time.sleep(send_time - now)
+        elif now - start >= duration:
+            break
+        if not send(make_message(sent, size)):
+            break
+        sent += 1
+    result['sent'] = sent
+    result['start'] = start
+
+
+def transfer(bus, pty: PtyPort, direction: str, size: int, duration: float, max_messages: int,
+             line_rate: float or None, receive_timeout: float) -> dict:
+    """
+    Transfer the messages in one direction and collect the latencies
+        Returns:
+            result (dict): {'sent', 'received', 'bytes', 'elapsed', 'latencies'}
+    """
+    sender_result = {}
+    if direction == "rx":
+        def send(msg):
+            return pty.write(msg, time.monotonic() + receive_timeout)
+    else:
+        def send(msg):
+            bus.send_message(msg, block=False)
+            return True
+    sender = threading.Thread(target=run_sender, args=(send, size, duration, max_messages, line_rate, sender_result),
+                              daemon=True)
+    latencies = []
+    received = 0
+    last_receive_time = None
+    framer = LengthPrefixFramer(2, max_size=_MAX_PAYLOAD_BYTES)
+
+    sender.start()
+    while True:
+        if direction == "rx":
+            frame = bus.get_frame(0.05)
+            payloads = [frame.data] if frame is not None else []
+        else:
+            payloads = [frame.data for frame in framer.feed(pty.read(0.05), None)]
+        now = time.monotonic()
+        for payload in payloads:
+            _, send_time = parse_message(payload)
+            latencies.append(now - send_time)
+            received += 1
+            last_receive_time = now
+        if not sender.is_alive():
+            if received >= sender_result['sent']:
+                break
+            if not payloads and now - (last_receive_time or sender_result['start']) > receive_timeout:
+                break
+    sender.join()
+    elapsed = (last_receive_time or time.monotonic()) - sender_result['start']
+    return {'sent': sender_result['sent'],
+            'received': received,
+            'bytes': received * size,
+            'elapsed': elapsed,
+            'latencies': latencies}
+
+
+def run_case(bus, pty: PtyPort, driver: str, direction: str, baud_rate: int, size: int, args) -> dict:
+    line_rate = baud_rate / _BITS_PER_CHAR if args.paced else None
+
+    def run(duration):
+        return transfer(bus, pty, direction, size, duration, args.max_messages, line_rate, args.receive_timeout)
+
+    statistics_before = bus.get_statistics()
+    measurement = BenchmarkHelper.measure(lambda: run(args.duration))
+    statistics_after = bus.get_statistics()
+    result = measurement['result']
+    megabytes = result['bytes'] / 1e6
+    latencies = BenchmarkHelper.get_percentiles([latency * 1000 for latency in result['latencies']])
+
+    case = {'name': "{}/{}/{}/{}/{}{}".format(driver, args.read_mode, direction, baud_rate, size,
+                                              "/paced" if args.paced else ""),
+            'driver': driver,
+            'read_mode': args.read_mode,
+            'paced': args.paced,
+            'direction': direction,
+            'baud_rate': baud_rate,
+            'message_size': size,
+            'messages_sent': result['sent'],
+            'messages_received': result['received'],
+            'bytes': result['bytes'],
+            'elapsed_s': result['elapsed'],
+            'bytes_per_s': result['bytes'] / result['elapsed'] if result['elapsed'] > 0 else None,
+            'line_rate_bytes_per_s': baud_rate / _BITS_PER_CHAR,
+            'latency_p50_ms': latencies['p50'],
+            'latency_p90_ms': latencies['p90'],
+            'latency_p99_ms': latencies['p99'],
+            'latency_max_ms': max(result['latencies']) * 1000 if result['latencies'] else None,
+            'cpu_s': measurement['cpu_time'],
+            'cpu_s_per_mb': measurement['cpu_time'] / megabytes if megabytes else None,
+            'read_calls_per_mb': (statistics_after['read_calls'] - statistics_before['read_calls']) / megabytes
+            if megabytes else None,
+            'lost_messages': statistics_after['lost_messages'] - statistics_before['lost_messages'],
+            'alloc_peak_bytes': None,
+            'alloc_retained_bytes': None}
+
+    if args.alloc_duration > 0:
+        # separate run, as tracing distorts the timings
+        allocations = BenchmarkHelper.measure(lambda: run(args.alloc_duration), trace_allocations=True)
+        case['alloc_peak_bytes'] = allocations['alloc_peak_bytes']
+        case['alloc_retained_bytes'] = allocations['alloc_retained_bytes']
+    bus.flush_incoming_data()
+    pty.drain()
+    return case
+
+
+def run_driver(driver: str, args) -> list:
+    """
+    Run all the cases of the driver. The baud rates are switched by sweep(), so the port is opened once.
+    """
+    pty = PtyPort()
+    bus = create_bus(driver, pty.port, args.baud_rates[0], args.read_mode)
+
+    def run_config(config):
+        cases = []
+        for direction in args.directions:
+            for size in args.sizes:
+                case = run_case(bus, pty, driver, direction, config['baud_rate'], size, args)
+                print("{name}: {bytes_per_s} B/s, p99 {latency_p99_ms} ms".format(**case), file=sys.stderr)
+                cases.append(case)
+        return cases
+
+    results = bus.sweep([{'baud_rate': baud_rate} for baud_rate in args.baud_rates], run_config)
+    cases = []
+    for baud_rate, result in zip(args.baud_rates, results):
+        if result is None:
+            print("Failed to apply baud rate {} for {}".format(baud_rate, driver), file=sys.stderr)
+            continue
+        cases += result
+    return cases
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Loopback pty benchmark of SerialDriver and RS485")
+    parser.add_argument("--drivers", nargs="+", choices=DRIVERS, default=DRIVERS)
+    parser.add_argument("--directions", nargs="+", choices=DIRECTIONS, default=DIRECTIONS)
+    parser.add_argument("--baud-rates", nargs="+", type=int, default=BAUD_RATES)
+    parser.add_argument("--sizes", nargs="+", type=int, default=MESSAGE_SIZES,
+                        help="message sizes in bytes, from {} to {}".format(_MESSAGE_HEADER.size,
+                                                                            _MAX_PAYLOAD_BYTES + 2))
+    parser.add_argument("--read-mode", default=SerialReadModeConsts.BULK,
+                        choices=[SerialReadModeConsts.BULK, SerialReadModeConsts.LOW_LATENCY])
+    parser.add_argument("--duration", type=float, default=0.3, help="sending time of each case in seconds")
+    parser.add_argument("--alloc-duration", type=float, default=0.1,
+                        help="sending time of the allocation tracing run of each case, 0 disables tracing")
+    parser.add_argument("--max-messages", type=int, default=100000, help="maximum number of messages of each case")
+    parser.add_argument("--receive-timeout", type=float, default=2.0,
+                        help="time to wait for the messages which have not been received yet")
+    parser.add_argument("--paced", action="store_true", help="do not send faster than the baud rate allows")
+    parser.add_argument("--output", help="JSON report file, stdout by default")
+    parser.add_argument("--baseline", help="JSON report to compare the results with")
+    parser.add_argument("--tolerance", type=float, default=0.3, help="allowed relative degradation")
+    args = parser.parse_args(argv)
+    for size in args.sizes:
+        if not _MESSAGE_HEADER.size <= size <= _MAX_PAYLOAD_BYTES + 2:
+            parser.error("Wrong message size: {}".format(size))
+    return args
+
+
+def main(argv) -> int:
+    args = parse_args(argv)
+    cases = []
+    for driver in args.drivers:
+        cases += run_driver(driver, args)
+    report = {'benchmark': "serial",
+              'python': platform.python_version(),
+              'platform': platform.platform(),
+              'parameters': vars(args),
+              'cases': cases}
+    BenchmarkHelper.write_report(report, args.output)
+
+    if args.baseline is not None:
+        regressions = BenchmarkHelper.compare_with_baseline(report, args.baseline, _COMPARED_METRICS,
+                                                            args.tolerance)
+        for regression in regressions:
+            print("Regression: " + regression, file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,100 @@
+from comm_support_lib.common.can_frame import CanFrame
+from comm_support_lib.config.config import CAN_SOCKET, CAN_INTERFACE_TYPE
+from comm_support_lib.hw_drivers.async_socket_can_driver import AsyncSocketCanDriver
+
+
+class AsyncCAN:
+    """
+    asyncio flavour of CAN interface. The frames are received by python-can Notifier into the event loop, so CAN checks
+    could be awaited concurrently with DebugCLI.wait_for_message() and other interfaces in one event loop, e.g. by
+    asyncio.gather(), instead of alternating blocking get_message() calls on each bus.
+    """
+
+    def __init__(self, rate: int, socket: str = CAN_SOCKET, interface_type: str = CAN_INTERFACE_TYPE,
+                 can_filters: list = None, fd: bool = False, bitrate_switch: bool = True):
+        """
+        Class constructor. Initialize object during its creation. If the object is created inside a coroutine, reading
+        is started at once, otherwise it is started on the first awaited call or by start().
+        :param rate: baud rate of the CAN interface.
+        :param socket: channel of the CAN interface: network host name and port of the SocketCAN converter for slcan,
+        interface name for native SocketCAN (e.g. “vcan0”), bus name for virtual interface.
+        :param interface_type: CanInterfaceTypeConsts value, “slcan”, “socketcan” or “virtual”.
+        :param can_filters: list of python-can filters {‘can_id’, ‘can_mask’, ‘extended’}. Only the frames matching any
+        of them are received. If None, all the frames are received.
+        :param fd: enable CAN FD, see CAN class. Not supported by slcan interface.
+        :param bitrate_switch: if True, the data phase of CAN FD frames is sent at the data bitrate.
+        """
+        self.__bus = AsyncSocketCanDriver(socket, rate, interface_type, can_filters, fd, bitrate_switch)
+
+    async def start(self) -> None:
+        """
+        Starts reading the CAN interface on the running event loop.
+        """
+        await self.__bus.start()
+
+    def close(self) -> None:
+        """
+        Stops reading and closes the CAN interface.
+        """
+        self.__bus.close()
+
+    async def send_message(self, message_id: int, payload: bytes = None, is_extended_id: bool = False) -> bool:
+        """
+        Performs message sending to CAN interface.
+        :param message_id: CAN message will be sent with this message ID.
+        :param payload: CAN message payload.
+        :param is_extended_id: if message_id is extended, should be True
+        :return: True if the message has been sent successfully, False otherwise.
+        """
+        return await self.__bus.send_message(message_id, payload, is_extended_id)
+
+    async def recv(self, timeout: float = None) -> CanFrame or None:
+        """
+        Takes the next message from the incoming data queue without blocking the event loop.
+        :param timeout: timeout waiting for the message in seconds. If None, waits without limit.
+        :return: None if timeout occurred. Otherwise – CanFrame of the message, see CAN.get_message().
+        """
+        return await self.__bus.recv(timeout)
+
+    def __aiter__(self):
+        """
+        Iterates over the incoming messages: “async for frame in can”. The iteration never stops, use “break” or
+        cancellation to finish it.
+        """
+        return self.__bus.__aiter__()
+
+    async def wait_for(self, can_id: int = None, payload_prefix: bytes = None,
+                       timeout: float = None) -> CanFrame or None:
+        """
+        Waits for the message with the ID and the payload prefix without blocking the event loop, e.g. for the response
+        to a request sent just before. Like DebugCLI.wait_for_message(), only messages received after the call are
+        checked and the incoming data queue is not changed.
+        :param can_id: arbitration ID of the message. If None, any ID matches.
+        :param payload_prefix: bytes the payload should start with. If None, any payload matches.
+        :param timeout: timeout waiting for the message in seconds. If None, waits without limit.
+        :return: None if timeout occurred. Otherwise – CanFrame of the message.
+        """
+        return await self.__bus.wait_for(can_id, payload_prefix, timeout)
+
+    def get_parameters(self) -> dict:
+        """
+        Returns parameters of SocketCAN driver module. Return type is Dict.
+        :return: Dictionary {‘socket’, ‘baud_rate’, ‘interface_type’, ‘can_filters’, ‘fd’, ‘bitrate_switch’}.
+        """
+        return self.__bus.get_parameters()
+
+    def flush_incoming_data(self) -> None:
+        """
+        Clears incoming data queue. Could be useful between test cases running to minimize impact of previous tests
+        on the current test.
+        """
+        self.__bus.flush_incoming_data()
+
+    def get_statistics(self) -> dict:
+        """
+        Returns counters of the CAN interface.
+        :return: Dictionary {‘bytes_in’, ‘frames_in’, ‘bytes_out’, ‘frames_out’, ‘send_errors’, ‘queue_depth’,
+        ‘queue_high_water_mark’, ‘waiters’}. The incoming data queue is unbounded, waiters is number of the pending
+        wait_for() calls. Bytes are payload bytes.
+        """
+        return self.__bus.get_statistics()
@@ -0,0 +1,205 @@
+import itertools
+import sys
+import threading
+import time
+
+from comm_support_lib.comm_interfaces.can_socket import CAN
+from comm_support_lib.common.can_frame import CanFrame
+
+
+class CanLoadGenerator:
+    """
+    Sends the same frame from the host at the target rate, e.g. to stress CAN receive path of the board. The frames
+    are sent by CAN.send_burst() in small bursts, so the achieved rate follows the target even if the host sleeps longer
+    than the frame period.
+    """
+    # maximum number of frames sent at once, limits the burst after the sender has been delayed
+    __MAX_BURST = 64
+    # minimal time to sleep between the bursts in seconds
+    __MIN_SLEEP = 0.001
+    # start of frame, arbitration, control and CRC fields, ACK, end of frame and interframe space, bits
+    __STANDARD_FRAME_OVERHEAD_BITS = 47
+    __EXTENDED_FRAME_OVERHEAD_BITS = 67
+    # CAN FD frame bits sent at the nominal bitrate: start of frame, arbitration and control fields up to bitrate
+    # switch, ACK, end of frame and interframe space
+    __FD_STANDARD_NOMINAL_BITS = 29
+    __FD_EXTENDED_NOMINAL_BITS = 48
+    # CAN FD frame bits sent at the data bitrate besides the payload and CRC: error state indicator, DLC, stuff count
+    # and CRC delimiter
+    __FD_DATA_OVERHEAD_BITS = 10
+    # CRC length of CAN FD frames with up to 16 bytes of payload and with longer payload
+    __FD_SHORT_CRC_BITS = 17
+    __FD_LONG_CRC_BITS = 21
+
+    def __init__(self, can: CAN):
+        """
+        Class constructor.
+        :param can: CAN interface used to send the frames.
+        """
+        self.__can = can
+        self.__thread = None
+        self.__stop_event = threading.Event()
+        self.__lock = threading.Lock()
+        self.__target_rate = 0.0
+        self.__sent = 0
+        self.__errors = 0
+        self.__elapsed = 0.0
+        self.__max_lag = 0.0
+
+    @staticmethod
+    def get_frame_bits(payload_length: int, is_extended_id: bool = False) -> int:
+        """
+        Returns length of the frame on the bus without stuff bits.
+        :param payload_length: number of payload bytes.
+        :param is_extended_id: True for the frame with 29-bit ID.
+        :return: length of the frame in bits including interframe space.
+        """
+        overhead = CanLoadGenerator.__EXTENDED_FRAME_OVERHEAD_BITS if is_extended_id \
+            else CanLoadGenerator.__STANDARD_FRAME_OVERHEAD_BITS
+        return overhead + 8 * payload_length
+
+    @staticmethod
+    def get_frame_time(bitrate: int, payload_length: int, is_extended_id: bool = False, is_fd: bool = False,
+                       data_bitrate: int = None) -> float:
+        """
+        Returns duration of the frame on the bus without stuff bits.
+        :param bitrate: bitrate of the bus, the nominal bitrate for CAN FD frame.
+        :param payload_length: number of payload bytes. The payload of CAN FD frame is padded to the next length which
+        could be encoded by DLC.
+        :param is_extended_id: True for the frame with 29-bit ID.
+        :param is_fd: True for CAN FD frame.
+        :param data_bitrate: bitrate of the data phase of CAN FD frame. If None, the bitrate is not switched.
+        :return: duration in seconds including interframe space.
+        """
+        if not is_fd:
+            return CanLoadGenerator.get_frame_bits(payload_length, is_extended_id) / bitrate
+        payload_length = CanFrame.get_fd_payload_length(payload_length)
+        nominal_bits = CanLoadGenerator.__FD_EXTENDED_NOMINAL_BITS if is_extended_id \
+            else CanLoadGenerator.__FD_STANDARD_NOMINAL_BITS
+        crc_bits = CanLoadGenerator.__FD_SHORT_CRC_BITS if payload_length <= 16 else CanLoadGenerator.__FD_LONG_CRC_BITS
+        data_bits = CanLoadGenerator.__FD_DATA_OVERHEAD_BITS + crc_bits + 8 * payload_length
+        return nominal_bits / bitrate + data_bits / (data_bitrate or bitrate)
+
+    @staticmethod
+    def get_max_frame_rate(bitrate: int, payload_length: int, is_extended_id: bool = False, is_fd: bool = False,
+                           data_bitrate: int = None) -> float:
+        """
+        Returns the frame rate which loads the bus completely. Stuff bits are not counted, so the real maximum could be
+        up to 20% lower. Parameters are the same as of get_frame_time().
+        :return: frames per second.
+        """
+        return 1 / CanLoadGenerator.get_frame_time(bitrate, payload_length, is_extended_id, is_fd, data_bitrate)
+
+    @staticmethod
+    def get_payload_rate(bitrate: int, payload_length: int, is_extended_id: bool = False, is_fd: bool = False,
+                         data_bitrate: int = None) -> float:
+        """
+        Returns the payload throughput of the completely loaded bus, e.g. to compare classic frames with CAN FD frames
+        of different length and data bitrate. Parameters are the same as of get_frame_time().
+        :return: payload bytes per second of bus time. Padding of CAN FD frames is not counted as payload.
+        """
+        return payload_length * CanLoadGenerator.get_max_frame_rate(bitrate, payload_length, is_extended_id, is_fd,
+                                                                    data_bitrate)
+
+    def start(self, message_id: int, payload: bytes, frames_per_second: float, duration: float = None,
+              is_extended_id: bool = False, count: int = None) -> bool:
+        """
+        Starts sending the frame in a background thread. The counters of the previous run are reset.
+        :param message_id: ID of the frames.
+        :param payload: payload of the frames.
+        :param frames_per_second: target rate.
+        :param duration: time in seconds to send for. If None, the frames are sent until count is reached or stop().
+        :param is_extended_id: if message_id is extended, should be True.
+        :param count: number of frames to send. If None, it is not limited.
+        :return: True if sending has been started, False if the generator is already running.
+        """
+        if frames_per_second <= 0:
+            raise ValueError("Wrong frame rate passed: {}".format(frames_per_second))
+        if self.__thread is not None and self.__thread.is_alive():
+            print("CAN load generator is already running", file=sys.stderr)
+            return False
+        with self.__lock:
+            self.__target_rate = frames_per_second
+            self.__sent = 0
+            self.__errors = 0
+            self.__elapsed = 0.0
+            self.__max_lag = 0.0
+        self.__stop_event.clear()
+        frame = (message_id, bytes(payload), is_extended_id)
+        self.__thread = threading.Thread(target=self.__run, args=(frame, frames_per_second, duration, count),
+                                         name="CanLoadGenerator", daemon=True)
+        self.__thread.start()
+        return True
+
+    def __run(self, frame: tuple, frames_per_second: float, duration: float or None, count: int or None):
+        """
+        Sending thread function
+        """
+        start_time = time.monotonic()
+        attempted = 0
+        while not self.__stop_event.is_set() and (count is None or attempted < count):
+            elapsed = time.monotonic() - start_time
+            if duration is not None and elapsed >= duration:
+                break
+            due = int(elapsed * frames_per_second) + 1 - attempted
+            if due <= 0:
+                self.__stop_event.wait(max(attempted / frames_per_second - elapsed, self.__MIN_SLEEP))
+                continue
+            if count is not None:
+                due = min(due, count - attempted)
+            burst = min(due, self.__MAX_BURST)
+            sent = self.__can.send_burst(itertools.repeat(frame, burst))
+            attempted += burst
+            with self.__lock:
+                self.__sent += sent
+                self.__errors += burst - sent
+                self.__elapsed = time.monotonic() - start_time
+                self.__max_lag = max(self.__max_lag, elapsed - (attempted - burst) / frames_per_second)
+
+    def wait(self, timeout: float = None) -> dict:
+        """
+        Waits until the generator has sent count frames or duration has expired.
+        :param timeout: time to wait in seconds. If None, waits without limit.
+        :return: statistics, see get_statistics().
+        """
+        if self.__thread is not None:
+            self.__thread.join(timeout)
+        return self.get_statistics()
+
+    def stop(self) -> dict:
+        """
+        Stops sending.
+        :return: statistics, see get_statistics().
+        """
+        self.__stop_event.set()
+        return self.wait()
+
+    def run(self, message_id: int, payload: bytes, frames_per_second: float, duration: float = None,
+            is_extended_id: bool = False, count: int = None) -> dict:
+        """
+        Sends the frames at the target rate and waits for the end of sending. Either duration or count should be set.
+        Parameters are the same as of start().
+        :return: statistics, see get_statistics(). None if the generator is already running.
+        """
+        if duration is None and count is None:
+            raise ValueError("Either duration or count should be set")
+        if not self.start(message_id, payload, frames_per_second, duration, is_extended_id, count):
+            return None
+        return self.wait()
+
+    def is_running(self) -> bool:
+        return self.__thread is not None and self.__thread.is_alive()
+
+    def get_statistics(self) -> dict:
+        """
+        Returns counters of the current or the last run.
+        :return: Dictionary {‘target_rate’, ‘achieved_rate’, ‘sent’, ‘send_errors’, ‘elapsed’, ‘max_lag’}. Rates are in
+        frames per second, times are in seconds. ‘max_lag’ is the maximum delay of a burst relative to the schedule.
+        """
+        with self.__lock:
+            return {'target_rate': self.__target_rate,
+                    'achieved_rate': self.__sent / self.__elapsed if self.__elapsed > 0 else 0.0,
+                    'sent': self.__sent,
+                    'send_errors': self.__errors,
+                    'elapsed': self.__elapsed,
+                    'max_lag': self.__max_lag}
@@ -0,0 +1,130 @@
+import sys
+import threading
+import time
+
+from comm_support_lib.comm_interfaces.can_socket import CAN
+from comm_support_lib.common.can_log_file import CanLogReader
+from comm_support_lib.common.capture_direction_consts import CaptureDirectionConsts
+
+
+class CanLogReplay:
+    """
+    Plays back the frames of CAN log written by CAN.start_log() into the callbacks and the incoming data queue of CAN
+    interface, e.g. to re-run a check on the traffic of a test without the board. A time window and a set of IDs
+    could be selected, only the chunks of the log containing them are read.
+    """
+    # maximum number of frames passed to CAN at once
+    __BATCH_SIZE = 256
+
+    def __init__(self, path: str, can: CAN):
+        """
+        Class constructor. Opens the log, the playback is started by start().
+        :param path: path to the log file.
+        :param can: CAN interface the frames are passed to. It could be created with “virtual” interface type, so that
+        no hardware is needed.
+        """
+        self.__reader = CanLogReader(path)
+        self.__can = can
+        self.__thread = None
+        self.__stop_event = threading.Event()
+        self.__lock = threading.Lock()
+        self.__frames = 0
+        self.__elapsed = 0.0
+
+    def __del__(self):
+        self.stop()
+        self.__reader.close()
+
+    def get_reader(self) -> CanLogReader:
+        """
+        Returns the reader of the log, e.g. to get its time range or IDs.
+        """
+        return self.__reader
+
+    def start(self, speed: float or None = 1.0, start_time: float = None, end_time: float = None, ids=None,
+              direction: int = CaptureDirectionConsts.DIRECTION_RX) -> bool:
+        """
+        Starts the playback in a background thread.
+        :param speed: playback speed relative to the logged time, e.g. 10 plays 10 times faster. If None, the frames
+        are passed as fast as CAN interface takes them.
+        :param start_time: timestamp of the first frame to play. If None, the playback starts from the log start.
+        :param end_time: timestamp of the last frame to play. If None, the playback runs to the log end.
+        :param ids: iterable of arbitration IDs to play. If None, all the frames are played.
+        :param direction: CaptureDirectionConsts value of the frames to play. If None, both received and sent frames
+        are played.
+        :return: True if the playback has been started, False if it is already running.
+        """
+        if speed is not None and speed <= 0:
+            raise ValueError("Wrong playback speed passed: {}".format(speed))
+        if self.is_running():
+            print("CAN log playback is already running", file=sys.stderr)
+            return False
+        with self.__lock:
+            self.__frames = 0
+            self.__elapsed = 0.0
+        self.__stop_event.clear()
+        records = self.__reader.read(start_time, end_time, ids, direction)
+        self.__thread = threading.Thread(target=self.__run, args=(records, speed), name="CanLogReplay", daemon=True)
+        self.__thread.start()
+        return True
+
+    def __run(self, records, speed: float or None):
+        """
+        Playback thread function. The frames which are already due are passed to CAN at once.
+        """
+        start_time = time.monotonic()
+        first_timestamp = None
+        batch = []
+        for _, frame in records:
+            if self.__stop_event.is_set():
+                return
+            if speed is not None:
+                if first_timestamp is None:
+                    first_timestamp = frame.timestamp
+                delay = start_time + (frame.timestamp - first_timestamp) / speed - time.monotonic()
+                if delay > 0:
+                    self.__inject(batch, start_time)
+                    if self.__stop_event.wait(delay):
+                        return
+            batch.append(frame)
+            if len(batch) >= self.__BATCH_SIZE:
+                self.__inject(batch, start_time)
+        self.__inject(batch, start_time)
+
+    def __inject(self, batch: list, start_time: float):
+        if not batch:
+            return
+        self.__can.inject_frames(batch)
+        with self.__lock:
+            self.__frames += len(batch)
+            self.__elapsed = time.monotonic() - start_time
+        batch.clear()
+
+    def is_running(self) -> bool:
+        return self.__thread is not None and self.__thread.is_alive()
+
+    def wait(self, timeout: float = None) -> bool:
+        """
+        Waits for the end of the playback.
+        :param timeout: time to wait in seconds. If None, waits without limit.
+        :return: True if the playback has finished, False if timeout occurred.
+        """
+        if self.__thread is not None:
+            self.__thread.join(timeout)
+        return not self.is_running()
+
+    def stop(self) -> None:
+        """
+        Stops the playback.
+        """
+        self.__stop_event.set()
+        self.wait()
+
+    def get_statistics(self) -> dict:
+        """
+        Returns counters of the current or the last playback.
+        :return: Dictionary {‘frames’, ‘elapsed’}. elapsed is the playback time in seconds.
+        """
+        with self.__lock:
+            return {'frames': self.__frames,
+                    'elapsed': self.__elapsed}
@@ -1,6 +1,8 @@
 from collections.abc import Callable
 
-from comm_support_lib.config.config import CAN_SOCKET, CAN_MSG_TIMEOUT
+from comm_support_lib.common.can_frame import CanFrame, CanFrameBatch
+from comm_support_lib.config.config import CAN_SOCKET, CAN_MSG_TIMEOUT, CAN_QUEUE_CAPACITY, CAN_QUEUE_OVERFLOW_POLICY, \
+    CAN_INTERFACE_TYPE
 from comm_support_lib.hw_drivers.socket_can_driver import SocketCanDriver
 
 
@@ -8,47 +10,186 @@ class CAN:
     INPUT_DATA_FIELD_ID = "id"
     INPUT_DATA_FIELD_PAYLOAD = "payload"
 
-    def __init__(self, rate: int, socket: str = CAN_SOCKET, timeout: float = CAN_MSG_TIMEOUT):
+    def __init__(self, rate: int, socket: str = CAN_SOCKET, timeout: float = CAN_MSG_TIMEOUT,
+                 queue_capacity: int = CAN_QUEUE_CAPACITY, queue_policy: str = CAN_QUEUE_OVERFLOW_POLICY,
+                 interface_type: str = CAN_INTERFACE_TYPE, can_filters: list = None,
+                 enqueue_unmatched_only: bool = False, fd: bool = False, data_bitrate: int = None,
+                 bitrate_switch: bool = True):
         """
         Class constructor. Initialize object during its creation.
-        :param rate: network host name and port of the SocketCAN converter.
-        :param socket: baud rate of the CAN interface.
+        :param rate: baud rate of the CAN interface.
+        :param socket: channel of the CAN interface: network host name and port of the SocketCAN converter for slcan,
+        interface name for native SocketCAN (e.g. “vcan0”), bus name for virtual interface.
         :param timeout: timeout between messages in seconds.
+        :param queue_capacity: maximum number of messages in the incoming data queue.
+        :param queue_policy: OverflowPolicyConsts value applied when the incoming data queue is full.
+        :param interface_type: CanInterfaceTypeConsts value, “slcan”, “socketcan” or “virtual”.
+        :param can_filters: list of python-can filters {‘can_id’, ‘can_mask’, ‘extended’}. Only the frames matching any
+        of them are received. The filters are applied by the kernel for native SocketCAN, so the unwanted frames do not
+        cost any CPU time in Python. If None, all the frames are received.
+        :param enqueue_unmatched_only: if True, the frames passed to any callback registered on an ID, a mask or a range
+        are not put into the incoming data queue, so get_message() returns only the rest of the frames.
+        :param fd: if True, CAN FD is enabled: the messages are sent by CAN FD frames by default, classic and CAN FD
+        frames are received. Supported by native SocketCAN (the interface should be configured with “fd on”) and
+        virtual interfaces.
+        :param data_bitrate: bitrate of the data phase of CAN FD frames. It is configured by the system for native
+        SocketCAN, so it is only stored, e.g. to calculate the bus load.
+        :param bitrate_switch: if True, the data phase of CAN FD frames is sent at the data bitrate.
         """
-        self.__bus = SocketCanDriver(socket, rate, timeout)
+        self.__bus = SocketCanDriver(socket, rate, timeout, queue_capacity, queue_policy, interface_type, can_filters,
+                                     enqueue_unmatched_only, fd, data_bitrate, bitrate_switch)
 
-    def update_iface_config(self, rate: int) -> None:
+    def update_iface_config(self, rate: int, data_bitrate: int = None) -> bool:
         """
-        Update configuration of CAN interface.
+        Update configuration of CAN interface. The bitrate of native SocketCAN interface is configured by the system,
+        so for it and for virtual interface the value is only stored.
         :param rate: baud rate of the CAN interface.
+        :param data_bitrate: bitrate of the data phase of CAN FD frames, it is only stored. If None, it is not changed.
+        :return: True if the configuration has been applied successfully, False otherwise.
+        """
+        return self.__bus.update_iface_config(rate, data_bitrate)
+
+    def sweep(self, configs, fn) -> list:
         """
-        self.__bus.update_iface_config(rate)
+        Applies several baud rates one by one without recreating the interface and calls the function for each of
+        them. The initial baud rate is restored at the end.
+        :param configs: iterable of dictionaries with ‘baud_rate’ key and optional ‘data_bitrate’ key.
+        :param fn: function called with the configuration dictionary once it has been applied.
+        :return: list of values returned by fn, None for the configurations which failed to be applied.
+        """
+        return self.__bus.sweep(configs, fn)
 
-    def send_message(self, message_id: int, payload: bytes = None, is_extended_id: bool = False) -> None:
+    def send_message(self, message_id: int, payload: bytes = None, is_extended_id: bool = False,
+                     is_fd: bool = None) -> None:
         """
         Performs message sending to CAN interface.
         :param message_id: CAN message will be sent with this message ID.
+        :param payload: CAN message payload, up to 8 bytes for classic frame and 64 bytes for CAN FD frame. The payload
+        of CAN FD frame is padded with zeros to the next length which could be encoded by DLC (12, 16, 20, 24, 32, 48).
+        :param is_extended_id: if message_id is extended, should be True
+        :param is_fd: if True, the message is sent by CAN FD frame, if False – by classic frame. If None, CAN FD frame
+        is used when CAN FD is enabled. The payload longer than 8 bytes is always sent by CAN FD frame.
+        """
+        self.__bus.send_message(message_id, payload, is_extended_id=is_extended_id, is_fd=is_fd)
+
+    def send_burst(self, frames) -> int:
+        """
+        Performs sending of several messages one after another without pauses, e.g. to load the bus.
+        :param frames: iterable of (message_id, payload, is_extended_id) tuples. The messages are sent by CAN FD frames
+        if CAN FD is enabled or the payload is longer than 8 bytes.
+        :return: number of messages sent successfully. Failed messages are counted in ‘send_errors’ of get_statistics().
+        """
+        return self.__bus.send_burst(frames)
+
+    def send_periodic(self, message_id: int, payload: bytes = None, period: float = 1.0, is_extended_id: bool = False,
+                      duration: float = None):
+        """
+        Starts periodic sending of the message. The message is sent by the kernel broadcast manager for native
+        SocketCAN interface, so the period does not depend on the load of the host, and by a python-can thread for
+        other interfaces. The periodic messages are not counted by get_statistics().
+        :param message_id: CAN message will be sent with this message ID.
         :param payload: CAN message payload.
+        :param period: period in seconds.
         :param is_extended_id: if message_id is extended, should be True
+        :param duration: time in seconds to send the message for. If None, it is sent until stop_periodic_tasks().
+        :return: python-can task, which could be stopped by its stop() method, or None if failed to start.
         """
-        self.__bus.send_message(message_id, payload, is_extended_id=is_extended_id)
+        return self.__bus.send_periodic(message_id, payload, period, is_extended_id, duration)
 
-    def get_message(self, timeout: float) -> dict or None:
+    def stop_periodic_tasks(self) -> None:
+        """
+        Stops all the messages started by send_periodic().
+        """
+        self.__bus.stop_periodic_tasks()
+
+    def get_message(self, timeout: float) -> CanFrame or None:
         """
         Performs getting message from CAN interface. If timeout is non-zero,
         the method blocks for required time for waiting a data from the board.
         :param timeout: timeout waiting for available data in message queue.
-        :return: None if nothing to read from message queue, or timeout occurred. Otherwise – byte array of the message.
+        :return: None if nothing to read from message queue, or timeout occurred. Otherwise – CanFrame of the message.
+        It could be read as dictionary {‘id’, ‘payload’, ‘timestamp’, ‘dlc’, ‘flags’, ‘is_extended_id’,
+        ‘is_remote_frame’, ‘is_error_frame’, ‘is_fd’, ‘bitrate_switch’}. The timestamp is reported by the interface.
         """
         return self.__bus.get_message(timeout)
 
+    def wait_for(self, predicate: Callable = None, can_id: int = None, can_mask: int = None,
+                 payload_prefix: bytes = None, timeout: float = None) -> CanFrame or None:
+        """
+        Waits for the message matching the filter and takes it from the incoming data queue. Unlike get_message(), the
+        messages which do not match stay in the queue for other consumers, so unrelated traffic on the bus does not
+        break the check. The messages which are already in the queue are checked first. Pending calls are indexed by
+        the arbitration ID, so each incoming message is checked only against the calls which could take it.
+        :param predicate: function called with CanFrame, returns True for the expected message. If None, any message
+        matching the other arguments is taken.
+        :param can_id: arbitration ID of the expected message. With can_mask, only the bits set in the mask are
+        compared. If None, any ID matches.
+        :param can_mask: mask applied to can_id and the IDs of the messages.
+        :param payload_prefix: bytes the payload of the expected message should start with. If None, any payload
+        matches.
+        :param timeout: timeout waiting for the message in seconds. If None, waits without limit.
+        :return: None if timeout occurred. Otherwise – CanFrame of the message.
+        """
+        return self.__bus.wait_for(predicate, can_id, can_mask, payload_prefix, timeout)
+
+    def get_messages(self, count: int, timeout: float) -> CanFrameBatch:
+        """
+        Performs getting many messages from CAN interface at once. The messages are stored compactly, so thousands of
+        frames, e.g. generated by cangen, could be checked cheaply by CanFrameBatch.count_mismatches().
+        :param count: number of messages to get.
+        :param timeout: time in seconds to wait for all the messages.
+        :return: CanFrameBatch with the received messages. It contains fewer than count messages if timeout occurred.
+        """
+        return self.__bus.get_messages(count, timeout)
+
+    def inject_frames(self, frames) -> None:
+        """
+        Passes the frames to the callbacks and the incoming data queue as if they have been received from the bus, e.g.
+        to play back CAN log. The frames are not counted by get_statistics() and not logged.
+        :param frames: iterable of CanFrame objects.
+        """
+        self.__bus.inject_frames(frames)
+
+    def start_log(self, path: str) -> bool:
+        """
+        Starts writing received and sent frames into CAN log, e.g. to keep a record of the traffic seen during a test.
+        The log consists of compressed chunks and has an index file with the time range and the IDs of each chunk, so
+        a time window or a set of IDs of a long log could be read by CanLogReader without decompressing all of it.
+        Writing is done by a separate thread and does not stall receiving.
+        :param path: path to the log file, the index is written next to it. The existing files are overwritten.
+        :return: True if logging has been started, False otherwise.
+        """
+        return self.__bus.start_log(path)
+
+    def stop_log(self) -> None:
+        """
+        Stops logging. The pending frames are written and the log file is closed.
+        """
+        self.__bus.stop_log()
+
+    def get_log_statistics(self) -> dict or None:
+        """
+        Returns counters of the active log.
+        :return: Dictionary {‘frames’, ‘chunks’, ‘size_bytes’, ‘pending’}, None if logging is not started.
+        """
+        return self.__bus.get_log_statistics()
+
     def get_parameters(self) -> dict:
         """
         Returns parameters of SocketCAN driver module. Return type is Dict.
-        :return: Dictionary with parameters of SocketCAN driver module, {‘socket’, ‘baud_rate’, ‘msg_timeout’}.
+        :return: Dictionary with parameters of SocketCAN driver module, {‘socket’, ‘baud_rate’, ‘msg_timeout’,
+        ‘interface_type’, ‘can_filters’, ‘fd’, ‘data_bitrate’, ‘bitrate_switch’}.
         """
         return self.__bus.get_parameters()
 
+    def set_filters(self, can_filters: list = None) -> None:
+        """
+        Replaces the filters of received frames without reopening the interface.
+        :param can_filters: list of python-can filters {‘can_id’, ‘can_mask’, ‘extended’}. If None, all the frames are
+        received.
+        """
+        self.__bus.set_filters(can_filters)
+
     def flush_incoming_data(self) -> None:
         """
         Clears incoming data queue. Could be useful between test cases running to minimize impact of previous tests
@@ -56,16 +197,52 @@ class CAN:
         """
         self.__bus.flush_incoming_data()
 
-    def register_message_callback(self, callback: Callable[dict]) -> None:
+    def get_statistics(self) -> dict:
+        """
+        Returns counters of the CAN interface. Useful to size timeouts and to find where time goes in long tests.
+        :return: Dictionary {‘bytes_in’, ‘frames_in’, ‘bytes_out’, ‘frames_out’, ‘send_errors’, ‘read_calls’,
+        ‘empty_reads’, ‘queue_depth’, ‘queue_high_water_mark’, ‘lost_messages’, ‘callback_time’, ‘callback_max_time’,
+        ‘reconnects’}. Callback times are in seconds. Bytes are payload bytes.
+        """
+        return self.__bus.get_statistics()
+
+    def get_wait_statistics(self) -> dict:
+        """
+        Returns counters of wait_for() calls.
+        :return: Dictionary {‘waits’, ‘matched’, ‘timeouts’, ‘pending’, ‘wakeups’, ‘wait_time’, ‘max_wait_time’,
+        ‘max_latency’}. wait_time is the total time spent in wait_for(), max_latency is the maximum time from the
+        timestamp of a message until it is returned. Times are in seconds.
+        """
+        return self.__bus.get_wait_statistics()
+
+    def get_queue_statistics(self) -> dict:
+        """
+        Returns counters of the incoming data queue. Could be useful to check how close the queue came to its capacity.
+        :return: Dictionary {‘capacity’, ‘policy’, ‘depth’, ‘high_water_mark’, ‘dropped’, ‘spilled’, ‘spill_depth’}.
+        """
+        return self.__bus.get_queue_statistics()
+
+    def register_message_callback(self, callback: Callable[[CanFrame], None], policy: str = None, capacity: int = None,
+                                  can_id: int = None, can_mask: int = None, id_range: tuple = None) -> None:
         """
         Registers callback function to the list inside the SocketCAN driver module. All the registered functions will
         be called when an incoming message will be received. If the callback function is already present in the list,
-        the method will do nothing.
+        the method will do nothing. The callback could be registered on an ID, an ID/mask pair or an ID range, then it
+        is called only for the matching frames. The callbacks of a frame are found by dictionary lookup, so watching a
+        few IDs on a busy bus does not cost a call of every callback for every frame.
         :param callback: function to be placed into the list of incoming data callbacks.
+        :param policy: OverflowPolicyConsts value applied when the callback does not keep up with incoming data. If
+        None, CALLBACK_OVERFLOW_POLICY is used.
+        :param capacity: number of messages which could be pending for the callback. If None, CALLBACK_QUEUE_CAPACITY
+        is used.
+        :param can_id: if set, the callback is called only for the frames with this ID.
+        :param can_mask: if set with can_id, the callback is called for the frames whose ID matches can_id in the bits
+        set in the mask.
+        :param id_range: (first, last) inclusive range of IDs, used if can_id is not set.
         """
-        self.__bus.register_message_callback(callback)
+        self.__bus.register_message_callback(callback, policy, capacity, can_id, can_mask, id_range)
 
-    def unregister_message_callback(self, callback: Callable[dict]) -> None:
+    def unregister_message_callback(self, callback: Callable[[CanFrame], None]) -> None:
         """
         Removes callback function of incoming data from the list inside SocketCAN driver module. If there is no such
         function presents, the method will do nothing.
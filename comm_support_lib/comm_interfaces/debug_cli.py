@@ -1,3 +1,4 @@
+import asyncio
 import queue
 import re
 import sys
@@ -6,7 +7,10 @@ from collections.abc import Callable
 from re import Pattern
 from threading import Lock
 
+from comm_support_lib.common.bounded_queue import BoundedQueue
 from comm_support_lib.common.meta_singleton import MetaSingleton
+from comm_support_lib.common.overflow_policy_consts import OverflowPolicyConsts
+from comm_support_lib.common.serial_base_interface import SerialBaseInterface
 from comm_support_lib.config.config import *
 from comm_support_lib.hw_drivers.serial_driver import SerialDriver
 
@@ -24,6 +28,8 @@ class DebugCLI(metaclass=MetaSingleton):
         print("DebugCLI receive. Time: " + str(time.time()) + "; Data: " + str(data_list), file=sys.stderr)
 
     last_string = None
+    # the previous chunk ended with '\r', so '\n' at the start of the next one belongs to the same line end
+    last_char_cr = False
 
     def __parse_incoming_data(self, msg: bytes):
         message_string_list = []
@@ -35,6 +41,11 @@ class DebugCLI(metaclass=MetaSingleton):
             return message_string_list
         else:
             decoded_data = msg.decode("utf-8", "ignore")
+            if self.last_char_cr and decoded_data.startswith("\n"):
+                decoded_data = decoded_data[1:]
+            self.last_char_cr = decoded_data.endswith("\r")
+            if len(decoded_data) == 0:
+                return message_string_list
             message_string_list = self.__INCOMING_DATA_SPLIT_REGEX.split(decoded_data)
 
             if self.last_string:
@@ -49,6 +60,9 @@ class DebugCLI(metaclass=MetaSingleton):
             return message_string_list
 
     def __incoming_message_callback(self, msg: bytes):
+        if not self.__parsing_enabled:
+            # binary transfer is in progress
+            return
         message_string_list = self.__parse_incoming_data(msg)
 
         if len(message_string_list) == 0:
@@ -74,18 +88,30 @@ class DebugCLI(metaclass=MetaSingleton):
             # add message into data queue
             self.__incoming_data_queue.put(message_string)
 
-    def __init__(self, mode: str = None, ic_timeout: float = DEBUG_CLI_INTERCHAR_TIMEOUT,
-                 msg_timeout: float = DEBUG_CLI_MSG_TIMEOUT):
+    def __init__(self, mode: str = None, ic_timeout: float or str = DEBUG_CLI_INTERCHAR_TIMEOUT,
+                 msg_timeout: float or str = DEBUG_CLI_MSG_TIMEOUT, bus: SerialBaseInterface = None,
+                 queue_capacity: int = DEBUG_CLI_QUEUE_CAPACITY, queue_policy: str = DEBUG_CLI_QUEUE_OVERFLOW_POLICY,
+                 read_mode: str = DEBUG_CLI_READ_MODE):
         """
         Class constructor. Initialize object during its creation. As Debug CLI implemented using Singleton design
         pattern, the method is being called only once.
         :param mode: Debug CLI h/w interface mode. Could be “Serial” of “SSH”.
-        :param ic_timeout: inter-char timeout, helps to avoid inter-frame gap.
-        :param msg_timeout: timeout between messages in seconds (inter-frame gap).
+        :param ic_timeout: inter-char timeout, helps to avoid inter-frame gap. Not used in low latency read mode.
+        “auto” means it is derived from the baud rate.
+        :param msg_timeout: timeout between messages in seconds (inter-frame gap). “auto” means it is derived from the
+        baud rate.
+        :param bus: already created driver to be used instead of the default one, e.g. AsyncSerialDriver. The driver
+        should be created with enqueue_incoming_data=False. If set, mode and timeouts are ignored.
+        :param queue_capacity: maximum number of strings in the incoming data queue.
+        :param queue_policy: OverflowPolicyConsts value applied when the incoming data queue is full.
+        :param read_mode: SerialReadModeConsts value. In low latency mode each chunk is parsed as soon as it is read, so
+        prompts are detected without waiting for inter-char timeout.
         """
-        if mode is None or mode == "Serial":
+        if bus is not None:
+            self.__bus = bus
+        elif mode is None or mode == "Serial":
             self.__bus = SerialDriver(DEBUG_CLI_SERIAL_PORT, DEBUG_CLI_SERIAL_BAUD, ic_timeout=ic_timeout,
-                                      msg_timeout=msg_timeout, enqueue_incoming_data=False)
+                                      msg_timeout=msg_timeout, enqueue_incoming_data=False, read_mode=read_mode)
         else:
             # here will be implementation of SSH interface
             pass
@@ -94,20 +120,91 @@ class DebugCLI(metaclass=MetaSingleton):
         self.__skip_list = set()
         self.__message_callback_dict_lock = Lock()
         self.__message_callback_dict = {}
-        self.__incoming_data_queue = queue.Queue(0)
+        self.__incoming_data_queue = BoundedQueue(queue_capacity, queue_policy, QUEUE_SPILL_DIR)
+        self.__binary_transfer_lock = Lock()
+        self.__parsing_enabled = True
 
-        self.__bus.register_message_callback(self.__incoming_message_callback)
+        # the console output is a stream: the pending chunks are merged instead of being dropped, and the reading
+        # thread never waits for the user callbacks invoked by the parser
+        self.__bus.register_message_callback(self.__incoming_message_callback, OverflowPolicyConsts.COALESCE)
 
-    def send_message(self, msg: str, eol: str = "\n") -> None:
+    def send_message(self, msg: str, eol: str = "\n", block: bool = True):
         """
         Performs message sending to CLI of Welbilt Common UI board.
         :param msg: Message to be sent to the board.
         :param eol: End Of Line symbol. By default is "\n"
+        :param block: if False, the method does not wait for the message to be transmitted and returns Future.
+        :return: result of the driver send_message(). If the driver is asynchronous, the result should be awaited.
         """
         if self.__DEBUG:
             print("send_message(): " + msg)
 
-        self.__bus.send_message((msg + eol).encode())
+        return self.__bus.send_message((msg + eol).encode(), block)
+
+    def send_many(self, messages, eol: str = "\n", block: bool = True):
+        """
+        Performs sending of several commands to CLI of Welbilt Common UI board using one write operation.
+        :param messages: iterable of messages (str) to be sent to the board.
+        :param eol: End Of Line symbol appended to each message. By default is "\n"
+        :param block: if False, the method does not wait for the messages to be transmitted and returns Future.
+        :return: result of the driver send_many(). If the driver is asynchronous, the result should be awaited.
+        """
+        if self.__DEBUG:
+            messages = list(messages)
+            print("send_many(): " + str(messages))
+
+        return self.__bus.send_many([(msg + eol).encode() for msg in messages], block)
+
+    def run_binary_transfer(self, transfer: Callable):
+        """
+        Suspends parsing of the incoming data and passes the driver to the function, e.g. to upload a file by
+        XmodemSender. The data received during the transfer does not appear in the incoming data queue and the
+        callbacks are not invoked on it.
+        :param transfer: function which takes the driver as the only argument.
+        :return: result of the function.
+        """
+        with self.__binary_transfer_lock:
+            self.__parsing_enabled = False
+            self.last_string = None
+            try:
+                return transfer(self.__bus)
+            finally:
+                self.last_string = None
+                self.__parsing_enabled = True
+
+    def start_capture(self, path: str) -> bool:
+        """
+        Starts writing of the console input and output into the binary capture file with timestamps and direction
+        tags. The capture could be played back later using ReplaySerialDriver, e.g.
+        DebugCLI(bus=ReplaySerialDriver(path)).
+        :param path: path to the capture file. The existing file is overwritten.
+        :return: True if the capture has been started, False otherwise.
+        """
+        return self.__bus.start_capture(path)
+
+    def stop_capture(self) -> None:
+        """
+        Stops capturing and closes the capture file.
+        """
+        self.__bus.stop_capture()
+
+    def get_statistics(self) -> dict:
+        """
+        Returns counters of the serial port of the debug console. Useful to size timeouts and to find where time goes
+        in long tests. The queue counters belong to the driver, see get_queue_statistics() for the queue of strings.
+        :return: Dictionary {‘bytes_in’, ‘frames_in’, ‘bytes_out’, ‘frames_out’, ‘read_calls’, ‘empty_reads’,
+        ‘queue_depth’, ‘queue_high_water_mark’, ‘lost_messages’, ‘callback_time’, ‘callback_max_time’, ‘reconnects’}.
+        Callback times are in seconds.
+        """
+        return self.__bus.get_statistics()
+
+    def get_write_statistics(self) -> dict:
+        """
+        Returns counters of outgoing data.
+        :return: Dictionary {‘messages’, ‘bytes’, ‘writes’, ‘failed’, ‘pending’, ‘write_time’, ‘throughput’}.
+        write_time is in seconds, throughput is in bytes per second.
+        """
+        return self.__bus.get_write_statistics()
 
     def get_message(self, timeout: float, expected_str: Pattern = None) -> str or None:
         """
@@ -137,6 +234,35 @@ class DebugCLI(metaclass=MetaSingleton):
             if (time.time() - start_time) > timeout:
                 return None
 
+    async def wait_for_message(self, timeout: float, expected_str: Pattern or set = None) -> str or None:
+        """
+        Waits for the next incoming message without blocking the event loop, so several interfaces could be waited
+        concurrently. Unlike get_message(), only messages received after the call are checked and the incoming data
+        queue is not changed.
+        :param timeout: Timeout waiting for the message. Represents time in seconds.
+        :param expected_str: regex or set of regexes the message should match. By default is None, what means that any
+        message will be returned.
+        :return: None if timeout occurred. Otherwise – message string.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def set_result(msg: str):
+            if not future.done():
+                future.set_result(msg)
+
+        def callback(msg: str):
+            # callbacks could be invoked from the driver thread
+            loop.call_soon_threadsafe(set_result, msg)
+
+        self.register_message_callback(callback, expected_str)
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            self.unregister_message_callback(callback)
+
     def get_parameters(self) -> dict:
         """
         Returns parameters of Debug CLI h/w driver. Return type is Dict.
@@ -150,13 +276,16 @@ class DebugCLI(metaclass=MetaSingleton):
         Clears incoming data queue. Could be useful between test cases running to minimize impact of previous tests
         on the current test.
         """
-        while True:
-            try:
-                self.__incoming_data_queue.get(block=False)
-            except queue.Empty:
-                break
+        self.__incoming_data_queue.clear()
+
+    def get_queue_statistics(self) -> dict:
+        """
+        Returns counters of the incoming data queue. Could be useful to check how close the queue came to its capacity.
+        :return: Dictionary {‘capacity’, ‘policy’, ‘depth’, ‘high_water_mark’, ‘dropped’, ‘spilled’, ‘spill_depth’}.
+        """
+        return self.__incoming_data_queue.get_statistics()
 
-    def register_message_callback(self, callback: Callable[str], expected_str: Pattern or set = None) -> None:
+    def register_message_callback(self, callback: Callable[[str], None], expected_str: Pattern or set = None) -> None:
         """
         Registers callback function to the list inside the Debug CLI module. All the registered functions will be
         called when an incoming message will be received. If the callback function is already present in the list,
@@ -184,7 +313,7 @@ class DebugCLI(metaclass=MetaSingleton):
                 else:
                     self.__message_callback_dict[callback].update(expected_str)
 
-    def unregister_message_callback(self, callback: Callable[str], expected_str: Pattern or set = None) -> None:
+    def unregister_message_callback(self, callback: Callable[[str], None], expected_str: Pattern or set = None) -> None:
         """
         Removes incoming data callback function of from the callback list inside Debug CLI module. If there is no such
         function presents, the method will do nothing. If a filter for specific messages is set, the method will remove
@@ -0,0 +1,454 @@
+import asyncio
+import queue
+import sys
+import threading
+import time
+from collections import deque
+
+from comm_support_lib.comm_interfaces.can_socket import CAN
+from comm_support_lib.common.bounded_queue import BoundedQueue
+from comm_support_lib.common.can_frame import CanFrame
+from comm_support_lib.common.overflow_policy_consts import OverflowPolicyConsts
+from comm_support_lib.config.config import ISO_TP_BLOCK_SIZE, ISO_TP_ST_MIN, ISO_TP_TIMEOUT, ISO_TP_MAX_WAIT_FRAMES, \
+    ISO_TP_QUEUE_CAPACITY
+
+# protocol control information types, the high nibble of the first byte
+_SINGLE_FRAME = 0x0
+_FIRST_FRAME = 0x1
+_CONSECUTIVE_FRAME = 0x2
+_FLOW_CONTROL = 0x3
+# flow status of flow control frame
+_CONTINUE_TO_SEND = 0x0
+_WAIT = 0x1
+_OVERFLOW = 0x2
+# data length of classic CAN frame
+_FRAME_SIZE = 8
+# maximum message length which fits into 12 bits of the first frame, longer messages use 32 bit length
+_FIRST_FRAME_MAX_LENGTH = 0xFFF
+# header length of the first frame with 12 bit and 32 bit message length
+_FIRST_FRAME_HEADER_LENGTH = 2
+_FIRST_FRAME_ESCAPE_HEADER_LENGTH = 6
+_MAX_MESSAGE_LENGTH = 0xFFFFFFFF
+
+
+class IsoTp:
+    """
+    ISO-TP (ISO 15765-2) transport over CAN interface. Messages longer than a frame are segmented into the first frame
+    and consecutive frames, the sender waits for flow control frames of the receiver, which set the block size and the
+    minimum separation time (STmin). The frames of the peer are taken by the callback registered on the receive ID,
+    so the endpoint sends and receives at the same time. send_message() blocks until the message is sent,
+    send_message_async() and get_message_async() could be awaited in the event loop.
+    Two endpoints with swapped IDs on CAN interfaces of one virtual bus could talk to each other in one process.
+    """
+
+    def __init__(self, can: CAN, tx_id: int, rx_id: int, is_extended_id: bool = False,
+                 block_size: int = ISO_TP_BLOCK_SIZE, st_min: float = ISO_TP_ST_MIN, timeout: float = ISO_TP_TIMEOUT,
+                 padding: int = None):
+        """
+        Class constructor. Registers the callback on rx_id, close() unregisters it.
+        :param can: CAN interface.
+        :param tx_id: arbitration ID of the frames sent by this endpoint, including its flow control frames.
+        :param rx_id: arbitration ID of the frames sent by the peer.
+        :param is_extended_id: if the IDs are extended, should be True.
+        :param block_size: number of consecutive frames the peer could send before the next flow control frame, from
+        0 to 255. 0 means the peer sends the whole message after the first flow control frame.
+        :param st_min: minimum time between consecutive frames of the peer in seconds. Values below 1 ms are rounded to
+        100 µs, the maximum is 0.127.
+        :param timeout: time to wait for flow control and consecutive frames of the peer in seconds.
+        :param padding: byte the frames are padded with to 8 bytes. If None, the frames are not padded.
+        """
+        if not 0 <= block_size <= 0xFF:
+            raise ValueError("Wrong block size passed: {}".format(block_size))
+        if not 0 <= st_min <= 0.127:
+            raise ValueError("Wrong STmin passed: {}".format(st_min))
+        if padding is not None and not 0 <= padding <= 0xFF:
+            raise ValueError("Wrong padding byte passed: {}".format(padding))
+        self.__can = can
+        self.__tx_id = tx_id
+        self.__rx_id = rx_id
+        self.__is_extended_id = is_extended_id
+        self.__block_size = block_size
+        self.__st_min = self.__encode_st_min(st_min)
+        self.__timeout = timeout
+        self.__padding = padding
+        self.__tx_lock = threading.Lock()
+        # flow control frames of the peer (flow status, block size, STmin in seconds)
+        self.__flow_control = deque()
+        self.__flow_control_condition = threading.Condition()
+        self.__messages = BoundedQueue(ISO_TP_QUEUE_CAPACITY, OverflowPolicyConsts.DROP_OLDEST)
+        # message being received: data, expected length, next sequence number, frames since the last flow control,
+        # interface timestamps of the first frame and of the last received frame, local time the next consecutive
+        # frame should be received before
+        self.__rx_data = None
+        self.__rx_length = 0
+        self.__rx_sequence = 0
+        self.__rx_block_frames = 0
+        self.__rx_start_time = 0.0
+        self.__rx_last_time = 0.0
+        self.__rx_deadline = 0.0
+        # the message being received is checked for timeout by get_message() as well as by the callback
+        self.__rx_lock = threading.Lock()
+        self.__lock = threading.Lock()
+        self.__reset_statistics()
+        # a lost frame breaks the message being received, the callback never waits itself
+        self.__can.register_message_callback(self.__on_frame, OverflowPolicyConsts.BLOCK, can_id=rx_id)
+
+    def close(self) -> None:
+        """
+        Unregisters the callback from CAN interface. The endpoint could not be used after that.
+        """
+        self.__can.unregister_message_callback(self.__on_frame)
+
+    @staticmethod
+    def __encode_st_min(st_min: float) -> int:
+        if 0 < st_min < 0.001:
+            return 0xF0 + min(max(round(st_min * 10000), 1), 9)
+        return round(st_min * 1000)
+
+    @staticmethod
+    def __decode_st_min(value: int) -> float:
+        if value <= 0x7F:
+            return value / 1000
+        if 0xF1 <= value <= 0xF9:
+            return (value - 0xF0) / 10000
+        # reserved values are treated as the maximum STmin
+        return 0.127
+
+    def __get_frame(self, data) -> tuple:
+        data = bytes(data)
+        if self.__padding is not None and len(data) < _FRAME_SIZE:
+            data += bytes((self.__padding,)) * (_FRAME_SIZE - len(data))
+        return self.__tx_id, data, self.__is_extended_id
+
+    def __send_frames(self, frames: list) -> bool:
+        sent = self.__can.send_burst(frames)
+        with self.__lock:
+            self.__frames_sent += sent
+        return sent == len(frames)
+
+    def __send_flow_control(self, flow_status: int) -> None:
+        if self.__send_frames([self.__get_frame((_FLOW_CONTROL << 4 | flow_status, self.__block_size,
+                                                  self.__st_min))]):
+            with self.__lock:
+                self.__flow_control_sent += 1
+
+    def __wait_for_flow_control(self) -> tuple or None:
+        """
+        Wait for the flow control frame of the peer
+            Returns:
+                (flow status, block size, STmin) (tuple): None if timeout expired
+        """
+        start_time = time.perf_counter()
+        with self.__flow_control_condition:
+            self.__flow_control_condition.wait_for(lambda: self.__flow_control, self.__timeout)
+            flow_control = self.__flow_control.popleft() if self.__flow_control else None
+        with self.__lock:
+            self.__flow_control_wait_time += time.perf_counter() - start_time
+        return flow_control
+
+    def __send_consecutive_frames(self, data: memoryview, offset: int, sequence: int, count: int,
+                                  st_min: float) -> tuple or None:
+        """
+        Send up to count consecutive frames. The frames are sent by one burst if STmin is 0
+            Returns:
+                (offset, sequence) (tuple): position of the next frame, None if failed to send
+        """
+        frames = []
+        while offset < len(data) and len(frames) < count:
+            frames.append(self.__get_frame(bytes((_CONSECUTIVE_FRAME << 4 | sequence,)) +
+                                           data[offset:offset + _FRAME_SIZE - 1]))
+            offset += _FRAME_SIZE - 1
+            sequence = (sequence + 1) & 0x0F
+        if st_min == 0:
+            return (offset, sequence) if self.__send_frames(frames) else None
+        next_time = time.perf_counter()
+        for frame in frames:
+            delay = next_time - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            if not self.__send_frames([frame]):
+                return None
+            next_time = time.perf_counter() + st_min
+        return offset, sequence
+
+    def __send_segmented(self, data: memoryview) -> bool:
+        with self.__flow_control_condition:
+            self.__flow_control.clear()
+        if len(data) <= _FIRST_FRAME_MAX_LENGTH:
+            header = bytes((_FIRST_FRAME << 4 | len(data) >> 8, len(data) & 0xFF))
+        else:
+            header = bytes((_FIRST_FRAME << 4, 0)) + len(data).to_bytes(4, "big")
+        offset = _FRAME_SIZE - len(header)
+        if not self.__send_frames([self.__get_frame(header + data[:offset])]):
+            return False
+        sequence = 1
+        wait_frames = 0
+        while offset < len(data):
+            flow_control = self.__wait_for_flow_control()
+            if flow_control is None:
+                print("IsoTp. Timeout occurred on waiting for flow control", file=sys.stderr)
+                with self.__lock:
+                    self.__timeouts += 1
+                return False
+            flow_status, block_size, st_min = flow_control
+            if flow_status == _WAIT:
+                wait_frames += 1
+                with self.__lock:
+                    self.__wait_frames += 1
+                if wait_frames > ISO_TP_MAX_WAIT_FRAMES:
+                    print("IsoTp. Too many wait frames received", file=sys.stderr)
+                    return False
+                continue
+            if flow_status != _CONTINUE_TO_SEND:
+                print("IsoTp. Transfer is rejected by the peer, flow status {}".format(flow_status), file=sys.stderr)
+                return False
+            wait_frames = 0
+            position = self.__send_consecutive_frames(data, offset, sequence, block_size or len(data), st_min)
+            if position is None:
+                return False
+            offset, sequence = position
+        return True
+
+    def send_message(self, data: bytes) -> bool:
+        """
+        Sends the message. The method blocks until all the frames are sent, the messages sent from several threads are
+        sent one after another.
+        :param data: message payload, from 1 byte to 4 GiB.
+        :return: True if the message has been sent, False if the peer has not responded or rejected the transfer.
+        """
+        if not 0 < len(data) <= _MAX_MESSAGE_LENGTH:
+            raise ValueError("Wrong message length passed: {} bytes".format(len(data)))
+        data = memoryview(bytes(data))
+        with self.__tx_lock:
+            start_time = time.perf_counter()
+            if len(data) < _FRAME_SIZE:
+                result = self.__send_frames([self.__get_frame(bytes((_SINGLE_FRAME << 4 | len(data),)) + data)])
+            else:
+                result = self.__send_segmented(data)
+            send_time = time.perf_counter() - start_time
+        with self.__lock:
+            if result:
+                self.__messages_sent += 1
+                self.__bytes_sent += len(data)
+                self.__send_time += send_time
+                self.__max_send_time = max(self.__max_send_time, send_time)
+            else:
+                self.__errors += 1
+        return result
+
+    async def send_message_async(self, data: bytes) -> bool:
+        """
+        Sends the message without blocking the event loop, see send_message(). The frames are sent by a thread of the
+        default executor of the loop.
+        """
+        return await asyncio.get_running_loop().run_in_executor(None, self.send_message, data)
+
+    def get_message(self, timeout: float) -> bytes or None:
+        """
+        Takes the next received message. The message being received is aborted if the peer has not sent its next
+        consecutive frame in time.
+        :param timeout: time to wait for the message in seconds.
+        :return: message payload, None if timeout occurred.
+        """
+        try:
+            return self.__messages.get(True, timeout)
+        except queue.Empty:
+            self.__check_reception_timeout()
+            return None
+
+    async def get_message_async(self, timeout: float) -> bytes or None:
+        """
+        Takes the next received message without blocking the event loop, see get_message(). The message is waited for
+        by a thread of the default executor of the loop.
+        """
+        return await asyncio.get_running_loop().run_in_executor(None, self.get_message, timeout)
+
+    def flush_incoming_data(self) -> None:
+        """
+        Clears the queue of received messages.
+        """
+        self.__messages.clear()
+
+    def __abort_reception(self, reason: str, timeout: bool = False) -> None:
+        """
+        Drop the message being received. Should be called holding the reception lock
+        """
+        print("IsoTp. Reception aborted: {}".format(reason), file=sys.stderr)
+        self.__rx_data = None
+        with self.__lock:
+            self.__errors += 1
+            if timeout:
+                self.__timeouts += 1
+
+    def __check_reception_timeout(self) -> None:
+        with self.__rx_lock:
+            if self.__rx_data is not None and time.monotonic() > self.__rx_deadline:
+                self.__abort_reception("timeout occurred on waiting for consecutive frame", True)
+
+    @staticmethod
+    def __get_first_frame_length(data) -> tuple or None:
+        """
+        Get message length of the first frame
+            Returns:
+                (length, header length) (tuple): None if the length is invalid
+        """
+        if len(data) < _FIRST_FRAME_HEADER_LENGTH:
+            return None
+        length = (data[0] & 0x0F) << 8 | data[1]
+        if length:
+            # shorter messages are sent by single frame
+            return (length, _FIRST_FRAME_HEADER_LENGTH) if length >= _FRAME_SIZE else None
+        if len(data) < _FIRST_FRAME_ESCAPE_HEADER_LENGTH:
+            return None
+        length = int.from_bytes(data[_FIRST_FRAME_HEADER_LENGTH:_FIRST_FRAME_ESCAPE_HEADER_LENGTH], "big")
+        # 32 bit length is used only for messages which do not fit into 12 bits
+        return (length, _FIRST_FRAME_ESCAPE_HEADER_LENGTH) if length > _FIRST_FRAME_MAX_LENGTH else None
+
+    def __deliver(self, data: bytes, receive_time: float = None) -> None:
+        """
+        Put the received message into the queue. receive_time is None for single frames
+        """
+        self.__messages.put(data)
+        with self.__lock:
+            self.__messages_received += 1
+            self.__bytes_received += len(data)
+            if receive_time is None:
+                return
+            self.__segmented_bytes_received += len(data)
+            self.__receive_time += receive_time
+            self.__max_receive_time = max(self.__max_receive_time, receive_time)
+
+    def __on_frame(self, frame: CanFrame) -> None:
+        """
+        Callback of the frames of the peer, it is called in the thread of the callback
+        """
+        data = frame.payload
+        if not data:
+            return
+        with self.__lock:
+            self.__frames_received += 1
+        frame_type = data[0] >> 4
+        if frame_type == _FLOW_CONTROL:
+            if len(data) < 3:
+                return
+            with self.__flow_control_condition:
+                self.__flow_control.append((data[0] & 0x0F, data[1], self.__decode_st_min(data[2])))
+                self.__flow_control_condition.notify()
+            with self.__lock:
+                self.__flow_control_received += 1
+            return
+        with self.__rx_lock:
+            self.__on_data_frame(frame_type, data, frame.timestamp)
+
+    def __on_data_frame(self, frame_type: int, data: bytes, now: float) -> None:
+        """
+        Process single, first or consecutive frame of the peer. now is the timestamp of the frame reported by the
+        interface. Should be called holding the reception lock
+        """
+        if frame_type == _SINGLE_FRAME:
+            if self.__rx_data is not None:
+                self.__abort_reception("single frame during segmented message")
+            length = data[0] & 0x0F
+            if 0 < length < len(data):
+                self.__deliver(bytes(data[1:1 + length]))
+        elif frame_type == _FIRST_FRAME:
+            first_frame_length = self.__get_first_frame_length(data)
+            if first_frame_length is None:
+                # the frame is ignored, so the message being received is not broken by it
+                print("IsoTp. First frame with wrong message length ignored: {}".format(bytes(data).hex()),
+                      file=sys.stderr)
+                with self.__lock:
+                    self.__errors += 1
+                return
+            if self.__rx_data is not None:
+                self.__abort_reception("new first frame during segmented message")
+            length, header_length = first_frame_length
+            self.__rx_data = bytearray(data[header_length:])
+            self.__rx_length = length
+            self.__rx_sequence = 1
+            self.__rx_block_frames = 0
+            self.__rx_start_time = self.__rx_last_time = now
+            self.__rx_deadline = time.monotonic() + self.__timeout
+            self.__send_flow_control(_CONTINUE_TO_SEND)
+        elif frame_type == _CONSECUTIVE_FRAME:
+            if self.__rx_data is None:
+                return
+            if now - self.__rx_last_time > self.__timeout:
+                self.__abort_reception("timeout occurred on waiting for consecutive frame", True)
+                return
+            if data[0] & 0x0F != self.__rx_sequence:
+                self.__abort_reception("wrong sequence number {}, expected {}".format(data[0] & 0x0F,
+                                                                                      self.__rx_sequence))
+                return
+            self.__rx_data += data[1:]
+            self.__rx_sequence = (self.__rx_sequence + 1) & 0x0F
+            self.__rx_last_time = now
+            self.__rx_deadline = time.monotonic() + self.__timeout
+            if len(self.__rx_data) >= self.__rx_length:
+                message = bytes(self.__rx_data[:self.__rx_length])
+                self.__rx_data = None
+                self.__deliver(message, now - self.__rx_start_time)
+                return
+            self.__rx_block_frames += 1
+            if self.__block_size and self.__rx_block_frames == self.__block_size:
+                self.__rx_block_frames = 0
+                self.__send_flow_control(_CONTINUE_TO_SEND)
+
+    def __reset_statistics(self):
+        self.__messages_sent = 0
+        self.__bytes_sent = 0
+        self.__messages_received = 0
+        self.__bytes_received = 0
+        self.__segmented_bytes_received = 0
+        self.__frames_sent = 0
+        self.__frames_received = 0
+        self.__flow_control_sent = 0
+        self.__flow_control_received = 0
+        self.__wait_frames = 0
+        self.__timeouts = 0
+        self.__errors = 0
+        self.__send_time = 0.0
+        self.__max_send_time = 0.0
+        self.__receive_time = 0.0
+        self.__max_receive_time = 0.0
+        self.__flow_control_wait_time = 0.0
+
+    def reset_statistics(self) -> None:
+        """
+        Resets the counters, e.g. between the runs with different block size and STmin.
+        """
+        with self.__lock:
+            self.__reset_statistics()
+
+    def get_statistics(self) -> dict:
+        """
+        Returns the counters of the endpoint. Useful to tune block size and STmin for maximum transfer rate.
+        :return: Dictionary {‘messages_sent’, ‘bytes_sent’, ‘messages_received’, ‘bytes_received’, ‘frames_sent’,
+        ‘frames_received’, ‘flow_control_sent’, ‘flow_control_received’, ‘wait_frames’, ‘timeouts’, ‘errors’,
+        ‘send_time’, ‘max_send_time’, ‘receive_time’, ‘max_receive_time’, ‘flow_control_wait_time’, ‘tx_throughput’,
+        ‘rx_throughput’}. send_time is the total time of the sent messages from the first frame until the last one,
+        receive_time is the total time of the received segmented messages from the first frame until the last one,
+        flow_control_wait_time is the total time the sender waited for the peer. Times are in seconds, throughputs are
+        in payload bytes per second, rx_throughput is of the segmented messages. errors counts failed transfers in both
+        directions.
+        """
+        with self.__lock:
+            return {'messages_sent': self.__messages_sent,
+                    'bytes_sent': self.__bytes_sent,
+                    'messages_received': self.__messages_received,
+                    'bytes_received': self.__bytes_received,
+                    'frames_sent': self.__frames_sent,
+                    'frames_received': self.__frames_received,
+                    'flow_control_sent': self.__flow_control_sent,
+                    'flow_control_received': self.__flow_control_received,
+                    'wait_frames': self.__wait_frames,
+                    'timeouts': self.__timeouts,
+                    'errors': self.__errors,
+                    'send_time': self.__send_time,
+                    'max_send_time': self.__max_send_time,
+                    'receive_time': self.__receive_time,
+                    'max_receive_time': self.__max_receive_time,
+                    'flow_control_wait_time': self.__flow_control_wait_time,
+                    'tx_throughput': self.__bytes_sent / self.__send_time if self.__send_time else 0.0,
+                    'rx_throughput': self.__segmented_bytes_received / self.__receive_time
+                    if self.__receive_time else 0.0}
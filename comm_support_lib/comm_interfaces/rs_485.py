@@ -1,39 +1,127 @@
 from collections.abc import Callable
 
+from comm_support_lib.common.framers import Frame, Framer
+from comm_support_lib.common.serial_base_interface import SerialBaseInterface
 from comm_support_lib.config.config import *
 from comm_support_lib.hw_drivers.serial_driver import SerialDriver
 
 
 class RS485:
     def __init__(self, port: str, rate: int, parity: str, stop_bit: int,
-                 ic_timeout: float = RS_485_INTERCHAR_TIMEOUT, msg_timeout: float = RS_485_MSG_TIMEOUT):
+                 ic_timeout: float or str = RS_485_INTERCHAR_TIMEOUT,
+                 msg_timeout: float or str = RS_485_MSG_TIMEOUT, bus: SerialBaseInterface = None,
+                 queue_capacity: int = SERIAL_QUEUE_CAPACITY,
+                 queue_policy: str = SERIAL_QUEUE_OVERFLOW_POLICY, framer: Framer = None,
+                 read_mode: str = RS_485_READ_MODE):
         """
         Class constructor. Initialize object during its creation.
         :param rate: baud rate of the RS-485 serial converter
         :param parity: parity settings for the RS-485 serial converter
         :param stop_bit: stop bit settings for the RS-485 serial converter. could be one of the next values: 1, 1.5, 2.
         :param port: port of the RS-485 serial converter.
-        :param ic_timeout: inter-char timeout, helps to avoid inter-frame gap.
-        :param msg_timeout: timeout between messages in seconds.
+        :param ic_timeout: inter-char timeout, helps to avoid inter-frame gap. “auto” means it is derived from the baud
+        rate.
+        :param msg_timeout: timeout between messages in seconds. “auto” means it is derived from the baud rate.
+        :param bus: already created driver to be used instead of SerialDriver, e.g. AsyncSerialDriver. If set, the port
+        settings are ignored. With asynchronous driver, results of the methods, which perform I/O, should be awaited.
+        :param queue_capacity: size of the incoming data buffer in bytes.
+        :param queue_policy: OverflowPolicyConsts value applied when the incoming data buffer is full.
+        :param framer: framer which splits incoming data into frames, e.g. ModbusRtuFramer or
+        DelimiterFramer(CommonConst.RS485_EOL.encode()). If set, ic_timeout is not used to find the end of a message.
+        :param read_mode: SerialReadModeConsts value, low latency or bulk reading of the incoming data.
+        """
+        if bus is not None:
+            self.__bus = bus
+        else:
+            self.__bus = SerialDriver(port, rate, ic_timeout, msg_timeout, parity=parity,
+                                      stopbits=stop_bit, queue_capacity=queue_capacity, queue_policy=queue_policy,
+                                      read_mode=read_mode)
+        if framer is not None:
+            self.__bus.set_framer(framer)
+
+    def set_framer(self, framer: Framer or None) -> None:
+        """
+        Sets framer which splits incoming data into frames. Only complete frames will be passed to the callbacks and
+        returned by get_message() and get_frame(). Incoming data queue is cleared.
+        :param framer: framer object, None to split incoming data by inter-char timeout.
         """
-        self.__bus = SerialDriver(port, rate, ic_timeout, msg_timeout, parity=parity,
-                                  stopbits=stop_bit)
+        self.__bus.set_framer(framer)
 
-    def update_serial_config(self, rate: int, parity: str, stop_bit: int) -> None:
+    def update_serial_config(self, rate: int, parity: str, stop_bit: int):
         """
         Update configuration of serial port including baud rate, parity and stop bit configs.
         :param rate: baud rate of the RS-485 serial converter.
         :param parity: parity settings for the RS-485 serial converter.
         :param stop_bit: stop bit settings for the RS-485 serial converter
+        :return: True if the configuration has been applied successfully, False otherwise.
         """
-        self.__bus.update_port_config(rate, parity, stop_bit)
+        return self.__bus.update_port_config(rate, parity, stop_bit)
 
-    def send_message(self, msg: bytes) -> None:
+    def sweep(self, configs, fn) -> list:
+        """
+        Applies several serial port configurations one by one without reopening the port and calls the function for
+        each of them. The initial configuration is restored at the end.
+        :param configs: iterable of dictionaries with ‘baud_rate’, ‘parity’ and ‘stopbits’ keys. Missing keys keep the
+        initial values.
+        :param fn: function called with the configuration dictionary once it has been applied. With asynchronous driver
+        it could be a coroutine function.
+        :return: list of values returned by fn, None for the configurations which failed to be applied.
+        """
+        return self.__bus.sweep(configs, fn)
+
+    def send_message(self, msg: bytes, block: bool = True):
         """
         Performs message sending to RS-485 through serial converter.
         :param msg: message to be sent to the board
+        :param block: if False, the method does not wait for the message to be transmitted.
+        :return: True if message has been sent successfully, False otherwise. If block is False, Future which will be
+        completed with the same value.
+        """
+        return self.__bus.send_message(msg, block)
+
+    def send_many(self, messages, block: bool = True):
+        """
+        Performs sending of several messages to RS-485 using one write operation. Useful to stream large payloads
+        split into small messages.
+        :param messages: iterable of messages (bytes) to be sent to the board.
+        :param block: if False, the method does not wait for the messages to be transmitted.
+        :return: True if messages have been sent successfully, False otherwise. If block is False, Future which will be
+        completed with the same value.
+        """
+        return self.__bus.send_many(messages, block)
+
+    def start_capture(self, path: str) -> bool:
+        """
+        Starts writing of incoming and outgoing data into the binary capture file with timestamps and direction tags.
+        The capture could be played back later using ReplaySerialDriver, e.g.
+        RS485(None, 0, None, 0, bus=ReplaySerialDriver(path)).
+        :param path: path to the capture file. The existing file is overwritten.
+        :return: True if the capture has been started, False otherwise.
+        """
+        return self.__bus.start_capture(path)
+
+    def stop_capture(self) -> None:
+        """
+        Stops capturing and closes the capture file.
         """
-        self.__bus.send_message(msg)
+        self.__bus.stop_capture()
+
+    def get_statistics(self) -> dict:
+        """
+        Returns counters of the serial port. Useful to size timeouts and to find where time goes in long tests.
+        :return: Dictionary {‘bytes_in’, ‘frames_in’, ‘bytes_out’, ‘frames_out’, ‘read_calls’, ‘empty_reads’,
+        ‘queue_depth’, ‘queue_high_water_mark’, ‘lost_messages’, ‘callback_time’, ‘callback_max_time’, ‘reconnects’}.
+        Callback times are in seconds.
+        """
+        return self.__bus.get_statistics()
+
+    def get_write_statistics(self) -> dict:
+        """
+        Returns counters of outgoing data.
+        :return: Dictionary {‘messages’, ‘bytes’, ‘writes’, ‘failed’, ‘pending’, ‘write_time’, ‘throughput’}.
+        write_time is in seconds, throughput is in bytes per second.
+        """
+        return self.__bus.get_write_statistics()
 
     def get_message(self, timeout: float) -> bytes or None:
         """
@@ -43,6 +131,15 @@ class RS485:
         """
         return self.__bus.get_message(timeout)
 
+    def get_frame(self, timeout: float) -> Frame or None:
+        """
+        Performs getting frame from RS-485 h/w interface together with its arrival time.
+        :param timeout: timeout waiting for available data in message queue.
+        :return: None if nothing to read from message queue, or timeout occurred. Otherwise – Frame object with ‘data’
+        and ‘timestamp’ (time.monotonic() based arrival time of the last byte) attributes.
+        """
+        return self.__bus.get_frame(timeout)
+
     def get_parameters(self) -> dict:
         """
         Returns parameters of RS-485 serial converter. Return type is Dict.
@@ -58,16 +155,30 @@ class RS485:
         """
         self.__bus.flush_incoming_data()
 
-    def register_message_callback(self, callback: Callable[bytes]) -> None:
+    def get_queue_statistics(self) -> dict:
+        """
+        Returns counters of the incoming data buffer. Could be useful to check how close the buffer came to its
+        capacity.
+        :return: Dictionary {‘capacity’, ‘policy’, ‘depth’, ‘used_bytes’, ‘high_water_mark’, ‘dropped’, ‘spilled’,
+        ‘spill_depth’}. Sizes are in bytes, depth is number of messages.
+        """
+        return self.__bus.get_queue_statistics()
+
+    def register_message_callback(self, callback: Callable[[bytes], None], policy: str = None,
+                                  capacity: int = None) -> None:
         """
         Registers callback function to the list inside the RS-485 driver module. All the registered functions will be
         called when an incoming message will be received. If the callback function is already present in the list,
         the method will do nothing.
         :param callback: function to be placed into the list of incoming data callbacks
+        :param policy: OverflowPolicyConsts value applied when the callback does not keep up with incoming data. If
+        None, CALLBACK_OVERFLOW_POLICY is used.
+        :param capacity: number of messages which could be pending for the callback. If None, CALLBACK_QUEUE_CAPACITY
+        is used.
         """
-        self.__bus.register_message_callback(callback)
+        self.__bus.register_message_callback(callback, policy, capacity)
 
-    def unregister_message_callback(self, callback: Callable[bytes]) -> None:
+    def unregister_message_callback(self, callback: Callable[[bytes], None]) -> None:
         """
         Removes callback function of incoming data from the list inside RS-485 driver module. If there is no such
         function presents, the method will do nothing.
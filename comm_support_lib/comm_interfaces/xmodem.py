@@ -0,0 +1,462 @@
+import binascii
+import os
+import sys
+import threading
+import time
+
+from comm_support_lib.common.overflow_policy_consts import OverflowPolicyConsts
+from comm_support_lib.common.serial_base_interface import SerialBaseInterface
+from comm_support_lib.common.xmodem_protocol_consts import XmodemProtocolConsts
+from comm_support_lib.config.config import XMODEM_START_TIMEOUT, XMODEM_ACK_TIMEOUT, XMODEM_MAX_RETRIES
+
+_SOH = 0x01  # start of 128 byte block
+_STX = 0x02  # start of 1024 byte block
+_EOT = 0x04  # end of transmission
+_ACK = 0x06
+_NAK = 0x15
+_CAN = 0x18  # cancel, two in a row abort the transfer
+_CRC = 0x43  # "C", the receiver requests the transfer with CRC-16
+_PAD = 0x1A  # CP/M end of file, fills the last data block
+_SMALL_BLOCK_SIZE = 128
+_LARGE_BLOCK_SIZE = 1024
+
+
+class _ByteReader:
+    """
+    Collects the bytes passed to the message callback of the driver
+    """
+
+    def __init__(self):
+        self.__buffer = bytearray()
+        self.__condition = threading.Condition()
+
+    def on_message(self, msg: bytes):
+        if len(msg) == 0:
+            return
+        with self.__condition:
+            self.__buffer += msg
+            self.__condition.notify_all()
+
+    def read(self, size: int, timeout: float) -> bytes:
+        """
+        Read exactly size bytes. Fewer bytes are returned if timeout expired.
+        """
+        with self.__condition:
+            self.__condition.wait_for(lambda: len(self.__buffer) >= size, timeout)
+            data = bytes(self.__buffer[:size])
+            del self.__buffer[:size]
+            return data
+
+    def purge(self):
+        with self.__condition:
+            self.__buffer.clear()
+
+
+def _get_statistics(data_bytes: int, blocks: int, retransmissions: int, timeouts: int, elapsed: float) -> dict:
+    return {'bytes': data_bytes,
+            'blocks': blocks,
+            'retransmissions': retransmissions,
+            'timeouts': timeouts,
+            'elapsed': elapsed,
+            'throughput': data_bytes / elapsed if elapsed > 0 else 0.0}
+
+
+class XmodemSender:
+    """
+    XMODEM-1K and YMODEM sender, e.g. to upload images by U-Boot "loadx"/"loady" commands over the debug console.
+    Blocks are written by send_message() of the driver, the responses are taken by the message callback registered for
+    the time of the transfer. Only synchronous drivers are supported.
+    """
+
+    def __init__(self, bus: SerialBaseInterface, protocol: str = XmodemProtocolConsts.YMODEM,
+                 start_timeout: float = XMODEM_START_TIMEOUT, ack_timeout: float = XMODEM_ACK_TIMEOUT,
+                 max_retries: int = XMODEM_MAX_RETRIES):
+        """
+        Class constructor.
+        :param bus: driver of the port the receiver is connected to, e.g. SerialDriver.
+        :param protocol: XmodemProtocolConsts value.
+        :param start_timeout: time to wait for the receiver to request the transfer in seconds.
+        :param ack_timeout: time to wait for the block to be acknowledged in seconds.
+        :param max_retries: maximum number of retransmissions of one block.
+        """
+        if protocol not in (XmodemProtocolConsts.XMODEM, XmodemProtocolConsts.YMODEM):
+            raise ValueError("Wrong protocol passed: {}".format(protocol))
+        self.__bus = bus
+        self.__protocol = protocol
+        self.__start_timeout = start_timeout
+        self.__ack_timeout = ack_timeout
+        self.__max_retries = max_retries
+        self.__cancel_event = threading.Event()
+        self.__data_bytes = 0
+        self.__blocks = 0
+        self.__retransmissions = 0
+        self.__timeouts = 0
+        self.__elapsed = 0.0
+
+    def __cancel(self):
+        self.__bus.send_message(bytes([_CAN, _CAN]))
+
+    def __wait_for_start(self, reader: _ByteReader) -> bool or None:
+        """
+        Wait for the receiver to request the transfer
+        :return: True if CRC-16 is requested, False if checksum is requested, None on timeout or cancellation.
+        """
+        deadline = time.monotonic() + self.__start_timeout
+        cancel_count = 0
+        while not self.__cancel_event.is_set():
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                print("XmodemSender. Timeout occurred on waiting for the receiver", file=sys.stderr)
+                return None
+            response = reader.read(1, min(timeout, 1.0))
+            if not response:
+                continue
+            if response[0] == _CRC:
+                return True
+            if response[0] == _NAK and self.__protocol == XmodemProtocolConsts.XMODEM:
+                return False
+            cancel_count = cancel_count + 1 if response[0] == _CAN else 0
+            if cancel_count == 2:
+                print("XmodemSender. Transfer is cancelled by the receiver", file=sys.stderr)
+                return None
+        self.__cancel()
+        return None
+
+    def __wait_for_response(self, reader: _ByteReader) -> int or None:
+        """
+        Wait for ACK, NAK or two CAN in a row. Other bytes, e.g. repeated transfer requests, are skipped.
+        :return: response byte, None on timeout.
+        """
+        deadline = time.monotonic() + self.__ack_timeout
+        cancel_count = 0
+        while True:
+            timeout = deadline - time.monotonic()
+            response = reader.read(1, timeout) if timeout > 0 else b""
+            if not response:
+                return None
+            if response[0] in (_ACK, _NAK):
+                return response[0]
+            cancel_count = cancel_count + 1 if response[0] == _CAN else 0
+            if cancel_count == 2:
+                return _CAN
+
+    def __send_packet(self, reader: _ByteReader, packet: bytes, name: str) -> bool:
+        """
+        Send the packet until it is acknowledged
+        :return: True if the packet has been acknowledged, False if the transfer has been cancelled.
+        """
+        for attempt in range(self.__max_retries + 1):
+            if self.__cancel_event.is_set():
+                self.__cancel()
+                return False
+            if attempt:
+                self.__retransmissions += 1
+            # drop the repeated transfer requests and responses to the previous attempts
+            reader.purge()
+            self.__bus.send_message(packet)
+            response = self.__wait_for_response(reader)
+            if response == _ACK:
+                return True
+            if response == _CAN:
+                print("XmodemSender. Transfer is cancelled by the receiver", file=sys.stderr)
+                return False
+            if response is None:
+                self.__timeouts += 1
+        print("XmodemSender. {} is not acknowledged after {} retries".format(name, self.__max_retries),
+              file=sys.stderr)
+        self.__cancel()
+        return False
+
+    def __send_block(self, reader: _ByteReader, sequence: int, payload, crc_mode: bool, pad: int = _PAD) -> bool:
+        block_size = _SMALL_BLOCK_SIZE if len(payload) <= _SMALL_BLOCK_SIZE else _LARGE_BLOCK_SIZE
+        sequence &= 0xFF
+        packet = bytearray((_SOH if block_size == _SMALL_BLOCK_SIZE else _STX, sequence, 0xFF - sequence))
+        packet += payload
+        packet += bytes((pad,)) * (block_size - len(payload))
+        if crc_mode:
+            packet += binascii.crc_hqx(packet[3:], 0).to_bytes(2, "big")
+        else:
+            packet.append(sum(packet[3:]) & 0xFF)
+        if not self.__send_packet(reader, bytes(packet), "Block {}".format(sequence)):
+            return False
+        self.__blocks += 1
+        return True
+
+    def __send_header(self, reader: _ByteReader, name: str, size: int or None, mtime: float or None) -> bool:
+        """
+        Send YMODEM block 0 with the file name and size. Empty name finishes the batch.
+        """
+        header = bytearray()
+        if name:
+            header += name.encode() + b"\0" + str(size).encode()
+            if mtime is not None:
+                header += " {:o}".format(int(mtime)).encode()
+        return self.__send_block(reader, 0, header, True, 0)
+
+    def __send_eot(self, reader: _ByteReader) -> bool:
+        # YMODEM receivers NAK the first EOT to make sure it is not a line noise
+        return self.__send_packet(reader, bytes((_EOT,)), "EOT")
+
+    def __transfer(self, reader: _ByteReader, data: memoryview, name: str, mtime: float or None) -> bool:
+        crc_mode = self.__wait_for_start(reader)
+        if crc_mode is None:
+            return False
+        if self.__protocol == XmodemProtocolConsts.YMODEM:
+            if not self.__send_header(reader, name, len(data), mtime):
+                return False
+            # the receiver requests the data once the header is acknowledged
+            if self.__wait_for_start(reader) is None:
+                return False
+        # 1K blocks require CRC-16, the receiver which requests checksum gets 128 byte blocks
+        block_size = _LARGE_BLOCK_SIZE if crc_mode else _SMALL_BLOCK_SIZE
+        sequence = 1
+        for offset in range(0, len(data), block_size):
+            payload = data[offset:offset + block_size]
+            if not self.__send_block(reader, sequence, payload, crc_mode):
+                return False
+            self.__data_bytes += len(payload)
+            sequence += 1
+        if not self.__send_eot(reader):
+            return False
+        if self.__protocol == XmodemProtocolConsts.YMODEM:
+            if self.__wait_for_start(reader) is None:
+                return False
+            return self.__send_header(reader, "", None, None)
+        return True
+
+    def send(self, data: bytes, name: str = "data.bin", mtime: float = None) -> bool:
+        """
+        Send the data. The method blocks until the transfer is finished.
+        :param data: data to send.
+        :param name: file name passed to YMODEM receiver. Not used by XMODEM.
+        :param mtime: modification time of the file passed to YMODEM receiver, None to omit it.
+        :return: True if the data has been sent and acknowledged, False otherwise.
+        """
+        self.__cancel_event.clear()
+        self.__data_bytes = 0
+        self.__blocks = 0
+        self.__retransmissions = 0
+        self.__timeouts = 0
+        reader = _ByteReader()
+        start_time = time.monotonic()
+        # the pending chunks are merged instead of being dropped, and the reading thread never waits
+        self.__bus.register_message_callback(reader.on_message, OverflowPolicyConsts.COALESCE)
+        try:
+            return self.__transfer(reader, memoryview(data), name, mtime)
+        finally:
+            self.__bus.unregister_message_callback(reader.on_message)
+            self.__elapsed = time.monotonic() - start_time
+
+    def send_file(self, path: str, name: str = None) -> bool:
+        """
+        Send the file. The method blocks until the transfer is finished.
+        :param path: path to the file.
+        :param name: file name passed to YMODEM receiver. None means the name of the file.
+        :return: True if the file has been sent and acknowledged, False otherwise.
+        """
+        try:
+            with open(path, "rb") as file:
+                data = file.read()
+            mtime = os.path.getmtime(path)
+        except OSError as ex:
+            print("XmodemSender. Failed to read the file: {}".format(ex), file=sys.stderr)
+            return False
+        return self.send(data, os.path.basename(path) if name is None else name, mtime)
+
+    def cancel(self) -> None:
+        """
+        Cancel the transfer running in another thread. The receiver is notified by CAN.
+        """
+        self.__cancel_event.set()
+
+    def get_statistics(self) -> dict:
+        """
+        Returns counters of the last transfer.
+        :return: Dictionary {‘bytes’, ‘blocks’, ‘retransmissions’, ‘timeouts’, ‘elapsed’, ‘throughput’}. bytes is the
+        size of the sent data without the protocol overhead, elapsed is in seconds, throughput is in bytes per second.
+        """
+        return _get_statistics(self.__data_bytes, self.__blocks, self.__retransmissions, self.__timeouts,
+                               self.__elapsed)
+
+
+class XmodemReceiver:
+    """
+    XMODEM-1K and YMODEM receiver, the counterpart of XmodemSender. Requests the transfer with CRC-16. Could be used
+    to check the sender without the board, e.g. over a loopback port.
+    """
+    # interval between the transfer requests
+    __REQUEST_INTERVAL = 1.0
+
+    def __init__(self, bus: SerialBaseInterface, protocol: str = XmodemProtocolConsts.YMODEM,
+                 block_timeout: float = XMODEM_ACK_TIMEOUT, max_retries: int = XMODEM_MAX_RETRIES):
+        """
+        Class constructor.
+        :param bus: driver of the port the sender is connected to, e.g. SerialDriver.
+        :param protocol: XmodemProtocolConsts value.
+        :param block_timeout: time to wait for the next block in seconds.
+        :param max_retries: maximum number of requests to repeat one block.
+        """
+        if protocol not in (XmodemProtocolConsts.XMODEM, XmodemProtocolConsts.YMODEM):
+            raise ValueError("Wrong protocol passed: {}".format(protocol))
+        self.__bus = bus
+        self.__protocol = protocol
+        self.__block_timeout = block_timeout
+        self.__max_retries = max_retries
+        self.__file_name = None
+        self.__file_size = None
+        self.__data_bytes = 0
+        self.__blocks = 0
+        self.__retransmissions = 0
+        self.__timeouts = 0
+        self.__elapsed = 0.0
+
+    def __read_block(self, reader: _ByteReader, timeout: float):
+        """
+        Read the next block
+        :return: tuple (start byte, sequence, payload). Sequence and payload are None for EOT and CAN, all the items
+        are None if the block is corrupted or incomplete. None if nothing has been received.
+        """
+        start = reader.read(1, timeout)
+        if not start:
+            return None
+        if start[0] in (_EOT, _CAN):
+            return start[0], None, None
+        if start[0] not in (_SOH, _STX):
+            return None, None, None
+        block_size = _SMALL_BLOCK_SIZE if start[0] == _SOH else _LARGE_BLOCK_SIZE
+        packet = reader.read(block_size + 4, self.__block_timeout)
+        if len(packet) < block_size + 4:
+            return None, None, None
+        payload = packet[2:2 + block_size]
+        if packet[0] + packet[1] != 0xFF or binascii.crc_hqx(payload, 0) != int.from_bytes(packet[-2:], "big"):
+            return None, None, None
+        return start[0], packet[0], payload
+
+    def __receive_blocks(self, reader: _ByteReader, start_timeout: float, header: bool) -> bytearray or None:
+        """
+        Request the transfer and receive the blocks until EOT. If header is True, only YMODEM block 0 is received.
+        :return: received data, None if the transfer failed.
+        """
+        deadline = time.monotonic() + start_timeout
+        block = None
+        while block is None:
+            if time.monotonic() > deadline:
+                print("XmodemReceiver. Timeout occurred on waiting for the sender", file=sys.stderr)
+                return None
+            self.__bus.send_message(bytes((_CRC,)))
+            block = self.__read_block(reader, self.__REQUEST_INTERVAL)
+
+        expected_sequence = 0 if header else 1
+        data = bytearray()
+        retries = 0
+        while True:
+            if block is None or block[0] is None:
+                if block is None:
+                    self.__timeouts += 1
+                retries += 1
+                if retries > self.__max_retries:
+                    print("XmodemReceiver. Block {} is not received after {} retries".format(
+                        expected_sequence & 0xFF, self.__max_retries), file=sys.stderr)
+                    self.__bus.send_message(bytes((_CAN, _CAN)))
+                    return None
+                self.__retransmissions += 1
+                reader.purge()
+                self.__bus.send_message(bytes((_NAK,)))
+            elif block[0] == _CAN:
+                print("XmodemReceiver. Transfer is cancelled by the sender", file=sys.stderr)
+                return None
+            elif block[0] == _EOT:
+                self.__bus.send_message(bytes((_ACK,)))
+                return data
+            elif block[1] == expected_sequence & 0xFF:
+                data += block[2]
+                self.__blocks += 1
+                retries = 0
+                self.__bus.send_message(bytes((_ACK,)))
+                if header:
+                    return data
+                expected_sequence += 1
+            elif block[1] == (expected_sequence - 1) & 0xFF:
+                # the acknowledge of the previous block has been lost
+                self.__bus.send_message(bytes((_ACK,)))
+            else:
+                print("XmodemReceiver. Unexpected block {}, block {} expected".format(
+                    block[1], expected_sequence & 0xFF), file=sys.stderr)
+                self.__bus.send_message(bytes((_CAN, _CAN)))
+                return None
+            block = self.__read_block(reader, self.__block_timeout)
+
+    def __parse_header(self, header: bytearray) -> bool:
+        """
+        Parse YMODEM block 0
+        :return: False if the header finishes the batch, True otherwise.
+        """
+        name, _, info = bytes(header).partition(b"\0")
+        if not name:
+            return False
+        self.__file_name = name.decode("utf-8", "replace")
+        fields = info.split(b"\0")[0].split()
+        self.__file_size = int(fields[0]) if fields and fields[0].isdigit() else None
+        return True
+
+    def __transfer(self, reader: _ByteReader, start_timeout: float) -> bytes or None:
+        if self.__protocol == XmodemProtocolConsts.XMODEM:
+            data = self.__receive_blocks(reader, start_timeout, False)
+            return bytes(data) if data is not None else None
+
+        header = self.__receive_blocks(reader, start_timeout, True)
+        if header is None:
+            return None
+        if not self.__parse_header(header):
+            # empty batch
+            return b""
+        data = self.__receive_blocks(reader, self.__block_timeout, False)
+        if data is None:
+            return None
+        if self.__file_size is not None:
+            del data[self.__file_size:]
+        if self.__receive_blocks(reader, self.__block_timeout, True) is None:
+            return None
+        return bytes(data)
+
+    def receive(self, start_timeout: float = XMODEM_START_TIMEOUT) -> bytes or None:
+        """
+        Receive the data. The method blocks until the transfer is finished.
+        :param start_timeout: time to wait for the sender to start the transfer in seconds.
+        :return: received data, None if the transfer failed. XMODEM data keeps the padding of the last block, YMODEM
+        data is truncated to the file size passed in the header.
+        """
+        self.__file_name = None
+        self.__file_size = None
+        self.__blocks = 0
+        self.__retransmissions = 0
+        self.__timeouts = 0
+        self.__data_bytes = 0
+        reader = _ByteReader()
+        start_time = time.monotonic()
+        # the pending chunks are merged instead of being dropped, and the reading thread never waits
+        self.__bus.register_message_callback(reader.on_message, OverflowPolicyConsts.COALESCE)
+        try:
+            data = self.__transfer(reader, start_timeout)
+        finally:
+            self.__bus.unregister_message_callback(reader.on_message)
+            self.__elapsed = time.monotonic() - start_time
+        if data is not None:
+            self.__data_bytes = len(data)
+        return data
+
+    def get_file_name(self) -> str or None:
+        """
+        Returns name of the file passed by YMODEM sender, None if the name has not been received.
+        """
+        return self.__file_name
+
+    def get_statistics(self) -> dict:
+        """
+        Returns counters of the last transfer.
+        :return: Dictionary {‘bytes’, ‘blocks’, ‘retransmissions’, ‘timeouts’, ‘elapsed’, ‘throughput’}.
+        retransmissions is the number of the blocks requested again, elapsed is in seconds, throughput is in bytes per
+        second.
+        """
+        return _get_statistics(self.__data_bytes, self.__blocks, self.__retransmissions, self.__timeouts,
+                               self.__elapsed)
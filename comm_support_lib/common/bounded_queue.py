@@ -0,0 +1,214 @@
+import queue
+import threading
+from collections import deque
+
+from comm_support_lib.common.overflow_policy_consts import OverflowPolicyConsts
+from comm_support_lib.common.spill_file import SpillFile
+
+
+class BoundedQueue:
+    """
+    FIFO queue with limited capacity and configurable overflow policy. Could be used instead of queue.Queue: put() and
+    get() raise queue.Full and queue.Empty in the same cases.
+    """
+    # set before the constructor checks the arguments, so __del__ works if it fails
+    __spill = None
+
+    def __init__(self, capacity: int, policy: str = OverflowPolicyConsts.BLOCK, spill_dir: str = None):
+        """
+        Class constructor.
+            Parameters:
+                capacity (int): maximum number of items kept in memory
+                policy (str): OverflowPolicyConsts value applied when the queue is full. COALESCE is not supported
+                spill_dir (str): directory for the spill file, used with SPILL policy only. None means system temporary
+                                 directory
+        """
+        if policy not in (OverflowPolicyConsts.BLOCK, OverflowPolicyConsts.DROP_OLDEST,
+                          OverflowPolicyConsts.DROP_NEWEST, OverflowPolicyConsts.SPILL):
+            raise ValueError("Wrong overflow policy passed: {}".format(policy))
+        if capacity < 1:
+            raise ValueError("Wrong queue capacity passed: {}".format(capacity))
+
+        self.__capacity = capacity
+        self.__policy = policy
+        self.__items = deque()
+        self.__spill = SpillFile(spill_dir) if policy == OverflowPolicyConsts.SPILL else None
+        self.__mutex = threading.Lock()
+        self.__not_empty = threading.Condition(self.__mutex)
+        self.__not_full = threading.Condition(self.__mutex)
+        self.__high_water_mark = 0
+        self.__dropped = 0
+        self.__spilled = 0
+
+    def __del__(self):
+        if self.__spill is not None:
+            self.__spill.close()
+
+    def __depth(self) -> int:
+        return len(self.__items) + (len(self.__spill) if self.__spill is not None else 0)
+
+    def put(self, item, block: bool = True, timeout: float = None) -> None:
+        """
+        Put item into the queue
+            Parameters:
+                item: item to put
+                block (bool): used with BLOCK policy only. Wait for free space if True, raise queue.Full otherwise
+                timeout (float): used with BLOCK policy only. Maximum time to wait for free space
+        """
+        with self.__not_full:
+            if self.__spill is not None and (len(self.__spill) or len(self.__items) >= self.__capacity):
+                # once spilling is started, all the new items go to the file to keep FIFO order
+                self.__spill.append(item)
+                self.__spilled += 1
+            else:
+                if len(self.__items) >= self.__capacity:
+                    if self.__policy == OverflowPolicyConsts.DROP_NEWEST:
+                        self.__dropped += 1
+                        return
+                    if self.__policy == OverflowPolicyConsts.DROP_OLDEST:
+                        self.__items.popleft()
+                        self.__dropped += 1
+                    elif not block or not self.__not_full.wait_for(lambda: len(self.__items) < self.__capacity,
+                                                                   timeout):
+                        raise queue.Full
+                self.__items.append(item)
+            self.__high_water_mark = max(self.__high_water_mark, self.__depth())
+            self.__not_empty.notify()
+
+    def put_many(self, items, block: bool = True, timeout: float = None) -> int:
+        """
+        Put several items into the queue taking the lock once
+            Parameters:
+                items (Iterable): items to put in order
+                block (bool): used with BLOCK policy only. Wait for free space if True, stop putting otherwise
+                timeout (float): used with BLOCK policy only. Maximum time to wait for free space for each item
+            Returns:
+                count (int): number of items put, the rest of the items did not fit into the queue with BLOCK policy
+        """
+        count = 0
+        with self.__not_full:
+            for item in items:
+                if self.__spill is not None and (len(self.__spill) or len(self.__items) >= self.__capacity):
+                    self.__spill.append(item)
+                    self.__spilled += 1
+                elif len(self.__items) < self.__capacity:
+                    self.__items.append(item)
+                elif self.__policy == OverflowPolicyConsts.DROP_NEWEST:
+                    self.__dropped += 1
+                elif self.__policy == OverflowPolicyConsts.DROP_OLDEST:
+                    self.__items.popleft()
+                    self.__dropped += 1
+                    self.__items.append(item)
+                else:
+                    # let the consumers take the items put before
+                    self.__not_empty.notify_all()
+                    if not block or not self.__not_full.wait_for(lambda: len(self.__items) < self.__capacity,
+                                                                 timeout):
+                        break
+                    self.__items.append(item)
+                count += 1
+            self.__high_water_mark = max(self.__high_water_mark, self.__depth())
+            self.__not_empty.notify_all()
+        return count
+
+    def get(self, block: bool = True, timeout: float = None):
+        """
+        Remove and return the oldest item from the queue
+            Parameters:
+                block (bool): wait for the item if True, raise queue.Empty immediately otherwise
+                timeout (float): maximum time to wait for the item
+            Returns:
+                item: the oldest item
+        """
+        with self.__not_empty:
+            if not block:
+                if not self.__depth():
+                    raise queue.Empty
+            elif not self.__not_empty.wait_for(self.__depth, timeout):
+                raise queue.Empty
+            if self.__items:
+                item = self.__items.popleft()
+            else:
+                item = self.__spill.pop()
+            self.__not_full.notify()
+            return item
+
+    def get_many(self, max_items: int, block: bool = True, timeout: float = None) -> list:
+        """
+        Remove and return up to max_items oldest items at once. Waits for the first item only
+            Parameters:
+                max_items (int): maximum number of items to return
+                block (bool): wait for the first item if True, raise queue.Empty immediately otherwise
+                timeout (float): maximum time to wait for the first item
+            Returns:
+                items (list): the oldest items, at least one
+        """
+        with self.__not_empty:
+            if not block:
+                if not self.__depth():
+                    raise queue.Empty
+            elif not self.__not_empty.wait_for(self.__depth, timeout):
+                raise queue.Empty
+            items = []
+            while len(items) < max_items and self.__items:
+                items.append(self.__items.popleft())
+            while len(items) < max_items and self.__spill is not None and len(self.__spill):
+                items.append(self.__spill.pop())
+            self.__not_full.notify_all()
+            return items
+
+    def take_first(self, predicate):
+        """
+        Remove and return the oldest item matching the predicate, the other items stay in the queue in the same order.
+        Does not wait. The spilled items are moved to memory while there is free space, the items left in the spill file
+        are not checked
+            Parameters:
+                predicate (Callable): function returning True for the item to take
+            Returns:
+                item: the oldest matching item, queue.Empty is raised if there is no such item
+        """
+        with self.__not_empty:
+            while self.__spill is not None and len(self.__spill) and len(self.__items) < self.__capacity:
+                self.__items.append(self.__spill.pop())
+            for index, item in enumerate(self.__items):
+                if predicate(item):
+                    del self.__items[index]
+                    self.__not_full.notify()
+                    return item
+            raise queue.Empty
+
+    def get_nowait(self):
+        return self.get(block=False)
+
+    def qsize(self) -> int:
+        with self.__mutex:
+            return self.__depth()
+
+    def empty(self) -> bool:
+        return self.qsize() == 0
+
+    def clear(self) -> None:
+        """
+        Remove all the items from the queue
+        """
+        with self.__mutex:
+            self.__items.clear()
+            if self.__spill is not None:
+                self.__spill.clear()
+            self.__not_full.notify_all()
+
+    def get_statistics(self) -> dict:
+        """
+        Get queue counters
+            Returns:
+                statistics (dict): {'capacity', 'policy', 'depth', 'high_water_mark', 'dropped', 'spilled',
+                                    'spill_depth'}
+        """
+        with self.__mutex:
+            return {'capacity': self.__capacity,
+                    'policy': self.__policy,
+                    'depth': self.__depth(),
+                    'high_water_mark': self.__high_water_mark,
+                    'dropped': self.__dropped,
+                    'spilled': self.__spilled,
+                    'spill_depth': len(self.__spill) if self.__spill is not None else 0}
@@ -0,0 +1,275 @@
+import sys
+import threading
+import time
+from collections import deque
+
+from comm_support_lib.common.overflow_policy_consts import OverflowPolicyConsts
+from comm_support_lib.config.config import CALLBACK_QUEUE_CAPACITY, CALLBACK_OVERFLOW_POLICY
+
+
+class CallbackSubscriber:
+    """
+    Registered callback with its own bounded queue and worker thread. The callback is invoked in the worker thread in
+    the same order as messages were put.
+    """
+
+    def __init__(self, callback, policy: str, capacity: int):
+        """
+        Class constructor. Starts the worker thread.
+            Parameters:
+                callback (Callable): function to be invoked for each message
+                policy (str): one of OverflowPolicyConsts, applied when the queue is full
+                capacity (int): maximum number of pending messages
+        """
+        if policy not in (OverflowPolicyConsts.BLOCK, OverflowPolicyConsts.DROP_OLDEST, OverflowPolicyConsts.COALESCE):
+            raise ValueError("Wrong overflow policy passed: {}".format(policy))
+        if capacity < 1:
+            raise ValueError("Wrong queue capacity passed: {}".format(capacity))
+
+        self.callback = callback
+        self.__policy = policy
+        self.__capacity = capacity
+        self.__items = deque()
+        self.__condition = threading.Condition()
+        self.__stopped = False
+        self.__delivered = 0
+        self.__dropped = 0
+        self.__coalesced = 0
+        self.__delayed = 0
+        self.__delay_time = 0.0
+        self.__max_depth = 0
+        self.__exec_time = 0.0
+        self.__max_exec_time = 0.0
+        self.__thread = threading.Thread(target=self.__run, name="Callback-" + getattr(callback, "__name__", ""),
+                                         daemon=True)
+        self.__thread.start()
+
+    @property
+    def name(self) -> str:
+        """
+        Unique name of the callback: its qualified name and the id of the callback object, so bound methods of
+        different objects and lambdas do not collide
+        """
+        return "{}@{:#x}".format(getattr(self.callback, "__qualname__", type(self.callback).__qualname__),
+                                 id(self.callback))
+
+    @staticmethod
+    def __coalesce(pending, msg):
+        """
+        Merge two messages. bytes and strings are concatenated, for other types only the newest message is kept.
+        """
+        if isinstance(pending, (bytes, str)) and type(pending) is type(msg):
+            return pending + msg
+        return msg
+
+    def put(self, msg) -> None:
+        """
+        Put message into the queue of the callback. Could block the caller if the policy is BLOCK.
+            Parameters:
+                msg: message to be passed to the callback
+        """
+        with self.__condition:
+            self.__put_locked(msg)
+            self.__condition.notify_all()
+
+    def put_many(self, messages) -> None:
+        """
+        Put several messages into the queue of the callback taking the lock once. Could block the caller if the policy
+        is BLOCK.
+            Parameters:
+                messages (Iterable): messages to be passed to the callback in order
+        """
+        with self.__condition:
+            for msg in messages:
+                if not self.__put_locked(msg):
+                    break
+            self.__condition.notify_all()
+
+    def __put_locked(self, msg) -> bool:
+        """
+        Put message into the queue. Should be called holding the condition.
+            Returns:
+                result (bool): False if the subscriber has been stopped
+        """
+        if self.__stopped:
+            return False
+        if len(self.__items) >= self.__capacity:
+            if self.__policy == OverflowPolicyConsts.BLOCK:
+                self.__delayed += 1
+                start_time = time.monotonic()
+                # let the worker take the messages put before
+                self.__condition.notify_all()
+                self.__condition.wait_for(lambda: len(self.__items) < self.__capacity or self.__stopped)
+                self.__delay_time += time.monotonic() - start_time
+                if self.__stopped:
+                    return False
+            elif self.__policy == OverflowPolicyConsts.DROP_OLDEST:
+                self.__items.popleft()
+                self.__dropped += 1
+            else:
+                self.__items.append(self.__coalesce(self.__items.pop(), msg))
+                self.__coalesced += 1
+                return True
+        self.__items.append(msg)
+        self.__max_depth = max(self.__max_depth, len(self.__items))
+        return True
+
+    def stop(self) -> None:
+        """
+        Stop the worker thread. Pending messages are discarded.
+        """
+        with self.__condition:
+            self.__stopped = True
+            self.__items.clear()
+            self.__condition.notify_all()
+        if threading.current_thread() is not self.__thread:
+            self.__thread.join()
+
+    def get_statistics(self) -> dict:
+        """
+        Get delivery counters of the callback
+            Returns:
+                statistics (dict): {'policy', 'capacity', 'depth', 'max_depth', 'delivered', 'dropped', 'coalesced',
+                                    'delayed', 'delay_time', 'exec_time', 'max_exec_time'}
+        """
+        with self.__condition:
+            return {'policy': self.__policy,
+                    'capacity': self.__capacity,
+                    'depth': len(self.__items),
+                    'max_depth': self.__max_depth,
+                    'delivered': self.__delivered,
+                    'dropped': self.__dropped,
+                    'coalesced': self.__coalesced,
+                    'delayed': self.__delayed,
+                    'delay_time': self.__delay_time,
+                    'exec_time': self.__exec_time,
+                    'max_exec_time': self.__max_exec_time}
+
+    def __run(self):
+        """
+        Worker thread function
+        """
+        while True:
+            with self.__condition:
+                self.__condition.wait_for(lambda: self.__items or self.__stopped)
+                if self.__stopped:
+                    return
+                msg = self.__items.popleft()
+                # wake up the producer waiting for free space
+                self.__condition.notify_all()
+
+            start_time = time.perf_counter()
+            try:
+                self.callback(msg)
+            except Exception as ex:
+                print("Callback {} failed: {}".format(getattr(self.callback, "__name__", self.callback), ex),
+                      file=sys.stderr)
+            exec_time = time.perf_counter() - start_time
+
+            with self.__condition:
+                self.__delivered += 1
+                self.__exec_time += exec_time
+                self.__max_exec_time = max(self.__max_exec_time, exec_time)
+
+
+class CallbackDispatcher:
+    """
+    Delivers incoming messages to the registered callbacks off the reading thread. Each callback has its own bounded
+    queue and worker thread, so a slow callback does not stall reading from the device and other callbacks.
+    Note: with BLOCK policy the reading thread waits for the callback once its queue is full. SerialDriver ports share
+    one SerialReactor thread, so such a callback stalls reading of all the ports. Use BLOCK only for the callbacks
+    which never wait themselves.
+    """
+
+    def __init__(self, policy: str = CALLBACK_OVERFLOW_POLICY, capacity: int = CALLBACK_QUEUE_CAPACITY):
+        """
+        Class constructor.
+            Parameters:
+                policy (str): default overflow policy of the callbacks, one of OverflowPolicyConsts
+                capacity (int): default queue capacity of the callbacks
+        """
+        self.__policy = policy
+        self.__capacity = capacity
+        self.__lock = threading.Lock()
+        self.__subscribers = {}
+        # immutable snapshot used by dispatch() to avoid locking on each message
+        self.__snapshot = ()
+
+    def subscribe(self, callback, policy: str = None, capacity: int = None) -> bool:
+        """
+        Register callback
+            Parameters:
+                callback (Callable): function to register
+                policy (str): overflow policy, None to use the default one
+                capacity (int): queue capacity, None to use the default one
+            Returns:
+                result (bool): False if the callback has already registered, True otherwise
+        """
+        with self.__lock:
+            if callback in self.__subscribers:
+                return False
+            self.__subscribers[callback] = CallbackSubscriber(callback, policy or self.__policy,
+                                                              capacity or self.__capacity)
+            self.__snapshot = tuple(self.__subscribers.values())
+        return True
+
+    def unsubscribe(self, callback) -> bool:
+        """
+        Unregister callback. Messages pending for the callback are discarded.
+            Parameters:
+                callback (Callable): function to unregister
+            Returns:
+                result (bool): False if the callback is not registered, True otherwise
+        """
+        with self.__lock:
+            subscriber = self.__subscribers.pop(callback, None)
+            self.__snapshot = tuple(self.__subscribers.values())
+        if subscriber is None:
+            return False
+        subscriber.stop()
+        return True
+
+    def is_subscribed(self, callback) -> bool:
+        return callback in self.__subscribers
+
+    def has_subscribers(self) -> bool:
+        return len(self.__snapshot) > 0
+
+    def clear(self) -> None:
+        """
+        Unregister all the callbacks
+        """
+        with self.__lock:
+            subscribers = self.__snapshot
+            self.__subscribers.clear()
+            self.__snapshot = ()
+        for subscriber in subscribers:
+            subscriber.stop()
+
+    def dispatch(self, msg) -> None:
+        """
+        Put message into the queues of all the registered callbacks
+            Parameters:
+                msg: message to be delivered
+        """
+        for subscriber in self.__snapshot:
+            subscriber.put(msg)
+
+    def get_execution_time(self) -> tuple:
+        """
+        Get execution time of the registered callbacks
+            Returns:
+                (total, maximum) (tuple): total and maximum execution time of one call over all the callbacks in
+                                          seconds
+        """
+        statistics = [subscriber.get_statistics() for subscriber in self.__snapshot]
+        return (sum(item['exec_time'] for item in statistics),
+                max((item['max_exec_time'] for item in statistics), default=0.0))
+
+    def get_statistics(self) -> dict:
+        """
+        Get delivery counters of the registered callbacks
+            Returns:
+                statistics (dict): CallbackSubscriber.name -> counters returned by CallbackSubscriber.get_statistics()
+        """
+        return {subscriber.name: subscriber.get_statistics() for subscriber in self.__snapshot}
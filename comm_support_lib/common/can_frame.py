@@ -0,0 +1,220 @@
+from array import array
+
+from comm_support_lib.common.can_frame_flag_consts import CanFrameFlagConsts
+
+
+class CanFrame:
+    """
+    Received CAN frame. Slotted record, so it costs less than a dictionary per frame. Supports read access by the keys
+    of the dictionary used before: frame.get('id'), frame['payload'].
+    """
+    __slots__ = ('timestamp', 'id', 'flags', 'dlc', 'payload')
+
+    KEY_TIMESTAMP = "timestamp"
+    KEY_ID = "id"
+    KEY_FLAGS = "flags"
+    KEY_DLC = "dlc"
+    KEY_PAYLOAD = "payload"
+    KEY_IS_EXTENDED_ID = "is_extended_id"
+    KEY_IS_REMOTE_FRAME = "is_remote_frame"
+    KEY_IS_ERROR_FRAME = "is_error_frame"
+    KEY_IS_FD = "is_fd"
+    KEY_BITRATE_SWITCH = "bitrate_switch"
+    __KEYS = (KEY_TIMESTAMP, KEY_ID, KEY_FLAGS, KEY_DLC, KEY_PAYLOAD, KEY_IS_EXTENDED_ID, KEY_IS_REMOTE_FRAME,
+              KEY_IS_ERROR_FRAME, KEY_IS_FD, KEY_BITRATE_SWITCH)
+    # payload lengths of classic CAN and CAN FD frames
+    MAX_PAYLOAD = 8
+    MAX_FD_PAYLOAD = 64
+    # payload lengths which could be encoded by DLC of CAN FD frame
+    __FD_PAYLOAD_LENGTHS = (0, 1, 2, 3, 4, 5, 6, 7, 8, 12, 16, 20, 24, 32, 48, 64)
+
+    def __init__(self, timestamp: float, frame_id: int, flags: int, dlc: int, payload: bytes):
+        """
+        Class constructor.
+            Parameters:
+                timestamp (float): receive time reported by the interface, seconds
+                frame_id (int): arbitration ID
+                flags (int): CanFrameFlagConsts bits
+                dlc (int): data length code
+                payload (bytes): frame data
+        """
+        self.timestamp = timestamp
+        self.id = frame_id
+        self.flags = flags
+        self.dlc = dlc
+        self.payload = payload
+
+    @property
+    def is_extended_id(self) -> bool:
+        return bool(self.flags & CanFrameFlagConsts.EXTENDED_ID)
+
+    @property
+    def is_remote_frame(self) -> bool:
+        return bool(self.flags & CanFrameFlagConsts.REMOTE_FRAME)
+
+    @property
+    def is_error_frame(self) -> bool:
+        return bool(self.flags & CanFrameFlagConsts.ERROR_FRAME)
+
+    @property
+    def is_fd(self) -> bool:
+        return bool(self.flags & CanFrameFlagConsts.FD_FRAME)
+
+    @property
+    def bitrate_switch(self) -> bool:
+        return bool(self.flags & CanFrameFlagConsts.BITRATE_SWITCH)
+
+    @staticmethod
+    def get_fd_payload_length(length: int) -> int:
+        """
+        Get length of CAN FD frame payload, the data is padded to it on the bus
+            Parameters:
+                length (int): number of data bytes, MAX_FD_PAYLOAD at most
+            Returns:
+                length (int): the smallest length which could be encoded by DLC and fits the data
+        """
+        for fd_length in CanFrame.__FD_PAYLOAD_LENGTHS:
+            if fd_length >= length:
+                return fd_length
+        raise ValueError("Payload does not fit into CAN FD frame: {} bytes".format(length))
+
+    def __getitem__(self, key: str):
+        if key not in self.__KEYS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __contains__(self, key) -> bool:
+        return key in self.__KEYS
+
+    def get(self, key: str, default=None):
+        return getattr(self, key) if key in self.__KEYS else default
+
+    def keys(self) -> tuple:
+        return self.__KEYS
+
+    def to_dict(self) -> dict:
+        return {key: getattr(self, key) for key in self.__KEYS}
+
+    def __eq__(self, other):
+        if not isinstance(other, CanFrame):
+            return NotImplemented
+        return self.timestamp == other.timestamp and self.id == other.id and self.flags == other.flags and \
+            self.dlc == other.dlc and self.payload == other.payload
+
+    def __repr__(self):
+        return "CanFrame(timestamp={:.6f}, id={:#x}, flags={:#x}, dlc={}, payload={})".format(
+            self.timestamp, self.id, self.flags, self.dlc, bytes(self.payload).hex())
+
+
+class CanFrameBatch:
+    """
+    Compact storage of many received frames: one array per field and a single buffer of fixed-size payload slots, so
+    thousands of frames could be kept and checked without an object per frame. Frames are materialized as CanFrame on
+    indexing and iteration only.
+    """
+    PAYLOAD_SLOT_SIZE = CanFrame.MAX_PAYLOAD
+    FD_PAYLOAD_SLOT_SIZE = CanFrame.MAX_FD_PAYLOAD
+
+    def __init__(self, payload_slot_size: int = PAYLOAD_SLOT_SIZE):
+        """
+        Class constructor.
+            Parameters:
+                payload_slot_size (int): maximum payload length of the frames, FD_PAYLOAD_SLOT_SIZE for CAN FD frames
+        """
+        self.__slot_size = payload_slot_size
+        self.__timestamps = array('d')
+        self.__ids = array('L')
+        self.__flags = array('B')
+        self.__dlcs = array('B')
+        self.__lengths = array('B')
+        self.__payloads = bytearray()
+
+    def __len__(self):
+        return len(self.__ids)
+
+    def append(self, frame: CanFrame) -> None:
+        self.append_fields(frame.timestamp, frame.id, frame.flags, frame.dlc, frame.payload)
+
+    def append_fields(self, timestamp: float, frame_id: int, flags: int, dlc: int, payload) -> None:
+        """
+        Add a frame without creating CanFrame object
+            Parameters:
+                timestamp (float): receive time reported by the interface, seconds
+                frame_id (int): arbitration ID
+                flags (int): CanFrameFlagConsts bits
+                dlc (int): data length code
+                payload (bytes): frame data, payload slot size bytes at most
+        """
+        length = len(payload)
+        if length > self.__slot_size:
+            raise ValueError("Payload does not fit into the batch slot: {} bytes".format(length))
+        self.__timestamps.append(timestamp)
+        self.__ids.append(frame_id)
+        self.__flags.append(flags)
+        self.__dlcs.append(dlc)
+        self.__lengths.append(length)
+        self.__payloads += payload
+        if length < self.__slot_size:
+            self.__payloads += bytes(self.__slot_size - length)
+
+    def get_payload(self, index: int) -> bytes:
+        offset = self.__slot_offset(index)
+        return bytes(self.__payloads[offset:offset + self.__lengths[index]])
+
+    def __slot_offset(self, index: int) -> int:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("batch index out of range")
+        return index * self.__slot_size
+
+    def __getitem__(self, index: int) -> CanFrame:
+        return CanFrame(self.__timestamps[index], self.__ids[index], self.__flags[index], self.__dlcs[index],
+                        self.get_payload(index))
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def get_timestamps(self) -> array:
+        return self.__timestamps
+
+    def get_ids(self) -> array:
+        return self.__ids
+
+    def get_flags(self) -> array:
+        return self.__flags
+
+    def get_dlcs(self) -> array:
+        return self.__dlcs
+
+    def get_payload_lengths(self) -> array:
+        return self.__lengths
+
+    def get_payload_buffer(self) -> bytes:
+        """
+        Get payloads of all the frames
+            Returns:
+                payloads (bytes): payload slot size bytes per frame, unused bytes of a slot are zero
+        """
+        return bytes(self.__payloads)
+
+    def count_mismatches(self, frame_id: int = None, payload: bytes = None) -> int:
+        """
+        Count the frames which differ from the expected ID or payload, e.g. to check a cangen run
+            Parameters:
+                frame_id (int): expected arbitration ID, None means any
+                payload (bytes): expected data, None means any
+            Returns:
+                count (int): number of frames which do not match
+        """
+        if payload is None:
+            return len(self) - self.__ids.count(frame_id) if frame_id is not None else 0
+        slot = bytes(payload) + bytes(self.__slot_size - len(payload))
+        mismatches = 0
+        for index in range(len(self)):
+            offset = index * self.__slot_size
+            if frame_id is not None and self.__ids[index] != frame_id or self.__lengths[index] != len(payload) or \
+                    self.__payloads[offset:offset + self.__slot_size] != slot:
+                mismatches += 1
+        return mismatches
@@ -0,0 +1,7 @@
+class CanFrameFlagConsts:
+    EXTENDED_ID: int = 0x01  # 29-bit identifier
+    REMOTE_FRAME: int = 0x02  # remote transmission request
+    ERROR_FRAME: int = 0x04  # error frame reported by the controller
+    FD_FRAME: int = 0x08  # CAN FD frame
+    BITRATE_SWITCH: int = 0x10  # data phase of CAN FD frame is sent at the data bitrate
+    ERROR_STATE_INDICATOR: int = 0x20  # transmitter of CAN FD frame is error passive
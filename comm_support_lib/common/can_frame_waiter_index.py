@@ -0,0 +1,160 @@
+import queue
+import threading
+import time
+
+
+class _FrameWaiter:
+    """
+    Pending wait_for() call
+    """
+    __slots__ = ("can_id", "can_mask", "payload_prefix", "predicate", "event")
+
+    def __init__(self, can_id: int or None, can_mask: int or None, payload_prefix: bytes or None, predicate):
+        self.can_id = can_id
+        self.can_mask = can_mask
+        self.payload_prefix = payload_prefix
+        self.predicate = predicate
+        self.event = threading.Event()
+
+    def matches(self, frame) -> bool:
+        if self.can_id is not None:
+            if self.can_mask is None:
+                if frame.id != self.can_id:
+                    return False
+            elif frame.id & self.can_mask != self.can_id & self.can_mask:
+                return False
+        if self.payload_prefix is not None and bytes(frame.payload[:len(self.payload_prefix)]) != self.payload_prefix:
+            return False
+        return self.predicate is None or bool(self.predicate(frame))
+
+
+class CanFrameWaiterIndex:
+    """
+    Waits for CAN frames matching an ID, an ID/mask pair, a payload prefix or a predicate in the incoming data queue.
+    The matching frame is taken from the queue, the other frames stay in it for get_message() and other waiters.
+    Pending waiters are kept in a dictionary by arbitration ID, so notify() checks each new frame only against the
+    waiters of its ID and the waiters without an exact ID, and wakes up only the waiters which could take it.
+    Note: the class is thread safe.
+    """
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.__waiters = set()
+        # immutable snapshot used by notify() to avoid locking on each frame: ID -> waiters, waiters without exact ID
+        self.__by_id = {}
+        self.__others = ()
+        self.__waits = 0
+        self.__matched = 0
+        self.__timeouts = 0
+        self.__wakeups = 0
+        self.__wait_time = 0.0
+        self.__max_wait_time = 0.0
+        self.__max_latency = 0.0
+
+    def __rebuild(self):
+        by_id = {}
+        others = []
+        for waiter in self.__waiters:
+            if waiter.can_id is not None and waiter.can_mask is None:
+                by_id.setdefault(waiter.can_id, []).append(waiter)
+            else:
+                others.append(waiter)
+        self.__by_id = {can_id: tuple(waiters) for can_id, waiters in by_id.items()}
+        self.__others = tuple(others)
+
+    def wait_for(self, frames_queue, timeout: float, predicate=None, can_id: int = None, can_mask: int = None,
+                 payload_prefix: bytes = None):
+        """
+        Take the oldest matching frame from the queue, wait for it if there is no such frame. The frames put into the
+        queue have to be passed to notify()
+            Parameters:
+                frames_queue (BoundedQueue): incoming data queue
+                timeout (float): maximum time to wait in seconds, None means to wait without limit
+                predicate (Callable): function returning True for the matching CanFrame, None means any frame
+                can_id (int): arbitration ID of the frame. With can_mask, the frame ID should match it in the bits set
+                              in can_mask. None means any ID
+                can_mask (int): mask applied to can_id and the frame IDs
+                payload_prefix (bytes): the payload of the frame should start with, None means any payload
+            Returns:
+                frame (CanFrame): the matching frame, None if timeout expired
+        """
+        if can_id is None and can_mask is not None:
+            raise ValueError("can_mask requires can_id")
+        waiter = _FrameWaiter(can_id, can_mask, bytes(payload_prefix) if payload_prefix is not None else None,
+                              predicate)
+        start_time = time.monotonic()
+        # the waiter is registered before the queue is checked, so a frame put after the check wakes it up
+        with self.__lock:
+            self.__waits += 1
+            self.__waiters.add(waiter)
+            self.__rebuild()
+        try:
+            while True:
+                waiter.event.clear()
+                try:
+                    frame = frames_queue.take_first(waiter.matches)
+                    break
+                except queue.Empty:
+                    pass
+                remaining = None if timeout is None else start_time + timeout - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    frame = None
+                    break
+                waiter.event.wait(remaining)
+        finally:
+            with self.__lock:
+                self.__waiters.discard(waiter)
+                self.__rebuild()
+        wait_time = time.monotonic() - start_time
+        with self.__lock:
+            self.__wait_time += wait_time
+            self.__max_wait_time = max(self.__max_wait_time, wait_time)
+            if frame is None:
+                self.__timeouts += 1
+            else:
+                self.__matched += 1
+                # the frame timestamp is wall clock time set by the interface
+                self.__max_latency = max(self.__max_latency, time.time() - frame.timestamp)
+        return frame
+
+    def notify(self, frames) -> None:
+        """
+        Wake up the waiters which could take the frames. Should be called after the frames are put into the queue
+            Parameters:
+                frames (Iterable): CanFrame objects put into the queue
+        """
+        by_id = self.__by_id
+        others = self.__others
+        if not by_id and not others:
+            return
+        woken = 0
+        for frame in frames:
+            for waiter in by_id.get(frame.id, ()):
+                if not waiter.event.is_set() and waiter.matches(frame):
+                    waiter.event.set()
+                    woken += 1
+            for waiter in others:
+                if not waiter.event.is_set() and waiter.matches(frame):
+                    waiter.event.set()
+                    woken += 1
+        if woken:
+            with self.__lock:
+                self.__wakeups += woken
+
+    def get_statistics(self) -> dict:
+        """
+        Get waiting counters
+            Returns:
+                statistics (dict): {'waits', 'matched', 'timeouts', 'pending', 'wakeups', 'wait_time', 'max_wait_time',
+                                    'max_latency'}. Times are in seconds, max_latency is the maximum time from the
+                                    frame timestamp until it is returned
+        """
+        with self.__lock:
+            return {'waits': self.__waits,
+                    'matched': self.__matched,
+                    'timeouts': self.__timeouts,
+                    'pending': len(self.__waiters),
+                    'wakeups': self.__wakeups,
+                    'wait_time': self.__wait_time,
+                    'max_wait_time': self.__max_wait_time,
+                    'max_latency': self.__max_latency}
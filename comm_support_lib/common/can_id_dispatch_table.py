@@ -0,0 +1,222 @@
+import bisect
+import threading
+
+from comm_support_lib.common.callback_dispatcher import CallbackSubscriber
+from comm_support_lib.config.config import CALLBACK_QUEUE_CAPACITY, CALLBACK_OVERFLOW_POLICY
+
+
+class _LookupSnapshot:
+    """
+    Immutable lookup structures built on each subscription change, so dispatch() does not take the lock
+    """
+
+    def __init__(self, all_frames: tuple, exact: dict, masked: tuple, range_bounds: list, range_subscribers: list):
+        # subscribers without a filter
+        self.all_frames = all_frames
+        # ID -> subscribers
+        self.exact = exact
+        # (mask, {masked ID -> subscribers}), one entry per distinct mask
+        self.masked = masked
+        # start IDs of non-overlapping segments and subscribers of each segment, the last segment has no subscribers
+        self.range_bounds = range_bounds
+        self.range_subscribers = range_subscribers
+        # ID -> subscribers with a filter matching the ID, filled by dispatch()
+        self.cache = {}
+
+
+class CanIdDispatchTable:
+    """
+    Delivers received CAN frames to the callbacks registered on an arbitration ID, an ID/mask pair or an ID range.
+    Callbacks without a filter get all the frames. The subscribers of an ID are found by dictionary lookups and cached
+    per ID, so the cost of a frame does not depend on the number of registered callbacks. Each callback has its own
+    queue and worker thread, as in CallbackDispatcher.
+    """
+    # maximum number of IDs kept in the lookup cache, the cache is reset when it is reached
+    __CACHE_CAPACITY = 4096
+
+    def __init__(self, policy: str = CALLBACK_OVERFLOW_POLICY, capacity: int = CALLBACK_QUEUE_CAPACITY):
+        """
+        Class constructor.
+            Parameters:
+                policy (str): default overflow policy of the callbacks, one of OverflowPolicyConsts
+                capacity (int): default queue capacity of the callbacks
+        """
+        self.__policy = policy
+        self.__capacity = capacity
+        self.__lock = threading.Lock()
+        # callback -> (subscriber, can_id, can_mask, id_range)
+        self.__entries = {}
+        self.__snapshot = _LookupSnapshot((), {}, (), [], [])
+
+    def subscribe(self, callback, policy: str = None, capacity: int = None, can_id: int = None, can_mask: int = None,
+                  id_range: tuple = None) -> bool:
+        """
+        Register callback
+            Parameters:
+                callback (Callable): function to register
+                policy (str): overflow policy, None to use the default one
+                capacity (int): queue capacity, None to use the default one
+                can_id (int): the callback gets the frames with this ID. With can_mask, the frames whose ID matches
+                              can_id in the bits set in can_mask
+                can_mask (int): mask applied to can_id and the frame IDs
+                id_range (tuple): (first, last) inclusive ID range, used if can_id is None. If neither can_id nor
+                                  id_range is set, the callback gets all the frames
+            Returns:
+                result (bool): False if the callback has already registered, True otherwise
+        """
+        if can_id is None and can_mask is not None:
+            raise ValueError("can_mask requires can_id")
+        if can_id is None and id_range is not None and id_range[0] > id_range[1]:
+            raise ValueError("Wrong ID range passed: {}".format(id_range))
+        with self.__lock:
+            if callback in self.__entries:
+                return False
+            subscriber = CallbackSubscriber(callback, policy or self.__policy, capacity or self.__capacity)
+            self.__entries[callback] = (subscriber, can_id, can_mask, id_range if can_id is None else None)
+            self.__rebuild()
+        return True
+
+    def unsubscribe(self, callback) -> bool:
+        """
+        Unregister callback. Frames pending for the callback are discarded.
+            Parameters:
+                callback (Callable): function to unregister
+            Returns:
+                result (bool): False if the callback is not registered, True otherwise
+        """
+        with self.__lock:
+            entry = self.__entries.pop(callback, None)
+            self.__rebuild()
+        if entry is None:
+            return False
+        entry[0].stop()
+        return True
+
+    def is_subscribed(self, callback) -> bool:
+        return callback in self.__entries
+
+    def has_subscribers(self) -> bool:
+        return len(self.__entries) > 0
+
+    def clear(self) -> None:
+        """
+        Unregister all the callbacks
+        """
+        with self.__lock:
+            entries = list(self.__entries.values())
+            self.__entries.clear()
+            self.__rebuild()
+        for entry in entries:
+            entry[0].stop()
+
+    def __rebuild(self):
+        """
+        Build the lookup structures. Should be called holding the lock.
+        """
+        all_frames = []
+        exact = {}
+        masked = {}
+        ranges = []
+        for subscriber, can_id, can_mask, id_range in self.__entries.values():
+            if can_id is not None:
+                if can_mask is None:
+                    exact.setdefault(can_id, []).append(subscriber)
+                else:
+                    masked.setdefault(can_mask, {}).setdefault(can_id & can_mask, []).append(subscriber)
+            elif id_range is not None:
+                ranges.append((id_range[0], id_range[1], subscriber))
+            else:
+                all_frames.append(subscriber)
+
+        range_bounds = sorted({first for first, _, _ in ranges} | {last + 1 for _, last, _ in ranges})
+        range_subscribers = [tuple(subscriber for first, last, subscriber in ranges if first <= bound <= last)
+                             for bound in range_bounds]
+        masked = tuple((can_mask, {masked_id: tuple(items) for masked_id, items in ids.items()})
+                       for can_mask, ids in masked.items())
+        self.__snapshot = _LookupSnapshot(tuple(all_frames),
+                                          {can_id: tuple(items) for can_id, items in exact.items()},
+                                          masked, range_bounds, range_subscribers)
+
+    @staticmethod
+    def __lookup(snapshot: _LookupSnapshot, can_id: int) -> tuple:
+        subscribers = snapshot.exact.get(can_id, ())
+        for can_mask, ids in snapshot.masked:
+            subscribers += ids.get(can_id & can_mask, ())
+        index = bisect.bisect_right(snapshot.range_bounds, can_id) - 1
+        if index >= 0:
+            subscribers += snapshot.range_subscribers[index]
+        return subscribers
+
+    def dispatch(self, can_id: int, msg) -> bool:
+        """
+        Put frame into the queues of the callbacks registered on its ID and of the callbacks without a filter
+            Parameters:
+                can_id (int): arbitration ID of the frame
+                msg: frame to be delivered
+            Returns:
+                matched (bool): True if any callback with a filter has got the frame
+        """
+        snapshot = self.__snapshot
+        subscribers = self.__get_subscribers(snapshot, can_id)
+        for subscriber in subscribers:
+            subscriber.put(msg)
+        for subscriber in snapshot.all_frames:
+            subscriber.put(msg)
+        return len(subscribers) > 0
+
+    def dispatch_many(self, frames: list) -> list:
+        """
+        Put several frames into the queues of the callbacks. Each callback gets its frames by one put, so the lock of
+        its queue is taken once per batch.
+            Parameters:
+                frames (list): frames to be delivered, objects with 'id' attribute
+            Returns:
+                unmatched (list): frames which have not been passed to any callback with a filter
+        """
+        snapshot = self.__snapshot
+        unmatched = []
+        batches = {}
+        for frame in frames:
+            subscribers = self.__get_subscribers(snapshot, frame.id)
+            if not subscribers:
+                unmatched.append(frame)
+                continue
+            for subscriber in subscribers:
+                batch = batches.get(subscriber)
+                if batch is None:
+                    batches[subscriber] = [frame]
+                else:
+                    batch.append(frame)
+        for subscriber, batch in batches.items():
+            subscriber.put_many(batch)
+        for subscriber in snapshot.all_frames:
+            subscriber.put_many(frames)
+        return unmatched
+
+    def __get_subscribers(self, snapshot: _LookupSnapshot, can_id: int) -> tuple:
+        subscribers = snapshot.cache.get(can_id)
+        if subscribers is None:
+            subscribers = self.__lookup(snapshot, can_id)
+            if len(snapshot.cache) >= self.__CACHE_CAPACITY:
+                snapshot.cache.clear()
+            snapshot.cache[can_id] = subscribers
+        return subscribers
+
+    def get_execution_time(self) -> tuple:
+        """
+        Get execution time of the registered callbacks
+            Returns:
+                (total, maximum) (tuple): total and maximum execution time of one call over all the callbacks in
+                                          seconds
+        """
+        statistics = [entry[0].get_statistics() for entry in list(self.__entries.values())]
+        return (sum(item['exec_time'] for item in statistics),
+                max((item['max_exec_time'] for item in statistics), default=0.0))
+
+    def get_statistics(self) -> dict:
+        """
+        Get delivery counters of the registered callbacks
+            Returns:
+                statistics (dict): CallbackSubscriber.name -> counters returned by CallbackSubscriber.get_statistics()
+        """
+        return {entry[0].name: entry[0].get_statistics() for entry in list(self.__entries.values())}
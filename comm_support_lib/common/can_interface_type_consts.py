@@ -0,0 +1,4 @@
+class CanInterfaceTypeConsts:
+    SLCAN: str = "slcan"  # serial-line adapter, the channel is its serial port or socket URL
+    SOCKETCAN: str = "socketcan"  # native Linux interface, e.g. "can0" or "vcan0"
+    VIRTUAL: str = "virtual"  # python-can in-process bus, for testing without hardware
@@ -0,0 +1,302 @@
+import json
+import os
+import struct
+import sys
+import threading
+import time
+import zlib
+
+from comm_support_lib.common.can_frame import CanFrame
+from comm_support_lib.config.config import CAN_LOG_CHUNK_FRAMES, CAN_LOG_CHUNK_INTERVAL, CAN_LOG_COMPRESSION_LEVEL
+
+# file header: magic, format version, wall clock time of the log start
+_FILE_HEADER = struct.Struct("<4sHd")
+# chunk header: length of the compressed records, number of frames, minimal and maximal frame timestamps
+_CHUNK_HEADER = struct.Struct("<IIdd")
+# record header: timestamp, arbitration ID, CanFrameFlagConsts bits, DLC, CaptureDirectionConsts value, payload length
+_RECORD_HEADER = struct.Struct("<dIBBBB")
+_MAGIC = b"CANL"
+_VERSION = 1
+# suffix of the index file, it is written next to the log
+INDEX_SUFFIX = ".idx"
+
+
+class CanLogWriter:
+    """
+    Log of CAN frames. The frames are grouped into chunks of CAN_LOG_CHUNK_FRAMES frames or CAN_LOG_CHUNK_INTERVAL
+    seconds, each chunk is compressed by zlib. The index file gets a JSON line per chunk with its offset, time range
+    and the set of arbitration IDs, so a reader could seek to a time window or an ID set without decompressing the
+    whole log. Encoding, compression and writing are done by the writer thread, write_frames() only appends the frames
+    to the list.
+    Note: the class is thread safe.
+    """
+    __thread = None
+
+    def __init__(self, path: str, chunk_frames: int = CAN_LOG_CHUNK_FRAMES,
+                 chunk_interval: float = CAN_LOG_CHUNK_INTERVAL, compression_level: int = CAN_LOG_COMPRESSION_LEVEL):
+        """
+        Class constructor. Creates the log and the index files, the existing files are overwritten.
+            Parameters:
+                path (str): path to the log file, the index is written to path + INDEX_SUFFIX
+                chunk_frames (int): maximum number of frames in a chunk
+                chunk_interval (float): maximum time in seconds the frames are kept in memory before writing
+                compression_level (int): zlib compression level
+        """
+        self.__chunk_frames = chunk_frames
+        self.__chunk_interval = chunk_interval
+        self.__compression_level = compression_level
+        self.__file = open(path, "wb")
+        self.__index_file = open(path + INDEX_SUFFIX, "w")
+        self.__file.write(_FILE_HEADER.pack(_MAGIC, _VERSION, time.time()))
+        self.__offset = _FILE_HEADER.size
+        # (direction, frame) pairs waiting for the writer thread
+        self.__pending = []
+        self.__condition = threading.Condition()
+        self.__closed = False
+        self.__frames = 0
+        self.__chunks = 0
+        self.__thread = threading.Thread(target=self.__run, name="CanLogWriter", daemon=True)
+        self.__thread.start()
+
+    def __del__(self):
+        if self.__thread is None:
+            # the constructor has failed
+            return
+        self.close()
+
+    def write_frames(self, direction: int, frames) -> None:
+        """
+        Add frames to the log
+            Parameters:
+                direction (int): CaptureDirectionConsts value
+                frames (Iterable): CanFrame objects
+        """
+        with self.__condition:
+            if self.__closed:
+                return
+            self.__pending.extend((direction, frame) for frame in frames)
+            if len(self.__pending) >= self.__chunk_frames:
+                self.__condition.notify()
+
+    def __run(self):
+        """
+        Writer thread function
+        """
+        while True:
+            with self.__condition:
+                self.__condition.wait_for(lambda: self.__closed or len(self.__pending) >= self.__chunk_frames,
+                                          self.__chunk_interval)
+                pending = self.__pending
+                self.__pending = []
+                closed = self.__closed
+            for start in range(0, len(pending), self.__chunk_frames):
+                self.__write_chunk(pending[start:start + self.__chunk_frames])
+            if closed:
+                return
+
+    def __write_chunk(self, records: list):
+        pack = _RECORD_HEADER.pack
+        parts = []
+        ids = set()
+        first_time = last_time = records[0][1].timestamp
+        for direction, frame in records:
+            payload = bytes(frame.payload)
+            parts.append(pack(frame.timestamp, frame.id, frame.flags, frame.dlc, direction, len(payload)))
+            parts.append(payload)
+            ids.add(frame.id)
+            first_time = min(first_time, frame.timestamp)
+            last_time = max(last_time, frame.timestamp)
+        data = zlib.compress(b"".join(parts), self.__compression_level)
+        try:
+            self.__file.write(_CHUNK_HEADER.pack(len(data), len(records), first_time, last_time))
+            self.__file.write(data)
+            self.__file.flush()
+            # the index line is written after the chunk, so it never points to a chunk which is not written
+            self.__index_file.write(json.dumps({'offset': self.__offset, 'frames': len(records),
+                                                'first_time': first_time, 'last_time': last_time,
+                                                'ids': sorted(ids)}) + "\n")
+            self.__index_file.flush()
+        except (OSError, ValueError) as ex:
+            print("Failed to write CAN log: {}".format(ex), file=sys.stderr)
+            return
+        self.__offset += _CHUNK_HEADER.size + len(data)
+        self.__frames += len(records)
+        self.__chunks += 1
+
+    def close(self) -> None:
+        """
+        Write the pending frames and close the files. Further writes are ignored.
+        """
+        with self.__condition:
+            if self.__closed:
+                return
+            self.__closed = True
+            self.__condition.notify()
+        self.__thread.join()
+        self.__file.close()
+        self.__index_file.close()
+
+    def get_statistics(self) -> dict:
+        """
+        Get log counters
+            Returns:
+                statistics (dict): {'frames', 'chunks', 'size_bytes', 'pending'}. frames and size are of the written
+                                   chunks
+        """
+        with self.__condition:
+            return {'frames': self.__frames,
+                    'chunks': self.__chunks,
+                    'size_bytes': self.__offset,
+                    'pending': len(self.__pending)}
+
+
+class CanLogReader:
+    """
+    Reader of the logs written by CanLogWriter. The chunks which are not in the index file (e.g. the index was lost or
+    the writer was not closed properly) are found by scanning the log.
+    """
+    __file = None
+
+    def __init__(self, path: str):
+        """
+        Class constructor. Opens the log file, checks its header and loads the index.
+            Parameters:
+                path (str): path to the log file
+        """
+        self.__file = open(path, "rb")
+        header = self.__file.read(_FILE_HEADER.size)
+        if len(header) < _FILE_HEADER.size:
+            self.__file.close()
+            raise ValueError("File is too short to be a CAN log: {}".format(path))
+        magic, version, self.__start_time = _FILE_HEADER.unpack(header)
+        if magic != _MAGIC or version != _VERSION:
+            self.__file.close()
+            raise ValueError("Unsupported CAN log format: {}".format(path))
+        self.__index = self.__load_index(path + INDEX_SUFFIX)
+
+    def __del__(self):
+        if self.__file is None:
+            # the constructor has failed
+            return
+        self.close()
+
+    def __load_index(self, index_path: str) -> list:
+        index = []
+        if os.path.exists(index_path):
+            with open(index_path) as index_file:
+                for line in index_file:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # the last line could be written partially
+                        break
+                    index.append(entry)
+        # find the chunks which are not indexed
+        offset = index[-1]['offset'] + _CHUNK_HEADER.size + self.__read_chunk_header(index[-1]['offset'])[0] \
+            if index else _FILE_HEADER.size
+        while True:
+            header = self.__read_chunk_header(offset)
+            if header is None:
+                break
+            length, frames, first_time, last_time = header
+            records = self.__read_chunk(offset)
+            if records is None:
+                break
+            index.append({'offset': offset, 'frames': frames, 'first_time': first_time, 'last_time': last_time,
+                          'ids': sorted({frame.id for _, frame in records})})
+            offset += _CHUNK_HEADER.size + length
+        return index
+
+    def __read_chunk_header(self, offset: int) -> tuple or None:
+        self.__file.seek(offset)
+        header = self.__file.read(_CHUNK_HEADER.size)
+        if len(header) < _CHUNK_HEADER.size:
+            return None
+        return _CHUNK_HEADER.unpack(header)
+
+    def __read_chunk(self, offset: int) -> list or None:
+        """
+        Read and decode the chunk
+            Returns:
+                records (list): (direction, CanFrame) pairs, None if the chunk is not complete
+        """
+        header = self.__read_chunk_header(offset)
+        if header is None:
+            return None
+        data = self.__file.read(header[0])
+        if len(data) < header[0]:
+            return None
+        try:
+            data = zlib.decompress(data)
+        except zlib.error:
+            return None
+        records = []
+        position = 0
+        unpack_from = _RECORD_HEADER.unpack_from
+        while position < len(data):
+            timestamp, frame_id, flags, dlc, direction, length = unpack_from(data, position)
+            position += _RECORD_HEADER.size
+            records.append((direction, CanFrame(timestamp, frame_id, flags, dlc, data[position:position + length])))
+            position += length
+        return records
+
+    @property
+    def start_time(self) -> float:
+        """
+        Wall clock time (time.time()) of the log start
+        """
+        return self.__start_time
+
+    def get_time_range(self) -> tuple:
+        """
+        Get time range of the logged frames
+            Returns:
+                (first, last) (tuple): minimal and maximal frame timestamps, None if the log is empty
+        """
+        if not self.__index:
+            return None
+        return (min(entry['first_time'] for entry in self.__index),
+                max(entry['last_time'] for entry in self.__index))
+
+    def get_ids(self) -> list:
+        """
+        Get arbitration IDs of the logged frames
+            Returns:
+                ids (list): sorted IDs
+        """
+        return sorted(set().union(*(entry['ids'] for entry in self.__index)))
+
+    def get_frame_count(self) -> int:
+        return sum(entry['frames'] for entry in self.__index)
+
+    def read(self, start_time: float = None, end_time: float = None, ids=None, direction: int = None):
+        """
+        Iterate over the frames of the time window and the ID set. Only the chunks which could contain such frames are
+        decompressed.
+            Parameters:
+                start_time (float): minimal frame timestamp, None means the log start
+                end_time (float): maximal frame timestamp, None means the log end
+                ids (Iterable): arbitration IDs, None means all
+                direction (int): CaptureDirectionConsts value, None means both directions
+            Returns:
+                iterator of (direction, CanFrame) pairs in the order they were written
+        """
+        ids = set(ids) if ids is not None else None
+        for entry in self.__index:
+            if start_time is not None and entry['last_time'] < start_time:
+                continue
+            if end_time is not None and entry['first_time'] > end_time:
+                continue
+            if ids is not None and ids.isdisjoint(entry['ids']):
+                continue
+            for record in self.__read_chunk(entry['offset']) or ():
+                frame = record[1]
+                if start_time is not None and frame.timestamp < start_time or \
+                        end_time is not None and frame.timestamp > end_time or \
+                        ids is not None and frame.id not in ids or direction is not None and record[0] != direction:
+                    continue
+                yield record
+
+    def close(self) -> None:
+        if not self.__file.closed:
+            self.__file.close()
@@ -0,0 +1,3 @@
+class CaptureDirectionConsts:
+    DIRECTION_RX: int = 1  # data received from the port
+    DIRECTION_TX: int = 2  # data sent to the port
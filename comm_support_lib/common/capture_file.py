@@ -0,0 +1,172 @@
+import mmap
+import struct
+import threading
+import time
+
+from comm_support_lib.config.config import CAPTURE_FILE_GROW_BYTES
+
+# file header: magic, format version, wall clock time and time.monotonic() value at the capture start
+_FILE_HEADER = struct.Struct("<4sHdd")
+# record header: time.monotonic() based timestamp, CaptureDirectionConsts value, data length
+_RECORD_HEADER = struct.Struct("<dBI")
+_MAGIC = b"SCAP"
+_VERSION = 1
+
+
+class CaptureRecord:
+    """
+    Chunk of data read from the capture file
+    """
+    __slots__ = ("timestamp", "direction", "data")
+
+    def __init__(self, timestamp: float, direction: int, data: bytes):
+        self.timestamp = timestamp
+        self.direction = direction
+        self.data = data
+
+    def __repr__(self):
+        return "CaptureRecord(timestamp={}, direction={}, data={!r})".format(self.timestamp, self.direction, self.data)
+
+
+class CaptureWriter:
+    """
+    Append-only binary capture file. Records are written into the memory mapped region, so appending does not require
+    a system call. The unused tail of the region is filled with zeros, so the records written before a crash could be
+    still read. The file is truncated to the written size on close.
+    Note: the class is thread safe.
+    """
+
+    def __init__(self, path: str, grow_bytes: int = CAPTURE_FILE_GROW_BYTES):
+        """
+        Class constructor. Creates the file, the existing file is overwritten.
+            Parameters:
+                path (str): path to the capture file
+                grow_bytes (int): minimum size the file grows by when the mapped region is full
+        """
+        self.__grow_bytes = grow_bytes
+        self.__lock = threading.Lock()
+        self.__mmap = None
+        self.__file = open(path, "w+b")
+        self.__size = 0
+        self.__resize(max(grow_bytes, _FILE_HEADER.size))
+        _FILE_HEADER.pack_into(self.__mmap, 0, _MAGIC, _VERSION, time.time(), time.monotonic())
+        self.__offset = _FILE_HEADER.size
+
+    def __del__(self):
+        self.close()
+
+    def __resize(self, size: int):
+        if self.__mmap is not None:
+            self.__mmap.close()
+        self.__file.truncate(size)
+        self.__mmap = mmap.mmap(self.__file.fileno(), size)
+        self.__size = size
+
+    def write(self, direction: int, data, timestamp: float = None) -> None:
+        """
+        Append record to the file
+            Parameters:
+                direction (int): CaptureDirectionConsts value
+                data (bytes or memoryview): captured data
+                timestamp (float): time.monotonic() based timestamp, None means current time
+        """
+        if timestamp is None:
+            timestamp = time.monotonic()
+        with self.__lock:
+            if self.__mmap is None:
+                return
+            data_offset = self.__offset + _RECORD_HEADER.size
+            end = data_offset + len(data)
+            if end > self.__size:
+                # the file size is at least doubled to keep the number of remappings logarithmic
+                self.__resize(max(end, self.__size + max(self.__size, self.__grow_bytes)))
+            # the header is written last, so a partially written record is never seen by the reader after a crash
+            self.__mmap[data_offset:end] = data
+            _RECORD_HEADER.pack_into(self.__mmap, self.__offset, timestamp, direction, len(data))
+            self.__offset = end
+
+    def flush(self) -> None:
+        """
+        Write the mapped region to the disk
+        """
+        with self.__lock:
+            if self.__mmap is not None:
+                self.__mmap.flush()
+
+    def close(self) -> None:
+        """
+        Flush and close the file. Further writes are ignored.
+        """
+        with self.__lock:
+            if self.__mmap is None:
+                return
+            self.__mmap.flush()
+            self.__mmap.close()
+            self.__mmap = None
+            self.__file.truncate(self.__offset)
+            self.__file.close()
+
+    @property
+    def size_bytes(self) -> int:
+        return self.__offset
+
+
+class CaptureReader:
+    """
+    Reader of the files written by CaptureWriter
+    """
+
+    def __init__(self, path: str):
+        """
+        Class constructor. Opens the file and checks its header.
+            Parameters:
+                path (str): path to the capture file
+        """
+        self.__mmap = None
+        with open(path, "rb") as file:
+            self.__mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self.__mmap) < _FILE_HEADER.size:
+            raise ValueError("File is too short to be a capture: {}".format(path))
+        magic, version, self.__start_time, self.__start_monotonic = _FILE_HEADER.unpack_from(self.__mmap)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError("Unsupported capture file format: {}".format(path))
+
+    def __del__(self):
+        self.close()
+
+    @property
+    def start_time(self) -> float:
+        """
+        Wall clock time (time.time()) of the capture start
+        """
+        return self.__start_time
+
+    @property
+    def start_monotonic(self) -> float:
+        """
+        time.monotonic() value at the capture start. Record timestamps use the same clock.
+        """
+        return self.__start_monotonic
+
+    def __iter__(self):
+        """
+        Iterate over the records in the order they were written
+            Returns:
+                iterator of CaptureRecord objects
+        """
+        offset = _FILE_HEADER.size
+        while offset + _RECORD_HEADER.size <= len(self.__mmap):
+            timestamp, direction, length = _RECORD_HEADER.unpack_from(self.__mmap, offset)
+            if direction == 0:
+                # zero filled tail of the file which was not closed properly
+                return
+            data_offset = offset + _RECORD_HEADER.size
+            if data_offset + length > len(self.__mmap):
+                return
+            yield CaptureRecord(timestamp, direction, self.__mmap[data_offset:data_offset + length])
+            offset = data_offset + length
+
+    def close(self) -> None:
+        if self.__mmap is not None:
+            self.__mmap.close()
+            self.__mmap = None
@@ -0,0 +1,40 @@
+class FaultScenario:
+    """
+    Parameters of the faults injected into incoming data by FaultInjectingDriver. All the decisions are made by the
+    random generator initialized with the seed, so the same incoming chunks are damaged in the same way on each run.
+    """
+
+    def __init__(self, name: str = "no_faults", seed: int = 0, latency: float = 0.0, jitter: float = 0.0,
+                 split_probability: float = 0.0, max_split_parts: int = 4, drop_probability: float = 0.0,
+                 drop_length: int = 1, burst_probability: float = 0.0, burst_duration: float = 0.0):
+        """
+        Class constructor. The default values do not inject any faults.
+            Parameters:
+                name (str): scenario name used in reports
+                seed (int): seed of the random generator
+                latency (float): delay of each chunk in seconds
+                jitter (float): maximum random delay in seconds added to the latency. The order of the bytes is kept
+                split_probability (float): probability of a chunk to be split at random offsets
+                max_split_parts (int): maximum number of parts a chunk is split into
+                drop_probability (float): probability of each byte to start a run of dropped bytes
+                drop_length (int): number of bytes dropped in a run
+                burst_probability (float): probability of a chunk to stall the link for burst_duration. The data
+                                           received during the stall is delivered as one chunk when the stall ends
+                burst_duration (float): duration of the stall in seconds
+        """
+        self.name = name
+        self.seed = seed
+        self.latency = latency
+        self.jitter = jitter
+        self.split_probability = split_probability
+        self.max_split_parts = max_split_parts
+        self.drop_probability = drop_probability
+        self.drop_length = drop_length
+        self.burst_probability = burst_probability
+        self.burst_duration = burst_duration
+
+    def to_dict(self) -> dict:
+        return dict(vars(self))
+
+    def __repr__(self):
+        return "FaultScenario({})".format(", ".join("{}={!r}".format(key, value) for key, value in vars(self).items()))
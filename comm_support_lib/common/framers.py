@@ -0,0 +1,225 @@
+from abc import abstractmethod, ABC
+
+from comm_support_lib.config.config import SERIAL_FRAME_MAX_BYTES
+
+
+class Frame:
+    """
+    Complete frame extracted from the byte stream
+    """
+    __slots__ = ("data", "timestamp")
+
+    def __init__(self, data: bytes, timestamp: float):
+        """
+        Class constructor.
+            Parameters:
+                data (bytes): frame bytes
+                timestamp (float): time.monotonic() based arrival time of the last byte of the frame, None if unknown
+        """
+        self.data = data
+        self.timestamp = timestamp
+
+    def __repr__(self):
+        return "Frame(data={!r}, timestamp={})".format(self.data, self.timestamp)
+
+
+class Framer:
+    """
+    Base class of the incremental framers. The driver passes each received chunk into feed() and gets the frames
+    completed by this chunk. Timing based framers additionally report the silent interval which terminates a frame,
+    the driver calls flush() when the line has been idle for that time.
+    """
+    __metaclass__ = ABC
+
+    def __init__(self, max_size: int = SERIAL_FRAME_MAX_BYTES):
+        """
+        Class constructor.
+            Parameters:
+                max_size (int): maximum frame size. Longer data is emitted as a frame of max_size bytes
+        """
+        self._max_size = max_size
+        self._buffer = bytearray()
+
+    @abstractmethod
+    def feed(self, data, timestamp: float) -> list:
+        """
+        Process the next chunk of the byte stream
+            Parameters:
+                data (bytes or memoryview): received bytes
+                timestamp (float): time.monotonic() based arrival time of the chunk
+            Returns:
+                frames (list): Frame objects completed by the chunk
+        """
+        pass
+
+    def flush(self, timestamp: float) -> list:
+        """
+        Terminate the current frame because the line has been idle for get_idle_timeout()
+            Parameters:
+                timestamp (float): arrival time of the last received byte
+            Returns:
+                frames (list): Frame objects, empty if there is no collected data or the framer is not timing based
+        """
+        return []
+
+    def get_idle_timeout(self) -> float or None:
+        """
+        Returns:
+            timeout (float): silent interval in seconds which terminates a frame, None if the framer is not timing based
+        """
+        return None
+
+    def set_baud_rate(self, baud_rate: int) -> None:
+        """
+        Update the baud rate used to calculate timing parameters
+            Parameters:
+                baud_rate (int): bus baud rate
+        """
+        pass
+
+    def has_pending_data(self) -> bool:
+        return len(self._buffer) > 0
+
+    def reset(self) -> None:
+        """
+        Drop collected bytes of the incomplete frame
+        """
+        self._buffer.clear()
+
+
+class DelimiterFramer(Framer):
+    """
+    Splits the byte stream by the delimiter, e.g. by the end of line symbol
+    """
+
+    def __init__(self, delimiter: bytes, include_delimiter: bool = False, max_size: int = SERIAL_FRAME_MAX_BYTES):
+        """
+        Class constructor.
+            Parameters:
+                delimiter (bytes): sequence which terminates a frame
+                include_delimiter (bool): keep the delimiter at the end of the frame data if True
+                max_size (int): maximum frame size. Longer data is emitted as a frame of max_size bytes
+        """
+        super().__init__(max_size)
+        if not delimiter:
+            raise ValueError("Delimiter should not be empty")
+        self.__delimiter = bytes(delimiter)
+        self.__include_delimiter = include_delimiter
+
+    def feed(self, data, timestamp: float) -> list:
+        frames = []
+        # the delimiter could be split between the chunks, so the search starts before the new data
+        search_pos = max(0, len(self._buffer) - len(self.__delimiter) + 1)
+        self._buffer += data
+        start = 0
+        while True:
+            end = self._buffer.find(self.__delimiter, max(start, search_pos))
+            if end < 0:
+                break
+            frame_end = end + len(self.__delimiter)
+            if self.__include_delimiter:
+                frames.append(Frame(bytes(self._buffer[start:frame_end]), timestamp))
+            elif end > start:
+                # empty frames between consecutive delimiters are skipped
+                frames.append(Frame(bytes(self._buffer[start:end]), timestamp))
+            start = frame_end
+        while len(self._buffer) - start >= self._max_size:
+            frames.append(Frame(bytes(self._buffer[start:start + self._max_size]), timestamp))
+            start += self._max_size
+        del self._buffer[:start]
+        return frames
+
+
+class LengthPrefixFramer(Framer):
+    """
+    Extracts frames which start with the length of the payload
+    """
+
+    def __init__(self, prefix_size: int = 1, byteorder: str = "big", include_prefix: bool = False,
+                 max_size: int = SERIAL_FRAME_MAX_BYTES):
+        """
+        Class constructor.
+            Parameters:
+                prefix_size (int): size of the length field in bytes
+                byteorder (str): byte order of the length field, "big" or "little"
+                include_prefix (bool): keep the length field at the beginning of the frame data if True
+                max_size (int): maximum frame size. If the length field exceeds it, the collected data is dropped
+        """
+        super().__init__(max_size)
+        self.__prefix_size = prefix_size
+        self.__byteorder = byteorder
+        self.__include_prefix = include_prefix
+
+    def feed(self, data, timestamp: float) -> list:
+        frames = []
+        self._buffer += data
+        start = 0
+        while len(self._buffer) - start >= self.__prefix_size:
+            payload_start = start + self.__prefix_size
+            length = int.from_bytes(self._buffer[start:payload_start], self.__byteorder)
+            if length > self._max_size:
+                # the stream is out of sync, there is no way to find the next frame boundary
+                start = len(self._buffer)
+                break
+            frame_end = payload_start + length
+            if frame_end > len(self._buffer):
+                break
+            frames.append(Frame(bytes(self._buffer[start if self.__include_prefix else payload_start:frame_end]),
+                                timestamp))
+            start = frame_end
+        del self._buffer[:start]
+        return frames
+
+
+class ModbusRtuFramer(Framer):
+    """
+    Modbus RTU framer. A frame is terminated by the silent interval of 3.5 character times, which is fixed to 1.75 ms
+    for baud rates above 19200 as required by the Modbus over serial line specification.
+    """
+    # start bit, 8 data bits, parity or second stop bit, stop bit
+    __BITS_PER_CHAR = 11
+    __FIXED_TIMING_BAUD_RATE = 19200
+    __FIXED_SILENT_INTERVAL = 0.00175
+    __MAX_FRAME_BYTES = 256
+
+    def __init__(self, baud_rate: int = None, max_size: int = __MAX_FRAME_BYTES):
+        """
+        Class constructor.
+            Parameters:
+                baud_rate (int): bus baud rate. The driver sets it when the framer is attached
+                max_size (int): maximum frame size. Longer data is emitted as a frame of max_size bytes
+        """
+        super().__init__(max_size)
+        self.__silent_interval = None
+        self.__last_timestamp = None
+        if baud_rate is not None:
+            self.set_baud_rate(baud_rate)
+
+    def set_baud_rate(self, baud_rate: int) -> None:
+        if baud_rate > self.__FIXED_TIMING_BAUD_RATE:
+            self.__silent_interval = self.__FIXED_SILENT_INTERVAL
+        else:
+            self.__silent_interval = 3.5 * self.__BITS_PER_CHAR / baud_rate
+
+    def get_idle_timeout(self) -> float or None:
+        return self.__silent_interval
+
+    def feed(self, data, timestamp: float) -> list:
+        frames = []
+        if self._buffer and self.__silent_interval is not None and \
+                timestamp - self.__last_timestamp >= self.__silent_interval:
+            # the gap has been detected without the idle timer, e.g. the driver was busy
+            frames += self.flush(self.__last_timestamp)
+        self._buffer += data
+        self.__last_timestamp = timestamp
+        while len(self._buffer) >= self._max_size:
+            frames.append(Frame(bytes(self._buffer[:self._max_size]), timestamp))
+            del self._buffer[:self._max_size]
+        return frames
+
+    def flush(self, timestamp: float) -> list:
+        if not self._buffer:
+            return []
+        frame = Frame(bytes(self._buffer), timestamp)
+        self._buffer.clear()
+        return [frame]
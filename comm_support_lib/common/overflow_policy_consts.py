@@ -0,0 +1,6 @@
+class OverflowPolicyConsts:
+    BLOCK: str = "block"  # producer waits until there is free space
+    DROP_OLDEST: str = "drop_oldest"  # the oldest item is dropped to free space for the new one
+    DROP_NEWEST: str = "drop_newest"  # the new item is dropped
+    COALESCE: str = "coalesce"  # the new item is merged with the newest pending one
+    SPILL: str = "spill"  # items are stored into the temporary file and read back transparently
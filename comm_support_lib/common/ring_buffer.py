@@ -0,0 +1,143 @@
+from collections import deque
+
+
+class RingBuffer:
+    """
+    Preallocated byte ring buffer of variable-length records. Writer reserves a contiguous region, fills it in place
+    (e.g. using readinto) and commits it as a record. Reader gets memoryview of the oldest record and releases it after
+    processing, so no intermediate bytes objects are created. Records never wrap around the end of the buffer.
+    Note: the class is not thread safe, access to the metadata should be synchronized by the owner.
+    """
+
+    def __init__(self, capacity: int):
+        """
+        Class constructor.
+            Parameters:
+                capacity (int): size of the buffer in bytes
+        """
+        self.__capacity = capacity
+        self.__buffer = bytearray(capacity)
+        self.__view = memoryview(self.__buffer)
+        # (offset, length) of the committed records, the oldest is the first
+        self.__records = deque()
+        self.__read_pos = 0
+        self.__write_pos = 0
+        self.__reserved_pos = None
+        # True if the writer has wrapped around the end of the buffer and the reader has not yet
+        self.__wrapped = False
+        self.__used_bytes = 0
+
+    def __len__(self):
+        return len(self.__records)
+
+    @property
+    def capacity(self) -> int:
+        return self.__capacity
+
+    @property
+    def used_bytes(self) -> int:
+        """
+        Number of payload bytes stored in the committed records
+        """
+        return self.__used_bytes
+
+    def reserve(self, size: int) -> memoryview or None:
+        """
+        Reserve contiguous region for the next record. The previous reservation, if it was not committed, is dropped.
+            Parameters:
+                size (int): number of bytes to reserve
+            Returns:
+                view (memoryview): writable region of the buffer, None if there is not enough free space
+        """
+        if not self.__records:
+            self.__read_pos = 0
+            self.__write_pos = 0
+            self.__wrapped = False
+
+        if self.__wrapped:
+            if self.__read_pos - self.__write_pos < size:
+                return None
+            self.__reserved_pos = self.__write_pos
+        elif self.__capacity - self.__write_pos >= size:
+            self.__reserved_pos = self.__write_pos
+        elif self.__read_pos >= size:
+            self.__reserved_pos = 0
+        else:
+            return None
+
+        return self.__view[self.__reserved_pos:self.__reserved_pos + size]
+
+    def commit(self, length: int) -> None:
+        """
+        Publish first length bytes of the current reservation as a new record.
+            Parameters:
+                length (int): number of bytes written into the reserved region
+        """
+        if self.__reserved_pos is None:
+            raise ValueError("Nothing is reserved")
+
+        if self.__records and self.__reserved_pos < self.__write_pos:
+            self.__wrapped = True
+        self.__records.append((self.__reserved_pos, length))
+        if len(self.__records) == 1:
+            self.__read_pos = self.__reserved_pos
+        self.__write_pos = self.__reserved_pos + length
+        self.__used_bytes += length
+        self.__reserved_pos = None
+
+    def peek(self) -> memoryview or None:
+        """
+        Get the oldest record without removing it from the buffer. The view is valid until release() is called.
+            Returns:
+                view (memoryview): read-only view of the record or None if the buffer is empty
+        """
+        if not self.__records:
+            return None
+        offset, length = self.__records[0]
+        return self.__view[offset:offset + length].toreadonly()
+
+    def release(self) -> None:
+        """
+        Remove the oldest record from the buffer
+        """
+        if not self.__records:
+            return
+        _, length = self.__records.popleft()
+        self.__used_bytes -= length
+        if not self.__records:
+            return
+        next_pos = self.__records[0][0]
+        if next_pos < self.__read_pos:
+            # reader has reached the end of the buffer and continues from the beginning
+            self.__wrapped = False
+        self.__read_pos = next_pos
+
+    def pop(self) -> bytes or None:
+        """
+        Remove the oldest record from the buffer and return its copy
+            Returns:
+                record (bytes): copy of the record or None if the buffer is empty
+        """
+        view = self.peek()
+        if view is None:
+            return None
+        record = view.tobytes()
+        view.release()
+        self.release()
+        return record
+
+    def clear(self) -> None:
+        """
+        Remove all the committed records. The current reservation stays valid.
+        """
+        self.__records.clear()
+        self.__used_bytes = 0
+        if self.__reserved_pos is None:
+            self.__read_pos = 0
+            self.__write_pos = 0
+            self.__wrapped = False
+        else:
+            # keep the reserved region untouched until it is committed
+            self.__read_pos = self.__reserved_pos
+            self.__write_pos = self.__reserved_pos
+            self.__wrapped = False
@@ -13,7 +13,7 @@ class SerialBaseInterface:
         pass
 
     @abstractmethod
-    def register_message_callback(self, callback):
+    def register_message_callback(self, callback, policy: str = None, capacity: int = None):
         pass
 
     @abstractmethod
@@ -0,0 +1,4 @@
+class SerialReadModeConsts:
+    LOW_LATENCY: str = "low_latency"  # each chunk is passed to the consumers as soon as it is read
+    BULK: str = "bulk"  # chunks are coalesced into one message until inter-char timeout expires
+    TIMEOUT_AUTO: str = "auto"  # timeout value which means that the timeout is derived from the character time
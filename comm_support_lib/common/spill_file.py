@@ -0,0 +1,85 @@
+import pickle
+import struct
+import tempfile
+
+
+class SpillFile:
+    """
+    Append-only temporary file used as FIFO storage for the items which do not fit into memory queue. The file is
+    truncated each time all the stored items have been read.
+    Note: the class is not thread safe, access should be synchronized by the owner.
+    """
+    __RECORD_HEADER = struct.Struct("<I")
+
+    def __init__(self, directory: str = None):
+        """
+        Class constructor. The file is created on the first append.
+            Parameters:
+                directory (str): directory for the temporary file, None means system temporary directory
+        """
+        self.__directory = directory
+        self.__file = None
+        self.__read_offset = 0
+        self.__write_offset = 0
+        self.__count = 0
+
+    def __len__(self):
+        return self.__count
+
+    @property
+    def size_bytes(self) -> int:
+        return self.__write_offset - self.__read_offset
+
+    def append(self, item) -> None:
+        """
+        Store item at the end of the file
+            Parameters:
+                item: any picklable object
+        """
+        if self.__file is None:
+            self.__file = tempfile.TemporaryFile(prefix="spill_", dir=self.__directory)
+        record = pickle.dumps(item, pickle.HIGHEST_PROTOCOL)
+        self.__file.seek(self.__write_offset)
+        self.__file.write(self.__RECORD_HEADER.pack(len(record)))
+        self.__file.write(record)
+        self.__write_offset += self.__RECORD_HEADER.size + len(record)
+        self.__count += 1
+
+    def pop(self):
+        """
+        Remove the oldest item from the file and return it
+            Returns:
+                item: the oldest item
+        """
+        if self.__count == 0:
+            raise IndexError("pop from empty spill file")
+        self.__file.flush()
+        self.__file.seek(self.__read_offset)
+        length, = self.__RECORD_HEADER.unpack(self.__file.read(self.__RECORD_HEADER.size))
+        item = pickle.loads(self.__file.read(length))
+        self.__read_offset += self.__RECORD_HEADER.size + length
+        self.__count -= 1
+        if self.__count == 0:
+            self.clear()
+        return item
+
+    def clear(self) -> None:
+        """
+        Remove all the items
+        """
+        if self.__file is not None:
+            self.__file.truncate(0)
+        self.__read_offset = 0
+        self.__write_offset = 0
+        self.__count = 0
+
+    def close(self) -> None:
+        """
+        Remove all the items and delete the file
+        """
+        if self.__file is not None:
+            self.__file.close()
+            self.__file = None
+        self.__read_offset = 0
+        self.__write_offset = 0
+        self.__count = 0
@@ -0,0 +1,3 @@
+class XmodemProtocolConsts:
+    XMODEM: str = "xmodem"  # XMODEM-1K, CRC-16 with fallback to 128 byte blocks and checksum
+    YMODEM: str = "ymodem"  # YMODEM batch mode, a single file with its name and size passed in block 0
@@ -4,22 +4,117 @@
 DEBUG_CLI_SERIAL_PORT = "COM9"
 # Baud rate of the USB-UART serial adapter, on which it should work
 DEBUG_CLI_SERIAL_BAUD = 115200
-# Inter-character timeout. Helps to avoid inter-frame gaps
-DEBUG_CLI_INTERCHAR_TIMEOUT = 0.5
-# Incoming message receiving timeout.
-DEBUG_CLI_MSG_TIMEOUT = 3
+# Inter-character timeout. Helps to avoid inter-frame gaps. "auto" means it is derived from the baud rate
+DEBUG_CLI_INTERCHAR_TIMEOUT = "auto"
+# Incoming message receiving timeout. "auto" means it is derived from the baud rate
+DEBUG_CLI_MSG_TIMEOUT = "auto"
+# Read mode of the serial port. Could be "low_latency" (each chunk is passed as soon as it is read) or "bulk" (chunks
+# are coalesced until inter-char timeout expires)
+DEBUG_CLI_READ_MODE = "low_latency"
 
 # CAN config
-# currently supports only SocketCAN implementation
 
+# Backend of the CAN interface. Could be "slcan" (serial-line adapter, CAN_SOCKET is its serial port or socket URL),
+# "socketcan" (native Linux interface, CAN_SOCKET is its name, e.g. "can0" or "vcan0") or "virtual" (python-can
+# in-process bus for testing without hardware, CAN_SOCKET is the channel name)
+CAN_INTERFACE_TYPE = "slcan"
 # Socket address including host IP-address amd port of the SocketCAN adapter
 CAN_SOCKET = "socket://192.168.0.1:1234"
 # Incoming message receiving timeout. Helps to avoid inter-frame gaps
 CAN_MSG_TIMEOUT = 10
+# Maximum number of frames which are already buffered by the interface and read at once, before they are passed to
+# the callbacks and the incoming data queue
+CAN_RECV_BATCH_SIZE = 256
 
 # RS-485 config
 
-# Inter-character timeout. Helps to avoid inter-frame gaps
-RS_485_INTERCHAR_TIMEOUT = 10
-# Incoming message receiving timeout.
-RS_485_MSG_TIMEOUT = 10
\ No newline at end of file
+# Inter-character timeout. Helps to avoid inter-frame gaps. "auto" means it is derived from the baud rate
+RS_485_INTERCHAR_TIMEOUT = "auto"
+# Incoming message receiving timeout. "auto" means it is derived from the baud rate
+RS_485_MSG_TIMEOUT = "auto"
+# Read mode of the serial port. Could be "low_latency" or "bulk"
+RS_485_READ_MODE = "bulk"
+
+# Callback dispatcher config
+
+# Number of incoming messages which could be pending for each registered callback
+CALLBACK_QUEUE_CAPACITY = 1024
+# Policy applied when a callback does not keep up with incoming messages. Could be "block", "drop_oldest" or "coalesce".
+# "block" pauses the reading thread, which is shared by all the serial ports
+CALLBACK_OVERFLOW_POLICY = "drop_oldest"
+
+# Incoming data queues config
+
+# Size of the incoming data ring buffer of serial ports (RS-485) in bytes
+SERIAL_QUEUE_CAPACITY = 1024 * 1024
+# Policy applied when incoming data queue of serial port is full. Could be "block", "drop_oldest", "drop_newest"
+# or "spill"
+SERIAL_QUEUE_OVERFLOW_POLICY = "drop_oldest"
+# Default maximum size of the frames extracted by the serial port framers in bytes
+SERIAL_FRAME_MAX_BYTES = 4096
+# Maximum number of messages in the incoming data queue of CAN interface
+CAN_QUEUE_CAPACITY = 100000
+# Policy applied when incoming data queue of CAN interface is full
+CAN_QUEUE_OVERFLOW_POLICY = "drop_oldest"
+# Maximum number of strings in the incoming data queue of Debug CLI
+DEBUG_CLI_QUEUE_CAPACITY = 100000
+# Policy applied when incoming data queue of Debug CLI is full
+DEBUG_CLI_QUEUE_OVERFLOW_POLICY = "drop_oldest"
+# Directory for the spill files of the queues with "spill" policy. None means system temporary directory
+QUEUE_SPILL_DIR = None
+
+# Outgoing data config
+
+# Maximum number of messages waiting to be written into serial port. Sending blocks when the queue is full
+SERIAL_TX_QUEUE_CAPACITY = 1024
+# Maximum number of bytes of the pending messages coalesced into one write() call
+SERIAL_TX_COALESCE_BYTES = 64 * 1024
+
+# Capture, replay and fault injection config
+
+# Size of the capture file region mapped into memory at once. The file grows by at least this size when it is full
+CAPTURE_FILE_GROW_BYTES = 1024 * 1024
+# Maximum number of messages in the incoming data queue of the replay driver. The replay waits when the queue is full
+REPLAY_QUEUE_CAPACITY = 100000
+# Maximum number of messages in the incoming data queue of the fault injecting driver. The oldest messages are dropped
+# when the queue is full
+FAULT_INJECTION_QUEUE_CAPACITY = 100000
+# Maximum number of frames in a compressed chunk of CAN log
+CAN_LOG_CHUNK_FRAMES = 4096
+# Maximum time in seconds the frames are kept in memory before they are written to CAN log
+CAN_LOG_CHUNK_INTERVAL = 1.0
+# zlib compression level of CAN log chunks, from 1 (fastest) to 9 (smallest)
+CAN_LOG_COMPRESSION_LEVEL = 1
+
+# Automatic serial timeouts config
+
+# Inter-char timeout in character times, used when the timeout is "auto"
+SERIAL_AUTO_INTERCHAR_CHARS = 16
+# Lower limit of the automatic inter-char timeout in seconds. Covers the latency of USB-UART adapters
+SERIAL_AUTO_INTERCHAR_MIN_TIMEOUT = 0.02
+# Message timeout in character times, used when the timeout is "auto"
+SERIAL_AUTO_MSG_CHARS = 1024
+# Lower limit of the automatic message timeout in seconds
+SERIAL_AUTO_MSG_MIN_TIMEOUT = 0.2
+
+# XMODEM/YMODEM config
+
+# Time to wait for the receiver to request the transfer start ("C" or NAK) in seconds
+XMODEM_START_TIMEOUT = 60
+# Time to wait for the block to be acknowledged in seconds
+XMODEM_ACK_TIMEOUT = 10
+# Maximum number of retransmissions of one block before the transfer is cancelled
+XMODEM_MAX_RETRIES = 10
+
+# ISO-TP config
+
+# Number of consecutive frames the receiver accepts before the next flow control frame, 0 means no further flow control
+ISO_TP_BLOCK_SIZE = 0
+# Minimum separation time between consecutive frames requested by the receiver in seconds, from 0.0001 to 0.127
+ISO_TP_ST_MIN = 0.0
+# Time to wait for flow control and consecutive frames in seconds (N_Bs and N_Cr timeouts)
+ISO_TP_TIMEOUT = 1.0
+# Maximum number of flow control frames with "wait" status accepted in a row before the transfer is aborted
+ISO_TP_MAX_WAIT_FRAMES = 10
+# Maximum number of received messages waiting to be taken by get_message(), the oldest messages are dropped
+ISO_TP_QUEUE_CAPACITY = 1024
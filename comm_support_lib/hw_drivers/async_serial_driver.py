@@ -0,0 +1,605 @@
+import asyncio
+import os
+import sys
+import time
+from collections import deque
+
+import serial
+
+from comm_support_lib.common.overflow_policy_consts import OverflowPolicyConsts
+from comm_support_lib.common.serial_base_interface import SerialBaseInterface
+from comm_support_lib.common.serial_iface_parity_consts import SerialIfaceParityConsts
+from comm_support_lib.common.serial_read_mode_consts import SerialReadModeConsts
+from comm_support_lib.common.spill_file import SpillFile
+from comm_support_lib.config.config import SERIAL_QUEUE_CAPACITY, SERIAL_QUEUE_OVERFLOW_POLICY, QUEUE_SPILL_DIR
+from comm_support_lib.hw_drivers.serial_driver import SERIAL_MESSAGE_MAX_BYTES
+from comm_support_lib.hw_drivers.serial_port_settings import SerialPortSettings
+from comm_support_lib.hw_drivers.serial_reactor import SerialReactor
+
+
+class AsyncSerialDriver(SerialBaseInterface):
+    """
+    asyncio transport for serial ports. send_message(), get_message() and update_port_config() are coroutines, incoming
+    chunks could be also received using "async for". Several ports could be served by one event loop without any
+    additional threads.
+    """
+    __bus = None
+    __QUEUE_POLICIES = (OverflowPolicyConsts.BLOCK, OverflowPolicyConsts.DROP_OLDEST, OverflowPolicyConsts.DROP_NEWEST,
+                        OverflowPolicyConsts.SPILL)
+    # polling interval for the ports without selectable file descriptor (Windows)
+    __POLL_INTERVAL = 0.01
+
+    def __init__(self, port: str, baud_rate: int, ic_timeout: float or str, msg_timeout: float or str,
+                 parity: str = SerialIfaceParityConsts.PARITY_NONE, stopbits: int = 1,
+                 enqueue_incoming_data: bool = True, queue_capacity: int = SERIAL_QUEUE_CAPACITY,
+                 queue_policy: str = SERIAL_QUEUE_OVERFLOW_POLICY, read_mode: str = SerialReadModeConsts.BULK):
+        """
+        Class constructor. Initialize serial bus communication:
+            Parameters:
+                port (str): Serial port
+                baud_rate (int):    Bus baud rate
+                parity (str): Serial port parity setting
+                stopbits (int): Serial port stop bits setting
+                ic_timeout (float):  inter-char timeout. SerialReadModeConsts.TIMEOUT_AUTO means it is derived from the
+                                     baud rate
+                msg_timeout (float): incoming message timeout. SerialReadModeConsts.TIMEOUT_AUTO means it is derived
+                                     from the baud rate
+                enqueue_incoming_data (bool):  Enqueue incoming data(True case) or not(False case)
+                queue_capacity (int): size of the incoming data queue in bytes, at least SERIAL_MESSAGE_MAX_BYTES
+                queue_policy (str): OverflowPolicyConsts value applied when the queue is full. With BLOCK policy
+                                    reading from the port is paused until the data is consumed
+                read_mode (str): SerialReadModeConsts.LOW_LATENCY to pass each chunk as soon as it is read, or
+                                 SerialReadModeConsts.BULK to coalesce chunks until inter-char timeout expires
+
+        Note: if the object is created inside a coroutine, reading is started immediately on the running event loop.
+        Otherwise, it is started on the first awaited call or by start().
+        """
+        self.__port = port
+        self.__baud_rate = baud_rate
+        self.__parity = parity
+        self.__stopbits = stopbits
+        if read_mode not in (SerialReadModeConsts.LOW_LATENCY, SerialReadModeConsts.BULK):
+            print("Wrong read mode passed: " + read_mode, file=sys.stderr)
+            sys.exit(1)
+        self.__read_mode = read_mode
+        self.__msg_timeout_setting = msg_timeout
+        self.__ic_timeout_setting = ic_timeout
+        self.__update_timeouts()
+        if queue_policy not in self.__QUEUE_POLICIES:
+            print("Wrong queue policy passed: " + queue_policy, file=sys.stderr)
+            sys.exit(1)
+        if enqueue_incoming_data and queue_capacity < SERIAL_MESSAGE_MAX_BYTES:
+            print("Wrong queue capacity passed: {}, minimum is {}".format(queue_capacity, SERIAL_MESSAGE_MAX_BYTES),
+                  file=sys.stderr)
+            sys.exit(1)
+        self.__queue = deque() if enqueue_incoming_data else None
+        self.__queue_capacity = queue_capacity
+        self.__queue_policy = queue_policy
+        self.__queue_bytes = 0
+        self.__queue_not_empty = None
+        self.__rx_spill = SpillFile(QUEUE_SPILL_DIR) if queue_policy == OverflowPolicyConsts.SPILL else None
+        # messages which do not fit into the queue with BLOCK policy, reading is paused while there are any
+        self.__rx_blocked = deque()
+        self.__rx_dropped = 0
+        self.__rx_spilled = 0
+        self.__clb_list = []
+        self.__loop = None
+        self.__timer = None
+        self.__rx_pending = bytearray()
+        self.__last_rx_time = 0.0
+        self.__read_start_time = 0.0
+        self.__tx_messages = 0
+        self.__tx_bytes = 0
+        self.__tx_writes = 0
+        self.__tx_failed = 0
+        self.__tx_write_time = 0.0
+        self.__rx_bytes = 0
+        self.__rx_messages = 0
+        self.__read_calls = 0
+        self.__empty_reads = 0
+        self.__queue_high_water_mark = 0
+        self.__callback_time = 0.0
+        self.__callback_max_time = 0.0
+
+        self.__init_bus()
+        try:
+            self.__attach(asyncio.get_running_loop())
+        except RuntimeError:
+            # there is no running event loop, reading will be started later
+            pass
+
+    def __update_timeouts(self):
+        self.__ic_timeout, self.__msg_timeout = SerialPortSettings.get_timeouts(
+            self.__baud_rate, self.__parity, self.__stopbits, self.__ic_timeout_setting, self.__msg_timeout_setting,
+            self.__read_mode)
+
+    def __del__(self):
+        if self.__bus is None:
+            # the constructor has failed
+            return
+        self.close()
+        if self.__rx_spill is not None:
+            self.__rx_spill.close()
+
+    def __init_bus(self):
+        """
+        Initialize serial bus in non-blocking mode.
+        """
+        try:
+            self.__bus = serial.Serial(self.__port, self.__baud_rate,
+                                       parity=SerialPortSettings.get_parity_from_string(self.__parity),
+                                       stopbits=self.__stopbits,
+                                       timeout=0)
+            self.__bus.reset_input_buffer()
+            self.__bus.reset_output_buffer()
+        except serial.SerialException as serialEx:
+            print("Failed to initialize Serial Bus: {}".format(serialEx))
+            sys.exit(1)
+
+    def __attach(self, loop: asyncio.AbstractEventLoop):
+        """
+        Start reading the port on the event loop.
+        """
+        if self.__loop is not None:
+            return
+        self.__loop = loop
+        self.__queue_not_empty = asyncio.Event()
+        if self.__get_queue_depth():
+            self.__queue_not_empty.set()
+        self.__read_start_time = loop.time()
+        if not self.__rx_blocked:
+            self.__start_reading()
+        self.__schedule_timer()
+
+    def __start_reading(self):
+        if SerialReactor.is_supported(self.__bus):
+            self.__loop.add_reader(self.__bus.fileno(), self.__on_readable)
+        else:
+            self.__loop.call_soon(self.__poll)
+
+    def __stop_reading(self):
+        if SerialReactor.is_supported(self.__bus) and not self.__loop.is_closed():
+            self.__loop.remove_reader(self.__bus.fileno())
+
+    def __detach(self):
+        if self.__loop is None:
+            return
+        if self.__timer is not None:
+            self.__timer.cancel()
+            self.__timer = None
+        if not self.__rx_blocked:
+            self.__stop_reading()
+        self.__loop = None
+        self.__rx_pending.clear()
+
+    def __get_queue_depth(self) -> int:
+        if self.__queue is None:
+            return 0
+        return len(self.__queue) + (len(self.__rx_spill) if self.__rx_spill is not None else 0)
+
+    def __enqueue(self, msg: bytes) -> bool:
+        """
+        Put the message into the incoming data queue. If the queue is full, the queue policy is applied.
+            Returns:
+                result (bool): False if the message does not fit into the queue with BLOCK policy
+        """
+        if self.__rx_spill is not None and (len(self.__rx_spill) or
+                                            self.__queue_bytes + len(msg) > self.__queue_capacity):
+            # once spilling is started, all the new messages go to the file to keep FIFO order
+            self.__rx_spill.append(msg)
+            self.__rx_spilled += 1
+        else:
+            if self.__queue_bytes + len(msg) > self.__queue_capacity:
+                if self.__queue_policy == OverflowPolicyConsts.BLOCK:
+                    return False
+                if self.__queue_policy == OverflowPolicyConsts.DROP_NEWEST:
+                    self.__rx_dropped += 1
+                    return True
+                while self.__queue_bytes + len(msg) > self.__queue_capacity:
+                    self.__queue_bytes -= len(self.__queue.popleft())
+                    self.__rx_dropped += 1
+            self.__queue.append(msg)
+            self.__queue_bytes += len(msg)
+        spill_bytes = self.__rx_spill.size_bytes if self.__rx_spill is not None else 0
+        self.__queue_high_water_mark = max(self.__queue_high_water_mark, self.__queue_bytes + spill_bytes)
+        self.__queue_not_empty.set()
+        return True
+
+    def __dequeue(self) -> bytes:
+        """
+        Remove the oldest message from the queue or the spill file. Reading paused by BLOCK policy is resumed once the
+        blocked messages fit into the queue.
+        """
+        if self.__queue:
+            msg = self.__queue.popleft()
+            self.__queue_bytes -= len(msg)
+        else:
+            msg = self.__rx_spill.pop()
+        if self.__rx_blocked:
+            while self.__rx_blocked and self.__enqueue(self.__rx_blocked[0]):
+                self.__rx_blocked.popleft()
+            if not self.__rx_blocked and self.__loop is not None:
+                self.__start_reading()
+        if not self.__get_queue_depth():
+            self.__queue_not_empty.clear()
+        return msg
+
+    async def __wait_message(self) -> bytes:
+        while not self.__get_queue_depth():
+            await self.__queue_not_empty.wait()
+        return self.__dequeue()
+
+    def __dispatch_message(self, msg: bytes):
+        for callback in list(self.__clb_list):
+            start_time = time.perf_counter()
+            callback(msg)
+            exec_time = time.perf_counter() - start_time
+            self.__callback_time += exec_time
+            self.__callback_max_time = max(self.__callback_max_time, exec_time)
+        if len(msg) > 0:
+            self.__rx_messages += 1
+            if self.__queue is None:
+                return
+            if self.__rx_blocked or not self.__enqueue(msg):
+                if not self.__rx_blocked:
+                    # the queue is full, the next data stays in the OS buffer until the messages are consumed
+                    self.__stop_reading()
+                self.__rx_blocked.append(msg)
+
+    def __flush_rx_pending(self):
+        msg = bytes(self.__rx_pending)
+        self.__rx_pending.clear()
+        self.__read_start_time = self.__loop.time()
+        self.__dispatch_message(msg)
+
+    def __schedule_timer(self):
+        """
+        Schedule emitting of the collected data after inter-char timeout, or of the empty message after message
+        timeout, the same as SerialDriver does.
+        """
+        if self.__timer is not None:
+            self.__timer.cancel()
+            self.__timer = None
+        if self.__rx_pending:
+            deadline = self.__last_rx_time + (self.__ic_timeout or 0)
+        elif self.__msg_timeout is not None:
+            deadline = self.__read_start_time + self.__msg_timeout
+        else:
+            return
+        self.__timer = self.__loop.call_at(deadline, self.__on_timer)
+
+    def __on_timer(self):
+        self.__timer = None
+        if self.__rx_pending:
+            self.__flush_rx_pending()
+        else:
+            self.__read_start_time = self.__loop.time()
+            self.__dispatch_message(b"")
+        self.__schedule_timer()
+
+    def __read_available(self) -> bool:
+        self.__read_calls += 1
+        try:
+            # the message never exceeds SERIAL_MESSAGE_MAX_BYTES, so it always fits into the empty queue
+            msg = self.__bus.read(max(1, min(self.__bus.in_waiting, SERIAL_MESSAGE_MAX_BYTES - len(self.__rx_pending))))
+        except serial.SerialException as serialEx:
+            print("Failed to read message: {}".format(serialEx), file=sys.stderr)
+            self.__detach()
+            return False
+        if not msg:
+            self.__empty_reads += 1
+        else:
+            self.__rx_bytes += len(msg)
+            self.__last_rx_time = self.__loop.time()
+            self.__rx_pending += msg
+            if not self.__ic_timeout or len(self.__rx_pending) >= SERIAL_MESSAGE_MAX_BYTES:
+                self.__flush_rx_pending()
+            self.__schedule_timer()
+        return True
+
+    def __on_readable(self):
+        self.__read_available()
+
+    def __poll(self):
+        if self.__loop is None:
+            return
+        if self.__rx_blocked:
+            # reading is resumed by __dequeue()
+            return
+        if self.__bus.in_waiting and not self.__read_available():
+            return
+        self.__loop.call_later(self.__POLL_INTERVAL, self.__poll)
+
+    async def __write(self, msg: bytes) -> int:
+        """
+        Write the message without blocking the event loop.
+        """
+        if not SerialReactor.is_supported(self.__bus):
+            return self.__bus.write(msg)
+
+        view = memoryview(msg)
+        written = 0
+        while written < len(view):
+            try:
+                written += os.write(self.__bus.fileno(), view[written:])
+            except BlockingIOError:
+                writable = self.__loop.create_future()
+                self.__loop.add_writer(self.__bus.fileno(), writable.set_result, None)
+                try:
+                    await writable
+                finally:
+                    self.__loop.remove_writer(self.__bus.fileno())
+        return written
+
+    async def __drain(self):
+        """
+        Wait for the output buffer to be transmitted.
+        """
+        char_time = 10 / self.__bus.baudrate
+        while True:
+            out_waiting = self.__bus.out_waiting
+            if not out_waiting:
+                return
+            await asyncio.sleep(out_waiting * char_time)
+
+    async def start(self):
+        """
+        Start reading the port on the running event loop
+        """
+        self.__attach(asyncio.get_running_loop())
+
+    def close(self):
+        """
+        Stop reading and close serial bus
+        """
+        try:
+            self.__detach()
+            self.__bus.close()
+        except Exception as ex:
+            print("Failed to close Serial Bus: {}".format(ex), file=sys.stderr)
+
+    async def send_message(self, msg: bytes, block: bool = True):
+        """
+        Send message to serial interface
+            Parameters:
+                msg (bytes):    Message to send
+                block (bool): not used, accepted for compatibility with SerialDriver. Use asyncio.create_task() to send
+                              the message in background
+            Returns:
+                status (bool): True if message has been sent successfully, False otherwise
+        """
+        self.__attach(asyncio.get_running_loop())
+        start_time = self.__loop.time()
+        try:
+            write_bytes = await self.__write(msg)
+            await self.__drain()
+        except (serial.SerialException, OSError) as ex:
+            print("Failed to send message: {}".format(ex), file=sys.stderr)
+            self.__tx_failed += 1
+            return False
+        finally:
+            self.__tx_writes += 1
+            self.__tx_write_time += self.__loop.time() - start_time
+        self.__tx_messages += 1
+        self.__tx_bytes += write_bytes
+        return write_bytes == len(msg)
+
+    async def send_many(self, messages, block: bool = True):
+        """
+        Send several messages to serial interface using one write
+            Parameters:
+                messages (Iterable): messages (bytes) to send
+                block (bool): not used, accepted for compatibility with SerialDriver
+            Returns:
+                status (bool): True if messages have been sent successfully, False otherwise
+        """
+        return await self.send_message(b"".join(messages))
+
+    def get_statistics(self):
+        """
+            Get port counters
+                Returns:
+                    statistics (dict): {'bytes_in', 'frames_in', 'bytes_out', 'frames_out', 'read_calls', 'empty_reads',
+                                       'queue_depth', 'queue_high_water_mark', 'lost_messages', 'callback_time',
+                                       'callback_max_time', 'reconnects'}. Queue depth is number of messages,
+                                       queue_high_water_mark is in bytes, callback times are in seconds
+        """
+        return {'bytes_in': self.__rx_bytes,
+                'frames_in': self.__rx_messages,
+                'bytes_out': self.__tx_bytes,
+                'frames_out': self.__tx_messages,
+                'read_calls': self.__read_calls,
+                'empty_reads': self.__empty_reads,
+                'queue_depth': self.__get_queue_depth(),
+                'queue_high_water_mark': self.__queue_high_water_mark,
+                'lost_messages': self.__rx_dropped,
+                'callback_time': self.__callback_time,
+                'callback_max_time': self.__callback_max_time,
+                'reconnects': 0}
+
+    def get_write_statistics(self):
+        """
+            Get outgoing data counters
+                Returns:
+                    statistics (dict): {'messages', 'bytes', 'writes', 'failed', 'pending', 'write_time', 'throughput'}.
+                                       pending is always 0 as there is no writer queue
+        """
+        return {'messages': self.__tx_messages,
+                'bytes': self.__tx_bytes,
+                'writes': self.__tx_writes,
+                'failed': self.__tx_failed,
+                'pending': 0,
+                'write_time': self.__tx_write_time,
+                'throughput': self.__tx_bytes / self.__tx_write_time if self.__tx_write_time else 0.0}
+
+    async def get_message(self, timeout: float):
+        """
+        Get message from serial interface
+            Parameters:
+                timeout (float):  Operation timeout in seconds
+            Returns:
+                msg (bytes): Received message (None if timeout expired or module works on the mode without data queue)
+        """
+        self.__attach(asyncio.get_running_loop())
+        if self.__queue is None:
+            return None
+
+        try:
+            return await asyncio.wait_for(self.__wait_message(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> bytes:
+        """
+        Get the next incoming chunk. Iteration never stops, use "break" or cancellation to finish it.
+        """
+        self.__attach(asyncio.get_running_loop())
+        if self.__queue is None:
+            raise StopAsyncIteration
+        return await self.__wait_message()
+
+    def get_parameters(self):
+        """
+            Get serial interface parameters
+                Returns:
+                    parameters (dict): Bus parameters
+        """
+        return {'port': self.__bus.port,
+                'baud_rate': self.__bus.baudrate,
+                'msg_timeout': self.__msg_timeout,
+                'parity': self.__bus.parity,
+                'stopbits': self.__bus.stopbits}
+
+    def flush_incoming_data(self):
+        """
+            Flush incoming data queue
+        """
+        if self.__queue is None:
+            return
+
+        self.__queue.clear()
+        self.__queue_bytes = 0
+        if self.__rx_spill is not None:
+            self.__rx_spill.clear()
+        if self.__queue_not_empty is not None:
+            self.__queue_not_empty.clear()
+        if self.__rx_blocked:
+            self.__rx_blocked.clear()
+            if self.__loop is not None:
+                self.__start_reading()
+
+    def get_queue_statistics(self):
+        """
+            Get incoming data queue counters
+                Returns:
+                    statistics (dict): {'capacity', 'policy', 'depth', 'used_bytes', 'high_water_mark', 'dropped',
+                                       'spilled', 'spill_depth'}. capacity, used_bytes and high_water_mark are in bytes,
+                                       depth is number of messages
+        """
+        if self.__queue is None:
+            return None
+
+        return {'capacity': self.__queue_capacity,
+                'policy': self.__queue_policy,
+                'depth': self.__get_queue_depth(),
+                'used_bytes': self.__queue_bytes,
+                'high_water_mark': self.__queue_high_water_mark,
+                'dropped': self.__rx_dropped,
+                'spilled': self.__rx_spilled,
+                'spill_depth': len(self.__rx_spill) if self.__rx_spill is not None else 0}
+
+    def register_message_callback(self, callback, policy: str = None, capacity: int = None):
+        """
+            Register incoming message callback. Callbacks are invoked in the event loop thread.
+                Parameters:
+                    callback (Callable): function to register as callback
+                    policy (str): not used, accepted for compatibility with SerialDriver
+                    capacity (int): not used, accepted for compatibility with SerialDriver
+        """
+        if callback is None:
+            print("Callback function is None", file=sys.stderr)
+            return
+        if callback in self.__clb_list:
+            print("Callback function has already registered:" + callback.__name__, file=sys.stderr)
+            return
+        self.__clb_list.append(callback)
+
+    def unregister_message_callback(self, callback):
+        """
+            Unregister incoming message callback
+                Parameters:
+                    callback (Callable): callback function to unregister
+        """
+        if callback is None:
+            print("Callback function is None", file=sys.stderr)
+            return
+        if callback not in self.__clb_list:
+            print("Callback function is not registered:" + callback.__name__, file=sys.stderr)
+            return
+        self.__clb_list.remove(callback)
+
+    def clear_callback_list(self):
+        """
+            Clear list of incoming data callbacks
+        """
+        self.__clb_list.clear()
+
+    async def update_port_config(self, baud_rate: int, parity: str, stopbits: int):
+        """
+            Update configuration of Serial hardware interface. The settings are applied to the opened port.
+                Parameters:
+                    baud_rate (int):    Bus baud rate
+                    parity (str): Serial port parity setting
+                    stopbits (int): Serial port stop bits setting
+                Returns:
+                    status (bool): True if the configuration has been applied successfully, False otherwise
+        """
+        self.__attach(asyncio.get_running_loop())
+        await self.__drain()
+        try:
+            self.__bus.baudrate = baud_rate
+            self.__bus.parity = SerialPortSettings.get_parity_from_string(parity)
+            self.__bus.stopbits = stopbits
+            self.__bus.reset_input_buffer()
+        except Exception as ex:
+            print("Failed to update Serial Bus configuration: {}".format(ex), file=sys.stderr)
+            return False
+        self.__baud_rate = baud_rate
+        self.__parity = parity
+        self.__stopbits = stopbits
+        self.__update_timeouts()
+        self.__rx_pending.clear()
+        self.__schedule_timer()
+        return True
+
+    async def sweep(self, configs, fn):
+        """
+            Apply several port configurations one by one and call the function for each of them. The initial
+            configuration is restored at the end.
+                Parameters:
+                    configs (Iterable): dictionaries with 'baud_rate', 'parity' and 'stopbits' keys. Missing keys keep
+                                        the initial values
+                    fn (Callable): function or coroutine function called with the configuration dictionary once it has
+                                   been applied
+                Returns:
+                    results (list): values returned by fn, None for the configurations which failed to be applied
+        """
+        initial_config = {'baud_rate': self.__baud_rate, 'parity': self.__parity, 'stopbits': self.__stopbits}
+        results = []
+        try:
+            for config in configs:
+                config = {**initial_config, **config}
+                if not await self.update_port_config(config['baud_rate'], config['parity'], config['stopbits']):
+                    results.append(None)
+                    continue
+                result = fn(config)
+                if asyncio.iscoroutine(result):
+                    result = await result
+                results.append(result)
+        finally:
+            await self.update_port_config(initial_config['baud_rate'], initial_config['parity'],
+                                          initial_config['stopbits'])
+        return results
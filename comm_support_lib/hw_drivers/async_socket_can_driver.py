@@ -0,0 +1,265 @@
+import asyncio
+import sys
+
+import can
+import serial  # to handle exceptions
+
+from comm_support_lib.common.can_frame import CanFrame
+from comm_support_lib.common.can_interface_type_consts import CanInterfaceTypeConsts
+from comm_support_lib.config.config import CAN_INTERFACE_TYPE
+from comm_support_lib.hw_drivers.can_bus_settings import CanBusSettings
+
+
+class AsyncSocketCanDriver:
+    """
+    asyncio transport for CAN interfaces based on python-can Notifier and AsyncBufferedReader. recv(), wait_for() and
+    send_message() are coroutines, incoming frames could be also received using "async for". The frames of native
+    SocketCAN interface are read by the event loop itself, the other interface types are read by the Notifier thread
+    which passes the frames to the event loop.
+    """
+    __bus = None
+    __INTERFACE_TYPES = (CanInterfaceTypeConsts.SLCAN, CanInterfaceTypeConsts.SOCKETCAN,
+                         CanInterfaceTypeConsts.VIRTUAL)
+    # timeout of recv() in the Notifier thread, it limits the time close() waits for the thread
+    __NOTIFIER_TIMEOUT = 0.1
+
+    def __init__(self, socket: str, baud_rate: int, interface_type: str = CAN_INTERFACE_TYPE, can_filters: list = None,
+                 fd: bool = False, bitrate_switch: bool = True):
+        """
+        Class constructor. Initialize CAN bus communication:
+            Parameters:
+                socket (str): CAN socket, channel of the interface: serial port or socket URL of slcan adapter, name of
+                              SocketCAN interface (e.g. "vcan0") or name of virtual bus
+                baud_rate (int):    Bus baud rate
+                interface_type (str): CanInterfaceTypeConsts value
+                can_filters (list): python-can filters, dictionaries {'can_id', 'can_mask', 'extended'}. None means
+                                    all the frames are received
+                fd (bool): enable CAN FD, see SocketCanDriver
+                bitrate_switch (bool): send the data phase of CAN FD frames at the data bitrate
+
+        Note: if the object is created inside a coroutine, reading is started immediately on the running event loop.
+        Otherwise, it is started on the first awaited call or by start().
+        """
+        if interface_type not in self.__INTERFACE_TYPES:
+            raise ValueError("Wrong CAN interface type passed: {}".format(interface_type))
+        if fd and interface_type == CanInterfaceTypeConsts.SLCAN:
+            raise ValueError("CAN FD is not supported by {} interface".format(interface_type))
+        self.__socket = socket
+        self.__fd = fd
+        self.__bitrate_switch = bitrate_switch
+        self.__interface_type = interface_type
+        self.__can_filters = can_filters
+        self.__baud_rate = baud_rate
+        self.__loop = None
+        self.__notifier = None
+        self.__reader = None
+        # [can_id, payload_prefix, future] of the pending wait_for() calls
+        self.__waiters = []
+        self.__rx_bytes = 0
+        self.__rx_messages = 0
+        self.__tx_bytes = 0
+        self.__tx_messages = 0
+        self.__tx_errors = 0
+        self.__queue_high_water_mark = 0
+
+        self.__init_bus()
+        try:
+            self.__attach(asyncio.get_running_loop())
+        except RuntimeError:
+            # no running event loop
+            pass
+
+    def __del__(self):
+        if self.__bus is None:
+            # the constructor has failed
+            return
+        self.close()
+
+    def __init_bus(self):
+        try:
+            self.__bus = can.interface.Bus(**CanBusSettings.get_bus_arguments(
+                self.__interface_type, self.__socket, self.__baud_rate, self.__can_filters, self.__fd))
+        except serial.serialutil.SerialException as CANEx:
+            print("Failed to initialize CAN Bus: {}".format(CANEx), file=sys.stderr)
+            sys.exit(1)
+        except Exception as ex:
+            print("Failed initialize CANBus bus_interface: {}".format(ex), file=sys.stderr)
+            sys.exit(1)
+
+    def __attach(self, loop: asyncio.AbstractEventLoop):
+        """
+        Start reading the interface on the event loop.
+        """
+        if self.__loop is not None:
+            return
+        self.__loop = loop
+        self.__reader = can.AsyncBufferedReader()
+        self.__notifier = can.Notifier(self.__bus, [self.__reader, self.__on_message_received],
+                                       timeout=self.__NOTIFIER_TIMEOUT, loop=loop)
+
+    def __detach(self):
+        if self.__loop is None:
+            return
+        self.__notifier.stop(self.__NOTIFIER_TIMEOUT * 2)
+        self.__notifier = None
+        for waiter in self.__waiters:
+            waiter[2].cancel()
+        self.__waiters.clear()
+        self.__loop = None
+
+    def __on_message_received(self, msg: can.Message):
+        """
+        Notifier listener, it is called in the event loop thread after the frame has been put into the reader queue.
+        """
+        self.__rx_messages += 1
+        self.__rx_bytes += len(msg.data)
+        self.__queue_high_water_mark = max(self.__queue_high_water_mark, self.__reader.buffer.qsize())
+        if not self.__waiters:
+            return
+        frame = None
+        for waiter in list(self.__waiters):
+            can_id, payload_prefix, future = waiter
+            if future.done() or can_id is not None and msg.arbitration_id != can_id or \
+                    payload_prefix is not None and not msg.data.startswith(payload_prefix):
+                continue
+            if frame is None:
+                frame = CanBusSettings.get_frame_from_message(msg)
+            future.set_result(frame)
+            self.__waiters.remove(waiter)
+
+    async def start(self):
+        """
+        Start reading the interface on the running event loop
+        """
+        self.__attach(asyncio.get_running_loop())
+
+    def close(self):
+        """
+        Stop reading and close CAN bus
+        """
+        try:
+            self.__detach()
+            self.__bus.shutdown()
+        except Exception as ex:
+            print("Failed to close CAN Bus: {}".format(ex), file=sys.stderr)
+
+    async def send_message(self, message_id: int, payload=None, is_extended_id: bool = False):
+        """
+        Send message to CAN bus_interface. The frame is passed to the interface at once, the kernel or the adapter
+        buffers it.
+            Parameters:
+                message_id:    Message ID to send
+                payload (bytes or list):   Message payload
+                is_extended_id (bool): if message_id is extended, should be True
+            Returns:
+                status (bool): True if message has been sent successfully, False otherwise
+        """
+        self.__attach(asyncio.get_running_loop())
+        if payload is None:
+            payload = []
+        try:
+            payload = bytes(payload)
+            # the payload longer than classic frame is sent as FD frame, padded to the valid FD length
+            is_fd = self.__fd or len(payload) > CanFrame.MAX_PAYLOAD
+            if is_fd:
+                payload += bytes(CanFrame.get_fd_payload_length(len(payload)) - len(payload))
+            msg = can.Message(arbitration_id=message_id, data=payload, is_extended_id=is_extended_id, is_fd=is_fd,
+                              bitrate_switch=is_fd and self.__bitrate_switch)
+            self.__bus.send(msg)
+        except (serial.serialutil.SerialException, can.CanError, ValueError) as ex:
+            self.__tx_errors += 1
+            print("Failed to send message through CAN bus: {}".format(ex), file=sys.stderr)
+            return False
+        self.__tx_messages += 1
+        self.__tx_bytes += len(msg.data)
+        return True
+
+    async def recv(self, timeout: float = None):
+        """
+        Get message from CAN interface
+            Parameters:
+                timeout (float):  Operation timeout in seconds, None means to wait without limit
+            Returns:
+                msg (CanFrame): Received message, None if timeout expired
+        """
+        self.__attach(asyncio.get_running_loop())
+        try:
+            msg = await asyncio.wait_for(self.__reader.get_message(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        return CanBusSettings.get_frame_from_message(msg)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> CanFrame:
+        """
+        Get the next incoming frame. Iteration never stops, use "break" or cancellation to finish it.
+        """
+        self.__attach(asyncio.get_running_loop())
+        return CanBusSettings.get_frame_from_message(await self.__reader.get_message())
+
+    async def wait_for(self, can_id: int = None, payload_prefix: bytes = None, timeout: float = None):
+        """
+        Wait for the frame with the ID and the payload prefix. Only the frames received after the call are checked,
+        the incoming data queue is not changed.
+            Parameters:
+                can_id (int): arbitration ID of the frame, None means any ID
+                payload_prefix (bytes): the payload of the frame should start with, None means any payload
+                timeout (float):  Operation timeout in seconds, None means to wait without limit
+            Returns:
+                msg (CanFrame): Received message, None if timeout expired
+        """
+        self.__attach(asyncio.get_running_loop())
+        waiter = [can_id, bytes(payload_prefix) if payload_prefix is not None else None, self.__loop.create_future()]
+        self.__waiters.append(waiter)
+        try:
+            return await asyncio.wait_for(waiter[2], timeout)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            if waiter in self.__waiters:
+                self.__waiters.remove(waiter)
+
+    def get_parameters(self):
+        """
+            Get CAN interface parameters
+                Returns:
+                    parameters (dict): Bus parameters
+        """
+        return {'socket': self.__socket,
+                'baud_rate': self.__baud_rate,
+                'interface_type': self.__interface_type,
+                'can_filters': self.__can_filters,
+                'fd': self.__fd,
+                'bitrate_switch': self.__bitrate_switch}
+
+    def flush_incoming_data(self):
+        """
+            Flush incoming data queue
+        """
+        if self.__reader is None:
+            return
+
+        while True:
+            try:
+                self.__reader.buffer.get_nowait()
+            except asyncio.QueueEmpty:
+                break
+
+    def get_statistics(self):
+        """
+            Get interface counters
+                Returns:
+                    statistics (dict): {'bytes_in', 'frames_in', 'bytes_out', 'frames_out', 'send_errors',
+                                       'queue_depth', 'queue_high_water_mark', 'waiters'}. The queue is unbounded,
+                                       waiters is number of the pending wait_for() calls
+        """
+        return {'bytes_in': self.__rx_bytes,
+                'frames_in': self.__rx_messages,
+                'bytes_out': self.__tx_bytes,
+                'frames_out': self.__tx_messages,
+                'send_errors': self.__tx_errors,
+                'queue_depth': self.__reader.buffer.qsize() if self.__reader is not None else 0,
+                'queue_high_water_mark': self.__queue_high_water_mark,
+                'waiters': len(self.__waiters)}
@@ -0,0 +1,61 @@
+import can
+
+from comm_support_lib.common.can_frame import CanFrame
+from comm_support_lib.common.can_frame_flag_consts import CanFrameFlagConsts
+from comm_support_lib.common.can_interface_type_consts import CanInterfaceTypeConsts
+
+
+class CanBusSettings:
+    """
+    python-can bus arguments and frame conversion shared by SocketCanDriver and AsyncSocketCanDriver
+    """
+
+    @staticmethod
+    def get_bus_arguments(interface_type: str, socket: str, baud_rate: int, can_filters: list = None,
+                          fd: bool = False) -> dict:
+        """
+        Get arguments of python-can bus for the interface type. The filters are applied by the kernel for SocketCAN
+        interface, by python-can before the frame is passed to the driver otherwise.
+            Parameters:
+                interface_type (str): CanInterfaceTypeConsts value
+                socket (str): channel of the interface
+                baud_rate (int):    Bus baud rate
+                can_filters (list): python-can filters, None means all the frames are received
+                fd (bool): enable CAN FD
+            Returns:
+                arguments (dict): keyword arguments of can.interface.Bus
+        """
+        arguments = {'interface': interface_type,
+                     'channel': socket,
+                     'can_filters': can_filters}
+        if interface_type == CanInterfaceTypeConsts.SLCAN:
+            arguments['rtscts'] = True
+            arguments['bitrate'] = baud_rate
+        elif fd:
+            # virtual bus passes CAN FD frames as they are, the argument is only used by SocketCAN interface
+            arguments['fd'] = True
+        return arguments
+
+    @staticmethod
+    def get_frame_from_message(msg: can.Message) -> CanFrame:
+        """
+        Convert python-can message to CanFrame
+            Parameters:
+                msg (can.Message): received or sent message
+            Returns:
+                frame (CanFrame): frame with the message timestamp, ID, flags and payload
+        """
+        flags = 0
+        if msg.is_extended_id:
+            flags |= CanFrameFlagConsts.EXTENDED_ID
+        if msg.is_remote_frame:
+            flags |= CanFrameFlagConsts.REMOTE_FRAME
+        if msg.is_error_frame:
+            flags |= CanFrameFlagConsts.ERROR_FRAME
+        if msg.is_fd:
+            flags |= CanFrameFlagConsts.FD_FRAME
+            if msg.bitrate_switch:
+                flags |= CanFrameFlagConsts.BITRATE_SWITCH
+            if msg.error_state_indicator:
+                flags |= CanFrameFlagConsts.ERROR_STATE_INDICATOR
+        return CanFrame(msg.timestamp, msg.arbitration_id, flags, msg.dlc, msg.data)
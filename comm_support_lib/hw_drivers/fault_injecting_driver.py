@@ -0,0 +1,280 @@
+import queue
+import random
+import sys
+import threading
+import time
+from collections import deque
+
+from comm_support_lib.common.bounded_queue import BoundedQueue
+from comm_support_lib.common.callback_dispatcher import CallbackDispatcher
+from comm_support_lib.common.fault_scenario import FaultScenario
+from comm_support_lib.common.overflow_policy_consts import OverflowPolicyConsts
+from comm_support_lib.common.serial_base_interface import SerialBaseInterface
+from comm_support_lib.config.config import FAULT_INJECTION_QUEUE_CAPACITY
+
+
+class FaultInjectingDriver(SerialBaseInterface):
+    """
+    Wrapper around any serial driver which damages incoming data according to FaultScenario: delays it, splits chunks,
+    drops bytes and delivers data in bursts. Could be passed as the bus to DebugCLI or RS485 to check parsing and
+    timeouts on a slow or noisy link. Outgoing data is passed to the wrapped driver as is.
+    """
+
+    def __init__(self, bus: SerialBaseInterface, scenario: FaultScenario = None, enqueue_incoming_data: bool = True,
+                 queue_capacity: int = FAULT_INJECTION_QUEUE_CAPACITY):
+        """
+        Class constructor. Registers the callback in the wrapped driver.
+            Parameters:
+                bus (SerialBaseInterface): wrapped driver. Its own incoming data queue is not used, so it could be
+                                           created with enqueue_incoming_data=False
+                scenario (FaultScenario): faults to inject, None means no faults
+                enqueue_incoming_data (bool):  Enqueue incoming data(True case) or not(False case)
+                queue_capacity (int): maximum number of messages in the incoming data queue
+        """
+        self.__bus = bus
+        self.__queue = BoundedQueue(queue_capacity, OverflowPolicyConsts.DROP_OLDEST) if enqueue_incoming_data \
+            else None
+        self.__dispatcher = CallbackDispatcher()
+        # [delivery time, data, merge allowed], delivery times are non-decreasing to keep the order of the bytes
+        self.__pending = deque()
+        self.__condition = threading.Condition()
+        self.__stopped = False
+        self.__scenario = None
+        self.__random = None
+        self.__burst_end = 0.0
+        self.__chunks_in = 0
+        self.__bytes_in = 0
+        self.__chunks_out = 0
+        self.__bytes_dropped = 0
+        self.__splits = 0
+        self.__bursts = 0
+        self.set_scenario(scenario)
+        self.__thread = threading.Thread(target=self.__deliver, name="FaultInjection", daemon=True)
+        self.__thread.start()
+        # the pending chunks are merged instead of being dropped, and the reading thread never waits
+        self.__bus.register_message_callback(self.__on_message, OverflowPolicyConsts.COALESCE)
+
+    def __del__(self):
+        self.stop()
+        self.__dispatcher.clear()
+
+    def stop(self):
+        """
+        Unregister from the wrapped driver and stop the delivery thread. Pending data is dropped.
+        """
+        with self.__condition:
+            if self.__stopped:
+                return
+            self.__stopped = True
+            self.__condition.notify_all()
+        self.__bus.unregister_message_callback(self.__on_message)
+        if self.__thread is not threading.current_thread():
+            self.__thread.join()
+
+    def set_scenario(self, scenario: FaultScenario or None):
+        """
+        Set the faults to inject. The random generator is reset with the scenario seed.
+            Parameters:
+                scenario (FaultScenario): faults to inject, None means no faults
+        """
+        with self.__condition:
+            self.__scenario = scenario if scenario is not None else FaultScenario()
+            self.__random = random.Random(self.__scenario.seed)
+            self.__burst_end = 0.0
+
+    def get_scenario(self) -> FaultScenario:
+        return self.__scenario
+
+    def __drop_bytes(self, data: bytes) -> bytes:
+        scenario = self.__scenario
+        kept = bytearray()
+        position = 0
+        while position < len(data):
+            if self.__random.random() < scenario.drop_probability:
+                dropped = min(scenario.drop_length, len(data) - position)
+                self.__bytes_dropped += dropped
+                position += dropped
+                continue
+            kept.append(data[position])
+            position += 1
+        return bytes(kept)
+
+    def __split(self, data: bytes) -> list:
+        scenario = self.__scenario
+        if len(data) < 2 or scenario.max_split_parts < 2 or self.__random.random() >= scenario.split_probability:
+            return [data]
+        parts = self.__random.randint(2, min(scenario.max_split_parts, len(data)))
+        offsets = [0] + sorted(self.__random.sample(range(1, len(data)), parts - 1)) + [len(data)]
+        self.__splits += 1
+        return [data[start:end] for start, end in zip(offsets, offsets[1:])]
+
+    def __schedule(self, data: bytes, now: float):
+        """
+        Put the data into the delivery queue. Should be called holding the condition.
+        """
+        scenario = self.__scenario
+        last_time = self.__pending[-1][0] if self.__pending else 0.0
+        if now < self.__burst_end:
+            if self.__pending and self.__pending[-1][2] and len(data) > 0:
+                self.__pending[-1][1] += data
+            else:
+                self.__pending.append([max(self.__burst_end, last_time), bytearray(data), len(data) > 0])
+            return
+        delivery_time = now + scenario.latency
+        if scenario.jitter > 0:
+            delivery_time += self.__random.uniform(0, scenario.jitter)
+        self.__pending.append([max(delivery_time, last_time), data, False])
+
+    def __on_message(self, msg: bytes):
+        """
+        Callback of the wrapped driver
+        """
+        now = time.monotonic()
+        with self.__condition:
+            if self.__stopped:
+                return
+            scenario = self.__scenario
+            if len(msg) == 0:
+                # the line is idle, the notification keeps its place among the delayed chunks
+                self.__schedule(msg, now)
+                self.__condition.notify()
+                return
+            self.__chunks_in += 1
+            self.__bytes_in += len(msg)
+            if scenario.burst_probability > 0 and now >= self.__burst_end and \
+                    self.__random.random() < scenario.burst_probability:
+                self.__burst_end = now + scenario.burst_duration
+                self.__bursts += 1
+            if scenario.drop_probability > 0:
+                msg = self.__drop_bytes(msg)
+                if len(msg) == 0:
+                    return
+            for part in self.__split(msg):
+                self.__schedule(part, now)
+            self.__condition.notify()
+
+    def __deliver(self):
+        """
+        Delivery thread function
+        """
+        while True:
+            with self.__condition:
+                while not self.__stopped:
+                    now = time.monotonic()
+                    if self.__pending and self.__pending[0][0] <= now:
+                        break
+                    self.__condition.wait(self.__pending[0][0] - now if self.__pending else None)
+                if self.__stopped:
+                    return
+                ready = []
+                while self.__pending and self.__pending[0][0] <= now:
+                    ready.append(bytes(self.__pending.popleft()[1]))
+            for msg in ready:
+                self.__dispatcher.dispatch(msg)
+                if len(msg) == 0:
+                    continue
+                self.__chunks_out += 1
+                if self.__queue is not None:
+                    self.__queue.put(msg)
+
+    def send_message(self, msg: bytes, block: bool = True):
+        """
+        Send message by the wrapped driver
+            Parameters:
+                msg (bytes):    Message to send
+                block (bool): passed to the wrapped driver
+            Returns:
+                result of the wrapped driver send_message()
+        """
+        return self.__bus.send_message(msg, block)
+
+    def send_many(self, messages, block: bool = True):
+        return self.__bus.send_many(messages, block)
+
+    def get_message(self, timeout: float):
+        """
+        Get incoming message with the faults applied
+            Parameters:
+                timeout (float):  Operation timeout in seconds
+            Returns:
+                msg (bytes): Received message (None if timeout expired or module works on the mode without data queue)
+        """
+        if self.__queue is None:
+            return None
+        try:
+            return self.__queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def get_parameters(self):
+        return self.__bus.get_parameters()
+
+    def flush_incoming_data(self):
+        """
+            Flush incoming data queue. The data which is delayed by the faults is kept.
+        """
+        if self.__queue is not None:
+            self.__queue.clear()
+
+    def register_message_callback(self, callback, policy: str = None, capacity: int = None):
+        """
+            Register incoming message callback. The callback is invoked in its own thread.
+                Parameters:
+                    callback (Callable): function to register as callback
+                    policy (str): OverflowPolicyConsts value, None means CALLBACK_OVERFLOW_POLICY
+                    capacity (int): number of messages which could be pending for the callback. None means
+                                    CALLBACK_QUEUE_CAPACITY
+        """
+        if callback is None:
+            print("Callback function is None", file=sys.stderr)
+            return
+        if not self.__dispatcher.subscribe(callback, policy, capacity):
+            print("Callback function has already registered:" + callback.__name__, file=sys.stderr)
+
+    def unregister_message_callback(self, callback):
+        """
+            Unregister incoming message callback
+                Parameters:
+                    callback (Callable): callback function to unregister
+        """
+        if callback is None:
+            print("Callback function is None", file=sys.stderr)
+            return
+        if not self.__dispatcher.unsubscribe(callback):
+            print("Callback function is not registered:" + callback.__name__, file=sys.stderr)
+
+    def clear_callback_list(self):
+        """
+            Clear list of incoming data callbacks
+        """
+        self.__dispatcher.clear()
+
+    def update_port_config(self, baud_rate: int, parity: str, stopbits: int):
+        return self.__bus.update_port_config(baud_rate, parity, stopbits)
+
+    def get_statistics(self):
+        """
+            Get counters of the wrapped driver
+                Returns:
+                    statistics (dict): see SerialDriver.get_statistics()
+        """
+        return self.__bus.get_statistics()
+
+    def get_write_statistics(self):
+        return self.__bus.get_write_statistics()
+
+    def get_fault_statistics(self):
+        """
+            Get counters of the injected faults
+                Returns:
+                    statistics (dict): {'chunks_in', 'bytes_in', 'chunks_out', 'bytes_dropped', 'splits', 'bursts',
+                                        'pending'}. pending is the number of chunks delayed at the moment
+        """
+        with self.__condition:
+            return {'chunks_in': self.__chunks_in,
+                    'bytes_in': self.__bytes_in,
+                    'chunks_out': self.__chunks_out,
+                    'bytes_dropped': self.__bytes_dropped,
+                    'splits': self.__splits,
+                    'bursts': self.__bursts,
+                    'pending': len(self.__pending)}
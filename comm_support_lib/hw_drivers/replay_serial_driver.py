@@ -0,0 +1,255 @@
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import Future
+
+from comm_support_lib.common.bounded_queue import BoundedQueue
+from comm_support_lib.common.callback_dispatcher import CallbackDispatcher
+from comm_support_lib.common.capture_direction_consts import CaptureDirectionConsts
+from comm_support_lib.common.capture_file import CaptureReader
+from comm_support_lib.common.overflow_policy_consts import OverflowPolicyConsts
+from comm_support_lib.common.serial_base_interface import SerialBaseInterface
+from comm_support_lib.config.config import REPLAY_QUEUE_CAPACITY
+
+
+class ReplaySerialDriver(SerialBaseInterface):
+    """
+    Serial driver which plays back the incoming data of a capture written by SerialDriver.start_capture(). Could be
+    passed as the bus to DebugCLI or RS485 to re-run parsing of the captured data without a board. Outgoing data is
+    accepted and dropped.
+    """
+
+    def __init__(self, path: str, real_time: bool = True, msg_timeout: float = None,
+                 enqueue_incoming_data: bool = True, queue_capacity: int = REPLAY_QUEUE_CAPACITY):
+        """
+        Class constructor. Opens the capture file, the playback is started by start().
+            Parameters:
+                path (str): path to the capture file
+                real_time (bool): keep the captured time intervals between the messages if True, play as fast as
+                                  possible otherwise
+                msg_timeout (float): if the captured interval between the messages is not less than this value, an empty
+                                     message is passed to the callbacks between them, the same as SerialDriver does on
+                                     the idle line. None means the empty message is passed only at the end of playback
+                enqueue_incoming_data (bool):  Enqueue incoming data(True case) or not(False case)
+                queue_capacity (int): maximum number of messages in the incoming data queue. The playback waits when
+                                      the queue is full
+        """
+        self.__path = path
+        self.__real_time = real_time
+        self.__msg_timeout = msg_timeout
+        self.__reader = CaptureReader(path)
+        self.__queue = BoundedQueue(queue_capacity, OverflowPolicyConsts.BLOCK) if enqueue_incoming_data else None
+        self.__dispatcher = CallbackDispatcher()
+        self.__stop_event = threading.Event()
+        self.__finished = threading.Event()
+        self.__thread = None
+        self.__rx_bytes = 0
+        self.__rx_messages = 0
+        self.__tx_bytes = 0
+        self.__tx_messages = 0
+
+    def __del__(self):
+        self.stop()
+        self.__dispatcher.clear()
+        self.__reader.close()
+
+    def __dispatch_message(self, msg: bytes):
+        self.__dispatcher.dispatch(msg)
+        if len(msg) == 0:
+            return
+        self.__rx_messages += 1
+        self.__rx_bytes += len(msg)
+        if self.__queue is not None:
+            while not self.__stop_event.is_set():
+                try:
+                    self.__queue.put(msg, timeout=0.1)
+                    return
+                except queue.Full:
+                    continue
+
+    def __wait_until(self, start_time: float, offset: float) -> bool:
+        """
+        Wait until the offset from the playback start is reached
+            Returns:
+                result (bool): False if the playback has been stopped
+        """
+        if self.__real_time:
+            delay = start_time + offset - time.monotonic()
+            if delay > 0:
+                return not self.__stop_event.wait(delay)
+        return not self.__stop_event.is_set()
+
+    def __play(self):
+        """
+        Playback thread function
+        """
+        start_time = time.monotonic()
+        first_timestamp = None
+        previous_timestamp = None
+        for record in self.__reader:
+            if record.direction != CaptureDirectionConsts.DIRECTION_RX:
+                continue
+            if first_timestamp is None:
+                first_timestamp = record.timestamp
+            if self.__msg_timeout is not None and previous_timestamp is not None and \
+                    record.timestamp - previous_timestamp >= self.__msg_timeout:
+                if not self.__wait_until(start_time, previous_timestamp + self.__msg_timeout - first_timestamp):
+                    break
+                self.__dispatch_message(b"")
+            if not self.__wait_until(start_time, record.timestamp - first_timestamp):
+                break
+            self.__dispatch_message(bytes(record.data))
+            previous_timestamp = record.timestamp
+        else:
+            # the line is idle after the last message
+            self.__dispatch_message(b"")
+        self.__finished.set()
+
+    def start(self):
+        """
+        Start the playback. Callbacks should be registered before.
+        """
+        if self.__thread is not None:
+            print("Replay has already been started", file=sys.stderr)
+            return
+        self.__thread = threading.Thread(target=self.__play, name="SerialReplay", daemon=True)
+        self.__thread.start()
+
+    def stop(self):
+        """
+        Stop the playback
+        """
+        self.__stop_event.set()
+        if self.__thread is not None and self.__thread is not threading.current_thread():
+            self.__thread.join()
+
+    def wait_until_finished(self, timeout: float = None) -> bool:
+        """
+        Wait for all the captured data to be played back
+            Parameters:
+                timeout (float): Operation timeout in seconds, None means no timeout
+            Returns:
+                result (bool): True if the playback has finished, False if timeout expired
+        """
+        return self.__finished.wait(timeout)
+
+    def is_finished(self) -> bool:
+        return self.__finished.is_set()
+
+    def send_message(self, msg: bytes, block: bool = True):
+        """
+        Accept outgoing message. The message is dropped, the played data does not depend on it.
+            Parameters:
+                msg (bytes):    Message to send
+                block (bool): if False, completed Future is returned, for compatibility with SerialDriver
+            Returns:
+                status (bool): always True
+        """
+        self.__tx_messages += 1
+        self.__tx_bytes += len(msg)
+        if block:
+            return True
+        future = Future()
+        future.set_result(True)
+        return future
+
+    def send_many(self, messages, block: bool = True):
+        return self.send_message(b"".join(messages), block)
+
+    def get_message(self, timeout: float):
+        """
+        Get played message
+            Parameters:
+                timeout (float):  Operation timeout in seconds
+            Returns:
+                msg (bytes): Received message (None if timeout expired or module works on the mode without data queue)
+        """
+        if self.__queue is None:
+            return None
+        try:
+            return self.__queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def get_parameters(self):
+        """
+            Get replay parameters
+                Returns:
+                    parameters (dict): {'port', 'baud_rate', 'msg_timeout', 'parity', 'stopbits'}. port is the path to
+                                       the capture file, other port settings are None
+        """
+        return {'port': self.__path,
+                'baud_rate': None,
+                'msg_timeout': self.__msg_timeout,
+                'parity': None,
+                'stopbits': None}
+
+    def flush_incoming_data(self):
+        """
+            Flush incoming data queue
+        """
+        if self.__queue is not None:
+            self.__queue.clear()
+
+    def register_message_callback(self, callback, policy: str = None, capacity: int = None):
+        """
+            Register incoming message callback. The callback is invoked in its own thread.
+                Parameters:
+                    callback (Callable): function to register as callback
+                    policy (str): OverflowPolicyConsts value, None means CALLBACK_OVERFLOW_POLICY
+                    capacity (int): number of messages which could be pending for the callback. None means
+                                    CALLBACK_QUEUE_CAPACITY
+        """
+        if callback is None:
+            print("Callback function is None", file=sys.stderr)
+            return
+        if not self.__dispatcher.subscribe(callback, policy, capacity):
+            print("Callback function has already registered:" + callback.__name__, file=sys.stderr)
+
+    def unregister_message_callback(self, callback):
+        """
+            Unregister incoming message callback
+                Parameters:
+                    callback (Callable): callback function to unregister
+        """
+        if callback is None:
+            print("Callback function is None", file=sys.stderr)
+            return
+        if not self.__dispatcher.unsubscribe(callback):
+            print("Callback function is not registered:" + callback.__name__, file=sys.stderr)
+
+    def clear_callback_list(self):
+        """
+            Clear list of incoming data callbacks
+        """
+        self.__dispatcher.clear()
+
+    def update_port_config(self, baud_rate: int, parity: str, stopbits: int):
+        """
+            Port settings are not used by the playback, the method does nothing
+                Returns:
+                    status (bool): always True
+        """
+        return True
+
+    def get_statistics(self):
+        """
+            Get playback counters
+                Returns:
+                    statistics (dict): the same keys as SerialDriver.get_statistics() returns
+        """
+        callback_time, callback_max_time = self.__dispatcher.get_execution_time()
+        queue_statistics = self.__queue.get_statistics() if self.__queue is not None else None
+        return {'bytes_in': self.__rx_bytes,
+                'frames_in': self.__rx_messages,
+                'bytes_out': self.__tx_bytes,
+                'frames_out': self.__tx_messages,
+                'read_calls': self.__rx_messages,
+                'empty_reads': 0,
+                'queue_depth': queue_statistics['depth'] if queue_statistics else 0,
+                'queue_high_water_mark': queue_statistics['high_water_mark'] if queue_statistics else 0,
+                'lost_messages': 0,
+                'callback_time': callback_time,
+                'callback_max_time': callback_max_time,
+                'reconnects': 0}
@@ -1,26 +1,44 @@
-import queue
+import os
+import struct
 import sys
 import threading
-from threading import Lock
+import time
+from collections import deque
+from concurrent.futures import Future
 
 import serial
 
+from comm_support_lib.common.callback_dispatcher import CallbackDispatcher
+from comm_support_lib.common.capture_direction_consts import CaptureDirectionConsts
+from comm_support_lib.common.capture_file import CaptureWriter
+from comm_support_lib.common.framers import Frame, Framer
+from comm_support_lib.common.overflow_policy_consts import OverflowPolicyConsts
+from comm_support_lib.common.ring_buffer import RingBuffer
 from comm_support_lib.common.serial_base_interface import SerialBaseInterface
 from comm_support_lib.common.serial_iface_parity_consts import SerialIfaceParityConsts
+from comm_support_lib.common.serial_read_mode_consts import SerialReadModeConsts
+from comm_support_lib.common.spill_file import SpillFile
+from comm_support_lib.config.config import SERIAL_QUEUE_CAPACITY, SERIAL_QUEUE_OVERFLOW_POLICY, QUEUE_SPILL_DIR, \
+    SERIAL_TX_QUEUE_CAPACITY, SERIAL_TX_COALESCE_BYTES
+from comm_support_lib.hw_drivers.serial_port_settings import SerialPortSettings
+from comm_support_lib.hw_drivers.serial_reactor import SerialReactor
 
 SERIAL_MESSAGE_MAX_BYTES = 1024 * 8  # 8kB
 
 
 class SerialDriver(SerialBaseInterface):
-    __PARITY_DICT = {SerialIfaceParityConsts.PARITY_NONE: serial.PARITY_NONE,
-                     SerialIfaceParityConsts.PARITY_EVEN: serial.PARITY_EVEN,
-                     SerialIfaceParityConsts.PARITY_ODD: serial.PARITY_ODD,
-                     SerialIfaceParityConsts.PARITY_MARK: serial.PARITY_MARK,
-                     SerialIfaceParityConsts.PARITY_SPACE: serial.PARITY_SPACE}
+    __bus = None
+    # interval of checking for the polling thread stop while waiting for free space in the ring buffer
+    __BLOCK_CHECK_INTERVAL = 0.1
+    # arrival timestamp stored before each frame in the ring buffer when a framer is set
+    __FRAME_HEADER = struct.Struct("<d")
+    __QUEUE_POLICIES = (OverflowPolicyConsts.BLOCK, OverflowPolicyConsts.DROP_OLDEST, OverflowPolicyConsts.DROP_NEWEST,
+                        OverflowPolicyConsts.SPILL)
 
-    def __init__(self, port: str, baud_rate: int, ic_timeout: float, msg_timeout: float,
+    def __init__(self, port: str, baud_rate: int, ic_timeout: float or str, msg_timeout: float or str,
                  parity: str = SerialIfaceParityConsts.PARITY_NONE, stopbits: int = 1,
-                 enqueue_incoming_data: bool = True):
+                 enqueue_incoming_data: bool = True, queue_capacity: int = SERIAL_QUEUE_CAPACITY,
+                 queue_policy: str = SERIAL_QUEUE_OVERFLOW_POLICY, read_mode: str = SerialReadModeConsts.BULK):
         """
         Class constructor. Initialize serial bus communication:
             Parameters:
@@ -28,61 +46,154 @@ class SerialDriver(SerialBaseInterface):
                 baud_rate (int):    Bus baud rate
                 parity (str): Serial port parity setting
                 stopbits (int): Serial port stop bits setting
-                ic_timeout (float):  inter-char timeout
-                msg_timeout (float): incoming message timeout
+                ic_timeout (float):  inter-char timeout. SerialReadModeConsts.TIMEOUT_AUTO means it is derived from the
+                                     character time, see SERIAL_AUTO_INTERCHAR_CHARS
+                msg_timeout (float): incoming message timeout. SerialReadModeConsts.TIMEOUT_AUTO means it is derived
+                                     from the character time, see SERIAL_AUTO_MSG_CHARS
                 enqueue_incoming_data (bool):  Enqueue incoming data(True case) or not(False case)
+                queue_capacity (int): size of the incoming data ring buffer in bytes, at least SERIAL_MESSAGE_MAX_BYTES
+                queue_policy (str): OverflowPolicyConsts value applied when the ring buffer is full. With BLOCK policy
+                                    reading from the port is paused until the data is consumed
+                read_mode (str): SerialReadModeConsts.LOW_LATENCY to pass each chunk as soon as it is read, or
+                                 SerialReadModeConsts.BULK to coalesce chunks until inter-char timeout expires
 
         Note: if enqueue_incoming_data is False, new messages will not be stored into the internal queue and can be
-        received only using callbacks
+        received only using callbacks.
+        Note: incoming messages are stored into the preallocated ring buffer. Use get_message_view() and
+        commit_message_view() to process them without copying.
+        Note: if the port provides selectable file descriptor (POSIX systems), incoming data is read by the single
+        SerialReactor thread shared between all the opened ports. Otherwise, the dedicated polling thread is used.
+        Note: outgoing messages are written by the dedicated writer thread, which is started on the first sending.
         """
         self.__port = port
         self.__baud_rate = baud_rate
         self.__parity = parity
         self.__stopbits = stopbits
-        self.__msg_timeout = msg_timeout
-        self.__ic_timeout = ic_timeout
-        self.__queue = queue.Queue(0) if enqueue_incoming_data else None
+        if read_mode not in (SerialReadModeConsts.LOW_LATENCY, SerialReadModeConsts.BULK):
+            print("Wrong read mode passed: " + read_mode, file=sys.stderr)
+            sys.exit(1)
+        self.__read_mode = read_mode
+        self.__msg_timeout_setting = msg_timeout
+        self.__ic_timeout_setting = ic_timeout
+        self.__update_timeouts()
+        if queue_policy not in self.__QUEUE_POLICIES:
+            print("Wrong queue policy passed: " + queue_policy, file=sys.stderr)
+            sys.exit(1)
+        self.__rx_policy = queue_policy
+        if enqueue_incoming_data and queue_capacity < SERIAL_MESSAGE_MAX_BYTES:
+            # the longest message should fit into the ring buffer, otherwise it could never be stored
+            print("Wrong queue capacity passed: {}, minimum is {}".format(queue_capacity, SERIAL_MESSAGE_MAX_BYTES),
+                  file=sys.stderr)
+            sys.exit(1)
+        self.__rx_buffer = RingBuffer(queue_capacity) if enqueue_incoming_data else None
+        self.__rx_spill = SpillFile(QUEUE_SPILL_DIR) if queue_policy == OverflowPolicyConsts.SPILL else None
+        self.__rx_condition = threading.Condition()
+        self.__rx_view_in_use = False
+        self.__rx_blocked = False
+        self.__rx_paused = False
+        self.__rx_dropped = 0
+        # True if the loss has been reported during the current overflow, reset when the consumer takes a message
+        self.__rx_overflow_reported = False
+        self.__rx_bytes = 0
+        self.__rx_messages = 0
+        self.__read_calls = 0
+        self.__empty_reads = 0
+        self.__reconnects = 0
+        self.__rx_spilled = 0
+        self.__rx_high_water_mark = 0
+        # collects the incoming message read by the reactor, takes the data which is not stored into the ring buffer
+        self.__rx_scratch = memoryview(bytearray(SERIAL_MESSAGE_MAX_BYTES))
+        self.__rx_chunk = None
+        self.__rx_chunk_queued = False
+        self.__rx_chunk_spilled = False
+        self.__rx_filled = 0
+        self.__framer = None
+        self.__capture = None
+        # frames which do not fit into the ring buffer with BLOCK policy
+        self.__rx_pending_frames = deque()
         self.__stop_polling_thread = threading.Event()
-        self.__clb_list = []
-        self.__clb_list_lock = Lock()
+        self.__polling_condition = threading.Condition()
+        self.__polling_paused = False
+        self.__polling_idle = False
+        self.__dispatcher = CallbackDispatcher()
+        self.__pollingThread = None
+        self.__reactor = None
+        self.__last_rx_time = 0.0
+        self.__read_start_time = 0.0
+        # (message, future) pairs waiting for the writer thread
+        self.__tx_items = deque()
+        self.__tx_condition = threading.Condition()
+        self.__tx_thread = None
+        self.__tx_busy = False
+        self.__tx_stopped = False
+        self.__tx_messages = 0
+        self.__tx_bytes = 0
+        self.__tx_writes = 0
+        self.__tx_failed = 0
+        self.__tx_write_time = 0.0
+        self.__bus = None
 
         self.__init_bus()
 
     def __del__(self):
+        if self.__bus is None:
+            # the constructor has failed
+            return
+        self.__stop_writer()
         self.__close_bus()
+        self.stop_capture()
+        self.__dispatcher.clear()
+
+    def __update_timeouts(self):
+        self.__ic_timeout, self.__msg_timeout = SerialPortSettings.get_timeouts(
+            self.__baud_rate, self.__parity, self.__stopbits, self.__ic_timeout_setting, self.__msg_timeout_setting,
+            self.__read_mode)
 
-    def __get_parity_from_string(self, parity_str: str):
+    def __get_framer_idle_timeout(self):
         """
-        Convert parity string to parity from serial.Serial
-            Parameters:
-                parity_str (str): raw parity string
-            Returns:
-                Parity value from serial.Serial
+        Returns:
+            timeout (float): silent interval which terminates a frame, None if the framer is not set or is not timing
+                             based
         """
-        result = self.__PARITY_DICT.get(parity_str)
-
-        if not result:
-            print("Wrong parity value passed: " + parity_str, file=sys.stderr)
-            sys.exit(1)
+        if self.__framer is None:
+            return None
+        return self.__framer.get_idle_timeout()
 
-        return result
+    def __get_inter_byte_timeout(self):
+        """
+        Returns:
+            timeout (float): inter_byte_timeout of pyserial used by the polling thread. If the framer is timing based,
+                             it is the silent interval of the framer, so read() returns at the end of each frame
+        """
+        idle_timeout = self.__get_framer_idle_timeout()
+        if idle_timeout is not None:
+            return idle_timeout
+        if self.__read_mode == SerialReadModeConsts.LOW_LATENCY:
+            return None
+        return self.__ic_timeout
 
     def __init_bus(self):
         """
         Initialize serial bus.
         """
         try:
-            self.__bus = serial.Serial(self.__port, self.__baud_rate, parity=self.__get_parity_from_string(self.__parity),
+            if self.__bus is not None:
+                self.__reconnects += 1
+            self.__bus = serial.Serial(self.__port, self.__baud_rate,
+                                       parity=SerialPortSettings.get_parity_from_string(self.__parity),
                                        stopbits=self.__stopbits,
-                                       timeout=self.__msg_timeout, inter_byte_timeout=self.__ic_timeout)
+                                       timeout=self.__msg_timeout, inter_byte_timeout=self.__get_inter_byte_timeout())
             self.__bus.reset_input_buffer()
             self.__bus.reset_output_buffer()
-            self.__pollingThread = threading.Thread(
-                target=self.__poll_messages,
-                daemon=True
-            )
-            self.__stop_polling_thread.clear()
-            self.__pollingThread.start()
+            if SerialReactor.is_supported(self.__bus):
+                self.__start_reactor_reading()
+            else:
+                self.__pollingThread = threading.Thread(
+                    target=self.__poll_messages,
+                    daemon=True
+                )
+                self.__stop_polling_thread.clear()
+                self.__pollingThread.start()
 
         except serial.SerialException as serialEx:
             print("Failed to initialize Serial Bus: {}".format(serialEx))
@@ -96,48 +207,493 @@ class SerialDriver(SerialBaseInterface):
         """
         Finish polling thread and close serial bus.
         """
-        self.__stop_polling_thread.set()
-        self.__pollingThread.join()
+        if self.__reactor is not None:
+            self.__reactor.unregister(self.__bus)
+            self.__reactor = None
+            self.__rx_chunk = None
+            self.__rx_filled = 0
+            self.__rx_blocked = False
+        else:
+            self.__stop_polling_thread.set()
+            self.__pollingThread.join()
         try:
             self.__bus.close()
         except Exception as ex:
             print("Failed to close Serial Bus: {}".format(ex))
             sys.exit(1)
 
+    def __invoke_callbacks(self, msg):
+        """
+        Pass incoming message to the registered callbacks. Callbacks are invoked by the dispatcher threads.
+            Parameters:
+                msg (bytes or memoryview): incoming message. memoryview is converted to bytes only if there is at
+                                           least one callback registered
+        """
+        if self.__dispatcher.has_subscribers():
+            if type(msg) is memoryview:
+                msg = msg.tobytes()
+            self.__dispatcher.dispatch(msg)
+
+    def __get_rx_depth(self) -> int:
+        return len(self.__rx_buffer) + (len(self.__rx_spill) if self.__rx_spill is not None else 0)
+
+    def __get_rx_scratch(self, size: int) -> memoryview:
+        if size <= len(self.__rx_scratch):
+            return self.__rx_scratch[:size]
+        return memoryview(bytearray(size))
+
+    def __reserve_rx_chunk(self, size: int):
+        """
+        Reserve space for the incoming message in the ring buffer. If the buffer is full, the queue policy is applied.
+        If the message should not be stored into the ring buffer, the scratch buffer is returned.
+            Parameters:
+                size (int): number of bytes to reserve
+            Returns:
+                chunk (memoryview): region to read the message into, None if reading should be paused (BLOCK policy)
+        """
+        self.__rx_chunk_queued = False
+        self.__rx_chunk_spilled = False
+        if self.__rx_buffer is None:
+            return self.__get_rx_scratch(size)
+
+        with self.__rx_condition:
+            while True:
+                # once spilling is started, all the new messages go to the file to keep FIFO order
+                if self.__rx_spill is None or len(self.__rx_spill) == 0:
+                    chunk = self.__rx_buffer.reserve(size)
+                    if chunk is not None:
+                        self.__rx_chunk_queued = True
+                        return chunk
+                if self.__rx_policy == OverflowPolicyConsts.SPILL:
+                    self.__rx_chunk_spilled = True
+                    return self.__get_rx_scratch(size)
+                if self.__rx_policy == OverflowPolicyConsts.BLOCK:
+                    if self.__reactor is not None:
+                        self.__rx_blocked = True
+                        return None
+                    if self.__stop_polling_thread.is_set():
+                        return self.__get_rx_scratch(size)
+                    self.__rx_condition.wait(self.__BLOCK_CHECK_INTERVAL)
+                    continue
+                if self.__rx_policy == OverflowPolicyConsts.DROP_OLDEST and len(self.__rx_buffer) > 0 \
+                        and not self.__rx_view_in_use:
+                    self.__rx_buffer.release()
+                    self.__report_rx_overflow()
+                    continue
+                # DROP_NEWEST policy, or the oldest message is being processed by the consumer
+                self.__report_rx_overflow()
+                return self.__get_rx_scratch(size)
+
+    def __report_rx_overflow(self):
+        """
+        Count the lost message. The loss is reported once per overflow, the number of lost messages is available from
+        get_statistics(). Should be called holding the ring buffer lock.
+        """
+        self.__rx_dropped += 1
+        if not self.__rx_overflow_reported:
+            self.__rx_overflow_reported = True
+            print("Queue is full. Messages are lost until the queue is consumed", file=sys.stderr)
+
+    def __resume_rx(self):
+        """
+        Resume reading paused because of the full ring buffer after the consumer has taken messages. Should be called
+        without holding the ring buffer lock.
+        """
+        with self.__rx_condition:
+            self.__rx_overflow_reported = False
+            if not self.__rx_blocked:
+                self.__rx_condition.notify_all()
+                return
+            self.__rx_blocked = False
+            if self.__rx_paused:
+                # reading will be resumed when the port reconfiguration is finished
+                return
+        if self.__reactor is not None:
+            self.__reactor.resume(self.__bus)
+
+    def __commit_rx_chunk(self, length: int, msg: bytes = None):
+        """
+        Invoke callbacks and publish the current chunk in the ring buffer
+            Parameters:
+                length (int): number of received bytes in the chunk
+                msg (bytes): message passed to the callbacks, None means the chunk itself
+        """
+        if msg is None:
+            msg = self.__rx_chunk[:length]
+        self.__invoke_callbacks(msg)
+        self.__rx_messages += 1
+        capture = self.__capture
+        if capture is not None:
+            capture.write(CaptureDirectionConsts.DIRECTION_RX, msg)
+        if self.__rx_chunk_queued or self.__rx_chunk_spilled:
+            with self.__rx_condition:
+                if self.__rx_chunk_queued:
+                    self.__rx_buffer.commit(length)
+                else:
+                    self.__rx_spill.append(self.__rx_chunk[:length].tobytes())
+                    self.__rx_spilled += 1
+                spill_bytes = self.__rx_spill.size_bytes if self.__rx_spill is not None else 0
+                self.__rx_high_water_mark = max(self.__rx_high_water_mark, self.__rx_buffer.used_bytes + spill_bytes)
+                self.__rx_condition.notify_all()
+        self.__rx_chunk = None
+        self.__rx_filled = 0
+
+    def __store_frames(self, frames) -> bool:
+        """
+        Invoke callbacks and publish the frames in the ring buffer. Each record starts with the arrival timestamp.
+            Parameters:
+                frames (Iterable): Frame objects produced by the framer
+            Returns:
+                result (bool): False if the ring buffer is full and reading should be paused (BLOCK policy). The frames
+                               which have not been stored are kept until the next call
+        """
+        self.__rx_pending_frames.extend(frames)
+        while self.__rx_pending_frames:
+            frame = self.__rx_pending_frames[0]
+            self.__rx_chunk = self.__reserve_rx_chunk(self.__FRAME_HEADER.size + len(frame.data))
+            if self.__rx_chunk is None:
+                return False
+            self.__rx_pending_frames.popleft()
+            self.__FRAME_HEADER.pack_into(self.__rx_chunk, 0, frame.timestamp)
+            self.__rx_chunk[self.__FRAME_HEADER.size:] = frame.data
+            self.__commit_rx_chunk(len(self.__rx_chunk), frame.data)
+        return True
+
+    def __get_framer_deadline(self):
+        """
+        Returns:
+            deadline (float): time when the incomplete frame should be terminated by the silent interval, None if
+                              there is no such frame
+        """
+        if self.__framer is None or not self.__framer.has_pending_data():
+            return None
+        idle_timeout = self.__framer.get_idle_timeout()
+        if idle_timeout is None:
+            return None
+        return self.__last_rx_time + idle_timeout
+
+    def __dispatch_message(self, msg: bytes):
+        """
+        Pass incoming message to the registered callbacks and put it into the ring buffer
+            Parameters:
+                msg (bytes): incoming message, empty if nothing was received during msg_timeout
+        """
+        if self.__framer is not None and len(msg) > 0:
+            now = time.monotonic()
+            self.__last_rx_time = now
+            frames = self.__framer.feed(msg, now)
+            # in bulk mode read() returns less than requested only if the line has been idle for inter-byte timeout,
+            # which is the silent interval of the timing based framer
+            if self.__is_bulk_polling() and len(msg) < SERIAL_MESSAGE_MAX_BYTES:
+                frames += self.__framer.flush(now)
+            self.__store_frames(frames)
+            return
+        if len(msg) == 0:
+            if self.__framer is not None:
+                # the line has been idle for message timeout
+                self.__store_frames(self.__framer.flush(self.__last_rx_time))
+            self.__invoke_callbacks(msg)
+            return
+        self.__rx_chunk = self.__reserve_rx_chunk(len(msg))
+        self.__rx_chunk[:] = msg
+        self.__commit_rx_chunk(len(msg))
+
+    def __is_bulk_polling(self) -> bool:
+        """
+        Returns:
+            result (bool): True if the polling thread reads until inter-byte timeout. Timing based framer is always
+                           read this way, as its frames are terminated by the silent interval
+        """
+        return self.__read_mode == SerialReadModeConsts.BULK or self.__get_framer_idle_timeout() is not None
+
     def __poll_messages(self):
         """
             Message polling function
         """
         while not self.__stop_polling_thread.is_set():
+            with self.__polling_condition:
+                # the port could be reconfigured only between read() calls
+                self.__polling_idle = True
+                self.__polling_condition.notify_all()
+                self.__polling_condition.wait_for(lambda: not self.__polling_paused)
+                self.__polling_idle = False
             try:
-                msg = self.__bus.read(SERIAL_MESSAGE_MAX_BYTES)
-
-                with self.__clb_list_lock:
-                    if len(self.__clb_list):
-                        for callback in self.__clb_list:
-                            callback(msg)
-                if self.__queue and len(msg) > 0:
-                    self.__queue.put(msg)
+                if not self.__is_bulk_polling():
+                    # wait for the first byte and take everything which has already arrived
+                    msg = self.__bus.read(1)
+                    in_waiting = self.__bus.in_waiting if msg else 0
+                    if in_waiting:
+                        msg += self.__bus.read(min(in_waiting, SERIAL_MESSAGE_MAX_BYTES - 1))
+                else:
+                    msg = self.__bus.read(SERIAL_MESSAGE_MAX_BYTES)
+                self.__read_calls += 1
+                if msg:
+                    self.__rx_bytes += len(msg)
+                else:
+                    self.__empty_reads += 1
+                self.__dispatch_message(msg)
             except serial.SerialException as serialEx:
                 print("Failed to read message: {}".format(serialEx))
-            except queue.Full:
-                print("Queue is full. Message lost")
 
-    def send_message(self, msg: bytes):
+    def __start_reactor_reading(self):
+        """
+        Switch the port into non-blocking mode and register it in the reactor. Inter-char and message timeouts are
+        handled by the reactor timers, so the driver behaves the same as with the blocking read() of the polling thread.
+        """
+        self.__bus.timeout = 0
+        self.__bus.inter_byte_timeout = None
+        self.__rx_chunk = None
+        self.__rx_filled = 0
+        self.__read_start_time = time.monotonic()
+        self.__reactor = SerialReactor()
+        self.__reactor.register(self.__bus, self.__on_readable, self.__on_timer, self.__get_next_deadline())
+
+    def __flush_rx_pending(self, now: float) -> bool:
+        """
+        Store the message collected in the scratch buffer into the ring buffer region of the exact message size
+            Returns:
+                result (bool): False if the ring buffer is full and reading should be paused (BLOCK policy). The
+                               message stays in the scratch buffer until the next call
+        """
+        self.__rx_chunk = self.__reserve_rx_chunk(self.__rx_filled)
+        if self.__rx_chunk is None:
+            return False
+        # the scratch buffer itself is returned if the message is not stored into the ring buffer
+        self.__rx_chunk[:] = self.__rx_scratch[:self.__rx_filled]
+        self.__read_start_time = now
+        self.__commit_rx_chunk(self.__rx_filled)
+        return True
+
+    def __get_next_deadline(self):
+        """
+        Calculate the time when the reactor should wake up the driver
+            Returns:
+                deadline (float): time.monotonic() based deadline or None if there is nothing to wait for
+        """
+        framer_deadline = self.__get_framer_deadline()
+        if framer_deadline is not None:
+            return framer_deadline
+        if self.__rx_filled:
+            return self.__last_rx_time + (self.__ic_timeout or 0)
+        if self.__msg_timeout is None:
+            return None
+        return self.__read_start_time + self.__msg_timeout
+
+    def __on_readable(self):
+        """
+        Reactor read handler. Called when the port has bytes to be read. The data is collected in the scratch buffer
+        until the message is complete, then the message is stored into the ring buffer by one copy, so it takes only
+        as much space as it needs.
+        """
+        if self.__framer is not None:
+            return self.__read_frames()
+        self.__read_calls += 1
+        try:
+            received = os.readv(self.__bus.fileno(), [self.__rx_scratch[self.__rx_filled:]])
+        except BlockingIOError:
+            self.__empty_reads += 1
+            return self.__get_next_deadline()
+        if received == 0:
+            raise serial.SerialException("device reports readiness to read but returned no data "
+                                         "(device disconnected or multiple access on port?)")
+        now = time.monotonic()
+        self.__last_rx_time = now
+        self.__rx_bytes += received
+        self.__rx_filled += received
+        if (not self.__ic_timeout or self.__rx_filled >= SERIAL_MESSAGE_MAX_BYTES) and \
+                not self.__flush_rx_pending(now):
+            # the ring buffer is full, the next data stays in the OS buffer until the message is consumed
+            self.__reactor.pause(self.__bus)
+            return None
+        return self.__get_next_deadline()
+
+    def __read_frames(self):
+        """
+        Reactor read handler used when a framer is set. The data is passed through the framer and only complete frames
+        are stored into the ring buffer.
+        """
+        self.__read_calls += 1
+        try:
+            received = os.readv(self.__bus.fileno(), [self.__rx_scratch])
+        except BlockingIOError:
+            self.__empty_reads += 1
+            return self.__get_next_deadline()
+        if received == 0:
+            raise serial.SerialException("device reports readiness to read but returned no data "
+                                         "(device disconnected or multiple access on port?)")
+        now = time.monotonic()
+        self.__last_rx_time = now
+        self.__rx_bytes += received
+        frames = self.__framer.feed(self.__rx_scratch[:received], now)
+        if frames:
+            self.__read_start_time = now
+        if not self.__store_frames(frames):
+            self.__reactor.pause(self.__bus)
+            return None
+        return self.__get_next_deadline()
+
+    def __on_timer(self, now: float):
+        """
+        Reactor timer handler. Emits collected data after the inter-char timeout, or an empty message after the
+        message timeout if nothing was received. If a framer is set, emits the frame terminated by the silent interval
+        and the frames which were not stored because of the full ring buffer.
+        """
+        if self.__framer is not None:
+            frames = []
+            framer_deadline = self.__get_framer_deadline()
+            if framer_deadline is not None and now >= framer_deadline:
+                frames = self.__framer.flush(self.__last_rx_time)
+                self.__read_start_time = now
+            if (frames or self.__rx_pending_frames) and not self.__store_frames(frames):
+                self.__reactor.pause(self.__bus)
+                return None
+        if self.__rx_filled:
+            if now >= self.__last_rx_time + (self.__ic_timeout or 0) and not self.__flush_rx_pending(now):
+                self.__reactor.pause(self.__bus)
+                return None
+        elif self.__msg_timeout is not None and now >= self.__read_start_time + self.__msg_timeout:
+            self.__read_start_time = now
+            self.__invoke_callbacks(b"")
+        return self.__get_next_deadline()
+
+    def __start_writer(self):
+        if self.__tx_thread is not None:
+            return
+        self.__tx_thread = threading.Thread(target=self.__write_messages, name="SerialWriter-" + str(self.__port),
+                                            daemon=True)
+        self.__tx_thread.start()
+
+    def __stop_writer(self):
+        """
+        Finish the writer thread. Messages which have not been written yet are completed with False status.
+        """
+        with self.__tx_condition:
+            self.__tx_stopped = True
+            self.__tx_condition.notify_all()
+            thread = self.__tx_thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+
+    def __wait_writer_idle(self):
+        """
+        Wait for all the queued messages to be written
+        """
+        with self.__tx_condition:
+            self.__tx_condition.wait_for(lambda: not (self.__tx_items or self.__tx_busy) or self.__tx_stopped)
+
+    def __enqueue_message(self, msg: bytes) -> Future:
+        """
+        Put the message into the writer queue. Blocks if the queue is full.
+            Parameters:
+                msg (bytes): message to write
+            Returns:
+                future (Future): completed with the sending status when the message has been transmitted
+        """
+        future = Future()
+        with self.__tx_condition:
+            self.__tx_condition.wait_for(lambda: len(self.__tx_items) < SERIAL_TX_QUEUE_CAPACITY or self.__tx_stopped)
+            if self.__tx_stopped:
+                future.set_result(False)
+                return future
+            self.__start_writer()
+            self.__tx_items.append((msg, future))
+            self.__tx_condition.notify_all()
+        return future
+
+    def __write_messages(self):
+        """
+        Writer thread function. All the pending messages are coalesced into one write() call, the output buffer is
+        drained once per such batch.
+        """
+        while True:
+            with self.__tx_condition:
+                self.__tx_busy = False
+                self.__tx_condition.notify_all()
+                self.__tx_condition.wait_for(lambda: self.__tx_items or self.__tx_stopped)
+                if self.__tx_stopped:
+                    batch = list(self.__tx_items)
+                    self.__tx_items.clear()
+                    self.__tx_condition.notify_all()
+                    break
+                batch = [self.__tx_items.popleft()]
+                batch_size = len(batch[0][0])
+                while self.__tx_items and batch_size + len(self.__tx_items[0][0]) <= SERIAL_TX_COALESCE_BYTES:
+                    batch.append(self.__tx_items.popleft())
+                    batch_size += len(batch[-1][0])
+                self.__tx_busy = True
+                # wake up the senders waiting for free space in the queue
+                self.__tx_condition.notify_all()
+
+            data = batch[0][0] if len(batch) == 1 else b"".join(msg for msg, _ in batch)
+            capture = self.__capture
+            if capture is not None:
+                capture.write(CaptureDirectionConsts.DIRECTION_TX, data)
+            start_time = time.perf_counter()
+            try:
+                status = self.__bus.write(data) == len(data)
+                self.__bus.flush()
+            except serial.SerialException as ex:
+                print("Failed to send message: {}".format(ex))
+                status = False
+            write_time = time.perf_counter() - start_time
+
+            with self.__tx_condition:
+                self.__tx_writes += 1
+                self.__tx_write_time += write_time
+                if status:
+                    self.__tx_messages += len(batch)
+                    self.__tx_bytes += len(data)
+                else:
+                    self.__tx_failed += len(batch)
+            for _, future in batch:
+                future.set_result(status)
+
+        for _, future in batch:
+            future.set_result(False)
+
+    def send_message(self, msg: bytes, block: bool = True):
         """
         Send message to serial interface
             Parameters:
                 msg (bytes):    Message to send
+                block (bool): wait for the message to be transmitted if True, return immediately otherwise
             Returns:
-                status (bool): True if message has been sent successfully, False otherwise
+                status (bool): True if message has been sent successfully, False otherwise. If block is False,
+                               concurrent.futures.Future which is completed with the status
         """
-        try:
-            write_bytes = self.__bus.write(msg)
-            self.__bus.flush()
-        except serial.SerialException as ex:
-            print("Failed to send message: {}".format(ex))
-            return False
-        return write_bytes == len(msg)
+        future = self.__enqueue_message(msg if type(msg) is bytes else bytes(msg))
+        if not block:
+            return future
+        return future.result()
+
+    def send_many(self, messages, block: bool = True):
+        """
+        Send several messages to serial interface using one write() call
+            Parameters:
+                messages (Iterable): messages (bytes) to send
+                block (bool): wait for the messages to be transmitted if True, return immediately otherwise
+            Returns:
+                status (bool): True if messages have been sent successfully, False otherwise. If block is False,
+                               concurrent.futures.Future which is completed with the status
+        """
+        return self.send_message(b"".join(messages), block)
+
+    def get_write_statistics(self):
+        """
+            Get outgoing data counters
+                Returns:
+                    statistics (dict): {'messages', 'bytes', 'writes', 'failed', 'pending', 'write_time', 'throughput'}.
+                                       writes is number of write() calls, write_time is total time of writing and
+                                       draining in seconds, throughput is bytes per second of write_time
+        """
+        with self.__tx_condition:
+            return {'messages': self.__tx_messages,
+                    'bytes': self.__tx_bytes,
+                    'writes': self.__tx_writes,
+                    'failed': self.__tx_failed,
+                    'pending': len(self.__tx_items),
+                    'write_time': self.__tx_write_time,
+                    'throughput': self.__tx_bytes / self.__tx_write_time if self.__tx_write_time else 0.0}
 
     def get_message(self, timeout: float):
         """
@@ -147,15 +703,86 @@ class SerialDriver(SerialBaseInterface):
             Returns:
                 msg (bytes): Received message (None if timeout expired or module works on the mode without data queue)
         """
-        if self.__queue is None:
+        if self.__rx_buffer is None:
             return None
 
-        try:
-            msg = self.__queue.get(block=True, timeout=timeout)
-            return msg
-        except queue.Empty:
+        with self.__rx_condition:
+            if not self.__rx_condition.wait_for(self.__get_rx_depth, timeout):
+                return None
+            record = self.__pop_rx_record()
+        self.__resume_rx()
+        if self.__framer is not None:
+            return record[self.__FRAME_HEADER.size:]
+        return record
+
+    def __pop_rx_record(self) -> bytes:
+        """
+        Remove the oldest record from the ring buffer or the spill file. Should be called holding the ring buffer lock.
+        """
+        self.__rx_view_in_use = False
+        if len(self.__rx_buffer):
+            return self.__rx_buffer.pop()
+        return self.__rx_spill.pop()
+
+    def get_frame(self, timeout: float):
+        """
+        Get frame from serial interface
+            Parameters:
+                timeout (float):  Operation timeout in seconds
+            Returns:
+                frame (Frame): Received frame with arrival timestamp (None if timeout expired or module works on the
+                               mode without data queue). If framer is not set, the frame contains the received chunk
+                               and its timestamp is None
+        """
+        if self.__rx_buffer is None:
+            return None
+
+        with self.__rx_condition:
+            if not self.__rx_condition.wait_for(self.__get_rx_depth, timeout):
+                return None
+            record = self.__pop_rx_record()
+        self.__resume_rx()
+        if self.__framer is None:
+            return Frame(record, None)
+        return Frame(record[self.__FRAME_HEADER.size:], self.__FRAME_HEADER.unpack_from(record)[0])
+
+    def get_message_view(self, timeout: float):
+        """
+        Get the oldest message from serial interface without copying it. The message stays in the ring buffer until
+        commit_message_view() is called, so the view should be released before the commit.
+            Parameters:
+                timeout (float):  Operation timeout in seconds
+            Returns:
+                msg (memoryview): Read-only view of the received message (None if timeout expired or module works on
+                                  the mode without data queue)
+        """
+        if self.__rx_buffer is None:
             return None
 
+        with self.__rx_condition:
+            if not self.__rx_condition.wait_for(self.__get_rx_depth, timeout):
+                return None
+            header_size = self.__FRAME_HEADER.size if self.__framer is not None else 0
+            if len(self.__rx_buffer):
+                self.__rx_view_in_use = True
+                return self.__rx_buffer.peek()[header_size:]
+            # messages read back from the spill file are already copied
+            return memoryview(self.__rx_spill.pop())[header_size:]
+
+    def commit_message_view(self):
+        """
+        Remove the message returned by get_message_view() from the ring buffer
+        """
+        if self.__rx_buffer is None:
+            return
+
+        with self.__rx_condition:
+            if not self.__rx_view_in_use:
+                return
+            self.__rx_view_in_use = False
+            self.__rx_buffer.release()
+        self.__resume_rx()
+
     def get_parameters(self):
         """
             Get serial interface parameters
@@ -164,7 +791,7 @@ class SerialDriver(SerialBaseInterface):
         """
         return {'port': self.__bus.port,
                 'baud_rate': self.__bus.baudrate,
-                'msg_timeout': self.__bus.timeout,
+                'msg_timeout': self.__msg_timeout,
                 'parity': self.__bus.parity,
                 'stopbits': self.__bus.stopbits}
 
@@ -172,29 +799,53 @@ class SerialDriver(SerialBaseInterface):
         """
             Flush incoming data queue
         """
-        if self.__queue is None:
+        if self.__rx_buffer is None:
             return
 
-        while True:
-            try:
-                self.__queue.get(block=False)
-            except queue.Empty:
-                break
+        with self.__rx_condition:
+            self.__rx_view_in_use = False
+            self.__rx_buffer.clear()
+            if self.__rx_spill is not None:
+                self.__rx_spill.clear()
+        self.__resume_rx()
 
-    def register_message_callback(self, callback):
+    def get_queue_statistics(self):
+        """
+            Get incoming data queue counters
+                Returns:
+                    statistics (dict): {'capacity', 'policy', 'depth', 'used_bytes', 'high_water_mark', 'dropped',
+                                       'spilled', 'spill_depth'}. capacity, used_bytes and high_water_mark are in bytes,
+                                       depth is number of messages
         """
-            Register incoming message callback
+        if self.__rx_buffer is None:
+            return None
+
+        with self.__rx_condition:
+            return {'capacity': self.__rx_buffer.capacity,
+                    'policy': self.__rx_policy,
+                    'depth': self.__get_rx_depth(),
+                    'used_bytes': self.__rx_buffer.used_bytes,
+                    'high_water_mark': self.__rx_high_water_mark,
+                    'dropped': self.__rx_dropped,
+                    'spilled': self.__rx_spilled,
+                    'spill_depth': len(self.__rx_spill) if self.__rx_spill is not None else 0}
+
+    def register_message_callback(self, callback, policy: str = None, capacity: int = None):
+        """
+            Register incoming message callback. The callback is invoked in its own thread, so it does not stall reading
+            from the device.
                 Parameters:
                     callback (Callable): function to register as callback
+                    policy (str): OverflowPolicyConsts value applied when the callback does not keep up with incoming
+                                  data. None means CALLBACK_OVERFLOW_POLICY
+                    capacity (int): number of messages which could be pending for the callback. None means
+                                    CALLBACK_QUEUE_CAPACITY
         """
         if callback is None:
             print("Callback function is None", file=sys.stderr)
             return
-        if callback in self.__clb_list:
+        if not self.__dispatcher.subscribe(callback, policy, capacity):
             print("Callback function has already registered:" + callback.__name__,  file=sys.stderr)
-            return
-        with self.__clb_list_lock:
-            self.__clb_list.append(callback)
 
     def unregister_message_callback(self, callback):
         """
@@ -205,30 +856,205 @@ class SerialDriver(SerialBaseInterface):
         if callback is None:
             print("Callback function is None",  file=sys.stderr)
             return
-        if callback not in self.__clb_list:
+        if not self.__dispatcher.unsubscribe(callback):
             print("Callback function is not registered:" + callback.__name__,  file=sys.stderr)
-            return
-        with self.__clb_list_lock:
-            self.__clb_list.remove(callback)
 
     def clear_callback_list(self):
         """
             Clear list of incoming data callbacks
         """
-        with self.__clb_list_lock:
-            self.__clb_list.clear()
+        self.__dispatcher.clear()
+
+    def start_capture(self, path: str):
+        """
+            Start writing incoming and outgoing data into the capture file. Incoming data is captured as it is passed
+            to the callbacks (messages or frames), outgoing data as it is written to the port. The capture could be
+            played back using ReplaySerialDriver.
+                Parameters:
+                    path (str): path to the capture file, the existing file is overwritten
+                Returns:
+                    status (bool): True if the capture has been started, False otherwise
+        """
+        try:
+            capture = CaptureWriter(path)
+        except (OSError, ValueError) as ex:
+            print("Failed to start capture: {}".format(ex), file=sys.stderr)
+            return False
+        previous_capture = self.__capture
+        self.__capture = capture
+        if previous_capture is not None:
+            previous_capture.close()
+        return True
+
+    def stop_capture(self):
+        """
+            Stop capturing and close the capture file
+        """
+        capture = self.__capture
+        self.__capture = None
+        if capture is not None:
+            capture.close()
+
+    def get_statistics(self):
+        """
+            Get port counters
+                Returns:
+                    statistics (dict): {'bytes_in', 'frames_in', 'bytes_out', 'frames_out', 'read_calls', 'empty_reads',
+                                       'queue_depth', 'queue_high_water_mark', 'lost_messages', 'callback_time',
+                                       'callback_max_time', 'reconnects'}. frames_in is number of received messages
+                                       (frames if framer is set), queue_high_water_mark is in bytes, callback times
+                                       are in seconds
+        """
+        callback_time, callback_max_time = self.__dispatcher.get_execution_time()
+        with self.__rx_condition:
+            queue_depth = self.__get_rx_depth() if self.__rx_buffer is not None else 0
+            lost_messages = self.__rx_dropped
+        with self.__tx_condition:
+            bytes_out = self.__tx_bytes
+            frames_out = self.__tx_messages
+        return {'bytes_in': self.__rx_bytes,
+                'frames_in': self.__rx_messages,
+                'bytes_out': bytes_out,
+                'frames_out': frames_out,
+                'read_calls': self.__read_calls,
+                'empty_reads': self.__empty_reads,
+                'queue_depth': queue_depth,
+                'queue_high_water_mark': self.__rx_high_water_mark,
+                'lost_messages': lost_messages,
+                'callback_time': callback_time,
+                'callback_max_time': callback_max_time,
+                'reconnects': self.__reconnects}
+
+    def get_callback_statistics(self):
+        """
+            Get delivery counters of the registered callbacks
+                Returns:
+                    statistics (dict): callback name -> {'policy', 'capacity', 'depth', 'max_depth', 'delivered',
+                                       'dropped', 'coalesced', 'delayed', 'delay_time', 'exec_time', 'max_exec_time'}.
+                                       The name is the qualified name and the id of the callback, e.g. "f@0x7f00"
+        """
+        return self.__dispatcher.get_statistics()
+
+    def __pause_reading(self):
+        """
+        Stop reading the port without closing it. Data collected so far is emitted as a message.
+        """
+        if self.__reactor is not None:
+            with self.__rx_condition:
+                self.__rx_paused = True
+            self.__reactor.pause(self.__bus)
+            if self.__rx_filled:
+                self.__flush_rx_pending(time.monotonic())
+        else:
+            with self.__polling_condition:
+                self.__polling_paused = True
+                self.__polling_condition.wait_for(lambda: self.__polling_idle)
+
+    def __resume_reading(self):
+        """
+        Continue reading paused by __pause_reading()
+        """
+        if self.__reactor is not None:
+            with self.__rx_condition:
+                self.__rx_paused = False
+                # the ring buffer is still full, reading will be resumed by the consumer
+                blocked = self.__rx_blocked
+            self.__read_start_time = time.monotonic()
+            if not blocked:
+                self.__reactor.resume(self.__bus)
+        else:
+            with self.__polling_condition:
+                self.__polling_paused = False
+                self.__polling_condition.notify_all()
 
     def update_port_config(self, baud_rate: int, parity: str, stopbits: int):
         """
-            Update configuration of Serial hardware interface
+            Update configuration of Serial hardware interface. The settings are applied to the opened port, reading is
+            paused during the update instead of closing and reopening the port.
                 Parameters:
                     baud_rate (int):    Bus baud rate
                     parity (str): Serial port parity setting
                     stopbits (int): Serial port stop bits setting
+                Returns:
+                    status (bool): True if the configuration has been applied successfully, False otherwise
         """
-        self.__close_bus()
+        serial_parity = SerialPortSettings.get_parity_from_string(parity)
+        # data queued with the previous settings should be transmitted before the change
+        self.__wait_writer_idle()
+        self.__pause_reading()
+        try:
+            # each changed attribute reconfigures the port, so only the changed ones are set
+            if self.__bus.baudrate != baud_rate:
+                self.__bus.baudrate = baud_rate
+            if self.__bus.parity != serial_parity:
+                self.__bus.parity = serial_parity
+            if self.__bus.stopbits != stopbits:
+                self.__bus.stopbits = stopbits
+            # bytes received before the change are garbage for the new settings
+            self.__bus.reset_input_buffer()
+            self.__baud_rate = baud_rate
+            self.__parity = parity
+            self.__stopbits = stopbits
+            self.__update_timeouts()
+            if self.__framer is not None:
+                self.__framer.set_baud_rate(baud_rate)
+                self.__framer.reset()
+            if self.__reactor is None:
+                self.__bus.timeout = self.__msg_timeout
+                self.__bus.inter_byte_timeout = self.__get_inter_byte_timeout()
+        except (serial.SerialException, ValueError) as ex:
+            print("Failed to update Serial Bus configuration: {}".format(ex), file=sys.stderr)
+            return False
+        finally:
+            self.__resume_reading()
+        return True
 
-        self.__baud_rate = baud_rate
-        self.__parity = parity
-        self.__stopbits = stopbits
-        self.__init_bus()
+    def set_framer(self, framer: Framer or None):
+        """
+            Set framer which splits incoming data into frames. Only complete frames are passed to the callbacks and
+            stored into the incoming data queue, inter-char timeout is not used. The frames of timing based framer are
+            terminated by its silent interval. Incoming data queue is flushed.
+                Parameters:
+                    framer (Framer): framer object, None to return to the inter-char timeout based messages
+        """
+        self.__pause_reading()
+        try:
+            if framer is not None:
+                framer.reset()
+                framer.set_baud_rate(self.__baud_rate)
+            with self.__rx_condition:
+                self.__rx_pending_frames.clear()
+                self.__framer = framer
+            if self.__reactor is None:
+                self.__bus.inter_byte_timeout = self.__get_inter_byte_timeout()
+            self.flush_incoming_data()
+        finally:
+            self.__resume_reading()
+
+    def get_framer(self) -> Framer or None:
+        return self.__framer
+
+    def sweep(self, configs, fn):
+        """
+            Apply several port configurations one by one and call the function for each of them. The initial
+            configuration is restored at the end.
+                Parameters:
+                    configs (Iterable): dictionaries with 'baud_rate', 'parity' and 'stopbits' keys. Missing keys keep
+                                        the initial values
+                    fn (Callable): function called with the configuration dictionary once it has been applied
+                Returns:
+                    results (list): values returned by fn, None for the configurations which failed to be applied
+        """
+        initial_config = {'baud_rate': self.__baud_rate, 'parity': self.__parity, 'stopbits': self.__stopbits}
+        results = []
+        try:
+            for config in configs:
+                config = {**initial_config, **config}
+                if self.update_port_config(config['baud_rate'], config['parity'], config['stopbits']):
+                    results.append(fn(config))
+                else:
+                    results.append(None)
+        finally:
+            self.update_port_config(initial_config['baud_rate'], initial_config['parity'],
+                                    initial_config['stopbits'])
+        return results
@@ -0,0 +1,68 @@
+import sys
+
+import serial
+
+from comm_support_lib.common.serial_iface_parity_consts import SerialIfaceParityConsts
+from comm_support_lib.common.serial_read_mode_consts import SerialReadModeConsts
+from comm_support_lib.config.config import SERIAL_AUTO_INTERCHAR_CHARS, SERIAL_AUTO_INTERCHAR_MIN_TIMEOUT, \
+    SERIAL_AUTO_MSG_CHARS, SERIAL_AUTO_MSG_MIN_TIMEOUT
+
+
+class SerialPortSettings:
+    """
+    Port settings conversions shared by SerialDriver and AsyncSerialDriver
+    """
+    __PARITY_DICT = {SerialIfaceParityConsts.PARITY_NONE: serial.PARITY_NONE,
+                     SerialIfaceParityConsts.PARITY_EVEN: serial.PARITY_EVEN,
+                     SerialIfaceParityConsts.PARITY_ODD: serial.PARITY_ODD,
+                     SerialIfaceParityConsts.PARITY_MARK: serial.PARITY_MARK,
+                     SerialIfaceParityConsts.PARITY_SPACE: serial.PARITY_SPACE}
+
+    @staticmethod
+    def get_parity_from_string(parity_str: str):
+        """
+        Convert parity string to parity from serial.Serial
+            Parameters:
+                parity_str (str): raw parity string
+            Returns:
+                Parity value from serial.Serial
+        """
+        result = SerialPortSettings.__PARITY_DICT.get(parity_str)
+
+        if not result:
+            print("Wrong parity value passed: " + parity_str, file=sys.stderr)
+            sys.exit(1)
+
+        return result
+
+    @staticmethod
+    def get_timeouts(baud_rate: int, parity: str, stopbits: int, ic_timeout: float or str, msg_timeout: float or str,
+                     read_mode: str = SerialReadModeConsts.BULK) -> tuple:
+        """
+        Calculate inter-char and message timeouts for the port settings. In low latency mode inter-char timeout is not
+        used.
+            Parameters:
+                baud_rate (int):    Bus baud rate
+                parity (str): Serial port parity setting
+                stopbits (int): Serial port stop bits setting
+                ic_timeout (float):  inter-char timeout setting, SerialReadModeConsts.TIMEOUT_AUTO means it is derived
+                                     from the character time
+                msg_timeout (float): incoming message timeout setting, SerialReadModeConsts.TIMEOUT_AUTO means it is
+                                     derived from the character time
+                read_mode (str): SerialReadModeConsts.LOW_LATENCY or SerialReadModeConsts.BULK
+            Returns:
+                timeouts (tuple): inter-char timeout and message timeout in seconds
+        """
+        # start bit, 8 data bits, parity bit and stop bits
+        bits_per_char = 1 + 8 + (parity != SerialIfaceParityConsts.PARITY_NONE) + stopbits
+        char_time = bits_per_char / baud_rate
+
+        if read_mode == SerialReadModeConsts.LOW_LATENCY:
+            ic_timeout = 0
+        elif ic_timeout == SerialReadModeConsts.TIMEOUT_AUTO:
+            ic_timeout = max(SERIAL_AUTO_INTERCHAR_CHARS * char_time, SERIAL_AUTO_INTERCHAR_MIN_TIMEOUT)
+
+        if msg_timeout == SerialReadModeConsts.TIMEOUT_AUTO:
+            msg_timeout = max(SERIAL_AUTO_MSG_CHARS * char_time, SERIAL_AUTO_MSG_MIN_TIMEOUT)
+
+        return ic_timeout, msg_timeout
@@ -0,0 +1,212 @@
+import selectors
+import socket
+import sys
+import threading
+import time
+
+from comm_support_lib.common.meta_singleton import MetaSingleton
+
+
+class SerialReactor(metaclass=MetaSingleton):
+    """
+    Single thread which multiplexes file descriptors of all the opened serial ports. Read handlers are invoked only
+    when bytes are ready to be read, timer handlers are invoked when the deadline returned by a handler has expired.
+    """
+
+    def __init__(self):
+        """
+        Class constructor. As the reactor is implemented using Singleton design pattern, the method is being called
+        only once. Reactor thread is started on the first handler registration.
+        """
+        self.__selector = selectors.DefaultSelector()
+        # fd -> [fileobj, on_readable, on_timer, deadline]
+        self.__handlers = {}
+        self.__paused_fds = set()
+        self.__pending_calls = []
+        self.__pending_calls_lock = threading.Lock()
+        self.__wakeup_recv, self.__wakeup_send = socket.socketpair()
+        self.__wakeup_recv.setblocking(False)
+        self.__wakeup_send.setblocking(False)
+        self.__selector.register(self.__wakeup_recv, selectors.EVENT_READ, None)
+        self.__thread = None
+        self.__thread_lock = threading.Lock()
+
+    @staticmethod
+    def is_supported(fileobj) -> bool:
+        """
+        Check whether the file object could be served by the reactor
+            Parameters:
+                fileobj: file object of the opened port
+            Returns:
+                result (bool): True if the object provides selectable file descriptor, False otherwise
+        """
+        if sys.platform.startswith("win"):
+            # select() on Windows works with sockets only
+            return False
+        try:
+            return fileobj.fileno() >= 0
+        except Exception:
+            return False
+
+    def register(self, fileobj, on_readable, on_timer, deadline: float = None):
+        """
+        Register file object in the reactor
+            Parameters:
+                fileobj: file object with fileno() method
+                on_readable (Callable): function invoked when data is ready to be read. Returns next deadline
+                                        (time.monotonic() based) or None
+                on_timer (Callable): function invoked with current time when deadline has expired. Returns next
+                                     deadline or None
+                deadline (float): initial deadline, None if timer is not required
+        """
+        self.__call_in_reactor(self.__add_handler, fileobj, on_readable, on_timer, deadline)
+
+    def unregister(self, fileobj):
+        """
+        Unregister file object from the reactor. Once the method returns, no handler of the object is running or
+        will be invoked.
+            Parameters:
+                fileobj: file object registered before
+        """
+        self.__call_in_reactor(self.__remove_handler, fileobj)
+
+    def pause(self, fileobj):
+        """
+        Stop watching the file object for incoming data and stop its timer. The object stays registered.
+            Parameters:
+                fileobj: file object registered before
+        """
+        self.__call_in_reactor(self.__set_paused, fileobj, True)
+
+    def resume(self, fileobj):
+        """
+        Continue watching the file object paused before. The timer handler is invoked immediately to calculate the
+        next deadline.
+            Parameters:
+                fileobj: file object registered before
+        """
+        self.__call_in_reactor(self.__set_paused, fileobj, False)
+
+    def __set_paused(self, fileobj, paused: bool):
+        for fd, handler in self.__handlers.items():
+            if handler[0] is not fileobj:
+                continue
+            if paused and fd not in self.__paused_fds:
+                self.__selector.unregister(fd)
+                self.__paused_fds.add(fd)
+                handler[3] = None
+            elif not paused and fd in self.__paused_fds:
+                self.__selector.register(fd, selectors.EVENT_READ, fd)
+                self.__paused_fds.discard(fd)
+                handler[3] = time.monotonic()
+            return
+
+    def __add_handler(self, fileobj, on_readable, on_timer, deadline):
+        fd = fileobj.fileno()
+        if fd in self.__handlers:
+            print("SerialReactor. File descriptor has already registered: {}".format(fd), file=sys.stderr)
+            return
+        self.__selector.register(fd, selectors.EVENT_READ, fd)
+        self.__handlers[fd] = [fileobj, on_readable, on_timer, deadline]
+
+    def __remove_handler(self, fileobj):
+        for fd, handler in list(self.__handlers.items()):
+            if handler[0] is fileobj:
+                self.__drop_handler(fd)
+                return
+
+    def __drop_handler(self, fd):
+        self.__handlers.pop(fd, None)
+        self.__paused_fds.discard(fd)
+        try:
+            self.__selector.unregister(fd)
+        except (KeyError, ValueError):
+            pass
+
+    def __call_in_reactor(self, func, *args):
+        """
+        Execute the function in the reactor thread and wait for the execution to complete.
+        """
+        if threading.current_thread() is self.__thread or sys.is_finalizing():
+            # daemon reactor thread could be already stopped on the interpreter shutdown
+            func(*args)
+            return
+
+        self.__start_thread()
+        done = threading.Event()
+        with self.__pending_calls_lock:
+            self.__pending_calls.append((func, args, done))
+        self.__wakeup()
+        done.wait()
+
+    def __start_thread(self):
+        with self.__thread_lock:
+            if self.__thread is not None and self.__thread.is_alive():
+                return
+            self.__thread = threading.Thread(target=self.__run, name="SerialReactor", daemon=True)
+            self.__thread.start()
+
+    def __wakeup(self):
+        try:
+            self.__wakeup_send.send(b"\0")
+        except (BlockingIOError, InterruptedError):
+            # wakeup is already pending
+            pass
+
+    def __drain_wakeup(self):
+        try:
+            while self.__wakeup_recv.recv(4096):
+                pass
+        except (BlockingIOError, InterruptedError):
+            pass
+
+    def __run_pending_calls(self):
+        with self.__pending_calls_lock:
+            pending_calls = self.__pending_calls
+            self.__pending_calls = []
+        for func, args, done in pending_calls:
+            try:
+                func(*args)
+            except Exception as ex:
+                print("SerialReactor. Failed to execute request: {}".format(ex), file=sys.stderr)
+            finally:
+                done.set()
+
+    def __get_select_timeout(self):
+        deadlines = [handler[3] for handler in self.__handlers.values() if handler[3] is not None]
+        if not deadlines:
+            return None
+        return max(0.0, min(deadlines) - time.monotonic())
+
+    def __run_expired_timers(self):
+        now = time.monotonic()
+        for fd, handler in list(self.__handlers.items()):
+            if handler[3] is None or handler[3] > now:
+                continue
+            try:
+                handler[3] = handler[2](now)
+            except Exception as ex:
+                print("SerialReactor. Timer handler failed: {}".format(ex), file=sys.stderr)
+                handler[3] = None
+
+    def __run(self):
+        """
+        Reactor thread function
+        """
+        while True:
+            for key, _ in self.__selector.select(self.__get_select_timeout()):
+                if key.data is None:
+                    self.__drain_wakeup()
+                    continue
+                handler = self.__handlers.get(key.data)
+                if handler is None:
+                    continue
+                try:
+                    handler[3] = handler[1]()
+                except Exception as ex:
+                    # the descriptor is broken (e.g. device was unplugged), stop watching it to avoid busy loop
+                    print("SerialReactor. Read handler failed, port is removed from the reactor: {}".format(ex),
+                          file=sys.stderr)
+                    self.__drop_handler(key.data)
+            self.__run_pending_calls()
+            self.__run_expired_timers()
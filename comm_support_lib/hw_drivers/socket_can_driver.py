@@ -6,28 +6,89 @@ import time
 import can
 import serial  # to handle exceptions
 
+from comm_support_lib.common.bounded_queue import BoundedQueue
+from comm_support_lib.common.can_frame import CanFrame, CanFrameBatch
+from comm_support_lib.common.can_frame_waiter_index import CanFrameWaiterIndex
+from comm_support_lib.common.can_id_dispatch_table import CanIdDispatchTable
+from comm_support_lib.common.can_interface_type_consts import CanInterfaceTypeConsts
+from comm_support_lib.common.can_log_file import CanLogWriter
+from comm_support_lib.common.capture_direction_consts import CaptureDirectionConsts
+from comm_support_lib.config.config import CAN_QUEUE_CAPACITY, CAN_QUEUE_OVERFLOW_POLICY, QUEUE_SPILL_DIR, \
+    CAN_INTERFACE_TYPE, CAN_RECV_BATCH_SIZE
+from comm_support_lib.hw_drivers.can_bus_settings import CanBusSettings
+
 
 class SocketCanDriver:
-    def __init__(self, socket: str, baud_rate: int, msg_timeout: float):
+    __bus = None
+    __INTERFACE_TYPES = (CanInterfaceTypeConsts.SLCAN, CanInterfaceTypeConsts.SOCKETCAN,
+                         CanInterfaceTypeConsts.VIRTUAL)
+
+    def __init__(self, socket: str, baud_rate: int, msg_timeout: float, queue_capacity: int = CAN_QUEUE_CAPACITY,
+                 queue_policy: str = CAN_QUEUE_OVERFLOW_POLICY, interface_type: str = CAN_INTERFACE_TYPE,
+                 can_filters: list = None, enqueue_unmatched_only: bool = False, fd: bool = False,
+                 data_bitrate: int = None, bitrate_switch: bool = True):
         """
         Initialize CAN bus communication:
             Parameters:
-                socket (str): CAN socket
+                socket (str): CAN socket, channel of the interface: serial port or socket URL of slcan adapter, name of
+                              SocketCAN interface (e.g. "vcan0") or name of virtual bus
                 baud_rate (int):    Bus baud rate
                 msg_timeout (float):  Timeout between messages (inter-frame gap)
+                queue_capacity (int): maximum number of messages in the incoming data queue
+                queue_policy (str): OverflowPolicyConsts value applied when the incoming data queue is full
+                interface_type (str): CanInterfaceTypeConsts value
+                can_filters (list): python-can filters, dictionaries {'can_id', 'can_mask', 'extended'}. A frame is
+                                    received if it matches any of them. None means all the frames are received
+                enqueue_unmatched_only (bool): put into the incoming data queue only the frames which have not been
+                                               passed to any callback registered on an ID, mask or range
+                fd (bool): enable CAN FD. The sent frames are CAN FD frames by default, classic and CAN FD frames are
+                           received. Not supported by slcan interface
+                data_bitrate (int): bitrate of the data phase of CAN FD frames. It is configured by the system for
+                                    SocketCAN interface (ip link), so it is only stored
+                bitrate_switch (bool): send the data phase of CAN FD frames at the data bitrate
         """
+        if interface_type not in self.__INTERFACE_TYPES:
+            raise ValueError("Wrong CAN interface type passed: {}".format(interface_type))
+        if fd and interface_type == CanInterfaceTypeConsts.SLCAN:
+            raise ValueError("CAN FD is not supported by {} interface".format(interface_type))
         self.__socket = socket
+        self.__interface_type = interface_type
+        self.__can_filters = can_filters
         self.__baud_rate = baud_rate
+        self.__fd = fd
+        self.__data_bitrate = data_bitrate
+        self.__bitrate_switch = bitrate_switch
         self.__msg_timeout = msg_timeout
-        self.__queue = queue.Queue(0)
-        self.__clb_list = []
-        self.__clb_list_lock = threading.Lock()
+        self.__queue = BoundedQueue(queue_capacity, queue_policy, QUEUE_SPILL_DIR)
+        self.__enqueue_unmatched_only = enqueue_unmatched_only
+        self.__dispatcher = CanIdDispatchTable()
+        self.__waiters = CanFrameWaiterIndex()
         self.__stop_polling_thread = threading.Event()
+        self.__polling_condition = threading.Condition()
+        self.__polling_paused = False
+        self.__polling_idle = False
+        self.__bus = None
+        self.__rx_bytes = 0
+        self.__rx_messages = 0
+        self.__read_calls = 0
+        self.__empty_reads = 0
+        self.__queue_full = 0
+        self.__tx_bytes = 0
+        self.__tx_messages = 0
+        self.__tx_errors = 0
+        self.__tx_lock = threading.Lock()
+        self.__reconnects = 0
+        self.__log = None
 
         self.__init_bus()
 
     def __del__(self):
+        if self.__bus is None:
+            # the constructor has failed
+            return
         self.__close_bus()
+        self.__dispatcher.clear()
+        self.stop_log()
 
     def __init_bus(self):
         """
@@ -35,7 +96,10 @@ class SocketCanDriver:
         """
         try:
             self.__stop_polling_thread.clear()
-            self.__bus = can.interface.Bus(bustype='slcan', channel=self.__socket, rtscts=True, bitrate=self.__baud_rate)
+            if self.__bus is not None:
+                self.__reconnects += 1
+            self.__bus = can.interface.Bus(**CanBusSettings.get_bus_arguments(
+                self.__interface_type, self.__socket, self.__baud_rate, self.__can_filters, self.__fd))
             self.__pollingThread = threading.Thread(
                 target=self.__poll_messages,
                 daemon=True
@@ -45,7 +109,8 @@ class SocketCanDriver:
             print("Failed to initialize CAN Bus: {}".format(CANEx), file=sys.stderr)
             sys.exit(1)
         except Exception as ex:
-            self.__bus.shutdown()
+            if self.__bus is not None:
+                self.__bus.shutdown()
             print("Failed initialize CANBus bus_interface: {}".format(ex), file=sys.stderr)
             sys.exit(1)
 
@@ -61,61 +126,181 @@ class SocketCanDriver:
             print("Failed to close CAN Bus: {}".format(ex), file=sys.stderr)
             sys.exit(1)
 
-    @staticmethod
-    def __get_dict_from_message(msg: can.Message):
-        return {'id': msg.arbitration_id,
-                'payload': msg.data}
+    def __create_message(self, message_id: int, payload, is_extended_id: bool, is_fd: bool = None) -> can.Message:
+        """
+        Create the message to send. The payload of CAN FD frame is padded with zeros to the length which could be
+        encoded by DLC, as the controller does
+        """
+        if payload is None:
+            payload = []
+        if is_fd is None:
+            is_fd = self.__fd
+        if len(payload) > CanFrame.MAX_PAYLOAD:
+            is_fd = True
+        if is_fd:
+            payload = bytes(payload)
+            payload += bytes(CanFrame.get_fd_payload_length(len(payload)) - len(payload))
+        return can.Message(arbitration_id=message_id, data=payload, is_extended_id=is_extended_id, is_fd=is_fd,
+                           bitrate_switch=is_fd and self.__bitrate_switch)
 
     def __poll_messages(self):
         """
             Message polling function
         """
         while not self.__stop_polling_thread.is_set():
+            with self.__polling_condition:
+                # the interface could be reconfigured only between recv() calls
+                self.__polling_idle = True
+                self.__polling_condition.notify_all()
+                self.__polling_condition.wait_for(lambda: not self.__polling_paused)
+                self.__polling_idle = False
+            frames = []
             try:
                 msg = self.__bus.recv(self.__msg_timeout)
+                self.__read_calls += 1
                 # nothing is received
                 if msg is None:
+                    self.__empty_reads += 1
                     continue
-                msg = self.__get_dict_from_message(msg)
-                # execute callbacks from the list
-                with self.__clb_list_lock:
-                    if len(self.__clb_list):
-                        for callback in self.__clb_list:
-                            callback(msg)
-                # put new message into the queue
-                self.__queue.put(msg)
-            except serial.serialutil.SerialException as CANEx:
+                # take the frames which are already buffered without waiting, to deliver them at once
+                while msg is not None:
+                    self.__rx_bytes += len(msg.data)
+                    frames.append(CanBusSettings.get_frame_from_message(msg))
+                    if len(frames) >= CAN_RECV_BATCH_SIZE:
+                        break
+                    msg = self.__bus.recv(0)
+                    self.__read_calls += 1
+            except (serial.serialutil.SerialException, can.CanError) as CANEx:
                 print("Failed to read message from CAN: {}".format(CANEx), file=sys.stderr)
-            except queue.Full:
-                print("CAN queue is full. Message lost", file=sys.stderr)
+            if not frames:
+                continue
+            self.__rx_messages += len(frames)
+            log = self.__log
+            if log is not None:
+                log.write_frames(CaptureDirectionConsts.DIRECTION_RX, frames)
+            # pass the messages to the callbacks, they are executed by the dispatcher threads
+            unmatched = self.__dispatcher.dispatch_many(frames)
+            if self.__enqueue_unmatched_only:
+                frames = unmatched
+            # put new messages into the queue
+            put = self.__queue.put_many(frames)
+            self.__waiters.notify(frames[:put])
+            lost = len(frames) - put
+            if lost:
+                self.__queue_full += lost
+                print("CAN queue is full. {} messages lost".format(lost), file=sys.stderr)
 
-    def send_message(self, message_id: int, payload=None, is_extended_id: bool = False):
+    def send_message(self, message_id: int, payload=None, is_extended_id: bool = False, is_fd: bool = None):
         """
         Send message to CAN bus_interface
             Parameters:
                 message_id:    Message ID to send
-                payload (bytes or list):   Message payload
+                payload (bytes or list):   Message payload, up to 8 bytes for classic frame and 64 bytes for CAN FD
+                                           frame
                 is_extended_id (bool): if message_id is extended, should be True
+                is_fd (bool): send CAN FD frame. None means CAN FD frame if CAN FD is enabled. The payload longer than
+                              8 bytes is always sent by CAN FD frame
             Returns:
                 status (bool): True if message has been sent successfully, False otherwise
         """
-        if payload is None:
-            payload = []
         try:
-            msg = can.Message(arbitration_id=message_id, data=payload, is_extended_id=is_extended_id)
+            msg = self.__create_message(message_id, payload, is_extended_id, is_fd)
             self.__bus.send(msg)
-        except serial.serialutil.SerialException as ex:
+        except (serial.serialutil.SerialException, can.CanError, ValueError) as ex:
+            with self.__tx_lock:
+                self.__tx_errors += 1
             print("Failed to send message through CAN bus: {}".format(ex), file=sys.stderr)
             return False
+        with self.__tx_lock:
+            self.__tx_messages += 1
+            self.__tx_bytes += len(msg.data)
+        self.__log_sent_messages([msg])
         return True
 
+    def __log_sent_messages(self, messages: list):
+        log = self.__log
+        if log is None:
+            return
+        timestamp = time.time()
+        frames = []
+        for msg in messages:
+            msg.timestamp = timestamp
+            frames.append(CanBusSettings.get_frame_from_message(msg))
+        log.write_frames(CaptureDirectionConsts.DIRECTION_TX, frames)
+
+    def send_burst(self, frames) -> int:
+        """
+        Send several messages one after another without pauses. Sending is continued after a failed message, the
+        failures are reported once.
+            Parameters:
+                frames (Iterable): (message_id, payload, is_extended_id) tuples. The messages are sent by CAN FD
+                                   frames if CAN FD is enabled or the payload is longer than 8 bytes
+            Returns:
+                sent (int): number of messages which have been sent successfully
+        """
+        sent = 0
+        sent_bytes = 0
+        errors = 0
+        last_error = None
+        # the sent messages are kept only if they are logged
+        sent_messages = [] if self.__log is not None else None
+        for message_id, payload, is_extended_id in frames:
+            try:
+                msg = self.__create_message(message_id, payload, is_extended_id)
+                self.__bus.send(msg)
+            except (serial.serialutil.SerialException, can.CanError, ValueError) as ex:
+                errors += 1
+                last_error = ex
+                continue
+            sent += 1
+            sent_bytes += len(msg.data)
+            if sent_messages is not None:
+                sent_messages.append(msg)
+        with self.__tx_lock:
+            self.__tx_messages += sent
+            self.__tx_bytes += sent_bytes
+            self.__tx_errors += errors
+        if sent_messages:
+            self.__log_sent_messages(sent_messages)
+        if errors:
+            print("Failed to send {} messages through CAN bus: {}".format(errors, last_error), file=sys.stderr)
+        return sent
+
+    def send_periodic(self, message_id: int, payload=None, period: float = 1.0, is_extended_id: bool = False,
+                      duration: float = None):
+        """
+        Start sending the message periodically. SocketCAN interface sends it by the kernel (broadcast manager), other
+        interfaces by a python-can thread. The periodic messages are not counted by get_statistics()
+            Parameters:
+                message_id:    Message ID to send
+                payload (bytes or list):   Message payload
+                period (float): period in seconds
+                is_extended_id (bool): if message_id is extended, should be True
+                duration (float): time in seconds to send the message for, None means until stop_periodic_tasks()
+            Returns:
+                task (can.broadcastmanager.CyclicSendTaskABC): task which could be stopped by its stop(), None if
+                                                               failed to start
+        """
+        try:
+            msg = self.__create_message(message_id, payload, is_extended_id)
+            return self.__bus.send_periodic(msg, period, duration)
+        except (serial.serialutil.SerialException, can.CanError, ValueError) as ex:
+            print("Failed to start periodic sending through CAN bus: {}".format(ex), file=sys.stderr)
+            return None
+
+    def stop_periodic_tasks(self):
+        """
+        Stop all the messages started by send_periodic()
+        """
+        self.__bus.stop_all_periodic_tasks()
+
     def get_message(self, timeout: float):
         """
         Get message from CAN bus_interface
             Parameters:
                 timeout (float):  Operation timeout in seconds
             Returns:
-                msg (bytearray): Received message (None if timeout expired)
+                msg (CanFrame): Received message (None if timeout expired)
         """
         try:
             msg = self.__queue.get(block=True, timeout=timeout)
@@ -123,6 +308,99 @@ class SocketCanDriver:
         except queue.Empty:
             return None
 
+    def wait_for(self, predicate=None, can_id: int = None, can_mask: int = None, payload_prefix: bytes = None,
+                 timeout: float = None):
+        """
+        Take the oldest message matching the filter from the incoming data queue, wait for it if there is no such
+        message. The other messages stay in the queue
+            Parameters:
+                predicate (Callable): function returning True for the matching CanFrame, None means any message
+                can_id (int): arbitration ID of the message, with can_mask it is matched in the bits set in can_mask.
+                              None means any ID
+                can_mask (int): mask applied to can_id and the message IDs
+                payload_prefix (bytes): the payload of the message should start with, None means any payload
+                timeout (float):  Operation timeout in seconds, None means to wait without limit
+            Returns:
+                msg (CanFrame): Received message (None if timeout expired)
+        """
+        return self.__waiters.wait_for(self.__queue, timeout, predicate, can_id, can_mask, payload_prefix)
+
+    def get_messages(self, count: int, timeout: float) -> CanFrameBatch:
+        """
+        Get many messages from CAN bus_interface at once
+            Parameters:
+                count (int): number of messages to get
+                timeout (float):  Time in seconds to wait for all the messages
+            Returns:
+                batch (CanFrameBatch): Received messages, fewer than count if timeout expired
+        """
+        batch = CanFrameBatch(CanFrameBatch.FD_PAYLOAD_SLOT_SIZE if self.__fd else CanFrameBatch.PAYLOAD_SLOT_SIZE)
+        deadline = time.monotonic() + timeout
+        while len(batch) < count:
+            try:
+                frames = self.__queue.get_many(count - len(batch), timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                break
+            for frame in frames:
+                batch.append(frame)
+        return batch
+
+    def inject_frames(self, frames) -> None:
+        """
+        Pass the frames to the callbacks and the incoming data queue as if they have been received. The frames are not
+        counted by get_statistics() and not logged.
+            Parameters:
+                frames (Iterable): CanFrame objects
+        """
+        frames = list(frames)
+        unmatched = self.__dispatcher.dispatch_many(frames)
+        if self.__enqueue_unmatched_only:
+            frames = unmatched
+        put = self.__queue.put_many(frames)
+        self.__waiters.notify(frames[:put])
+        lost = len(frames) - put
+        if lost:
+            self.__queue_full += lost
+
+    def start_log(self, path: str):
+        """
+            Start writing received and sent frames into CAN log. The frames are compressed and written by the log
+            thread, so logging does not stall reading from the bus. The log could be read by CanLogReader and played
+            back by CanLogReplay.
+                Parameters:
+                    path (str): path to the log file, the existing file is overwritten
+                Returns:
+                    status (bool): True if logging has been started, False otherwise
+        """
+        try:
+            log = CanLogWriter(path)
+        except OSError as ex:
+            print("Failed to start CAN log: {}".format(ex), file=sys.stderr)
+            return False
+        previous_log = self.__log
+        self.__log = log
+        if previous_log is not None:
+            previous_log.close()
+        return True
+
+    def stop_log(self):
+        """
+            Stop logging, write the pending frames and close the log file
+        """
+        log = self.__log
+        self.__log = None
+        if log is not None:
+            log.close()
+
+    def get_log_statistics(self):
+        """
+            Get counters of the active log
+                Returns:
+                    statistics (dict): see CanLogWriter.get_statistics(), None if logging is not started
+        """
+        log = self.__log
+        return log.get_statistics() if log is not None else None
+
     def get_parameters(self):
         """
             Get Serial bus_interface parameters
@@ -131,33 +409,52 @@ class SocketCanDriver:
         """
         return {'socket': self.__socket,
                 'baud_rate': self.__baud_rate,
-                'msg_timeout': self.__msg_timeout}
+                'msg_timeout': self.__msg_timeout,
+                'interface_type': self.__interface_type,
+                'can_filters': self.__can_filters,
+                'fd': self.__fd,
+                'data_bitrate': self.__data_bitrate,
+                'bitrate_switch': self.__bitrate_switch}
+
+    def set_filters(self, can_filters: list = None):
+        """
+            Replace the filters of received frames without reopening the interface
+                Parameters:
+                    can_filters (list): python-can filters, dictionaries {'can_id', 'can_mask', 'extended'}. None means
+                                        all the frames are received
+        """
+        self.__can_filters = can_filters
+        self.__bus.set_filters(can_filters)
 
     def flush_incoming_data(self):
         """
             Flush incoming data queue
         """
-        while True:
-            try:
-                self.__queue.get(block=False)
-            except queue.Empty:
-                break
+        self.__queue.clear()
 
-    def register_message_callback(self, callback):
+    def register_message_callback(self, callback, policy: str = None, capacity: int = None, can_id: int = None,
+                                  can_mask: int = None, id_range: tuple = None):
         """
-            Register incoming data callback
+            Register incoming data callback. The callback is invoked in its own thread, so it does not stall reading
+            from the bus.
                 Parameters:
                     callback (Callable): function to register as callback
+                    policy (str): OverflowPolicyConsts value applied when the callback does not keep up with incoming
+                                  data. None means CALLBACK_OVERFLOW_POLICY
+                    capacity (int): number of messages which could be pending for the callback. None means
+                                    CALLBACK_QUEUE_CAPACITY
+                    can_id (int): the callback gets only the frames with this ID, or matching it in the bits of
+                                  can_mask
+                    can_mask (int): mask applied to can_id and the frame IDs
+                    id_range (tuple): (first, last) inclusive range of IDs of the frames the callback gets. Used if
+                                      can_id is None. If neither can_id nor id_range is set, all the frames are passed
         """
         if callback is None:
             print("register_message_callback(). Callback function is None", file=sys.stderr)
             return
-        if callback in self.__clb_list:
+        if not self.__dispatcher.subscribe(callback, policy, capacity, can_id, can_mask, id_range):
             print("register_message_callback(). Callback function has already registered:" + callback.__name__,
                   file=sys.stderr)
-            return
-        with self.__clb_list_lock:
-            self.__clb_list.append(callback)
 
     def unregister_message_callback(self, callback):
         """
@@ -168,26 +465,133 @@ class SocketCanDriver:
         if callback is None:
             print("unregister_message_callback(). Callback function is None", file=sys.stderr)
             return
-        if callback not in self.__clb_list:
+        if not self.__dispatcher.unsubscribe(callback):
             print("Callback function is not registered:" + callback.__name__, file=sys.stderr)
-            return
-        with self.__clb_list_lock:
-            self.__clb_list.remove(callback)
 
     def clear_callback_list(self):
         """
             Clear list of incoming data callbacks
         """
-        with self.__clb_list_lock:
-            self.__clb_list.clear()
+        self.__dispatcher.clear()
+
+    def get_queue_statistics(self):
+        """
+            Get incoming data queue counters
+                Returns:
+                    statistics (dict): {'capacity', 'policy', 'depth', 'high_water_mark', 'dropped', 'spilled',
+                                       'spill_depth'}
+        """
+        return self.__queue.get_statistics()
 
-    def update_iface_config(self, baud_rate: int):
+    def get_statistics(self):
         """
-            Update configuration of Serial hardware interface
+            Get interface counters
+                Returns:
+                    statistics (dict): {'bytes_in', 'frames_in', 'bytes_out', 'frames_out', 'send_errors',
+                                       'read_calls', 'empty_reads', 'queue_depth', 'queue_high_water_mark',
+                                       'lost_messages', 'callback_time', 'callback_max_time', 'reconnects'}. Bytes are
+                                       payload bytes, callback times are in seconds
+        """
+        queue_statistics = self.__queue.get_statistics()
+        callback_time, callback_max_time = self.__dispatcher.get_execution_time()
+        with self.__tx_lock:
+            bytes_out = self.__tx_bytes
+            frames_out = self.__tx_messages
+            send_errors = self.__tx_errors
+        return {'bytes_in': self.__rx_bytes,
+                'frames_in': self.__rx_messages,
+                'bytes_out': bytes_out,
+                'frames_out': frames_out,
+                'send_errors': send_errors,
+                'read_calls': self.__read_calls,
+                'empty_reads': self.__empty_reads,
+                'queue_depth': queue_statistics['depth'],
+                'queue_high_water_mark': queue_statistics['high_water_mark'],
+                'lost_messages': queue_statistics['dropped'] + self.__queue_full,
+                'callback_time': callback_time,
+                'callback_max_time': callback_max_time,
+                'reconnects': self.__reconnects}
+
+    def get_wait_statistics(self):
+        """
+            Get counters of wait_for() calls
+                Returns:
+                    statistics (dict): {'waits', 'matched', 'timeouts', 'pending', 'wakeups', 'wait_time',
+                                       'max_wait_time', 'max_latency'}. Times are in seconds
+        """
+        return self.__waiters.get_statistics()
+
+    def get_callback_statistics(self):
+        """
+            Get delivery counters of the registered callbacks
+                Returns:
+                    statistics (dict): callback name -> {'policy', 'capacity', 'depth', 'max_depth', 'delivered',
+                                       'dropped', 'coalesced', 'delayed', 'delay_time', 'exec_time', 'max_exec_time'}.
+                                       The name is the qualified name and the id of the callback, e.g. "f@0x7f00"
+        """
+        return self.__dispatcher.get_statistics()
+
+    def update_iface_config(self, baud_rate: int, data_bitrate: int = None):
+        """
+            Update configuration of CAN hardware interface. If the interface supports changing of the bitrate (slcan),
+            the new bitrate is applied to the opened channel and the polling thread is paused during the update.
+            The bitrate of SocketCAN interface is configured by the system (ip link), and virtual bus has no bitrate,
+            so for them the value is only stored. Otherwise, the interface is closed and reopened.
                 Parameters:
                     baud_rate (int):    Baud rate of the bus
+                    data_bitrate (int): bitrate of the data phase of CAN FD frames, None means it is not changed. It
+                                        is only stored, as CAN FD is supported by SocketCAN and virtual interfaces
+                Returns:
+                    status (bool): True if the configuration has been applied successfully, False otherwise
         """
-        self.__close_bus()
+        if data_bitrate is not None:
+            self.__data_bitrate = data_bitrate
+        if self.__interface_type in (CanInterfaceTypeConsts.SOCKETCAN, CanInterfaceTypeConsts.VIRTUAL):
+            self.__baud_rate = baud_rate
+            return True
+
+        set_bitrate = getattr(self.__bus, "set_bitrate", None)
+        if set_bitrate is None:
+            self.__close_bus()
+            self.__baud_rate = baud_rate
+            self.__init_bus()
+            return True
+
+        with self.__polling_condition:
+            self.__polling_paused = True
+            self.__polling_condition.wait_for(lambda: self.__polling_idle)
+        try:
+            set_bitrate(baud_rate)
+        except (serial.serialutil.SerialException, ValueError) as ex:
+            print("Failed to update CAN Bus configuration: {}".format(ex), file=sys.stderr)
+            return False
+        finally:
+            with self.__polling_condition:
+                self.__polling_paused = False
+                self.__polling_condition.notify_all()
 
         self.__baud_rate = baud_rate
-        self.__init_bus()
+        return True
+
+    def sweep(self, configs, fn):
+        """
+            Apply several bus configurations one by one and call the function for each of them. The initial
+            configuration is restored at the end.
+                Parameters:
+                    configs (Iterable): dictionaries with 'baud_rate' key and optional 'data_bitrate' key
+                    fn (Callable): function called with the configuration dictionary once it has been applied
+                Returns:
+                    results (list): values returned by fn, None for the configurations which failed to be applied
+        """
+        initial_baud_rate = self.__baud_rate
+        initial_data_bitrate = self.__data_bitrate
+        results = []
+        try:
+            for config in configs:
+                if self.update_iface_config(config['baud_rate'], config.get('data_bitrate')):
+                    results.append(fn(config))
+                else:
+                    results.append(None)
+        finally:
+            self.update_iface_config(initial_baud_rate, initial_data_bitrate)
+        return results
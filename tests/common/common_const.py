@@ -130,12 +130,17 @@ class CommonConst:
     IP_LINK_SET = "set "
     IP_LINK_TYPE_CAN = "type can "
     IP_LINK_BITRATE = "bitrate "
+    IP_LINK_DBITRATE = "dbitrate "
+    IP_LINK_FD_ON = "fd on"
     CANGEN_EXTENDED = "-e "
+    CANGEN_FD = "-f "
+    CANGEN_FD_BRS = "-b "
     CANGEN_DATA_LEN = "-L"
     CANGEN_DATA = "-D "
     CANGEN_ID = "-I"
     CANGEN_INTERVAL = "-g "
     CAN_MAX_PAYLOAD = 8
+    CAN_FD_MAX_PAYLOAD = 64
     COMMAND_CANGEN = "cangen"
     COMMAND_CANSEND = "cansend "
     COMMAND_CANDUMP = "candump "
@@ -374,11 +374,15 @@ class CommonHelper:
         return found_list
 
     @staticmethod
-    def configure_can(iface: str, enable: bool, bit_rate: int = 20000):
+    def configure_can(iface: str, enable: bool, bit_rate: int = 20000, data_bit_rate: int = None):
         CommonHelper.__debug_cli.flush_incoming_data()
         if enable:
-            CommonHelper.__debug_cli.send_message(
-                f"{CommonConst.COMMAND_IP_LINK}{CommonConst.IP_LINK_SET}{iface} {CommonConst.IFACE_STATE_UP} {CommonConst.IP_LINK_TYPE_CAN}{CommonConst.IP_LINK_BITRATE}{bit_rate}")
+            command = f"{CommonConst.COMMAND_IP_LINK}{CommonConst.IP_LINK_SET}{iface} {CommonConst.IFACE_STATE_UP} " \
+                      f"{CommonConst.IP_LINK_TYPE_CAN}{CommonConst.IP_LINK_BITRATE}{bit_rate}"
+            # CAN FD with the data phase bitrate
+            if data_bit_rate is not None:
+                command += f" {CommonConst.IP_LINK_DBITRATE}{data_bit_rate} {CommonConst.IP_LINK_FD_ON}"
+            CommonHelper.__debug_cli.send_message(command)
         else:
             CommonHelper.__debug_cli.send_message(
                 f"{CommonConst.COMMAND_IP_LINK}{CommonConst.IP_LINK_SET}{iface} {CommonConst.IFACE_STATE_DOWN}")
@@ -401,14 +405,16 @@ class CommonHelper:
 
     @staticmethod
     def perform_cangen(iface: str, extended_id: bool, data: bytes, id: int, delay_msec: int, generation_time_sec: int,
-                       additional_arguments: str = None):
+                       additional_arguments: str = None, fd: bool = False, bitrate_switch: bool = False):
         output_command = f"{CommonConst.COMMAND_CANGEN} {iface} "
 
         if extended_id:
             output_command += CommonConst.CANGEN_EXTENDED
+        if fd:
+            output_command += CommonConst.CANGEN_FD_BRS if bitrate_switch else CommonConst.CANGEN_FD
 
         data_len = len(data)
-        if data_len == 0 or data_len > CommonConst.CAN_MAX_PAYLOAD:
+        if data_len == 0 or data_len > (CommonConst.CAN_FD_MAX_PAYLOAD if fd else CommonConst.CAN_MAX_PAYLOAD):
             return False
 
         output_command += f"{CommonConst.CANGEN_DATA_LEN}{data_len} {CommonConst.CANGEN_DATA}{data.hex().upper()} "
@@ -71,8 +71,9 @@ class TestCan:
                                                param_dict.get(CommonConst.PARAM_LIST_FIELD_ID),
                                                CommonConst.CANGEN_DELAY, CommonConst.TIMEOUT_2_SEC) is True
 
-            message: dict = self.__can.get_message(CommonConst.TIMEOUT_5_SEC)
-            assert message.get(CAN.INPUT_DATA_FIELD_ID) == param_dict.get(CommonConst.PARAM_LIST_FIELD_ID)
+            message: dict = self.__can.wait_for(can_id=param_dict.get(CommonConst.PARAM_LIST_FIELD_ID),
+                                                timeout=CommonConst.TIMEOUT_5_SEC)
+            assert message is not None
             assert message.get(CAN.INPUT_DATA_FIELD_PAYLOAD) == bytes(CommonConst.CAN_PAYLOAD)
 
         with allure.step("Send bytes from Host PC to the board"):
@@ -0,0 +1,123 @@
+import queue
+
+import pytest
+
+from comm_support_lib.common.bounded_queue import BoundedQueue
+from comm_support_lib.common.overflow_policy_consts import OverflowPolicyConsts
+from comm_support_lib.common.spill_file import SpillFile
+
+
+class TestBoundedQueue:
+
+    def test_wrong_arguments(self):
+        with pytest.raises(ValueError):
+            BoundedQueue(1, OverflowPolicyConsts.COALESCE)
+        with pytest.raises(ValueError):
+            BoundedQueue(0)
+
+    def test_block_policy(self):
+        items = BoundedQueue(2)
+        items.put(1)
+        items.put(2)
+        with pytest.raises(queue.Full):
+            items.put(3, block=False)
+        with pytest.raises(queue.Full):
+            items.put(3, timeout=0)
+        assert items.get() == 1
+        items.put(3)
+        assert items.get_many(10) == [2, 3]
+        with pytest.raises(queue.Empty):
+            items.get(block=False)
+        with pytest.raises(queue.Empty):
+            items.get(timeout=0)
+
+    def test_put_many_stops_when_full(self):
+        items = BoundedQueue(2)
+        assert items.put_many([1, 2, 3], block=False) == 2
+        assert items.get_many(10) == [1, 2]
+
+    @pytest.mark.parametrize("policy, expected", [(OverflowPolicyConsts.DROP_OLDEST, [3, 4]),
+                                                  (OverflowPolicyConsts.DROP_NEWEST, [1, 2])])
+    def test_drop_policies(self, policy: str, expected: list):
+        items = BoundedQueue(2, policy)
+        items.put(1)
+        assert items.put_many([2, 3]) == 2
+        items.put(4)
+        assert items.get_many(10) == expected
+        statistics = items.get_statistics()
+        assert statistics['dropped'] == 2
+        assert statistics['high_water_mark'] == 2
+
+    def test_spill_policy_keeps_order(self, tmp_path):
+        items = BoundedQueue(2, OverflowPolicyConsts.SPILL, str(tmp_path))
+        items.put_many(range(5))
+        items.put(5)
+        statistics = items.get_statistics()
+        assert statistics['spilled'] == 4
+        assert statistics['spill_depth'] == 4
+        assert statistics['high_water_mark'] == 6
+        assert items.get() == 0
+        # the memory queue has free space, but the new item goes after the spilled ones
+        items.put(6)
+        assert [items.get() for _ in range(6)] == [1, 2, 3, 4, 5, 6]
+        assert items.empty()
+
+    def test_take_first(self):
+        items = BoundedQueue(4)
+        items.put_many([1, 2, 3, 4])
+        assert items.take_first(lambda item: item % 2 == 0) == 2
+        with pytest.raises(queue.Empty):
+            items.take_first(lambda item: item > 10)
+        assert items.get_many(10) == [1, 3, 4]
+
+    def test_take_first_from_spill_file(self, tmp_path):
+        items = BoundedQueue(2, OverflowPolicyConsts.SPILL, str(tmp_path))
+        items.put_many([1, 2, 3])
+        assert items.get() == 1
+        # the spilled item is moved to memory to be checked
+        assert items.take_first(lambda item: item == 3) == 3
+        assert items.qsize() == 1
+
+    def test_clear(self, tmp_path):
+        items = BoundedQueue(1, OverflowPolicyConsts.SPILL, str(tmp_path))
+        items.put_many([1, 2, 3])
+        items.clear()
+        assert items.qsize() == 0
+        items.put(4)
+        assert items.get_nowait() == 4
+
+
+class TestSpillFile:
+
+    def test_fifo_order(self, tmp_path):
+        spill = SpillFile(str(tmp_path))
+        for item in (b"bytes", {'key': 1}, [1, 2]):
+            spill.append(item)
+        assert len(spill) == 3
+        assert spill.size_bytes > 0
+        assert [spill.pop() for _ in range(3)] == [b"bytes", {'key': 1}, [1, 2]]
+        with pytest.raises(IndexError):
+            spill.pop()
+        spill.close()
+
+    def test_file_is_truncated_when_read(self, tmp_path):
+        spill = SpillFile(str(tmp_path))
+        spill.append(1)
+        spill.append(2)
+        assert spill.pop() == 1
+        spill.append(3)
+        assert spill.pop() == 2
+        assert spill.pop() == 3
+        assert spill.size_bytes == 0
+        spill.append(4)
+        assert spill.pop() == 4
+        spill.close()
+
+    def test_clear(self, tmp_path):
+        spill = SpillFile(str(tmp_path))
+        spill.append(1)
+        spill.clear()
+        assert len(spill) == 0
+        spill.append(2)
+        assert spill.pop() == 2
+        spill.close()
@@ -0,0 +1,142 @@
+import threading
+
+import pytest
+
+from comm_support_lib.common.callback_dispatcher import CallbackDispatcher, CallbackSubscriber
+from comm_support_lib.common.overflow_policy_consts import OverflowPolicyConsts
+
+# time to wait for the worker threads, the tests do not rely on it unless they fail
+_TIMEOUT = 5
+
+
+class GatedCallback:
+    """
+    Callback which holds the worker thread on the first message until open() is called, so the queue of the
+    subscriber could be filled deterministically
+    """
+
+    def __init__(self):
+        self.messages = []
+        self.__gate = threading.Event()
+        self.__started = threading.Event()
+        self.__condition = threading.Condition()
+
+    def __call__(self, msg):
+        self.__started.set()
+        self.__gate.wait(_TIMEOUT)
+        with self.__condition:
+            self.messages.append(msg)
+            self.__condition.notify_all()
+
+    def wait_started(self) -> bool:
+        return self.__started.wait(_TIMEOUT)
+
+    def open(self) -> None:
+        self.__gate.set()
+
+    def wait_messages(self, count: int) -> list:
+        with self.__condition:
+            self.__condition.wait_for(lambda: len(self.messages) >= count, _TIMEOUT)
+            return list(self.messages)
+
+
+class TestCallbackSubscriber:
+
+    def test_wrong_arguments(self):
+        with pytest.raises(ValueError):
+            CallbackSubscriber(print, OverflowPolicyConsts.SPILL, 1)
+        with pytest.raises(ValueError):
+            CallbackSubscriber(print, OverflowPolicyConsts.BLOCK, 0)
+
+    @pytest.mark.parametrize("policy, expected", [(OverflowPolicyConsts.DROP_OLDEST, [b"0", b"3", b"4"]),
+                                                  (OverflowPolicyConsts.COALESCE, [b"0", b"1", b"234"])])
+    def test_overflow_policies(self, policy: str, expected: list):
+        callback = GatedCallback()
+        subscriber = CallbackSubscriber(callback, policy, 2)
+        subscriber.put(b"0")
+        # the worker holds the first message, the others stay in the queue
+        assert callback.wait_started()
+        subscriber.put_many([b"1", b"2", b"3", b"4"])
+        callback.open()
+        assert callback.wait_messages(len(expected)) == expected
+        statistics = subscriber.get_statistics()
+        subscriber.stop()
+        assert statistics['max_depth'] == 2
+        assert statistics['dropped' if policy == OverflowPolicyConsts.DROP_OLDEST else 'coalesced'] == 2
+
+    def test_block_policy_keeps_all_messages(self):
+        callback = GatedCallback()
+        subscriber = CallbackSubscriber(callback, OverflowPolicyConsts.BLOCK, 1)
+        subscriber.put(0)
+        assert callback.wait_started()
+        subscriber.put(1)
+        producer = threading.Thread(target=subscriber.put_many, args=([2, 3],))
+        producer.start()
+        callback.open()
+        producer.join(_TIMEOUT)
+        assert callback.wait_messages(4) == [0, 1, 2, 3]
+        statistics = subscriber.get_statistics()
+        subscriber.stop()
+        assert statistics['dropped'] == 0
+        assert statistics['delayed'] >= 1
+
+    def test_failed_callback_does_not_stop_worker(self):
+        received = []
+        done = threading.Event()
+
+        def callback(msg):
+            if msg == 0:
+                raise RuntimeError("failure")
+            received.append(msg)
+            done.set()
+
+        subscriber = CallbackSubscriber(callback, OverflowPolicyConsts.BLOCK, 4)
+        subscriber.put_many([0, 1])
+        assert done.wait(_TIMEOUT)
+        subscriber.stop()
+        assert received == [1]
+
+    def test_names_are_unique(self):
+        first = GatedCallback()
+        second = GatedCallback()
+        subscribers = [CallbackSubscriber(callback, OverflowPolicyConsts.DROP_OLDEST, 1)
+                       for callback in (first, second)]
+        names = [subscriber.name for subscriber in subscribers]
+        for subscriber in subscribers:
+            subscriber.stop()
+        assert names[0] != names[1]
+        assert all(name.startswith("GatedCallback@") for name in names)
+
+
+class TestCallbackDispatcher:
+
+    def test_subscribe_and_dispatch(self):
+        dispatcher = CallbackDispatcher(OverflowPolicyConsts.DROP_OLDEST, 16)
+        first = GatedCallback()
+        second = GatedCallback()
+        assert not dispatcher.has_subscribers()
+        assert dispatcher.subscribe(first)
+        assert not dispatcher.subscribe(first)
+        assert dispatcher.subscribe(second, OverflowPolicyConsts.BLOCK, 4)
+        first.open()
+        second.open()
+        for msg in range(3):
+            dispatcher.dispatch(msg)
+        assert first.wait_messages(3) == [0, 1, 2]
+        assert second.wait_messages(3) == [0, 1, 2]
+        statistics = dispatcher.get_statistics()
+        assert sorted(item['policy'] for item in statistics.values()) == [OverflowPolicyConsts.BLOCK,
+                                                                         OverflowPolicyConsts.DROP_OLDEST]
+        dispatcher.clear()
+        assert not dispatcher.has_subscribers()
+
+    def test_unsubscribe(self):
+        dispatcher = CallbackDispatcher()
+        callback = GatedCallback()
+        callback.open()
+        dispatcher.subscribe(callback)
+        assert dispatcher.is_subscribed(callback)
+        assert dispatcher.unsubscribe(callback)
+        assert not dispatcher.unsubscribe(callback)
+        dispatcher.dispatch(1)
+        assert callback.messages == []
@@ -0,0 +1,37 @@
+import json
+
+from benchmarks import can_benchmark
+
+# short run of one bitrate, the CI smoke check of the benchmark
+_SMOKE_ARGUMENTS = ["--channel", "can_benchmark_unit_test", "--bitrates", "500000", "--duration", "0.2",
+                    "--receive-timeout", "0.5", "--subscribers", "2"]
+
+
+def _run(tmp_path, *arguments) -> tuple:
+    path = str(tmp_path / "can_benchmark.json")
+    result = can_benchmark.main(_SMOKE_ARGUMENTS + ["--output", path] + list(arguments))
+    with open(path) as file:
+        return result, json.load(file)
+
+
+class TestCanBenchmark:
+
+    def test_smoke(self, tmp_path):
+        result, report = _run(tmp_path)
+        assert result == 0
+        assert [case['name'] for case in report['cases']] == ["virtual/standard/500000", "virtual/extended/500000"]
+        for case in report['cases']:
+            assert case['frames_sent'] > 0
+            assert case['frames_received'] == case['frames_sent']
+            assert case['callbacks_called'] == case['frames_sent']
+            assert case['send_errors'] == 0
+            assert case['lost_messages'] == 0
+
+    def test_regression_detected(self, tmp_path):
+        baseline_path = tmp_path / "baseline.json"
+        _, report = _run(tmp_path)
+        for case in report['cases']:
+            case['frames_per_s'] *= 100
+        baseline_path.write_text(json.dumps(report))
+        result, _ = _run(tmp_path, "--baseline", str(baseline_path))
+        assert result == 1
@@ -0,0 +1,99 @@
+import threading
+import time
+
+import pytest
+
+from comm_support_lib.common.bounded_queue import BoundedQueue
+from comm_support_lib.common.can_frame import CanFrame
+from comm_support_lib.common.can_frame_waiter_index import CanFrameWaiterIndex
+
+_TIMEOUT = 5
+
+
+def _get_frame(can_id: int, payload: bytes = b"") -> CanFrame:
+    return CanFrame(time.time(), can_id, 0, len(payload), payload)
+
+
+def _put(frames_queue: BoundedQueue, waiters: CanFrameWaiterIndex, frames: list) -> None:
+    frames_queue.put_many(frames)
+    waiters.notify(frames)
+
+
+def _wait_pending(waiters: CanFrameWaiterIndex, count: int) -> None:
+    deadline = time.monotonic() + _TIMEOUT
+    while waiters.get_statistics()['pending'] != count:
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+
+class TestCanFrameWaiterIndex:
+
+    def test_mask_requires_id(self):
+        with pytest.raises(ValueError):
+            CanFrameWaiterIndex().wait_for(BoundedQueue(1), 0, can_mask=0x7FF)
+
+    def test_matching_frame_is_taken_from_queue(self):
+        frames_queue = BoundedQueue(16)
+        waiters = CanFrameWaiterIndex()
+        _put(frames_queue, waiters, [_get_frame(0x100, b"\x01"), _get_frame(0x200, b"\x02"),
+                                     _get_frame(0x200, b"\x03")])
+        frame = waiters.wait_for(frames_queue, 0, can_id=0x200)
+        assert frame.payload == b"\x02"
+        # the other frames stay in the queue in the same order
+        assert [item.payload for item in frames_queue.get_many(10)] == [b"\x01", b"\x03"]
+
+    def test_filters(self):
+        frames_queue = BoundedQueue(16)
+        waiters = CanFrameWaiterIndex()
+        _put(frames_queue, waiters, [_get_frame(0x123, b"\x10\x00"), _get_frame(0x124, b"\x62\xF1\x90"),
+                                     _get_frame(0x7E8, b"\x02\x50"), _get_frame(0x7E9, b"\x03")])
+        assert waiters.wait_for(frames_queue, 0, can_id=0x7E0, can_mask=0x7F0).id == 0x7E8
+        assert waiters.wait_for(frames_queue, 0, payload_prefix=b"\x62\xF1").id == 0x124
+        assert waiters.wait_for(frames_queue, 0, predicate=lambda frame: len(frame.payload) == 1).id == 0x7E9
+        assert waiters.wait_for(frames_queue, 0, can_id=0x123, payload_prefix=b"\x11") is None
+        statistics = waiters.get_statistics()
+        assert statistics['waits'] == 4
+        assert statistics['matched'] == 3
+        assert statistics['timeouts'] == 1
+        assert statistics['pending'] == 0
+
+    @pytest.mark.parametrize("filters", [{'can_id': 0x300}, {'can_id': 0x300, 'can_mask': 0x700},
+                                         {'payload_prefix': b"\xAA"}])
+    def test_waiter_is_woken_by_notify(self, filters: dict):
+        frames_queue = BoundedQueue(16)
+        waiters = CanFrameWaiterIndex()
+        result = {}
+        thread = threading.Thread(target=lambda: result.update(frame=waiters.wait_for(frames_queue, _TIMEOUT,
+                                                                                      **filters)))
+        thread.start()
+        _wait_pending(waiters, 1)
+        # the frame which does not match does not wake up the waiter
+        _put(frames_queue, waiters, [_get_frame(0x400, b"\x00")])
+        assert waiters.get_statistics()['wakeups'] == 0
+        _put(frames_queue, waiters, [_get_frame(0x301, b"\x00"), _get_frame(0x300, b"\xAA")])
+        thread.join(_TIMEOUT)
+        assert result['frame'].id == (0x301 if 'can_mask' in filters else 0x300)
+        assert waiters.get_statistics()['wakeups'] == 1
+        assert frames_queue.qsize() == 2
+
+    def test_several_waiters_of_one_id(self):
+        frames_queue = BoundedQueue(16)
+        waiters = CanFrameWaiterIndex()
+        results = []
+        lock = threading.Lock()
+
+        def wait():
+            frame = waiters.wait_for(frames_queue, _TIMEOUT, can_id=0x10)
+            with lock:
+                results.append(bytes(frame.payload))
+
+        threads = [threading.Thread(target=wait) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        _wait_pending(waiters, 2)
+        _put(frames_queue, waiters, [_get_frame(0x10, b"\x01"), _get_frame(0x10, b"\x02")])
+        for thread in threads:
+            thread.join(_TIMEOUT)
+        # each frame is taken by one waiter only
+        assert sorted(results) == [b"\x01", b"\x02"]
+        assert frames_queue.empty()
@@ -0,0 +1,121 @@
+import threading
+
+import pytest
+
+from comm_support_lib.common.can_frame import CanFrame
+from comm_support_lib.common.can_id_dispatch_table import CanIdDispatchTable
+from comm_support_lib.common.overflow_policy_consts import OverflowPolicyConsts
+
+_TIMEOUT = 5
+# payload of the frame which is dispatched last, the callbacks have got all the frames before it once they get it
+_END = b"end"
+
+
+class Collector:
+    """
+    Callback collecting IDs of the frames until the frames with _END payload
+    """
+
+    def __init__(self):
+        self.ids = []
+        self.__ends = 0
+        self.__condition = threading.Condition()
+
+    def __call__(self, frame: CanFrame):
+        with self.__condition:
+            if frame.payload == _END:
+                self.__ends += 1
+                self.__condition.notify_all()
+            else:
+                self.ids.append(frame.id)
+
+    def wait_ends(self, count: int = 1) -> list:
+        with self.__condition:
+            assert self.__condition.wait_for(lambda: self.__ends >= count, _TIMEOUT)
+            return self.ids
+
+
+def _get_frame(can_id: int, payload: bytes = b"") -> CanFrame:
+    return CanFrame(0.0, can_id, 0, len(payload), payload)
+
+
+class TestCanIdDispatchTable:
+
+    def test_wrong_filters(self):
+        table = CanIdDispatchTable()
+        with pytest.raises(ValueError):
+            table.subscribe(Collector(), can_mask=0x7FF)
+        with pytest.raises(ValueError):
+            table.subscribe(Collector(), id_range=(0x200, 0x100))
+        assert not table.has_subscribers()
+
+    def test_dispatch_many_by_filters(self):
+        table = CanIdDispatchTable(OverflowPolicyConsts.BLOCK, 64)
+        exact = Collector()
+        masked = Collector()
+        ranged = Collector()
+        everything = Collector()
+        assert table.subscribe(exact, can_id=0x100)
+        assert table.subscribe(masked, can_id=0x200, can_mask=0x700)
+        assert table.subscribe(ranged, id_range=(0x180, 0x27F))
+        assert table.subscribe(everything)
+        assert not table.subscribe(exact, can_id=0x101)
+
+        ids = [0x100, 0x101, 0x1FF, 0x200, 0x2FF, 0x300, 0x280]
+        unmatched = table.dispatch_many([_get_frame(can_id) for can_id in ids])
+        assert [frame.id for frame in unmatched] == [0x101, 0x300]
+        # the end frames matching each filter
+        table.dispatch_many([_get_frame(can_id, _END) for can_id in (0x100, 0x2AA, 0x180)])
+
+        assert exact.wait_ends() == [0x100]
+        assert masked.wait_ends() == [0x200, 0x2FF, 0x280]
+        assert ranged.wait_ends() == [0x1FF, 0x200]
+        assert everything.wait_ends(3) == ids
+        table.clear()
+
+    def test_dispatch_single_frame(self):
+        table = CanIdDispatchTable(OverflowPolicyConsts.BLOCK, 64)
+        exact = Collector()
+        table.subscribe(exact, can_id=0x10)
+        assert table.dispatch(0x10, _get_frame(0x10))
+        assert not table.dispatch(0x11, _get_frame(0x11))
+        table.dispatch(0x10, _get_frame(0x10, _END))
+        assert exact.wait_ends() == [0x10]
+        table.clear()
+
+    def test_overlapping_ranges(self):
+        table = CanIdDispatchTable(OverflowPolicyConsts.BLOCK, 64)
+        low = Collector()
+        high = Collector()
+        table.subscribe(low, id_range=(0x10, 0x20))
+        table.subscribe(high, id_range=(0x18, 0x30))
+        unmatched = table.dispatch_many([_get_frame(can_id) for can_id in (0x0F, 0x10, 0x18, 0x20, 0x21, 0x31)])
+        assert [frame.id for frame in unmatched] == [0x0F, 0x31]
+        table.dispatch_many([_get_frame(0x18, _END)])
+        assert low.wait_ends() == [0x10, 0x18, 0x20]
+        assert high.wait_ends() == [0x18, 0x20, 0x21]
+        table.clear()
+
+    def test_unsubscribe_updates_lookup(self):
+        table = CanIdDispatchTable(OverflowPolicyConsts.BLOCK, 64)
+        first = Collector()
+        second = Collector()
+        table.subscribe(first, can_id=0x1)
+        table.subscribe(second, can_id=0x1)
+        # the ID is cached by the lookup
+        assert table.dispatch(0x1, _get_frame(0x1))
+        assert table.unsubscribe(first)
+        assert not table.unsubscribe(first)
+        assert not table.is_subscribed(first)
+        table.dispatch(0x1, _get_frame(0x1, _END))
+        assert second.wait_ends() == [0x1]
+        table.unsubscribe(second)
+        assert not table.dispatch(0x1, _get_frame(0x1))
+        assert not table.has_subscribers()
+
+    def test_statistics_keys_are_unique(self):
+        table = CanIdDispatchTable()
+        table.subscribe(Collector(), can_id=0x1)
+        table.subscribe(Collector(), can_id=0x2)
+        assert len(table.get_statistics()) == 2
+        table.clear()
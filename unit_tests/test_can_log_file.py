@@ -0,0 +1,128 @@
+import os
+
+import pytest
+
+from comm_support_lib.common.can_frame import CanFrame
+from comm_support_lib.common.can_frame_flag_consts import CanFrameFlagConsts
+from comm_support_lib.common.can_log_file import CanLogReader, CanLogWriter, INDEX_SUFFIX
+from comm_support_lib.common.capture_direction_consts import CaptureDirectionConsts
+
+_RX = CaptureDirectionConsts.DIRECTION_RX
+_TX = CaptureDirectionConsts.DIRECTION_TX
+
+
+def _get_frames(count: int) -> list:
+    return [CanFrame(100.0 + index, 0x100 + index % 4, CanFrameFlagConsts.EXTENDED_ID if index % 2 else 0,
+                     index % 9, bytes([index]) * (index % 9)) for index in range(count)]
+
+
+def _write_log(path: str, chunk_frames: int = 3) -> list:
+    """
+    Write 10 frames, the even ones received, the odd ones sent
+        Returns:
+            records (list): written (direction, frame) pairs
+    """
+    frames = _get_frames(10)
+    writer = CanLogWriter(path, chunk_frames=chunk_frames)
+    for index, frame in enumerate(frames):
+        writer.write_frames(_TX if index % 2 else _RX, [frame])
+    writer.close()
+    return [(_TX if index % 2 else _RX, frame) for index, frame in enumerate(frames)]
+
+
+def _get_tuples(records) -> list:
+    return [(direction, frame.timestamp, frame.id, frame.flags, frame.dlc, bytes(frame.payload))
+            for direction, frame in records]
+
+
+class TestCanLogFile:
+
+    def test_round_trip(self, tmp_path):
+        path = str(tmp_path / "can.log")
+        records = _write_log(path)
+        reader = CanLogReader(path)
+        assert _get_tuples(reader.read()) == _get_tuples(records)
+        assert reader.get_frame_count() == 10
+        assert reader.get_ids() == [0x100, 0x101, 0x102, 0x103]
+        assert reader.get_time_range() == (100.0, 109.0)
+        reader.close()
+        with open(path + INDEX_SUFFIX) as index_file:
+            assert len(index_file.readlines()) == 4
+
+    def test_writer_statistics(self, tmp_path):
+        path = str(tmp_path / "can.log")
+        writer = CanLogWriter(path, chunk_frames=4)
+        writer.write_frames(_RX, _get_frames(10))
+        writer.close()
+        statistics = writer.get_statistics()
+        assert statistics['frames'] == 10
+        assert statistics['chunks'] == 3
+        assert statistics['pending'] == 0
+        assert statistics['size_bytes'] == os.path.getsize(path)
+        # frames written after close are ignored
+        writer.write_frames(_RX, _get_frames(1))
+        assert writer.get_statistics()['frames'] == 10
+
+    def test_read_filters(self, tmp_path):
+        path = str(tmp_path / "can.log")
+        records = _write_log(path)
+        reader = CanLogReader(path)
+        assert _get_tuples(reader.read(start_time=103.0, end_time=105.0)) == _get_tuples(records[3:6])
+        assert _get_tuples(reader.read(ids=[0x101])) == _get_tuples(records[1::4])
+        assert _get_tuples(reader.read(direction=_TX)) == _get_tuples(records[1::2])
+        assert list(reader.read(start_time=200.0)) == []
+        reader.close()
+
+    def test_lost_index(self, tmp_path):
+        path = str(tmp_path / "can.log")
+        records = _write_log(path)
+        os.remove(path + INDEX_SUFFIX)
+        reader = CanLogReader(path)
+        assert _get_tuples(reader.read(ids=[0x102])) == _get_tuples(records[2::4])
+        assert reader.get_frame_count() == 10
+        reader.close()
+
+    def test_partially_written_index(self, tmp_path):
+        path = str(tmp_path / "can.log")
+        records = _write_log(path)
+        with open(path + INDEX_SUFFIX) as index_file:
+            lines = index_file.readlines()
+        with open(path + INDEX_SUFFIX, "w") as index_file:
+            index_file.write(lines[0] + lines[1][:10])
+        reader = CanLogReader(path)
+        assert _get_tuples(reader.read()) == _get_tuples(records)
+        reader.close()
+
+    def test_truncated_log(self, tmp_path):
+        path = str(tmp_path / "can.log")
+        records = _write_log(path)
+        os.remove(path + INDEX_SUFFIX)
+        with open(path, "r+b") as file:
+            file.truncate(os.path.getsize(path) - 1)
+        reader = CanLogReader(path)
+        # the last chunk with the 10th frame is not complete
+        assert _get_tuples(reader.read()) == _get_tuples(records[:9])
+        reader.close()
+
+    def test_empty_log(self, tmp_path):
+        path = str(tmp_path / "can.log")
+        CanLogWriter(path).close()
+        reader = CanLogReader(path)
+        assert reader.get_time_range() is None
+        assert reader.get_ids() == []
+        assert list(reader.read()) == []
+        reader.close()
+
+    @pytest.mark.parametrize("content", [b"CAN", b"XXXX" + bytes(10)])
+    def test_wrong_file(self, tmp_path, content: bytes):
+        path = tmp_path / "can.log"
+        path.write_bytes(content)
+        with pytest.raises(ValueError):
+            CanLogReader(str(path))
+
+    def test_missing_directory(self, tmp_path):
+        path = str(tmp_path / "missing" / "can.log")
+        with pytest.raises(OSError):
+            CanLogWriter(path)
+        with pytest.raises(OSError):
+            CanLogReader(path)
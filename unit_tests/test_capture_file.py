@@ -0,0 +1,68 @@
+import pytest
+
+from comm_support_lib.common.capture_direction_consts import CaptureDirectionConsts
+from comm_support_lib.common.capture_file import CaptureReader, CaptureWriter
+
+
+def _get_records(path: str) -> list:
+    reader = CaptureReader(path)
+    records = [(record.timestamp, record.direction, record.data) for record in reader]
+    reader.close()
+    return records
+
+
+class TestCaptureFile:
+
+    def test_round_trip(self, tmp_path):
+        path = str(tmp_path / "capture.bin")
+        writer = CaptureWriter(path)
+        writer.write(CaptureDirectionConsts.DIRECTION_TX, b"command\n", 1.5)
+        writer.write(CaptureDirectionConsts.DIRECTION_RX, memoryview(b"response"), 2.5)
+        writer.write(CaptureDirectionConsts.DIRECTION_RX, b"", 3.0)
+        writer.close()
+        assert _get_records(path) == [(1.5, CaptureDirectionConsts.DIRECTION_TX, b"command\n"),
+                                      (2.5, CaptureDirectionConsts.DIRECTION_RX, b"response"),
+                                      (3.0, CaptureDirectionConsts.DIRECTION_RX, b"")]
+        # the file is truncated to the written size
+        assert (tmp_path / "capture.bin").stat().st_size == writer.size_bytes
+
+    def test_file_grows(self, tmp_path):
+        path = str(tmp_path / "capture.bin")
+        writer = CaptureWriter(path, grow_bytes=64)
+        chunks = [bytes([index]) * 50 for index in range(20)]
+        for index, chunk in enumerate(chunks):
+            writer.write(CaptureDirectionConsts.DIRECTION_RX, chunk, float(index))
+        writer.close()
+        assert [record[2] for record in _get_records(path)] == chunks
+
+    def test_writes_after_close_are_ignored(self, tmp_path):
+        path = str(tmp_path / "capture.bin")
+        writer = CaptureWriter(path)
+        writer.close()
+        writer.write(CaptureDirectionConsts.DIRECTION_RX, b"late", 1.0)
+        writer.close()
+        assert _get_records(path) == []
+
+    def test_file_which_was_not_closed(self, tmp_path):
+        path = str(tmp_path / "capture.bin")
+        writer = CaptureWriter(path, grow_bytes=4096)
+        writer.write(CaptureDirectionConsts.DIRECTION_RX, b"before crash", 1.0)
+        writer.flush()
+        # the zero filled tail of the file is not taken as records
+        assert _get_records(path) == [(1.0, CaptureDirectionConsts.DIRECTION_RX, b"before crash")]
+        writer.close()
+
+    def test_start_time(self, tmp_path):
+        path = str(tmp_path / "capture.bin")
+        CaptureWriter(path).close()
+        reader = CaptureReader(path)
+        assert reader.start_time > 0
+        assert reader.start_monotonic > 0
+        reader.close()
+
+    @pytest.mark.parametrize("content", [b"", b"SCAP", b"XXXX" + bytes(100)])
+    def test_wrong_file(self, tmp_path, content: bytes):
+        path = tmp_path / "capture.bin"
+        path.write_bytes(content)
+        with pytest.raises(ValueError):
+            CaptureReader(str(path))
@@ -0,0 +1,103 @@
+import pytest
+
+from comm_support_lib.common.framers import DelimiterFramer, LengthPrefixFramer, ModbusRtuFramer
+
+
+def _get_data(frames: list) -> list:
+    return [frame.data for frame in frames]
+
+
+class TestDelimiterFramer:
+
+    def test_empty_delimiter(self):
+        with pytest.raises(ValueError):
+            DelimiterFramer(b"")
+
+    def test_several_frames_in_chunk(self):
+        framer = DelimiterFramer(b"\n")
+        frames = framer.feed(b"one\ntwo\nthr", 1.0)
+        assert _get_data(frames) == [b"one", b"two"]
+        assert frames[0].timestamp == 1.0
+        assert framer.has_pending_data()
+        assert _get_data(framer.feed(b"ee\n", 2.0)) == [b"three"]
+        assert not framer.has_pending_data()
+
+    def test_delimiter_split_across_chunks(self):
+        framer = DelimiterFramer(b"\r\n")
+        assert framer.feed(b"abc\r", 1.0) == []
+        assert _get_data(framer.feed(b"\ndef\r", 2.0)) == [b"abc"]
+        assert _get_data(framer.feed(b"\n", 3.0)) == [b"def"]
+
+    def test_delimiter_split_byte_by_byte(self):
+        framer = DelimiterFramer(b"END", include_delimiter=True)
+        frames = []
+        for byte in b"xEyENDzEN":
+            frames += framer.feed(bytes((byte,)), 0.0)
+        frames += framer.feed(b"D", 0.0)
+        assert _get_data(frames) == [b"xEyEND", b"zEND"]
+
+    def test_empty_frames_are_skipped(self):
+        framer = DelimiterFramer(b"\n")
+        assert _get_data(framer.feed(b"\n\na\n\n", 0.0)) == [b"a"]
+
+    def test_max_size(self):
+        framer = DelimiterFramer(b"\n", max_size=4)
+        assert _get_data(framer.feed(b"0123456789", 0.0)) == [b"0123", b"4567"]
+        assert _get_data(framer.feed(b"\n", 0.0)) == [b"89"]
+
+    def test_reset(self):
+        framer = DelimiterFramer(b"\n")
+        framer.feed(b"partial", 0.0)
+        framer.reset()
+        assert _get_data(framer.feed(b"new\n", 0.0)) == [b"new"]
+
+
+class TestLengthPrefixFramer:
+
+    def test_frames_split_across_chunks(self):
+        framer = LengthPrefixFramer()
+        assert _get_data(framer.feed(b"\x03abc\x02d", 0.0)) == [b"abc"]
+        assert _get_data(framer.feed(b"e\x00\x01", 0.0)) == [b"de", b""]
+        assert _get_data(framer.feed(b"f", 0.0)) == [b"f"]
+
+    def test_prefix_split_across_chunks(self):
+        framer = LengthPrefixFramer(prefix_size=2, byteorder="little", include_prefix=True)
+        assert framer.feed(b"\x02", 0.0) == []
+        assert framer.feed(b"\x00a", 0.0) == []
+        assert _get_data(framer.feed(b"b", 0.0)) == [b"\x02\x00ab"]
+
+    def test_too_long_frame_drops_data(self):
+        framer = LengthPrefixFramer(max_size=4)
+        assert framer.feed(b"\x05abcde", 0.0) == []
+        assert not framer.has_pending_data()
+        assert _get_data(framer.feed(b"\x01z", 0.0)) == [b"z"]
+
+
+class TestModbusRtuFramer:
+
+    def test_idle_timeout(self):
+        assert ModbusRtuFramer(9600).get_idle_timeout() == pytest.approx(3.5 * 11 / 9600)
+        assert ModbusRtuFramer(115200).get_idle_timeout() == 0.00175
+        assert ModbusRtuFramer().get_idle_timeout() is None
+
+    def test_flush_terminates_frame(self):
+        framer = ModbusRtuFramer(115200)
+        assert framer.feed(b"\x01\x03", 1.0) == []
+        assert framer.feed(b"\x00\x10", 1.0001) == []
+        frames = framer.flush(1.0001)
+        assert _get_data(frames) == [b"\x01\x03\x00\x10"]
+        assert frames[0].timestamp == 1.0001
+        assert framer.flush(2.0) == []
+
+    def test_gap_detected_by_feed(self):
+        framer = ModbusRtuFramer(115200)
+        framer.feed(b"\x01\x02", 1.0)
+        frames = framer.feed(b"\x03", 1.01)
+        assert _get_data(frames) == [b"\x01\x02"]
+        assert frames[0].timestamp == 1.0
+        assert _get_data(framer.flush(1.01)) == [b"\x03"]
+
+    def test_max_size(self):
+        framer = ModbusRtuFramer(115200, max_size=3)
+        assert _get_data(framer.feed(b"abcdefg", 1.0)) == [b"abc", b"def"]
+        assert _get_data(framer.flush(1.0)) == [b"g"]
@@ -0,0 +1,132 @@
+import itertools
+
+import pytest
+
+from comm_support_lib.comm_interfaces.can_socket import CAN
+from comm_support_lib.comm_interfaces.iso_tp import IsoTp
+from comm_support_lib.common.can_interface_type_consts import CanInterfaceTypeConsts
+
+_RATE = 500000
+_MSG_TIMEOUT = 0.01
+_TIMEOUT = 5
+_TX_ID = 0x7E0
+_RX_ID = 0x7E8
+_channels = itertools.count()
+
+
+@pytest.fixture
+def bus():
+    """
+    Returns a function creating CAN interfaces on a virtual bus of the test, so the tests do not see the frames of
+    each other
+    """
+    channel = "iso_tp_unit_test_{}".format(next(_channels))
+    return lambda: CAN(_RATE, channel, _MSG_TIMEOUT, interface_type=CanInterfaceTypeConsts.VIRTUAL)
+
+
+def _get_endpoints(bus, **kwargs) -> tuple:
+    client = IsoTp(bus(), _TX_ID, _RX_ID, **kwargs)
+    server = IsoTp(bus(), _RX_ID, _TX_ID, **kwargs)
+    return client, server
+
+
+def _get_frames(monitor: CAN, count: int) -> list:
+    frames = monitor.get_messages(count, _TIMEOUT)
+    return [(frame.id, bytes(frame.payload)) for frame in frames]
+
+
+class TestIsoTp:
+
+    def test_wrong_arguments(self, bus):
+        with pytest.raises(ValueError):
+            IsoTp(bus(), _TX_ID, _RX_ID, block_size=256)
+        with pytest.raises(ValueError):
+            IsoTp(bus(), _TX_ID, _RX_ID, st_min=0.2)
+        with pytest.raises(ValueError):
+            IsoTp(bus(), _TX_ID, _RX_ID, padding=0x100)
+
+    def test_single_frame(self, bus):
+        client, server = _get_endpoints(bus)
+        assert client.send_message(b"\x22\xF1\x90")
+        assert server.get_message(_TIMEOUT) == b"\x22\xF1\x90"
+        assert server.get_statistics()['bytes_received'] == 3
+        client.close()
+        server.close()
+
+    @pytest.mark.parametrize("size", [7, 8, 62, 4095, 4096])
+    @pytest.mark.parametrize("block_size", [0, 1, 8])
+    def test_segmented_message(self, bus, size: int, block_size: int):
+        client, server = _get_endpoints(bus, block_size=block_size)
+        data = bytes(index & 0xFF for index in range(size))
+        assert client.send_message(data)
+        assert server.get_message(_TIMEOUT) == data
+        client_statistics = client.get_statistics()
+        server_statistics = server.get_statistics()
+        assert client_statistics['messages_sent'] == 1
+        assert server_statistics['messages_received'] == 1
+        assert server_statistics['errors'] == 0
+        # one flow control after the first frame and one after each block of consecutive frames but the last
+        if size >= 8:
+            frames = client_statistics['frames_sent']
+            assert server_statistics['flow_control_sent'] == \
+                (1 if block_size == 0 else 1 + (frames - 2) // block_size)
+        client.close()
+        server.close()
+
+    def test_frames_on_the_bus(self, bus):
+        monitor = bus()
+        client, server = _get_endpoints(bus, block_size=2, padding=0xCC)
+        assert client.send_message(bytes(range(20)))
+        assert server.get_message(_TIMEOUT) == bytes(range(20))
+        assert _get_frames(monitor, 4) == [
+            (_TX_ID, b"\x10\x14\x00\x01\x02\x03\x04\x05"),
+            (_RX_ID, b"\x30\x02\x00\xCC\xCC\xCC\xCC\xCC"),
+            (_TX_ID, b"\x21\x06\x07\x08\x09\x0A\x0B\x0C"),
+            # the message is complete, so no flow control is sent after the second block
+            (_TX_ID, b"\x22\x0D\x0E\x0F\x10\x11\x12\x13")]
+        client.close()
+        server.close()
+
+    def test_both_directions(self, bus):
+        client, server = _get_endpoints(bus, block_size=4)
+        request = bytes(100)
+        response = bytes(range(200))
+        assert client.send_message(request)
+        assert server.get_message(_TIMEOUT) == request
+        assert server.send_message(response)
+        assert client.get_message(_TIMEOUT) == response
+        client.close()
+        server.close()
+
+    def test_no_peer(self, bus):
+        client = IsoTp(bus(), _TX_ID, _RX_ID, timeout=0.1)
+        assert not client.send_message(bytes(20))
+        statistics = client.get_statistics()
+        assert statistics['timeouts'] == 1
+        assert statistics['errors'] == 1
+        client.close()
+
+    def test_consecutive_frame_timeout(self, bus):
+        peer = bus()
+        server = IsoTp(bus(), _RX_ID, _TX_ID, timeout=0.1)
+        # the first frame of 32 byte message without consecutive frames
+        peer.send_message(_TX_ID, b"\x10\x20\x00\x01\x02\x03\x04\x05")
+        assert server.get_message(0.3) is None
+        statistics = server.get_statistics()
+        assert statistics['timeouts'] == 1
+        assert statistics['errors'] == 1
+        server.close()
+
+    @pytest.mark.parametrize("first_frame", [b"\x10\x07\x00\x01\x02\x03\x04\x05", b"\x10\x00\x00\x00",
+                                             b"\x10\x00\x00\x00\x0F\xFF\x00\x01", b"\x10"])
+    def test_wrong_first_frame(self, bus, first_frame: bytes):
+        peer = bus()
+        server = IsoTp(bus(), _RX_ID, _TX_ID)
+        peer.send_message(_TX_ID, first_frame)
+        # the valid single frame is received after the wrong first frame is processed
+        peer.send_message(_TX_ID, b"\x01\xAA")
+        assert server.get_message(_TIMEOUT) == b"\xAA"
+        statistics = server.get_statistics()
+        assert statistics['flow_control_sent'] == 0
+        assert statistics['errors'] == 1
+        server.close()
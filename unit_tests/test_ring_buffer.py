@@ -0,0 +1,97 @@
+import pytest
+
+from comm_support_lib.common.ring_buffer import RingBuffer
+
+
+class TestRingBuffer:
+
+    @staticmethod
+    def __put(buffer: RingBuffer, record: bytes) -> bool:
+        view = buffer.reserve(len(record))
+        if view is None:
+            return False
+        view[:] = record
+        buffer.commit(len(record))
+        return True
+
+    def test_records_are_returned_in_order(self):
+        buffer = RingBuffer(64)
+        for record in (b"one", b"two", b"three"):
+            assert self.__put(buffer, record)
+        assert len(buffer) == 3
+        assert buffer.used_bytes == 11
+        assert [buffer.pop() for _ in range(3)] == [b"one", b"two", b"three"]
+        assert buffer.pop() is None
+        assert buffer.used_bytes == 0
+
+    def test_commit_of_shorter_record(self):
+        buffer = RingBuffer(16)
+        view = buffer.reserve(16)
+        view[:4] = b"data"
+        buffer.commit(4)
+        assert buffer.used_bytes == 4
+        # the rest of the reservation is free again
+        assert self.__put(buffer, bytes(12))
+        assert buffer.pop() == b"data"
+
+    def test_commit_without_reservation(self):
+        with pytest.raises(ValueError):
+            RingBuffer(16).commit(1)
+
+    def test_full_buffer(self):
+        buffer = RingBuffer(10)
+        assert self.__put(buffer, b"12345")
+        assert self.__put(buffer, b"67890")
+        assert buffer.reserve(1) is None
+        buffer.release()
+        assert buffer.reserve(5) is not None
+
+    def test_wrap_around(self):
+        buffer = RingBuffer(10)
+        assert self.__put(buffer, b"aaaa")
+        assert self.__put(buffer, b"bbbb")
+        buffer.release()
+        # 2 bytes are free at the end, so the record is placed at the beginning
+        assert self.__put(buffer, b"cccc")
+        # the writer has caught up with the reader
+        assert buffer.reserve(1) is None
+        assert buffer.pop() == b"bbbb"
+        assert self.__put(buffer, b"dddd")
+        assert [buffer.pop() for _ in range(2)] == [b"cccc", b"dddd"]
+        assert len(buffer) == 0
+
+    def test_records_never_wrap(self):
+        buffer = RingBuffer(10)
+        assert self.__put(buffer, b"aaa")
+        assert self.__put(buffer, b"bbb")
+        buffer.release()
+        # 4 bytes are free at the end and 3 bytes at the beginning: no contiguous region of 5 bytes
+        assert buffer.reserve(5) is None
+        assert self.__put(buffer, b"cccc")
+        assert [buffer.pop() for _ in range(2)] == [b"bbb", b"cccc"]
+
+    def test_peek_and_release(self):
+        buffer = RingBuffer(16)
+        self.__put(buffer, b"first")
+        self.__put(buffer, b"second")
+        view = buffer.peek()
+        assert view.readonly
+        assert view == b"first"
+        view.release()
+        buffer.release()
+        assert buffer.peek() == b"second"
+        buffer.release()
+        assert buffer.peek() is None
+        # release of the empty buffer does nothing
+        buffer.release()
+
+    def test_clear_keeps_reservation(self):
+        buffer = RingBuffer(16)
+        self.__put(buffer, b"old")
+        view = buffer.reserve(4)
+        view[:] = b"new!"
+        buffer.clear()
+        assert len(buffer) == 0
+        assert buffer.used_bytes == 0
+        buffer.commit(4)
+        assert buffer.pop() == b"new!"
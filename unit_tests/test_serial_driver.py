@@ -0,0 +1,61 @@
+import os
+import time
+
+import pytest
+
+from benchmarks.common.pty_port import PtyPort
+from comm_support_lib.common.framers import ModbusRtuFramer
+from comm_support_lib.common.serial_read_mode_consts import SerialReadModeConsts
+from comm_support_lib.hw_drivers.serial_driver import SerialDriver
+from comm_support_lib.hw_drivers.serial_reactor import SerialReactor
+
+_TIMEOUT = 5
+# silent interval of Modbus RTU is 32 ms at 1200 baud, the auto inter-char timeout is 133 ms
+_BAUD_RATE = 1200
+_FRAME_GAP = 0.07
+
+pytestmark = pytest.mark.skipif(not hasattr(os, "openpty"), reason="pseudo terminals are not available")
+
+
+@pytest.fixture
+def pty_port():
+    port = PtyPort()
+    yield port
+    port.close()
+
+
+@pytest.fixture
+def polling(monkeypatch):
+    """
+    Makes the driver read the port by the polling thread, as it does for the ports without selectable descriptor
+    """
+    monkeypatch.setattr(SerialReactor, "is_supported", staticmethod(lambda fileobj: False))
+
+
+class TestSerialDriverPolling:
+
+    @pytest.mark.parametrize("read_mode", [SerialReadModeConsts.BULK, SerialReadModeConsts.LOW_LATENCY])
+    def test_rtu_frames_split_by_silent_interval(self, pty_port, polling, read_mode: str):
+        driver = SerialDriver(pty_port.port, _BAUD_RATE, SerialReadModeConsts.TIMEOUT_AUTO,
+                              SerialReadModeConsts.TIMEOUT_AUTO, read_mode=read_mode)
+        driver.set_framer(ModbusRtuFramer())
+        frames = [b"\x01\x03\x00\x00\x00\x02\xC4\x0B", b"\x01\x03\x04\x00\x01\x00\x02\x2A\x32",
+                  b"\x01\x06\x00\x01\x00\x03\x98\x0B"]
+        for frame in frames:
+            assert pty_port.write(frame, time.monotonic() + _TIMEOUT)
+            # longer than the silent interval, but shorter than the inter-char timeout
+            time.sleep(_FRAME_GAP)
+        assert [driver.get_message(_TIMEOUT) for _ in frames] == frames
+        del driver
+
+    def test_framer_removed(self, pty_port, polling):
+        driver = SerialDriver(pty_port.port, _BAUD_RATE, SerialReadModeConsts.TIMEOUT_AUTO,
+                              SerialReadModeConsts.TIMEOUT_AUTO)
+        driver.set_framer(ModbusRtuFramer())
+        driver.set_framer(None)
+        # without the framer the inter-char timeout delimits the messages again
+        for chunk in (b"abc", b"def"):
+            assert pty_port.write(chunk, time.monotonic() + _TIMEOUT)
+            time.sleep(_FRAME_GAP)
+        assert driver.get_message(_TIMEOUT) == b"abcdef"
+        del driver
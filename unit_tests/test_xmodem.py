@@ -0,0 +1,138 @@
+import threading
+
+import pytest
+
+from comm_support_lib.comm_interfaces.xmodem import XmodemReceiver, XmodemSender
+from comm_support_lib.common.serial_base_interface import SerialBaseInterface
+from comm_support_lib.common.xmodem_protocol_consts import XmodemProtocolConsts
+
+_PAD = 0x1A
+_TIMEOUT = 5
+
+
+class LoopbackPort(SerialBaseInterface):
+    """
+    One end of the in-memory serial link. The data sent to the port without the registered callback is kept until a
+    callback is registered, as in the receive buffer of the port.
+    """
+
+    def __init__(self, corrupted_packet: int = None):
+        """
+        :param corrupted_packet: index of the sent message which has its last byte inverted, None means no corruption.
+        """
+        self.peer = None
+        self.__corrupted_packet = corrupted_packet
+        self.__sent = 0
+        self.__callbacks = []
+        self.__pending = []
+        self.__lock = threading.Lock()
+
+    def send_message(self, msg):
+        msg = bytearray(msg)
+        if self.__sent == self.__corrupted_packet:
+            msg[-1] ^= 0xFF
+        self.__sent += 1
+        self.peer.receive(bytes(msg))
+
+    def receive(self, msg: bytes):
+        with self.__lock:
+            callbacks = list(self.__callbacks)
+            if not callbacks:
+                self.__pending.append(msg)
+        for callback in callbacks:
+            callback(msg)
+
+    def get_message(self, timeout: float):
+        return None
+
+    def register_message_callback(self, callback, policy: str = None, capacity: int = None):
+        with self.__lock:
+            self.__callbacks.append(callback)
+            pending = self.__pending
+            self.__pending = []
+        for msg in pending:
+            callback(msg)
+
+    def unregister_message_callback(self, callback):
+        with self.__lock:
+            self.__callbacks.remove(callback)
+
+    def get_parameters(self):
+        return {}
+
+    def flush_incoming_data(self):
+        pass
+
+    def clear_callback_list(self):
+        with self.__lock:
+            self.__callbacks.clear()
+
+    def update_port_config(self, baud_rate: int, parity: str, stopbits: int):
+        pass
+
+
+def _get_link(corrupted_packet: int = None) -> tuple:
+    sender_port = LoopbackPort(corrupted_packet)
+    receiver_port = LoopbackPort()
+    sender_port.peer = receiver_port
+    receiver_port.peer = sender_port
+    return sender_port, receiver_port
+
+
+def _transfer(sender: XmodemSender, receiver: XmodemReceiver, data: bytes, name: str = "image.bin") -> tuple:
+    result = {}
+    thread = threading.Thread(target=lambda: result.update(data=receiver.receive(_TIMEOUT)))
+    thread.start()
+    sent = sender.send(data, name)
+    thread.join(_TIMEOUT)
+    return sent, result.get('data')
+
+
+class TestXmodem:
+
+    def test_wrong_protocol(self):
+        sender_port, receiver_port = _get_link()
+        with pytest.raises(ValueError):
+            XmodemSender(sender_port, "zmodem")
+        with pytest.raises(ValueError):
+            XmodemReceiver(receiver_port, "zmodem")
+
+    @pytest.mark.parametrize("size", [1, 128, 1024, 3000])
+    def test_ymodem_round_trip(self, size: int):
+        sender_port, receiver_port = _get_link()
+        sender = XmodemSender(sender_port, XmodemProtocolConsts.YMODEM)
+        receiver = XmodemReceiver(receiver_port, XmodemProtocolConsts.YMODEM)
+        data = bytes(index & 0xFF for index in range(size))
+        assert _transfer(sender, receiver, data) == (True, data)
+        assert receiver.get_file_name() == "image.bin"
+        statistics = sender.get_statistics()
+        assert statistics['bytes'] == size
+        # header, data blocks and the empty header finishing the batch
+        assert statistics['blocks'] == (size + 1023) // 1024 + 2
+        assert statistics['retransmissions'] == 0
+
+    def test_xmodem_round_trip_keeps_padding(self):
+        sender_port, receiver_port = _get_link()
+        sender = XmodemSender(sender_port, XmodemProtocolConsts.XMODEM)
+        receiver = XmodemReceiver(receiver_port, XmodemProtocolConsts.XMODEM)
+        data = bytes(range(200))
+        sent, received = _transfer(sender, receiver, data)
+        assert sent
+        # the last 1K block is padded
+        assert received == data + bytes((_PAD,)) * (1024 - len(data))
+        assert receiver.get_statistics()['blocks'] == 1
+
+    def test_corrupted_block_is_retransmitted(self):
+        # the packets sent by XMODEM sender are the data blocks and EOT, the first block is corrupted
+        sender_port, receiver_port = _get_link(corrupted_packet=0)
+        sender = XmodemSender(sender_port, XmodemProtocolConsts.XMODEM)
+        receiver = XmodemReceiver(receiver_port, XmodemProtocolConsts.XMODEM)
+        data = bytes(2048)
+        assert _transfer(sender, receiver, data) == (True, data)
+        assert sender.get_statistics()['retransmissions'] == 1
+        assert receiver.get_statistics()['retransmissions'] == 1
+
+    def test_no_receiver(self):
+        sender_port, _ = _get_link()
+        sender = XmodemSender(sender_port, XmodemProtocolConsts.YMODEM, start_timeout=0.1)
+        assert not sender.send(b"data")
@@ -6,6 +6,8 @@ import time
 from re import Pattern
 
 from comm_support_lib.comm_interfaces.debug_cli import DebugCLI
+from comm_support_lib.comm_interfaces.xmodem import XmodemSender
+from comm_support_lib.common.xmodem_protocol_consts import XmodemProtocolConsts
 from utils.common.cli_command_consts import CliCommandConsts
 from utils.common.cli_regex_consts import CliRegexConsts
 from utils.config import config as utils_config
@@ -21,6 +23,9 @@ class CliCommonUtil:
     __WAIT_AFTER_ENTER_UBOOT = 2
     __GET_MESSAGE_WAIT = 5
     __COMMAND_RESPONSE_TIMEOUT = 30
+    # U-Boot command receiving the file by each protocol
+    __LOAD_COMMANDS = {XmodemProtocolConsts.YMODEM: CliCommandConsts.COMMAND_LOADY,
+                       XmodemProtocolConsts.XMODEM: CliCommandConsts.COMMAND_LOADX}
 
     """
     Boot device eMMC
@@ -145,6 +150,7 @@ class CliCommonUtil:
         """
         self.__login = login
         self.__password = password
+        self.__upload_statistics = None
 
         self.__cli = cli
 
@@ -314,6 +320,60 @@ class CliCommonUtil:
 
         return True
 
+    def upload_file(self, path: str, address: int, protocol: str = XmodemProtocolConsts.YMODEM) -> bool:
+        """
+        Uploads the file into the memory of WB Common UI board by U-Boot "loady" or "loadx" command over the debug
+        console. The board should be switched to the bootloader mode before, see switch_to_bootloader().
+        :param path: path to the file on the test Host PC.
+        :param address: memory address the file should be loaded to.
+        :param protocol: XmodemProtocolConsts.YMODEM for "loady", XmodemProtocolConsts.XMODEM for "loadx".
+        :return: True on success, otherwise – False. Transfer counters could be got by get_upload_statistics().
+        """
+        command = self.__LOAD_COMMANDS.get(protocol)
+        if command is None:
+            print("upload_file() failed. Wrong protocol passed: {}".format(protocol), file=sys.stderr)
+            return False
+
+        with self.__util_lock:
+            if not self.__perform_command(CliCommandConsts.COMMAND_EMPTY, self.__COMMAND_RESPONSE_TIMEOUT,
+                                          CliRegexConsts.REGEX_UBOOT_CLI):
+                print("upload_file() failed. Maybe is not in bootloader mode", file=sys.stderr)
+                return False
+
+            if not self.__perform_command(command + hex(address), self.__COMMAND_RESPONSE_TIMEOUT,
+                                          CliRegexConsts.REGEX_UBOOT_READY_FOR_BINARY):
+                print("upload_file() no response after " + command.strip(), file=sys.stderr)
+                return False
+
+            sender = None
+
+            def transfer(bus):
+                nonlocal sender
+                sender = XmodemSender(bus, protocol)
+                return sender.send_file(path)
+
+            result = self.__cli.run_binary_transfer(transfer)
+            self.__upload_statistics = sender.get_statistics() if sender is not None else None
+            if not result:
+                print("upload_file() failed. File transfer error", file=sys.stderr)
+                return False
+
+            if not self.__perform_command(CliCommandConsts.COMMAND_EMPTY, self.__COMMAND_RESPONSE_TIMEOUT,
+                                          CliRegexConsts.REGEX_UBOOT_CLI):
+                print("upload_file() no response after the file transfer", file=sys.stderr)
+                return False
+            print("upload_file() successful. {bytes} bytes in {elapsed:.1f} s, {throughput:.0f} bytes/s".format(
+                **self.__upload_statistics))
+            return True
+
+    def get_upload_statistics(self) -> dict or None:
+        """
+        Returns counters of the last upload_file() transfer.
+        :return: Dictionary {‘bytes’, ‘blocks’, ‘retransmissions’, ‘timeouts’, ‘elapsed’, ‘throughput’}, None if
+        no file has been uploaded.
+        """
+        return self.__upload_statistics
+
     def switch_to_normal_mode(self, timeout: float = CLI_COMMON_NORMAL_MODE_TIMEOUT) -> bool:
         """
         Performs switching WB Common UI board to normal mode from bootloader. Waits for according response from the
@@ -5,6 +5,8 @@ class CliCommandConsts:
     COMMAND_RESET: str = "reset"
     COMMAND_BOOT: str = "boot"
     COMMAND_BOOT_FROM_EMMC: str = "bmode emmc"
+    COMMAND_LOADX: str = "loadx "
+    COMMAND_LOADY: str = "loady "
     COMMAND_KILL: str = "kill "
     COMMAND_CTRL_C: str = "\x03"
     COMMAND_DBUS_SIGNAL: str = "dbus-monitor --system \"sender=org.welbilt.firmwaremanager, path=/instance, member=\" &"
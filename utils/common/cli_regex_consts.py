@@ -10,6 +10,7 @@ class CliRegexConsts:
     REGEX_STOP_AUTOBOOT: Pattern = re.compile(
         r"U-Boot \d{4}\.\d{2}-Welbilt\+\w+ \(\w{3} \d{2} \d{4} - \d\d:\d\d:\d\d .\d+\)")
     REGEX_UBOOT_CLI: Pattern = re.compile(r"=>")
+    REGEX_UBOOT_READY_FOR_BINARY: Pattern = re.compile(r"## Ready for binary \([xy]modem\) download")
     REGEX_SIGNAL_SUBSCR_RESULT: Pattern = re.compile(r"\[\d+] \d+")
     REGEX_DBUS_MONITOR_PROCESS: Pattern = re.compile(r"\d+$")
     REGEX_DBUS_COMMON_RESULT: Pattern = re.compile(r"(boolean|string) (\".+\"|true|false)")